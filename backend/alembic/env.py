@@ -13,7 +13,10 @@ from dotenv import load_dotenv
 load_dotenv()
 # this is the Alembic Config object
 config = context.config
-config.set_main_option("sqlalchemy.url", os.getenv("DB_URL"))
+# Una conexión pasada en ``config.attributes`` (p. ej. desde las pruebas)
+# tiene prioridad sobre DB_URL
+if "connection" not in config.attributes:
+    config.set_main_option("sqlalchemy.url", os.getenv("DB_URL"))
 # other configurations...
 
 
@@ -33,6 +36,13 @@ def run_migrations_offline() -> None:
 
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=Base.metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -0,0 +1,139 @@
+"""notification dedup keys
+
+Revision ID: 4f1c2a9d7e10
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+import hashlib
+import math
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4f1c2a9d7e10"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+NEW_COLUMNS = [
+    sa.Column("rule_id", sa.Integer(), nullable=True),
+    sa.Column("evc_q_id", sa.Integer(), nullable=True),
+    sa.Column("threshold_bucket", sa.Integer(), nullable=True),
+    sa.Column("fingerprint", sa.String(length=64), nullable=True),
+]
+
+NEW_INDEXES = {
+    "ix_notification_fingerprint_created_at": ["fingerprint", "created_at"],
+    "ix_notification_evc_q_id_created_at": ["evc_q_id", "created_at"],
+}
+
+# Copia congelada de app/services/notification_dedup.py al escribir esta
+# revisión: cambios posteriores en la huella o en el formato de los mensajes
+# no deben cambiar lo que hace la migración.
+PERCENTAGE_BUCKET_SIZE = 10
+_QUARTER_ID_PATTERN = re.compile(r"cuatrimestre \(ID: (\d+)\)")
+_PERCENTAGE_PATTERN = re.compile(
+    r"El EVC '(?P<evc_name>.*)' ha gastado el (?P<percentage>[\d.]+)% "
+    r"de su presupuesto en Q(?P<q>\d+)/(?P<year>\d+)"
+)
+
+
+def notification_fingerprint(rule_id, evc_q_id, threshold_bucket, message=None):
+    parts = [str(rule_id), str(evc_q_id), str(threshold_bucket), ""]
+    if rule_id is None:
+        parts.append(message or "")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def parse_legacy_message(message):
+    match = _QUARTER_ID_PATTERN.search(message or "")
+    if match:
+        return {"evc_q_id": int(match.group(1))}
+    match = _PERCENTAGE_PATTERN.search(message or "")
+    if match:
+        percentage = float(match.group("percentage"))
+        return {
+            "evc_name": match.group("evc_name"),
+            "q": int(match.group("q")),
+            "year": int(match.group("year")),
+            "threshold_bucket": int(math.floor(percentage / PERCENTAGE_BUCKET_SIZE))
+            * PERCENTAGE_BUCKET_SIZE,
+        }
+    return {}
+
+
+def _backfill(bind) -> None:
+    """Calcula evc_q_id, threshold_bucket y fingerprint de las filas antiguas."""
+    quarters = {
+        (row.evc_name, row.q, row.year): row.id
+        for row in bind.execute(
+            sa.text(
+                "SELECT eq.id, eq.q, eq.year, e.name AS evc_name "
+                "FROM evc_q eq JOIN evc e ON eq.evc_id = e.id"
+            )
+        )
+    }
+    rows = bind.execute(
+        sa.text("SELECT id, message FROM notification WHERE fingerprint IS NULL")
+    ).fetchall()
+
+    updates = []
+    for row in rows:
+        keys = parse_legacy_message(row.message)
+        evc_q_id = keys.get("evc_q_id") or quarters.get(
+            (keys.get("evc_name"), keys.get("q"), keys.get("year"))
+        )
+        threshold_bucket = keys.get("threshold_bucket")
+        updates.append(
+            {
+                "id": row.id,
+                "evc_q_id": evc_q_id,
+                "threshold_bucket": threshold_bucket,
+                "fingerprint": notification_fingerprint(
+                    None, evc_q_id, threshold_bucket, message=row.message
+                ),
+            }
+        )
+
+    statement = sa.text(
+        "UPDATE notification SET evc_q_id = :evc_q_id, "
+        "threshold_bucket = :threshold_bucket, fingerprint = :fingerprint "
+        "WHERE id = :id"
+    )
+    for start in range(0, len(updates), BATCH_SIZE):
+        bind.execute(statement, updates[start : start + BATCH_SIZE])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "notification" not in inspector.get_table_names():
+        # La tabla se crea completa más adelante con las columnas nuevas
+        return
+
+    existing_columns = {c["name"] for c in inspector.get_columns("notification")}
+    for column in NEW_COLUMNS:
+        if column.name not in existing_columns:
+            op.add_column("notification", column.copy())
+
+    existing_indexes = {i["name"] for i in inspector.get_indexes("notification")}
+    for name, columns in NEW_INDEXES.items():
+        if name not in existing_indexes:
+            op.create_index(name, "notification", columns, unique=False)
+
+    _backfill(bind)
+
+
+def downgrade() -> None:
+    if "notification" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    for name in NEW_INDEXES:
+        op.drop_index(name, table_name="notification")
+    for column in reversed(NEW_COLUMNS):
+        op.drop_column("notification", column.name)
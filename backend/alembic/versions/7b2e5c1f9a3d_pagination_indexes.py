@@ -0,0 +1,44 @@
+"""pagination indexes
+
+Revision ID: 7b2e5c1f9a3d
+Revises: 4f1c2a9d7e10
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7b2e5c1f9a3d"
+down_revision = "4f1c2a9d7e10"
+branch_labels = None
+depends_on = None
+
+# Índices que sirven el orden por defecto de los listados paginados por cursor
+NEW_INDEXES = {
+    "notification": {
+        "ix_notification_read_created_at_id": ["read", "created_at", "id"],
+    },
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, indexes in NEW_INDEXES.items():
+        if table not in tables:
+            continue
+        existing = {i["name"] for i in inspector.get_indexes(table)}
+        for name, columns in indexes.items():
+            if name not in existing:
+                op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for table, indexes in NEW_INDEXES.items():
+        if table not in tables:
+            continue
+        for name in indexes:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,327 @@
+"""create missing tables
+
+Revision ID: 9c4d2e7a1b58
+Revises: 7b2e5c1f9a3d
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9c4d2e7a1b58"
+down_revision = "7b2e5c1f9a3d"
+branch_labels = None
+depends_on = None
+
+# Hasta esta revisión app.main creaba las tablas al importarse. Este es el
+# esquema de ese momento, congelado: en una base nueva se crea aquí completo
+# (con las columnas e índices de las revisiones anteriores, que las omiten si
+# la tabla no existe); en una base existente sólo las tablas que falten. Las
+# tablas y columnas posteriores las crean sus propias revisiones.
+TABLES = [
+    (
+        "app_user",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String(length=60), nullable=False),
+            sa.Column("email", sa.String(length=255), nullable=False),
+            sa.Column("password", sa.String(length=255), nullable=False),
+            sa.Column("rol", sa.String(length=20), nullable=False),
+        ],
+        [
+            ("ix_app_user_email", ["email"], True),
+            ("ix_app_user_id", ["id"], False),
+            ("ix_app_user_username", ["username"], True),
+        ],
+    ),
+    (
+        "category",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(length=45), nullable=False),
+        ],
+        [("ix_category_id", ["id"], False)],
+    ),
+    (
+        "document",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("file_name", sa.String(), nullable=False),
+            sa.Column("file_url", sa.String(), nullable=False),
+            sa.Column("file_type", sa.String(), nullable=True),
+            sa.Column("uploaded_at", sa.DateTime(), nullable=True),
+        ],
+        [("ix_document_id", ["id"], False)],
+    ),
+    (
+        "functional_leader",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(length=80), nullable=False),
+            sa.Column("email", sa.String(length=80), nullable=False),
+            sa.Column("entry_date", sa.DateTime(), nullable=False),
+        ],
+        [("ix_functional_leader_id", ["id"], False)],
+    ),
+    (
+        "notification",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("message", sa.String(), nullable=False),
+            sa.Column("type", sa.String(), nullable=True),
+            sa.Column("read", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("rule_id", sa.Integer(), nullable=True),
+            sa.Column("evc_q_id", sa.Integer(), nullable=True),
+            sa.Column("threshold_bucket", sa.Integer(), nullable=True),
+            sa.Column("fingerprint", sa.String(length=64), nullable=True),
+        ],
+        [
+            ("ix_notification_evc_q_id_created_at", ["evc_q_id", "created_at"], False),
+            (
+                "ix_notification_fingerprint_created_at",
+                ["fingerprint", "created_at"],
+                False,
+            ),
+            ("ix_notification_id", ["id"], False),
+            (
+                "ix_notification_read_created_at_id",
+                ["read", "created_at", "id"],
+                False,
+            ),
+        ],
+    ),
+    (
+        "notification_rule",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("target_table", sa.String(), nullable=False),
+            sa.Column("condition_field", sa.String(), nullable=False),
+            sa.Column("threshold", sa.Float(), nullable=False),
+            sa.Column("comparison", sa.String(), nullable=False),
+            sa.Column("message", sa.String(), nullable=False),
+            sa.Column("type", sa.String(), nullable=True),
+            sa.Column("active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        ],
+        [("ix_notification_rule_id", ["id"], False)],
+    ),
+    (
+        "provider",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("role", sa.String(), nullable=True),
+            sa.Column("company", sa.String(), nullable=True),
+            sa.Column("country", sa.String(), nullable=True),
+            sa.Column("cost_usd", sa.Float(), nullable=True),
+            sa.Column("category", sa.String(), nullable=True),
+            sa.Column("line", sa.String(), nullable=True),
+            sa.Column("email", sa.String(), nullable=True),
+        ],
+        [
+            ("ix_provider_email", ["email"], True),
+            ("ix_provider_id", ["id"], False),
+            ("ix_provider_name", ["name"], True),
+        ],
+    ),
+    (
+        "technical_leader",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(length=80), nullable=False),
+            sa.Column("email", sa.String(length=80), nullable=False),
+            sa.Column("entry_date", sa.DateTime(), nullable=False),
+        ],
+        [("ix_technical_leader_id", ["id"], False)],
+    ),
+    (
+        "app_user_category",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "user_id", sa.Integer(), sa.ForeignKey("app_user.id"), nullable=True
+            ),
+            sa.Column(
+                "category_id", sa.Integer(), sa.ForeignKey("category.id"), nullable=True
+            ),
+        ],
+        [("ix_app_user_category_id", ["id"], False)],
+    ),
+    (
+        "entorno",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(length=60), nullable=False),
+            sa.Column("status", sa.Boolean(), nullable=True),
+            sa.Column("creation_date", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.Column(
+                "technical_leader_id",
+                sa.Integer(),
+                sa.ForeignKey("technical_leader.id"),
+                nullable=True,
+            ),
+            sa.Column(
+                "functional_leader_id",
+                sa.Integer(),
+                sa.ForeignKey("functional_leader.id"),
+                nullable=True,
+            ),
+        ],
+        [("ix_entorno_id", ["id"], False)],
+    ),
+    (
+        "provider_document",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "provider_id",
+                sa.Integer(),
+                sa.ForeignKey("provider.id"),
+                nullable=False,
+            ),
+            sa.Column("file_name", sa.String(), nullable=False),
+            sa.Column("file_url", sa.String(), nullable=False),
+            sa.Column("uploaded_at", sa.DateTime(), nullable=True),
+        ],
+        [("ix_provider_document_id", ["id"], False)],
+    ),
+    (
+        "budget_pocket",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("year", sa.Integer(), nullable=False),
+            sa.Column(
+                "entorno_id", sa.Integer(), sa.ForeignKey("entorno.id"), nullable=False
+            ),
+            sa.Column("agreed_value", sa.Float(), nullable=False),
+            sa.Column("status", sa.Boolean(), nullable=True),
+            sa.Column("is_available", sa.Boolean(), nullable=True),
+            sa.Column("total_allocated", sa.Float(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+        ],
+        [("ix_budget_pocket_id", ["id"], False)],
+    ),
+    (
+        "evc",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(length=60), nullable=False),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("creation_date", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.Column(
+                "technical_leader_id",
+                sa.Integer(),
+                sa.ForeignKey("technical_leader.id"),
+                nullable=True,
+            ),
+            sa.Column(
+                "functional_leader_id",
+                sa.Integer(),
+                sa.ForeignKey("functional_leader.id"),
+                nullable=True,
+            ),
+            sa.Column(
+                "entorno_id", sa.Integer(), sa.ForeignKey("entorno.id"), nullable=True
+            ),
+            sa.Column("status", sa.Boolean(), nullable=True),
+        ],
+        [("ix_evc_id", ["id"], False)],
+    ),
+    (
+        "budget_allocation",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "budget_pocket_id",
+                sa.Integer(),
+                sa.ForeignKey("budget_pocket.id"),
+                nullable=False,
+            ),
+            sa.Column("evc_id", sa.Integer(), sa.ForeignKey("evc.id"), nullable=False),
+            sa.Column("allocation_date", sa.DateTime(), nullable=False),
+            sa.Column("allocated_value", sa.Float(), nullable=False),
+            sa.Column("is_total_allocation", sa.Boolean(), nullable=True),
+            sa.Column("comments", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+        ],
+        [("ix_budget_allocation_id", ["id"], False)],
+    ),
+    (
+        "evc_q",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("year", sa.Integer(), nullable=False),
+            sa.Column("q", sa.Integer(), nullable=False),
+            sa.Column("evc_id", sa.Integer(), sa.ForeignKey("evc.id"), nullable=False),
+            sa.Column("allocated_budget", sa.Float(), nullable=True),
+            sa.Column("allocated_percentage", sa.Float(), nullable=True),
+            sa.Column(
+                "creation_date",
+                sa.DateTime(),
+                server_default=sa.func.now(),
+                nullable=True,
+            ),
+        ],
+        [("ix_evc_q_id", ["id"], False)],
+    ),
+    (
+        "evc_financial",
+        [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "evc_q_id", sa.Integer(), sa.ForeignKey("evc_q.id"), nullable=True
+            ),
+            sa.Column(
+                "provider_id", sa.Integer(), sa.ForeignKey("provider.id"), nullable=True
+            ),
+            sa.Column(
+                "created_at",
+                sa.DateTime(),
+                server_default=sa.func.now(),
+                nullable=True,
+            ),
+            sa.Column("concept", sa.String(length=100), nullable=True),
+            sa.Column("value_usd", sa.Float(), nullable=True),
+        ],
+        [("ix_evc_financial_id", ["id"], False)],
+    ),
+    (
+        "evc_q_spending",
+        [
+            sa.Column(
+                "evc_q_id", sa.Integer(), sa.ForeignKey("evc_q.id"), primary_key=True
+            ),
+            sa.Column("provider_total", sa.Float(), nullable=False),
+            sa.Column("manual_total", sa.Float(), nullable=False),
+            sa.Column("spent_total", sa.Float(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+        ],
+        [],
+    ),
+]
+
+
+def upgrade() -> None:
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for table, columns, indexes in TABLES:
+        if table in tables:
+            continue
+        op.create_table(table, *(column.copy() for column in columns))
+        for name, index_columns, unique in indexes:
+            op.create_index(name, table, index_columns, unique=unique)
+
+
+def downgrade() -> None:
+    # En orden inverso por las claves foráneas
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for table, _, _ in reversed(TABLES):
+        if table in tables:
+            op.drop_table(table)
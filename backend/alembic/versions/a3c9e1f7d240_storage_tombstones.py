@@ -0,0 +1,60 @@
+"""storage tombstones
+
+Revision ID: a3c9e1f7d240
+Revises: f7a1c3e5b820
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a3c9e1f7d240"
+down_revision = "f7a1c3e5b820"
+branch_labels = None
+depends_on = None
+
+DOCUMENT_TABLES = ("document", "provider_document")
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if "storage_tombstone" not in tables:
+        op.create_table(
+            "storage_tombstone",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("storage_key", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("next_attempt_at", sa.DateTime(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("last_error", sa.Text(), nullable=True),
+        )
+        op.create_index(
+            "ix_storage_tombstone_storage_key", "storage_tombstone", ["storage_key"]
+        )
+        op.create_index(
+            "ix_storage_tombstone_next_attempt_at",
+            "storage_tombstone",
+            ["next_attempt_at"],
+        )
+
+    # La reconciliación busca qué claves siguen referenciadas
+    for table in DOCUMENT_TABLES:
+        if table not in tables:
+            continue
+        indexes = {index["name"] for index in inspector.get_indexes(table)}
+        if f"ix_{table}_storage_key" not in indexes:
+            op.create_index(f"ix_{table}_storage_key", table, ["storage_key"])
+
+
+def downgrade() -> None:
+    for table in DOCUMENT_TABLES:
+        op.drop_index(f"ix_{table}_storage_key", table_name=table)
+    op.drop_index(
+        "ix_storage_tombstone_next_attempt_at", table_name="storage_tombstone"
+    )
+    op.drop_index("ix_storage_tombstone_storage_key", table_name="storage_tombstone")
+    op.drop_table("storage_tombstone")
@@ -0,0 +1,85 @@
+"""search index
+
+Revision ID: b8d4f2a6c135
+Revises: a3c9e1f7d240
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b8d4f2a6c135"
+down_revision = "a3c9e1f7d240"
+branch_labels = None
+depends_on = None
+
+# Debe coincidir con SEARCH_TS_CONFIG (app/services/search.py); el nombre del
+# archivo pesa más que el contenido
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('spanish', coalesce(file_name, '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(body, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "search_entry" not in tables:
+        op.create_table(
+            "search_entry",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("source", sa.String(length=32), nullable=False),
+            sa.Column("source_key", sa.String(length=64), nullable=False),
+            sa.Column("file_name", sa.String(), nullable=True),
+            sa.Column("length", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("body", sa.Text(), nullable=True),
+            sa.Column("indexed_at", sa.DateTime(), nullable=True),
+            sa.UniqueConstraint("source", "source_key"),
+        )
+        op.create_index(
+            "ix_search_entry_source_length", "search_entry", ["source", "length"]
+        )
+
+    # La tabla puede existir de antes (creada desde los modelos), sin la
+    # columna generada: se decide por la columna, no por la tabla
+    if bind.dialect.name == "postgresql":
+        inspector = sa.inspect(bind)
+        columns = {c["name"] for c in inspector.get_columns("search_entry")}
+        if "search_vector" not in columns:
+            op.execute(
+                "ALTER TABLE search_entry ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+            )
+        indexes = {i["name"] for i in inspector.get_indexes("search_entry")}
+        if "ix_search_entry_search_vector" not in indexes:
+            op.create_index(
+                "ix_search_entry_search_vector",
+                "search_entry",
+                ["search_vector"],
+                postgresql_using="gin",
+            )
+
+    if "search_term" not in tables:
+        op.create_table(
+            "search_term",
+            sa.Column("term", sa.String(length=64), primary_key=True),
+            sa.Column(
+                "entry_id",
+                sa.Integer(),
+                sa.ForeignKey("search_entry.id", ondelete="CASCADE"),
+                primary_key=True,
+            ),
+            sa.Column("tf", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_search_term_entry_id", "search_term", ["entry_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_search_term_entry_id", table_name="search_term")
+    op.drop_table("search_term")
+    op.drop_index("ix_search_entry_source_length", table_name="search_entry")
+    op.drop_table("search_entry")
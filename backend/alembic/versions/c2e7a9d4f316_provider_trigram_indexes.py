@@ -0,0 +1,63 @@
+"""provider trigram indexes
+
+Revision ID: c2e7a9d4f316
+Revises: b8d4f2a6c135
+Create Date: 2026-10-19 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c2e7a9d4f316"
+down_revision = "b8d4f2a6c135"
+branch_labels = None
+depends_on = None
+
+# Columnas con ILIKE '%...%' (filtros) y typeahead
+TRIGRAM_COLUMNS = ("name", "company", "country", "line")
+
+# Debe coincidir con SEARCH_TEXT (app/services/provider_search.py)
+SEARCH_TEXT = (
+    "(coalesce(name, '') || ' ' || coalesce(company, '') || ' ' || "
+    "coalesce(email, ''))"
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "provider" not in inspector.get_table_names():
+        return
+    existing = {index["name"] for index in inspector.get_indexes("provider")}
+
+    if "ix_provider_cost_usd" not in existing:
+        op.create_index("ix_provider_cost_usd", "provider", ["cost_usd"])
+
+    if bind.dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in TRIGRAM_COLUMNS:
+        name = f"ix_provider_{column}_trgm"
+        if name not in existing:
+            op.create_index(
+                name,
+                "provider",
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+    if "ix_provider_search_trgm" not in existing:
+        op.execute(
+            "CREATE INDEX ix_provider_search_trgm ON provider "
+            f"USING gin ({SEARCH_TEXT} gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_provider_search_trgm")
+        for column in TRIGRAM_COLUMNS:
+            op.execute(f"DROP INDEX IF EXISTS ix_provider_{column}_trgm")
+    op.drop_index("ix_provider_cost_usd", table_name="provider")
@@ -0,0 +1,57 @@
+"""invoice parse cache
+
+Revision ID: d5e8a3c6f1b7
+Revises: 9c4d2e7a1b58
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d5e8a3c6f1b7"
+down_revision = "9c4d2e7a1b58"
+branch_labels = None
+depends_on = None
+
+SOURCE_INDEX = "ix_evc_financial_evc_q_id_source_sha256"
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if "invoice_parse" not in tables:
+        op.create_table(
+            "invoice_parse",
+            sa.Column("sha256", sa.String(length=64), primary_key=True),
+            sa.Column("parser_version", sa.Integer(), nullable=False),
+            sa.Column("size", sa.Integer(), nullable=False),
+            sa.Column("pages", sa.Integer(), nullable=False),
+            sa.Column("value", sa.Float(), nullable=True),
+            sa.Column("currency", sa.String(length=8), nullable=True),
+            sa.Column("method", sa.String(length=16), nullable=True),
+            sa.Column("text", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+
+    if "evc_financial" not in tables:
+        return
+    columns = {c["name"] for c in inspector.get_columns("evc_financial")}
+    if "source_sha256" not in columns:
+        op.add_column(
+            "evc_financial",
+            sa.Column("source_sha256", sa.String(length=64), nullable=True),
+        )
+    indexes = {i["name"] for i in inspector.get_indexes("evc_financial")}
+    if SOURCE_INDEX not in indexes:
+        op.create_index(
+            SOURCE_INDEX, "evc_financial", ["evc_q_id", "source_sha256"], unique=False
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(SOURCE_INDEX, table_name="evc_financial")
+    op.drop_column("evc_financial", "source_sha256")
+    op.drop_table("invoice_parse")
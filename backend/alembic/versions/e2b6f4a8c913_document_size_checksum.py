@@ -0,0 +1,36 @@
+"""document size and checksum
+
+Revision ID: e2b6f4a8c913
+Revises: d5e8a3c6f1b7
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e2b6f4a8c913"
+down_revision = "d5e8a3c6f1b7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "document" not in inspector.get_table_names():
+        return
+    columns = {c["name"] for c in inspector.get_columns("document")}
+    if "file_size" not in columns:
+        op.add_column(
+            "document", sa.Column("file_size", sa.BigInteger(), nullable=True)
+        )
+    if "sha256" not in columns:
+        op.add_column(
+            "document", sa.Column("sha256", sa.String(length=64), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "sha256")
+    op.drop_column("document", "file_size")
@@ -0,0 +1,76 @@
+"""storage keys and resumable uploads
+
+Revision ID: f7a1c3e5b820
+Revises: e2b6f4a8c913
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f7a1c3e5b820"
+down_revision = "e2b6f4a8c913"
+branch_labels = None
+depends_on = None
+
+DOCUMENT_TABLES = ("document", "provider_document")
+# Sólo las URLs del storage propio (``<STORAGE_PUBLIC_URL>/<clave>``) tienen
+# clave; las de Supabase (``.../storage/v1/object/public/...``) y otras
+# externas quedan sin clave y se sirven redirigiendo a ``file_url``
+STORAGE_URL_PREFIX = (
+    os.getenv("STORAGE_PUBLIC_URL", "http://localhost:8000/storage").rstrip("/") + "/"
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "document_upload" not in tables:
+        op.create_table(
+            "document_upload",
+            sa.Column("id", sa.String(length=32), primary_key=True),
+            sa.Column("upload_id", sa.String(), nullable=False),
+            sa.Column("storage_key", sa.String(), nullable=False),
+            sa.Column("file_name", sa.String(), nullable=False),
+            sa.Column("content_type", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index(
+            "ix_document_upload_created_at", "document_upload", ["created_at"]
+        )
+
+    for table in DOCUMENT_TABLES:
+        if table not in tables:
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table)}
+        if "storage_key" in columns:
+            continue
+        op.add_column(table, sa.Column("storage_key", sa.String(), nullable=True))
+        # La clave antes se derivaba de la URL al borrar
+        rows = bind.execute(
+            sa.text(
+                f"SELECT id, file_url FROM {table} "
+                "WHERE substr(file_url, 1, :length) = :prefix"
+            ),
+            {"length": len(STORAGE_URL_PREFIX), "prefix": STORAGE_URL_PREFIX},
+        ).fetchall()
+        for row_id, file_url in rows:
+            key = file_url[len(STORAGE_URL_PREFIX) :]
+            if key:
+                bind.execute(
+                    sa.text(f"UPDATE {table} SET storage_key = :key WHERE id = :id"),
+                    {"key": key, "id": row_id},
+                )
+
+
+def downgrade() -> None:
+    for table in DOCUMENT_TABLES:
+        op.drop_column(table, "storage_key")
+    op.drop_index("ix_document_upload_created_at", table_name="document_upload")
+    op.drop_table("document_upload")
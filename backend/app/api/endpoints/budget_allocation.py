@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
+from app.core.pagination import LimitedPageParams, page_response
 from app.crud import budget_allocation as crud
 from app.schemas.budget_allocation import (
     BudgetAllocation,
@@ -20,10 +21,12 @@ router = APIRouter()
 
 @router.get("/", response_model=List[BudgetAllocationResponse])
 def read_budget_allocations(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    response: Response,
+    page: LimitedPageParams = Depends(),
+    db: Session = Depends(get_db),
 ):
-    allocations = crud.get_budget_allocations(db, skip=skip, limit=limit)
-    return allocations
+    allocations = crud.get_budget_allocations(db, page)
+    return page_response(response, allocations)
 
 
 @router.get("/{allocation_id}", response_model=BudgetAllocationResponse)
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
+from app.core.pagination import LimitedPageParams, page_response
 from app.crud import budget_pocket as crud
 from app.crud import budget_allocation as allocation_crud
 from app.schemas.budget_pocket import (
@@ -24,12 +25,20 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[BudgetPocketResponse])
-def read_budget_pockets(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_budget_pockets(
+    response: Response,
+    page: LimitedPageParams = Depends(),
+    db: Session = Depends(get_db),
+):
     try:
-        budget_pockets = crud.get_budget_pockets(db, skip=skip, limit=limit)
+        budget_pockets = crud.get_budget_pockets(db, page)
         # Log the response data for debugging
-        logger.info(f"Budget pockets response: {[p.__dict__ for p in budget_pockets]}")
-        return budget_pockets
+        logger.info(
+            f"Budget pockets response: {[p.__dict__ for p in budget_pockets.items]}"
+        )
+        return page_response(response, budget_pockets)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in read_budget_pockets: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,6 +1,9 @@
+from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 from typing import Optional
 
+load_dotenv()
+
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Finup API"
@@ -15,6 +18,17 @@ class Settings(BaseSettings):
     # Database Settings
     DATABASE_URL: str = "sqlite:///./finup.db"
 
+    # Pool de conexiones (por proceso y por engine: el síncrono y el asíncrono
+    # tienen cada uno el suyo). Conexiones máximas por worker de uvicorn:
+    # 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 30.0  # segundos esperando una conexión libre
+    DB_POOL_RECYCLE: int = 1800  # segundos antes de reemplazar una conexión
+    DB_POOL_PRE_PING: bool = True
+    # Límite por sentencia en PostgreSQL; 0 lo desactiva
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+
     class Config:
         case_sensitive = True
 
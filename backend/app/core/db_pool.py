@@ -0,0 +1,127 @@
+# app/core/db_pool.py
+"""
+Configuración y métricas del pool de conexiones.
+
+``engine_options`` traduce los ``DB_POOL_*`` de ``settings`` a argumentos de
+``create_engine``/``create_async_engine``. Los pools de PostgreSQL usan
+``MeteredQueuePool``/``MeteredAsyncQueuePool``, que además de la ocupación
+registran cuántas veces se pidió una conexión, cuánto se esperó por ella y
+cuántas esperas terminaron en timeout (ver ``GET /admin/db-pool``).
+"""
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+
+class _PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        # Checkouts sin conexiones libres: abrieron una nueva o esperaron
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, idle_before: int, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            if idle_before == 0:
+                self.waited += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkouts_waited": self.waited,
+                "checkout_timeouts": self.timeouts,
+                "avg_wait_seconds": (
+                    self.total_wait / self.checkouts if self.checkouts else 0.0
+                ),
+                "max_wait_seconds": self.max_wait,
+            }
+
+
+class _MeteredPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = _PoolMetrics()
+
+    def _do_get(self):
+        idle = self.checkedin()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - start, idle, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start, idle)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Argumentos de pool para el engine de ``url`` según ``settings``."""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        # SQLite elige su propio pool (memoria, archivo, aiosqlite)
+        return {}
+
+    options = {
+        "poolclass": MeteredAsyncQueuePool if is_async else MeteredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    if timeout and backend == "postgresql":
+        if is_async:
+            connect_args = {"server_settings": {"statement_timeout": str(timeout)}}
+        else:
+            connect_args = {"options": f"-c statement_timeout={timeout}"}
+        options["connect_args"] = connect_args
+    return options
+
+
+def pool_status(engine) -> dict:
+    """Ocupación actual y métricas acumuladas del pool de ``engine``."""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "timeout_seconds": pool.timeout(),
+            }
+        )
+    metrics = getattr(pool, "metrics", None)
+    status.update(metrics.snapshot() if metrics else _PoolMetrics().snapshot())
+    return status
@@ -0,0 +1,187 @@
+# app/core/file_response.py
+"""
+Respuesta de archivos con rangos y GET condicionales.
+
+``RangeFileResponse`` sirve un archivo ya abierto:
+
+- ``Range: bytes=a-b`` (también ``a-`` y ``-n``) responde 206 con esa parte
+  y 416 si queda fuera del archivo; varios rangos se ignoran y se envía el
+  archivo completo, como permite la RFC 9110.
+- ``If-None-Match`` / ``If-Modified-Since`` responden 304 y ``If-Range``
+  descarta el rango si el archivo cambió.
+- El cuerpo va con la extensión ASGI ``http.response.zerocopy``
+  (``sendfile``) cuando el servidor la ofrece; si no, por bloques leídos con
+  ``os.pread`` en el threadpool. En ningún caso se carga el archivo entero.
+
+``ETag`` y ``Last-Modified`` salen del ``fstat`` del descriptor: si el
+archivo se reemplaza mientras se envía, la respuesta sigue siendo la del
+archivo abierto.
+"""
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import IO, Mapping, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+FILE_CHUNK_SIZE = 1024 * 1024
+
+# Headers que el navegador debe poder leer en respuestas CORS
+FILE_HEADERS = [
+    "Accept-Ranges",
+    "Content-Disposition",
+    "Content-Range",
+    "ETag",
+    "Last-Modified",
+]
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    ``(inicio, fin)`` inclusivos del header ``Range``, o ``None`` si se
+    ignora (otra unidad, varios rangos o sintaxis inválida).
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # Sufijo: los últimos ``last`` bytes
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if start < 0 or (end is not None and start > end):
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def not_modified(headers: Mapping[str, str], etag: str, mtime: float) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    since = headers.get("if-modified-since")
+    if since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class RangeFileResponse(Response):
+    def __init__(
+        self,
+        file: IO[bytes],
+        request_headers: Mapping[str, str],
+        media_type: Optional[str] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        method: str = "GET",
+        chunk_size: int = FILE_CHUNK_SIZE,
+    ):
+        self.file = file
+        self.chunk_size = chunk_size
+        stat = os.fstat(file.fileno())
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+
+        response_headers = {
+            **(headers or {}),
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": last_modified,
+        }
+        self.start, self.end = 0, size - 1
+        status_code = 200
+        if not_modified(request_headers, etag, stat.st_mtime):
+            status_code = 304
+        elif "range" in request_headers and request_headers.get("if-range", etag) in (
+            etag,
+            last_modified,
+        ):
+            try:
+                byte_range = parse_range(request_headers["range"], size)
+            except RangeNotSatisfiable:
+                status_code = 416
+                response_headers["content-range"] = f"bytes */{size}"
+            else:
+                if byte_range is not None:
+                    status_code = 206
+                    self.start, self.end = byte_range
+                    response_headers[
+                        "content-range"
+                    ] = f"bytes {self.start}-{self.end}/{size}"
+
+        self.send_body = method != "HEAD" and status_code in (200, 206)
+        if status_code in (200, 206):
+            response_headers["content-length"] = str(self.end - self.start + 1)
+        elif status_code == 416:
+            response_headers["content-length"] = "0"
+        super().__init__(
+            None,
+            status_code=status_code,
+            headers=response_headers,
+            media_type=media_type,
+        )
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            if not self.send_body:
+                await send({"type": "http.response.body", "body": b""})
+            elif "http.response.zerocopy" in scope.get("extensions", {}):
+                await send(
+                    {
+                        "type": "http.response.zerocopy",
+                        "file": self.file,
+                        "offset": self.start,
+                        "count": self.end - self.start + 1,
+                    }
+                )
+            else:
+                await self._send_chunks(send)
+        finally:
+            self.file.close()
+
+    async def _send_chunks(self, send):
+        fd = self.file.fileno()
+        offset, remaining = self.start, self.end - self.start + 1
+        while remaining > 0:
+            chunk = await run_in_threadpool(
+                os.pread, fd, min(self.chunk_size, remaining), offset
+            )
+            if not chunk:
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                }
+            )
+        if remaining > 0 or self.end < self.start:
+            # Archivo vacío, o se truncó mientras se enviaba
+            await send({"type": "http.response.body", "body": b""})
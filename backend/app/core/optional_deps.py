@@ -0,0 +1,51 @@
+# app/core/optional_deps.py
+"""
+Dependencias pesadas y opcionales (PyMuPDF, Pillow, Tesseract).
+
+Sólo las usa la carga de facturas, así que no se importan al arrancar el
+worker: ``optional_import`` las importa en el primer uso. Con
+``PRELOAD_HEAVY_DEPS=true`` se importan en el evento ``startup`` para que el
+primer request no pague ese costo (útil en workers de larga vida; en un
+autoescalado conviene el arranque en frío más rápido, el valor por defecto).
+"""
+import importlib
+import os
+from types import ModuleType
+
+PRELOAD_HEAVY_DEPS = os.getenv("PRELOAD_HEAVY_DEPS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Módulo -> paquete que lo provee
+HEAVY_MODULES = {
+    "fitz": "PyMuPDF",
+    "PIL.Image": "Pillow",
+    "pytesseract": "pytesseract",
+}
+
+
+class MissingDependency(RuntimeError):
+    pass
+
+
+def optional_import(name: str, feature: str) -> ModuleType:
+    """Importa ``name`` o explica qué paquete falta para ``feature``."""
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        package = HEAVY_MODULES.get(name, name)
+        raise MissingDependency(f"{feature} requiere el paquete {package}") from e
+
+
+def preload_heavy_modules() -> list:
+    """Importa las dependencias pesadas disponibles; devuelve las cargadas."""
+    loaded = []
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        loaded.append(name)
+    return loaded
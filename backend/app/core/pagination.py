@@ -0,0 +1,478 @@
+# app/core/pagination.py
+"""
+Paginación por cursor (keyset) compartida por los endpoints de listado.
+
+En lugar de ``OFFSET`` (que obliga a la base a recorrer y descartar todas
+las filas anteriores) cada página continúa desde los valores de orden de la
+última fila entregada: ``WHERE (orden, id) > (último)``. Con un índice sobre
+la columna de orden la página 10.000 cuesta lo mismo que la primera.
+
+Parámetros de query comunes:
+
+- ``limit``: tamaño de página (máximo ``PAGE_MAX_LIMIT``). Sin ``limit``
+  se usa ``PAGE_DEFAULT_LIMIT`` si hay ``cursor`` o si el endpoint usa
+  ``LimitedPageParams`` (los que antes tenían ``limit=100``); en los que
+  nunca tuvieron límite se devuelven todas las filas, como antes de paginar.
+- ``skip``: ya no se admite (400); se pagina con ``cursor``.
+- ``cursor``: valor opaco devuelto en ``X-Next-Cursor`` por la página anterior.
+- ``sort``: campos separados por coma, ``-`` para descendente (``-created_at,name``).
+- ``filter``: repetible, ``campo:operador:valor`` (``cost_usd:gte:100``).
+- ``count``: ``estimate`` (por defecto), ``exact`` o ``none``.
+
+El cuerpo de la respuesta sigue siendo la lista de elementos; los metadatos
+van en las cabeceras ``X-Next-Cursor``, ``X-Total-Count`` y
+``X-Total-Count-Estimated``.
+"""
+import base64
+import json
+import os
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Boolean, Date, DateTime, Select, and_, false, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query as ORMQuery, Session
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "100"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "1000"))
+# Por debajo de este número de filas estimadas se cuenta exactamente
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", "10000"))
+
+PAGE_HEADERS = ["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated"]
+
+FILTER_OPERATORS = (
+    "eq",
+    "ne",
+    "gt",
+    "gte",
+    "lt",
+    "lte",
+    "in",
+    "contains",
+    "startswith",
+    "isnull",
+)
+
+
+def _bad_request(detail: str):
+    return HTTPException(status_code=400, detail=detail)
+
+
+class PageParams:
+    """Dependencia de FastAPI con los parámetros de paginación del request."""
+
+    # Tamaño de página cuando no llega ``limit`` ni ``cursor`` (None: sin límite)
+    default_limit: Optional[int] = None
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=PAGE_MAX_LIMIT),
+        cursor: Optional[str] = Query(None),
+        sort: Optional[str] = Query(None),
+        filters: List[str] = Query([], alias="filter"),
+        count: str = Query("estimate", pattern="^(estimate|exact|none)$"),
+        skip: Optional[int] = Query(None, include_in_schema=False),
+    ):
+        if skip is not None:
+            # Ignorarlo devolvería siempre la primera página a los clientes
+            # que paginan por offset
+            raise _bad_request("skip no está soportado; use cursor (X-Next-Cursor)")
+        if limit is None:
+            limit = PAGE_DEFAULT_LIMIT if cursor else self.default_limit
+        # None: sin límite (todas las filas)
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+        self.filters = filters
+        self.count = count
+
+
+class LimitedPageParams(PageParams):
+    """``PageParams`` para los listados que antes tenían ``limit=100``."""
+
+    default_limit = PAGE_DEFAULT_LIMIT
+
+
+def default_page(**overrides) -> PageParams:
+    """``PageParams`` con los valores por defecto, para llamadas fuera de un request."""
+    values = {
+        "limit": None,
+        "cursor": None,
+        "sort": None,
+        "filters": [],
+        "count": "estimate",
+        "skip": None,
+    }
+    values.update(overrides)
+    return PageParams(**values)
+
+
+class PageSpec:
+    """
+    Describe qué columnas de un modelo se pueden usar para ordenar y filtrar.
+    ``id`` se agrega siempre al final del orden para que sea total.
+    """
+
+    def __init__(self, model, fields: Sequence[str], default_sort: str = "id"):
+        self.table = model.__table__
+        self.fields = {name: self.table.c[name] for name in fields}
+        self.fields.setdefault("id", self.table.c.id)
+        self.default_sort = default_sort
+
+    def column(self, name: str):
+        if name not in self.fields:
+            raise _bad_request(
+                f"Campo no permitido: {name}. Use uno de: {', '.join(self.fields)}"
+            )
+        return self.fields[name]
+
+    def sort_keys(self, sort: Optional[str]) -> List[Tuple[str, bool]]:
+        keys = []
+        for part in (sort or self.default_sort).split(","):
+            part = part.strip()
+            if not part:
+                continue
+            descending = part.startswith("-")
+            name = part.lstrip("-+")
+            self.column(name)
+            if name not in [k for k, _ in keys]:
+                keys.append((name, descending))
+        if "id" not in [k for k, _ in keys]:
+            # El desempate sigue el sentido de la última clave: así el orden
+            # completo coincide con un índice ``(columna, id)`` leído al revés
+            keys.append(("id", keys[-1][1] if keys else False))
+        return keys
+
+
+class Page:
+    def __init__(
+        self,
+        items: list,
+        next_cursor: Optional[str],
+        total: Optional[int],
+        total_estimated: bool,
+    ):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+        self.total_estimated = total_estimated
+
+
+# ---------------------------------------------------------------------------
+# Conversión de valores
+# ---------------------------------------------------------------------------
+
+
+def _parse_value(column, raw: str):
+    if isinstance(column.type, Boolean):
+        lowered = raw.lower()
+        if lowered in ("1", "true", "yes"):
+            return True
+        if lowered in ("0", "false", "no"):
+            return False
+        raise _bad_request(f"Valor booleano inválido para {column.name}: {raw}")
+    try:
+        if isinstance(column.type, DateTime):
+            return datetime.fromisoformat(raw)
+        if isinstance(column.type, Date):
+            return date.fromisoformat(raw)
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return raw
+    except ValueError:
+        raise _bad_request(f"Fecha inválida para {column.name}: {raw}")
+    try:
+        return python_type(raw)
+    except (TypeError, ValueError):
+        raise _bad_request(f"Valor inválido para {column.name}: {raw}")
+
+
+def _dump_value(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _load_value(column, value: Any):
+    if value is None or not isinstance(value, str):
+        return value
+    if isinstance(column.type, (DateTime, Date)):
+        return _parse_value(column, value)
+    return value
+
+
+def encode_cursor(sort_keys: List[Tuple[str, bool]], values: List[Any]) -> str:
+    payload = {
+        "s": [[name, descending] for name, descending in sort_keys],
+        "v": [_dump_value(value) for value in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, spec: PageSpec, sort_keys: List[Tuple[str, bool]]
+) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        keys = [(name, bool(descending)) for name, descending in payload["s"]]
+        values = payload["v"]
+    except (ValueError, KeyError, TypeError):
+        raise _bad_request("Cursor inválido")
+    if keys != sort_keys or len(values) != len(keys):
+        raise _bad_request("El cursor no corresponde al orden solicitado")
+    return [
+        _load_value(spec.column(name), value) for (name, _), value in zip(keys, values)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Construcción de la consulta
+# ---------------------------------------------------------------------------
+
+
+def _filter_clause(spec: PageSpec, expression: str):
+    parts = expression.split(":", 2)
+    if len(parts) != 3:
+        raise _bad_request(
+            f"Filtro inválido: {expression}. Formato: campo:operador:valor"
+        )
+    name, operator, raw = parts
+    column = spec.column(name)
+    if operator not in FILTER_OPERATORS:
+        raise _bad_request(
+            f"Operador inválido: {operator}. Use uno de: {', '.join(FILTER_OPERATORS)}"
+        )
+
+    if operator == "isnull":
+        is_null = raw.lower() in ("1", "true", "yes")
+        return column.is_(None) if is_null else column.isnot(None)
+    if operator == "in":
+        return column.in_([_parse_value(column, v) for v in raw.split(",") if v])
+    if operator == "contains":
+        return column.ilike(f"%{raw}%")
+    if operator == "startswith":
+        return column.ilike(f"{raw}%")
+
+    value = _parse_value(column, raw)
+    return {
+        "eq": lambda: column == value,
+        "ne": lambda: column != value,
+        "gt": lambda: column > value,
+        "gte": lambda: column >= value,
+        "lt": lambda: column < value,
+        "lte": lambda: column <= value,
+    }[operator]()
+
+
+# Motores que ordenan los NULL como el valor más grande (el resto, como el menor)
+NULLS_LARGEST_DIALECTS = ("postgresql", "oracle")
+
+
+def _nulls_largest(dialect) -> bool:
+    return dialect.name in NULLS_LARGEST_DIALECTS
+
+
+def _order_by(spec: PageSpec, sort_keys: List[Tuple[str, bool]]):
+    """
+    Se usa el orden nativo del motor (sin ``NULLS FIRST/LAST``) para que un
+    índice B-tree normal pueda recorrerse en cualquiera de los dos sentidos.
+    """
+    return [
+        spec.column(name).desc() if descending else spec.column(name).asc()
+        for name, descending in sort_keys
+    ]
+
+
+def _after_clause(
+    spec: PageSpec, sort_keys: List[Tuple[str, bool]], values, nulls_largest: bool
+):
+    """``WHERE`` que selecciona las filas posteriores a ``values`` en el orden dado."""
+    clause = None
+    for (name, descending), value in reversed(list(zip(sort_keys, values))):
+        column = spec.column(name)
+        nulls_after = column.nullable and nulls_largest != descending
+        if value is None:
+            equal = column.is_(None)
+            after = false() if nulls_after else column.isnot(None)
+        else:
+            equal = column == value
+            after = column < value if descending else column > value
+            if nulls_after:
+                after = or_(after, column.is_(None))
+        clause = after if clause is None else or_(after, and_(equal, clause))
+
+    # Cota redundante sobre la primera columna: permite un rango en el índice
+    # en lugar de evaluar el OR sobre todas las filas.
+    name, descending = sort_keys[0]
+    column, value = spec.column(name), values[0]
+    if len(sort_keys) > 1 and value is not None:
+        if not (column.nullable and nulls_largest != descending):
+            bound = column <= value if descending else column >= value
+            clause = and_(bound, clause)
+    return clause
+
+
+# ---------------------------------------------------------------------------
+# Conteo total
+# ---------------------------------------------------------------------------
+
+
+def _exact_count(query: ORMQuery) -> int:
+    return query.order_by(None).count()
+
+
+def _count_statement(statement: Select) -> Select:
+    return select(func.count()).select_from(statement.order_by(None).subquery())
+
+
+def _planner_estimate(session: Session, statement) -> Optional[int]:
+    """Filas estimadas por el planificador de PostgreSQL (sin ejecutar la consulta)."""
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    compiled = statement.order_by(None).compile(dialect=bind.dialect)
+    params = (
+        tuple(compiled.params[name] for name in compiled.positiontup)
+        if compiled.positional
+        else compiled.params
+    )
+    try:
+        plan = session.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", params
+        )
+        return int(plan.scalar()[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        print(f"[pagination] Could not estimate row count: {e}")
+        return None
+
+
+def count_rows(query: ORMQuery, mode: str) -> Tuple[Optional[int], bool]:
+    """Devuelve ``(total, es_estimado)`` según ``mode``."""
+    if mode == "none":
+        return None, False
+    if mode == "estimate":
+        statement = query.enable_eagerloads(False).statement
+        estimate = _planner_estimate(query.session, statement)
+        if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+            return estimate, True
+    return _exact_count(query), False
+
+
+async def count_rows_async(
+    db: AsyncSession, statement: Select, mode: str
+) -> Tuple[Optional[int], bool]:
+    """Como ``count_rows`` pero para un ``select()`` sobre una ``AsyncSession``."""
+    if mode == "none":
+        return None, False
+    if mode == "estimate":
+        estimate = await db.run_sync(_planner_estimate, statement)
+        if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+            return estimate, True
+    return (await db.execute(_count_statement(statement))).scalar_one(), False
+
+
+# ---------------------------------------------------------------------------
+# Página
+# ---------------------------------------------------------------------------
+
+
+def _page_query(query, page: PageParams, spec: PageSpec, dialect):
+    """
+    Aplica filtros, cursor y orden a ``query`` (``Query`` del ORM o
+    ``select()``). Devuelve ``(filtrada, paginada, claves_de_orden)``; la
+    filtrada (sin cursor ni límite) es la que se cuenta.
+    """
+    sort_keys = spec.sort_keys(page.sort)
+
+    for expression in page.filters:
+        query = query.filter(_filter_clause(spec, expression))
+
+    filtered = query
+    if page.cursor:
+        values = decode_cursor(page.cursor, spec, sort_keys)
+        query = query.filter(
+            _after_clause(spec, sort_keys, values, _nulls_largest(dialect))
+        )
+
+    paged = query.order_by(None).order_by(*_order_by(spec, sort_keys))
+    if page.limit is not None:
+        paged = paged.limit(page.limit + 1)
+    return filtered, paged, sort_keys
+
+
+def _split_page(rows: list, page: PageParams, sort_keys) -> Tuple[list, Optional[str]]:
+    """Separa los ``limit`` elementos de la página y arma el cursor siguiente."""
+    if page.limit is None:
+        return rows, None
+    items = rows[: page.limit]
+    if len(rows) <= page.limit:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor(
+        sort_keys, [getattr(last, name) for name, _ in sort_keys]
+    )
+
+
+def _is_only_page(page: PageParams, next_cursor: Optional[str]) -> bool:
+    # Primera y única página: el total es exacto sin otra consulta
+    return not page.cursor and next_cursor is None and page.count != "none"
+
+
+# ---------------------------------------------------------------------------
+# API pública
+# ---------------------------------------------------------------------------
+
+
+def paginate(query: ORMQuery, page: Optional[PageParams], spec: PageSpec) -> Page:
+    """
+    Aplica filtros, orden y cursor a ``query`` (una ``Query`` del ORM sobre
+    el modelo de ``spec``) y devuelve una ``Page`` con ``limit`` elementos
+    (todos si no hay ``limit``).
+    """
+    page = page or default_page()
+    filtered, paged, sort_keys = _page_query(
+        query, page, spec, query.session.get_bind().dialect
+    )
+    items, next_cursor = _split_page(paged.all(), page, sort_keys)
+
+    if _is_only_page(page, next_cursor):
+        total, estimated = len(items), False
+    else:
+        total, estimated = count_rows(filtered, page.count)
+
+    return Page(items, next_cursor, total, estimated)
+
+
+async def paginate_async(
+    db: AsyncSession, statement: Select, page: Optional[PageParams], spec: PageSpec
+) -> Page:
+    """
+    Versión de ``paginate`` para una ``AsyncSession``: ``statement`` es un
+    ``select()`` del modelo de ``spec`` (con sus opciones de carga).
+    """
+    page = page or default_page()
+    filtered, paged, sort_keys = _page_query(
+        statement, page, spec, db.get_bind().dialect
+    )
+    rows = (await db.execute(paged)).scalars().unique().all()
+    items, next_cursor = _split_page(rows, page, sort_keys)
+
+    if _is_only_page(page, next_cursor):
+        total, estimated = len(items), False
+    else:
+        total, estimated = await count_rows_async(db, filtered, page.count)
+
+    return Page(items, next_cursor, total, estimated)
+
+
+def page_response(response: Response, page: Page) -> list:
+    """Escribe los metadatos de ``page`` en las cabeceras y devuelve los elementos."""
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.total is not None:
+        response.headers["X-Total-Count"] = str(page.total)
+        response.headers["X-Total-Count-Estimated"] = str(page.total_estimated).lower()
+    return page.items
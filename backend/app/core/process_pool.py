@@ -0,0 +1,37 @@
+# app/core/process_pool.py
+"""
+``ProcessPoolExecutor`` creado en el primer uso, para el trabajo de CPU que
+no debe correr en el proceso del servidor (lectura de facturas, OCR).
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional
+
+
+class LazyProcessPool:
+    def __init__(self, workers: int, max_tasks_per_child: Optional[int] = None):
+        self.workers = max(1, workers)
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # "spawn": un fork del servidor copiaría sus hilos y conexiones
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=self.max_tasks_per_child,
+                )
+            return self._executor
+
+    def run(self, fn: Callable, *args) -> Future:
+        return self._get_executor().submit(fn, *args)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
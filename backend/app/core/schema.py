@@ -0,0 +1,79 @@
+# app/core/schema.py
+"""
+Versión del esquema de base de datos.
+
+El esquema lo gestiona Alembic en un paso explícito de despliegue
+(``alembic upgrade head``, una sola vez por release). Los workers ya no
+ejecutan ``create_all`` al importar ``app.main``: al arrancar sólo comparan
+la revisión de ``alembic_version`` con la cabeza de ``alembic/versions``, una
+consulta sin reflexión de tablas.
+
+``SCHEMA_CHECK`` controla qué pasa si no coinciden:
+
+- ``warn`` (por defecto): se informa y el worker arranca igual.
+- ``strict``: el worker no arranca.
+- ``off``: no se consulta la base.
+"""
+import os
+from pathlib import Path
+from typing import Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "warn").lower()
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def alembic_config():
+    # Alembic se importa aquí: sólo hace falta al arrancar, no en cada import
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    return config
+
+
+def head_revisions() -> Set[str]:
+    """Revisiones cabeza de ``alembic/versions`` (sin tocar la base)."""
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+
+def current_revisions(engine) -> Set[str]:
+    """Revisiones registradas en ``alembic_version``; vacío si no existe."""
+    try:
+        with engine.connect() as connection:
+            rows = connection.execute(text("SELECT version_num FROM alembic_version"))
+            return {row[0] for row in rows}
+    except DBAPIError:
+        return set()
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def check_schema_version(engine, mode: str = None) -> Tuple[Set[str], Set[str]]:
+    """
+    Compara la revisión de la base con la cabeza de las migraciones.
+
+    Devuelve ``(actual, cabeza)``. En modo ``strict`` lanza
+    ``SchemaOutOfDate`` si difieren.
+    """
+    mode = (mode or SCHEMA_CHECK).lower()
+    if mode == "off":
+        return set(), set()
+
+    current, heads = current_revisions(engine), head_revisions()
+    if current != heads:
+        message = (
+            f"Database schema at {sorted(current) or 'no revision'}, "
+            f"expected {sorted(heads)}; run 'alembic upgrade head'"
+        )
+        if mode == "strict":
+            raise SchemaOutOfDate(message)
+        print(f"[schema] WARNING: {message}")
+    return current, heads
@@ -0,0 +1,48 @@
+# app/core/startup.py
+"""
+Tiempos de arranque del worker.
+
+``startup_timer`` se crea al importar ``app.main`` y cada fase relevante
+(importación de routers, chequeo de esquema, ...) se registra con ``mark``.
+Al terminar el evento ``startup`` se imprime el resumen; también se puede
+consultar en ``GET /admin/startup``.
+"""
+import time
+from typing import Dict, Optional
+
+
+class StartupTimer:
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self._last = self.started_at
+        self.phases: Dict[str, float] = {}
+        self.total: Optional[float] = None
+
+    def mark(self, phase: str) -> float:
+        """Registra la duración desde la marca anterior bajo ``phase``."""
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+        self._last = now
+        return elapsed
+
+    def finish(self) -> float:
+        self.total = time.perf_counter() - self.started_at
+        return self.total
+
+    def report(self) -> dict:
+        return {
+            "phases_ms": {
+                phase: round(seconds * 1000, 1)
+                for phase, seconds in self.phases.items()
+            },
+            "total_ms": round(self.total * 1000, 1) if self.total is not None else None,
+        }
+
+    def summary(self) -> str:
+        report = self.report()
+        phases = ", ".join(f"{k} {v} ms" for k, v in report["phases_ms"].items())
+        return f"[startup] {report['total_ms']} ms ({phases})"
+
+
+startup_timer = StartupTimer()
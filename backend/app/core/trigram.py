@@ -0,0 +1,89 @@
+# app/core/trigram.py
+"""
+Similitud por trigramas con la misma definición que la extensión ``pg_trgm``
+de PostgreSQL:
+
+- cada palabra (letras y dígitos, en minúsculas) se rellena como
+  ``"  palabra "`` y se parte en trigramas;
+- ``similarity(a, b)``: trigramas en común sobre trigramas de ambos;
+- ``word_similarity(q, texto)``: la mejor ``similarity`` entre ``q`` y un
+  tramo continuo de los trigramas de ``texto`` (``q`` escrito con errores o
+  incompleto dentro de un texto más largo).
+
+En PostgreSQL las funciones (y los índices GIN ``gin_trgm_ops``) las provee
+la extensión; en SQLite (tests y desarrollo) se registran como funciones SQL
+en cada conexión, así las consultas son las mismas en ambos motores.
+"""
+import re
+import sqlite3
+from typing import List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def _word_trigrams(word: str) -> List[str]:
+    padded = f"  {word} "
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+def _sequence(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [
+        trigram
+        for word in _WORD.findall(text.lower())
+        for trigram in _word_trigrams(word)
+    ]
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    return set(_sequence(text))
+
+
+def similarity(a: Optional[str], b: Optional[str]) -> float:
+    first, second = trigrams(a), trigrams(b)
+    if not first or not second:
+        return 0.0
+    common = len(first & second)
+    return common / (len(first) + len(second) - common)
+
+
+def word_similarity(q: Optional[str], text: Optional[str]) -> float:
+    target = trigrams(q)
+    sequence = _sequence(text)
+    if not target or target.isdisjoint(sequence):
+        return 0.0
+    best = 0.0
+    for start, first in enumerate(sequence):
+        # El mejor tramo empieza (y termina) en un trigrama de ``q``
+        if first not in target:
+            continue
+        seen: Set[str] = set()
+        common = 0
+        for trigram in sequence[start:]:
+            if trigram in seen:
+                continue
+            seen.add(trigram)
+            # Un tramo más largo no puede superar len(target) / len(seen)
+            if len(target) <= best * len(seen):
+                break
+            if trigram in target:
+                common += 1
+                best = max(best, common / (len(target) + len(seen) - common))
+        if best == 1.0:
+            break
+    return best
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function(
+            "similarity", 2, similarity, deterministic=True
+        )
+        dbapi_connection.create_function(
+            "word_similarity", 2, word_similarity, deterministic=True
+        )
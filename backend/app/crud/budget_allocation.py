@@ -3,6 +3,19 @@ from app.models.budget_allocation import BudgetAllocation
 from app.models.budget_pocket import BudgetPocket
 from app.schemas.budget_allocation import BudgetAllocationCreate, BudgetAllocationUpdate
 from fastapi import HTTPException
+from app.core.pagination import PageParams, PageSpec, paginate
+
+BUDGET_ALLOCATION_PAGE = PageSpec(
+    BudgetAllocation,
+    [
+        "budget_pocket_id",
+        "evc_id",
+        "allocation_date",
+        "allocated_value",
+        "is_total_allocation",
+        "created_at",
+    ],
+)
 
 
 def get_budget_allocation(db: Session, allocation_id: int):
@@ -14,14 +27,9 @@ def get_budget_allocation(db: Session, allocation_id: int):
     )
 
 
-def get_budget_allocations(db: Session, skip: int = 0, limit: int = 100):
-    return (
-        db.query(BudgetAllocation)
-        .options(joinedload(BudgetAllocation.evc))
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+def get_budget_allocations(db: Session, page: PageParams = None):
+    query = db.query(BudgetAllocation).options(joinedload(BudgetAllocation.evc))
+    return paginate(query, page, BUDGET_ALLOCATION_PAGE)
 
 
 def get_budget_allocations_by_pocket(db: Session, budget_pocket_id: int):
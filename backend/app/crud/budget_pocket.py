@@ -5,20 +5,20 @@ from app.models.entorno import Entorno
 from app.models.budget_allocation import BudgetAllocation
 from typing import List, Optional
 import logging
+from app.core.pagination import PageParams, PageSpec, paginate
 
 logger = logging.getLogger(__name__)
 
+BUDGET_POCKET_PAGE = PageSpec(
+    BudgetPocket,
+    ["year", "entorno_id", "agreed_value", "status", "is_available", "created_at"],
+)
+
 
 def get_budget_pocket(db: Session, budget_pocket_id: int) -> Optional[BudgetPocket]:
     return db.query(BudgetPocket).filter(BudgetPocket.id == budget_pocket_id).first()
 
 
-def get_budget_pockets(
-    db: Session, skip: int = 0, limit: int = 100
-) -> List[BudgetPocket]:
-    return db.query(BudgetPocket).offset(skip).limit(limit).all()
-
-
 def get_budget_pocket(db: Session, budget_pocket_id: int):
     return (
         db.query(BudgetPocket)
@@ -28,14 +28,9 @@ def get_budget_pocket(db: Session, budget_pocket_id: int):
     )
 
 
-def get_budget_pockets(db: Session, skip: int = 0, limit: int = 100):
-    return (
-        db.query(BudgetPocket)
-        .options(joinedload(BudgetPocket.entorno))
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+def get_budget_pockets(db: Session, page: PageParams = None):
+    query = db.query(BudgetPocket).options(joinedload(BudgetPocket.entorno))
+    return paginate(query, page, BUDGET_POCKET_PAGE)
 
 
 def get_budget_pockets_by_entorno(db: Session, entorno_id: int):
@@ -1,3 +1,6 @@
+# Primero, para que el tiempo de arranque incluya la importación de routers
+from app.core.startup import startup_timer
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -15,16 +18,24 @@ from app.routes.provider_documents import router as provider_documents_router
 from app.routes.notification import router as notification_router
 from app.routes.notification_rules import router as notification_rules_router
 from app.routes.documents import router as documents_router
+from app.routes.admin import router as admin_router
+from app.routes.storage import router as storage_router
 
 from app.api.endpoints import budget_pocket, budget_allocation
-from app.database import engine, Base, SessionLocal
-
-from app import models
+from app.core.file_response import FILE_HEADERS
+from app.core.pagination import PAGE_HEADERS
+import app.models  # noqa: F401  registra todos los modelos en los mappers
+from app.core.optional_deps import PRELOAD_HEAVY_DEPS, preload_heavy_modules
+from app.core.schema import check_schema_version
+from app.database import async_engine, engine
+from app.services.invoice_jobs import invoice_pool
+from app.services.invoice_ocr import ocr_pool
+from app.services.rule_queue import rule_queue
+from app.services.storage import storage
+from app.services.storage_gc import STORAGE_GC_ENABLED, storage_sweeper
 
-models.Base.metadata.create_all(bind=engine)
-
-# Crear las tablas en la base de datos
-Base.metadata.create_all(bind=engine)
+# Las tablas las crea y migra ``alembic upgrade head`` (ver app/core/schema.py)
+startup_timer.mark("imports")
 
 app = FastAPI(title="Finup API")
 
@@ -39,6 +50,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Metadatos de paginación (ver app/core/pagination.py) y de descargas
+    expose_headers=PAGE_HEADERS + FILE_HEADERS,
 )
 
 # Incluir rutas
@@ -62,6 +75,8 @@ app.include_router(
     provider_documents_router, prefix="/provider-documents", tags=["ProviderDocuments"]
 )
 app.include_router(documents_router, prefix="/documents", tags=["Documents"])
+# Sirve las URLs de storage.public_url / storage.signed_url
+app.include_router(storage_router, prefix="/storage", tags=["Storage"])
 app.include_router(notification_router, prefix="/notifications", tags=["Notifications"])
 app.include_router(
     notification_rules_router, prefix="/notification-rules", tags=["Notification Rules"]
@@ -73,6 +88,50 @@ app.include_router(
 app.include_router(
     budget_allocation.router, prefix="/budget-allocations", tags=["Budget Allocations"]
 )
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
+startup_timer.mark("app")
+
+
+@app.on_event("startup")
+def check_schema():
+    check_schema_version(engine)
+    startup_timer.mark("schema_check")
+    if PRELOAD_HEAVY_DEPS:
+        preload_heavy_modules()
+        startup_timer.mark("preload")
+    startup_timer.finish()
+    print(startup_timer.summary())
+
+
+@app.on_event("shutdown")
+def stop_rule_queue():
+    # Evaluate any pending rule events before the worker exits
+    rule_queue.stop()
+
+
+@app.on_event("shutdown")
+def stop_invoice_pools():
+    invoice_pool.shutdown(wait=False)
+    ocr_pool.shutdown(wait=False)
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
+
+
+@app.on_event("startup")
+async def start_storage_sweeper():
+    # Borra en segundo plano los archivos de los documentos eliminados
+    if STORAGE_GC_ENABLED:
+        storage_sweeper.start()
+
+
+@app.on_event("shutdown")
+async def close_storage():
+    await storage_sweeper.stop()
+    # Cierra las conexiones reutilizadas del backend S3
+    await storage.close()
 
 
 @app.get("/")
@@ -12,6 +12,7 @@ from app.models.evc_financial import EVC_Financial
 
 # from app.models.evc_provider import EVCProvider
 from app.models.evc_q import EVC_Q
+from app.models.evc_q_spending import EVC_QSpending
 from app.models.evc import EVC
 from app.models.functional_leader import FunctionalLeader
 from app.models.provider import Provider
@@ -24,7 +25,11 @@ from app.models.notification_rule import NotificationRule
 from app.models.budget_pocket import BudgetPocket
 from app.models.budget_allocation import BudgetAllocation
 from app.models.document import Document
+from app.models.document_upload import DocumentUpload
 from app.models.provider_document import ProviderDocument
+from app.models.invoice_parse import InvoiceParse
+from app.models.storage_tombstone import StorageTombstone
+from app.models.search_entry import SearchEntry, SearchTerm
 
 # This ensures all models are registered with SQLAlchemy
 __all__ = [
@@ -36,6 +41,7 @@ __all__ = [
     "Provider",
     # "EVCProvider",
     "EVC_Q",
+    "EVC_QSpending",
     "EVC",
     "FunctionalLeader",
     "Provider",
@@ -46,5 +52,10 @@ __all__ = [
     "BudgetPocket",
     "BudgetAllocation",
     "Document",
+    "DocumentUpload",
     "ProviderDocument",
+    "InvoiceParse",
+    "StorageTombstone",
+    "SearchEntry",
+    "SearchTerm",
 ]
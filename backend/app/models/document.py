@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime
 from datetime import datetime
 from app.database import Base
 
@@ -8,5 +8,10 @@ class Document(Base):
     id = Column(Integer, primary_key=True, index=True)
     file_name = Column(String, nullable=False)
     file_url = Column(String, nullable=False)
+    # Object key in app.services.storage (None for external URLs)
+    storage_key = Column(String, nullable=True, index=True)
     file_type = Column(String, nullable=True)  # For storing file extension/type
+    # Computed while streaming the upload to storage
+    file_size = Column(BigInteger, nullable=True)
+    sha256 = Column(String(64), nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,19 @@
+# models/document_upload.py
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, String
+
+from app.database import Base
+
+
+class DocumentUpload(Base):
+    """Subida reanudable en curso (ver app/services/document.py)."""
+
+    __tablename__ = "document_upload"
+    # Id público de la subida; ``upload_id`` es el del backend de storage
+    id = Column(String(32), primary_key=True)
+    upload_id = Column(String, nullable=False)
+    storage_key = Column(String, nullable=False)
+    file_name = Column(String, nullable=False)
+    content_type = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
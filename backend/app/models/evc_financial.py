@@ -8,6 +8,7 @@ from sqlalchemy import (
     func,
     Float,
     Double,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -23,6 +24,13 @@ class EVC_Financial(Base):
     created_at = Column(DateTime, server_default=func.now())
     concept = Column(String(100), nullable=True)
     value_usd = Column(Float, nullable=True)
+    # SHA-256 de la factura de la que se cargó (ver app/services/invoice_cache.py)
+    source_sha256 = Column(String(64), nullable=True)
     # Relationship with EVC_Q
     evc_q = relationship("EVC_Q", back_populates="evc_financials")
     provider = relationship("Provider", back_populates="evc_financials")
+
+    __table_args__ = (
+        # Detección de facturas duplicadas por cuatrimestre
+        Index("ix_evc_financial_evc_q_id_source_sha256", "evc_q_id", "source_sha256"),
+    )
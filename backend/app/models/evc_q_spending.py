@@ -0,0 +1,18 @@
+# app/models/evc_q_spending.py
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from datetime import datetime
+from app.database import Base
+
+
+class EVC_QSpending(Base):
+    """Ledger materializado del gasto de cada cuatrimestre (EVC_Q)."""
+
+    __tablename__ = "evc_q_spending"
+
+    evc_q_id = Column(Integer, ForeignKey("evc_q.id"), primary_key=True)
+    provider_total = Column(Float, nullable=False, default=0.0)
+    manual_total = Column(Float, nullable=False, default=0.0)
+    spent_total = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
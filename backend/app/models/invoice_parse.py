@@ -0,0 +1,22 @@
+# models/invoice_parse.py
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, Integer, String, Text
+
+from app.database import Base
+
+
+class InvoiceParse(Base):
+    """Resultado de leer una factura, direccionado por el SHA-256 del archivo."""
+
+    __tablename__ = "invoice_parse"
+    sha256 = Column(String(64), primary_key=True)
+    # Versión del extractor que produjo el resultado; otra versión relee
+    parser_version = Column(Integer, nullable=False)
+    size = Column(Integer, nullable=False)
+    pages = Column(Integer, nullable=False)
+    value = Column(Float, nullable=True)
+    currency = Column(String(8), nullable=True)
+    method = Column(String(16), nullable=True)
+    text = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,5 +1,5 @@
 # models/notification.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -12,3 +12,16 @@ class Notification(Base):
     type = Column(String, default="alert")  # info | warning | alert
     read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Claves estructuradas para deduplicar sin buscar en el texto del mensaje
+    rule_id = Column(Integer, nullable=True)
+    evc_q_id = Column(Integer, nullable=True)
+    threshold_bucket = Column(Integer, nullable=True)
+    fingerprint = Column(String(64), nullable=True)
+
+    __table_args__ = (
+        Index("ix_notification_fingerprint_created_at", "fingerprint", "created_at"),
+        Index("ix_notification_evc_q_id_created_at", "evc_q_id", "created_at"),
+        # Listado paginado de no leídas, más recientes primero
+        Index("ix_notification_read_created_at_id", "read", "created_at", "id"),
+    )
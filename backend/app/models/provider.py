@@ -12,10 +12,13 @@ class Provider(Base):
     role = Column(String)
     company = Column(String)
     country = Column(String)
-    cost_usd = Column(Float)
+    # Rangos de costo en /providers/filter y /providers/search
+    cost_usd = Column(Float, index=True)
     category = Column(String)
     line = Column(String)
     email = Column(String, unique=True, index=True)
+    # En PostgreSQL, name/company/country/line y el texto de búsqueda tienen
+    # además índices GIN de trigramas (migración c2e7a9d4f316)
 
     # Relationships
     evc_financials = relationship("EVC_Financial", back_populates="provider")
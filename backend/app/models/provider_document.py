@@ -10,6 +10,8 @@ class ProviderDocument(Base):
     provider_id = Column(Integer, ForeignKey("provider.id"), nullable=False)
     file_name = Column(String, nullable=False)
     file_url = Column(String, nullable=False)
+    # Object key in app.services.storage (None for external URLs)
+    storage_key = Column(String, nullable=True, index=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
     provider = relationship("Provider", back_populates="documents")
@@ -0,0 +1,54 @@
+# models/search_entry.py
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
+
+from app.database import Base
+
+
+class SearchEntry(Base):
+    """
+    Texto indexado de una factura (``source_key`` = SHA-256) o de un documento
+    (``source_key`` = id). En PostgreSQL la migración agrega la columna
+    generada ``search_vector`` con su índice GIN; ver app/services/search.py.
+    """
+
+    __tablename__ = "search_entry"
+    __table_args__ = (
+        UniqueConstraint("source", "source_key"),
+        # Cantidad de entradas y largo promedio para BM25 sin leer los textos
+        Index("ix_search_entry_source_length", "source", "length"),
+    )
+    id = Column(Integer, primary_key=True)
+    source = Column(String(32), nullable=False)
+    source_key = Column(String(64), nullable=False)
+    file_name = Column(String, nullable=True)
+    # Cantidad de términos (largo del documento para BM25 en el índice local);
+    # antes que ``body`` para no recorrer el texto al leerla
+    length = Column(Integer, nullable=False, default=0)
+    body = Column(Text, nullable=True)
+    indexed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SearchTerm(Base):
+    """Índice invertido local (bases sin ``tsvector``): término -> entradas."""
+
+    __tablename__ = "search_term"
+    term = Column(String(64), primary_key=True)
+    entry_id = Column(
+        Integer,
+        ForeignKey("search_entry.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+    # Frecuencia del término (las apariciones en el nombre del archivo pesan más)
+    tf = Column(Integer, nullable=False)
@@ -0,0 +1,19 @@
+# models/storage_tombstone.py
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, Text
+
+from app.database import Base
+
+
+class StorageTombstone(Base):
+    """Archivo del storage pendiente de borrar (ver app/services/storage_gc.py)."""
+
+    __tablename__ = "storage_tombstone"
+    id = Column(Integer, primary_key=True)
+    storage_key = Column(String, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # El sweeper toma las filas vencidas y corre la fecha mientras las procesa
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
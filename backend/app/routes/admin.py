@@ -0,0 +1,58 @@
+# app/routes/admin.py
+from fastapi import APIRouter
+
+from app.core.db_pool import pool_status
+from app.core.startup import startup_timer
+from app.database import async_engine, engine
+from app.services.rule_queue import rule_queue
+from app.services.search import reindex
+from app.services.storage_gc import reconcile_storage, storage_sweeper
+
+router = APIRouter()
+
+tag_name = "Admin"
+
+
+@router.get("/rule-queue", response_model=dict, tags=[tag_name])
+def get_rule_queue_metrics():
+    """Profundidad, lag y contadores de la cola de evaluación de reglas."""
+    return rule_queue.metrics()
+
+
+@router.get("/db-pool", response_model=dict, tags=[tag_name])
+def get_db_pool_metrics():
+    """Ocupación, esperas y timeouts de los pools de conexiones (sync y async)."""
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine.sync_engine),
+    }
+
+
+@router.get("/startup", response_model=dict, tags=[tag_name])
+def get_startup_timings():
+    """Duración de cada fase del arranque de este worker."""
+    return startup_timer.report()
+
+
+@router.get("/storage-gc", response_model=dict, tags=[tag_name])
+def get_storage_gc_metrics():
+    """Archivos pendientes de borrar, reintentos y contadores del sweeper."""
+    return storage_sweeper.metrics()
+
+
+@router.post("/storage-gc/sweep", response_model=dict, tags=[tag_name])
+async def run_storage_sweep():
+    """Procesa ahora un lote de archivos pendientes de borrar."""
+    return await storage_sweeper.run_once()
+
+
+@router.post("/storage-gc/reconcile", response_model=dict, tags=[tag_name])
+async def run_storage_reconcile():
+    """Marca los archivos que ningún documento referencia y descarta subidas abandonadas."""
+    return await reconcile_storage()
+
+
+@router.post("/search/reindex", response_model=dict, tags=[tag_name])
+async def run_search_reindex():
+    """Indexa las facturas y documentos que todavía no están en el índice de búsqueda."""
+    return await reindex()
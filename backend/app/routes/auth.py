@@ -1,12 +1,16 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.core.security import SECRET_KEY, ALGORITHM
+from app.database import get_async_db, get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, Token, User as UserSchema, UserResponse
-from app.services import auth_service
+from app.services import auth_service, login_attempts
+from app.services.principal_cache import get_cached_principal, remember_principal
 
 # (
 #     verify_password,
@@ -20,20 +24,41 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = auth_service.get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    wait = login_attempts.retry_after(email)
+    if wait is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(wait)},
+        )
+
+    user = await auth_service.get_user_by_email_async(db, email)
     if not user:
+        login_attempts.record_failure(email)
         return False
-    if not auth_service.verify_password(password, user.password):
+    valid, new_hash = await auth_service.verify_and_update_password(
+        password, user.password
+    )
+    if not valid:
+        login_attempts.record_failure(email)
         return False
+
+    login_attempts.record_success(email)
+    if new_hash:
+        # El costo de bcrypt cambió: se guarda el hash con el costo actual
+        user.password = new_hash
+        await db.commit()
     return user
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ):
-    from jose import JWTError, jwt
-    from app.core.security import SECRET_KEY, ALGORITHM
+    # Token ya validado y aún vigente: no hace falta decodificar ni consultar
+    principal = get_cached_principal(token)
+    if principal is not None:
+        return principal
 
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -49,11 +74,11 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = auth_service.get_user_by_email(db, email)
+    user = await auth_service.get_user_by_email_async(db, email)
     if user is None:
         raise credentials_exception
 
-    return user
+    return remember_principal(token, user, payload.get("exp"))
 
 
 @router.post("/register", response_model=UserResponse)
@@ -84,10 +109,11 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
-        user = authenticate_user(db, form_data.username, form_data.password)
+        user = await authenticate_user(db, form_data.username, form_data.password)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,12 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    status,
+    UploadFile,
+    File,
+    Form,
+    Path,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.schemas.document import DocumentResponse
+from app.core.pagination import PageParams, page_response
+from app.schemas.document import (
+    DocumentBatchDelete,
+    DocumentResponse,
+    DocumentUploadComplete,
+    DocumentUploadStart,
+)
 from app.services.document import (
+    DocumentUploadError,
+    DocumentUploadNotFound,
+    abort_document_upload,
+    complete_document_upload,
+    get_document_upload,
+    start_document_upload,
     upload_and_create_document,
+    upload_document_part,
     get_all_documents,
+    get_document,
     delete_document,
+    delete_documents,
+)
+from app.services.search import (
+    DOCUMENT,
+    SEARCH_MAX_LIMIT,
+    SOURCES,
+    index_stored_document,
+    search_documents,
 )
+from app.routes.storage import ExpiresIn, document_response, document_url
 from typing import List, Optional
 
 router = APIRouter()
@@ -17,7 +54,7 @@ router = APIRouter()
     response_model=DocumentResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Upload Document",
-    description="Upload a document without associating it with a provider. The file will be stored in Supabase storage.",
+    description="Upload a document without associating it with a provider. The file is streamed to the configured storage backend.",
     responses={
         201: {
             "description": "Document created successfully",
@@ -27,6 +64,7 @@ router = APIRouter()
     },
 )
 async def upload_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     file_url: Optional[str] = Form(None),
     db: Session = Depends(get_db),
@@ -38,11 +76,167 @@ async def upload_document(
     - **file_url**: Optional pre-uploaded file URL
     """
     try:
-        return await upload_and_create_document(db, file, file_url)
+        doc = await upload_and_create_document(db, file, file_url)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         )
+    # Text extraction for search runs after the response is sent
+    background_tasks.add_task(index_stored_document, DOCUMENT, doc.id)
+    return doc
+
+
+@router.post(
+    "/uploads",
+    response_model=dict,
+    status_code=status.HTTP_201_CREATED,
+    summary="Start Resumable Upload",
+    description="Start a multipart upload for a large document. Send the parts with PUT /uploads/{upload_id}/parts/{part_number} and finish with POST /uploads/{upload_id}/complete.",
+)
+async def start_upload(upload: DocumentUploadStart, db: Session = Depends(get_db)):
+    try:
+        return await start_document_upload(db, upload.file_name, upload.content_type)
+    except DocumentUploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.put(
+    "/uploads/{upload_id}/parts/{part_number}",
+    response_model=dict,
+    summary="Upload Part",
+    description="Upload one part as the raw request body. It is streamed to storage; sending a part again replaces it.",
+)
+async def upload_part(
+    upload_id: str,
+    request: Request,
+    part_number: int = Path(..., ge=1, le=10000),
+    db: Session = Depends(get_db),
+):
+    # With a Content-Length the part is streamed through without buffering
+    size = request.headers.get("content-length")
+    try:
+        return await upload_document_part(
+            db,
+            upload_id,
+            part_number,
+            request.stream(),
+            int(size) if size is not None else None,
+        )
+    except DocumentUploadNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except DocumentUploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.get(
+    "/uploads/{upload_id}",
+    response_model=dict,
+    summary="Get Upload",
+    description="Parts received so far, to resume an interrupted upload.",
+)
+async def get_upload(upload_id: str, db: Session = Depends(get_db)):
+    try:
+        return await get_document_upload(db, upload_id)
+    except DocumentUploadNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post(
+    "/uploads/{upload_id}/complete",
+    response_model=DocumentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Complete Upload",
+    description="Join the uploaded parts and create the document.",
+)
+async def complete_upload(
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    upload: Optional[DocumentUploadComplete] = None,
+    db: Session = Depends(get_db),
+):
+    parts = None
+    if upload is not None and upload.parts is not None:
+        parts = [part.model_dump(exclude_none=True) for part in upload.parts]
+    try:
+        doc = await complete_document_upload(db, upload_id, parts)
+    except DocumentUploadNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except DocumentUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    background_tasks.add_task(index_stored_document, DOCUMENT, doc.id)
+    return doc
+
+
+@router.delete(
+    "/uploads/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Abort Upload",
+    description="Discard an upload and the parts received.",
+)
+async def abort_upload(upload_id: str, db: Session = Depends(get_db)):
+    try:
+        await abort_document_upload(db, upload_id)
+    except DocumentUploadNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except DocumentUploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+    return None
+
+
+@router.post(
+    "/batch-delete",
+    response_model=dict,
+    summary="Delete Documents",
+    description="Delete several documents by ID. Their files are removed from storage in a single batch call.",
+)
+async def delete_documents_endpoint(
+    payload: DocumentBatchDelete, db: Session = Depends(get_db)
+):
+    """
+    Delete several documents at once.
+
+    - **ids**: IDs of the documents to delete
+    """
+    return await delete_documents(db, payload.ids)
+
+
+@router.get(
+    "/search",
+    response_model=dict,
+    summary="Search Documents",
+    description="Full-text search over invoice and document contents, ranked by relevance, with a highlighted snippet per hit.",
+    responses={400: {"description": "Unknown source"}},
+)
+def search_documents_endpoint(
+    q: str = Query(..., min_length=1, max_length=500),
+    source: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    Search invoices and documents by their text and file name.
+
+    - **q**: Words to find (all of them must appear), e.g. a supplier or PO number
+    - **source**: Restrict to `invoice`, `document` and/or `provider_document`
+    - **limit** / **offset**: Page of results
+
+    Each hit has its `rank`, a `snippet` with the matches wrapped in `<mark>`
+    (the rest of the text is HTML-escaped) and either the `financials` loaded
+    from the invoice or the document's `download_url`.
+    """
+    unknown = set(source or ()) - set(SOURCES)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown source: {', '.join(sorted(unknown))}"
+        )
+    return search_documents(db, q, source, limit, offset)
 
 
 @router.get(
@@ -57,11 +251,58 @@ async def upload_document(
         }
     },
 )
-def list_all_documents(db: Session = Depends(get_db)):
+def list_all_documents(
+    response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)
+):
     """
-    Retrieve all documents that are not associated with any provider.
+    Retrieve a page of documents that are not associated with any provider.
+    Use the `X-Next-Cursor` response header as `cursor` to fetch the next page.
+    """
+    return page_response(response, get_all_documents(db, page))
+
+
+@router.api_route(
+    "/{doc_id}/download",
+    methods=["GET", "HEAD"],
+    summary="Download Document",
+    description="Stream the document file. Supports Range requests and conditional GETs; files stored on S3 redirect to a presigned URL.",
+    responses={
+        200: {"description": "File content"},
+        206: {"description": "Requested byte range"},
+        304: {"description": "Not modified"},
+        307: {"description": "Redirect to the file URL"},
+        404: {"description": "Document not found"},
+    },
+)
+async def download_document(
+    doc_id: int, request: Request, db: Session = Depends(get_db)
+):
+    """
+    Download a document.
+
+    - **doc_id**: The ID of the document to download
+    """
+    doc = await run_in_threadpool(get_document, db, doc_id)
+    return await document_response(request, doc)
+
+
+@router.get(
+    "/{doc_id}/download-url",
+    response_model=dict,
+    summary="Get Download URL",
+    description="Short-lived signed URL to download the document without authentication.",
+)
+async def get_download_url(
+    doc_id: int, expires_in: int = ExpiresIn, db: Session = Depends(get_db)
+):
+    """
+    Signed download URL for a document.
+
+    - **doc_id**: The ID of the document
+    - **expires_in**: Seconds the URL stays valid
     """
-    return get_all_documents(db)
+    doc = await run_in_threadpool(get_document, db, doc_id)
+    return document_url(doc, expires_in)
 
 
 @router.delete(
@@ -74,13 +315,13 @@ def list_all_documents(db: Session = Depends(get_db)):
         404: {"description": "Document not found"},
     },
 )
-def delete_document_endpoint(doc_id: int, db: Session = Depends(get_db)):
+async def delete_document_endpoint(doc_id: int, db: Session = Depends(get_db)):
     """
     Delete a document by its ID.
 
     - **doc_id**: The ID of the document to delete
     """
-    success = delete_document(db, doc_id)
+    success = await delete_document(db, doc_id)
     if not success:
         raise HTTPException(status_code=404, detail="Document not found")
     return None
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
+from app.core.pagination import LimitedPageParams, page_response
 
 
 from app.services import entorno as entorno_service
@@ -20,8 +21,12 @@ def create_new_entorno(entorno_data: EntornoCreate, db: Session = Depends(get_db
 
 
 @router.get("/entornos/", response_model=list[EntornoResponse], tags=[tag_name])
-def get_entornos(db: Session = Depends(get_db)):
-    return entorno_service.get_entornos(db)
+def get_entornos(
+    response: Response,
+    page: LimitedPageParams = Depends(),
+    db: Session = Depends(get_db),
+):
+    return page_response(response, entorno_service.get_entornos(db, page))
 
 
 @router.put("/entornos/{entorno_id}", response_model=EntornoResponse, tags=[tag_name])
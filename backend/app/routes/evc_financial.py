@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.models.evc_financial import EVC_Financial
 from app.models.evc_q import EVC_Q
 from app.database import get_db
+from app.services.spending import record_financial_change, snapshot_financial
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -16,7 +17,7 @@ class ManualSpendingCreate(BaseModel):
 @router.post(
     "/evc_financials/manual/{evc_q_id}", response_model=dict, tags=["EVC_Financials"]
 )
-async def add_manual_spending(
+def add_manual_spending(
     evc_q_id: int, spending: ManualSpendingCreate, db: Session = Depends(get_db)
 ):
     if spending.value_usd <= 0:
@@ -31,6 +32,8 @@ async def add_manual_spending(
     )
 
     db.add(manual_spending)
+    db.flush()
+    record_financial_change(db, None, snapshot_financial(db, manual_spending))
     db.commit()
     db.refresh(manual_spending)
 
@@ -1,18 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+import json
+from app.database import get_async_db, get_db
+from app.core.pagination import LimitedPageParams, page_response
 from fastapi import UploadFile, File, Form
-import fitz
-from PIL import Image
-import io
-import pytesseract
-import re
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-# pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_PATH")
+from app.core.optional_deps import MissingDependency
+from app.services.invoice import InvoiceParsingError
 
 from app.schemas.evc_financial import (
     EVC_FinancialCreate,
@@ -23,6 +19,10 @@ from app.schemas.evc_financial import (
 from app.models.evc_financial import EVC_Financial
 from app.schemas.provider import ProviderResponse
 import app.services.evc_financial as evc_financial_service
+import app.services.invoice_batch as invoice_batch
+import app.services.invoice_cache as invoice_cache
+import app.services.invoice_jobs as invoice_jobs
+import app.services.spending as spending_service
 
 router = APIRouter()
 
@@ -30,7 +30,7 @@ tag_name = "EVC Financials"
 
 
 @router.post("/evc_financials/", response_model=EVC_FinancialResponse, tags=[tag_name])
-async def create_evc_financial(
+def create_evc_financial(
     evc_financial: EVC_FinancialCreate, db: Session = Depends(get_db)
 ):
     return evc_financial_service.create_evc_financial(
@@ -41,7 +41,7 @@ async def create_evc_financial(
 @router.post(
     "/evc_financials/concept", response_model=EVC_FinancialResponse, tags=[tag_name]
 )
-async def create_evc_financial_concept(
+def create_evc_financial_concept(
     evc_financial_data: EVC_FinancialCreateConcept, db: Session = Depends(get_db)
 ):
     return evc_financial_service.create_evc_financial_concept(
@@ -52,9 +52,13 @@ async def create_evc_financial_concept(
 @router.get(
     "/evc_financials/", response_model=List[EVC_FinancialResponse], tags=[tag_name]
 )
-async def read_evc_financials(db: Session = Depends(get_db)):
-    evc_financials = evc_financial_service.get_evc_financials(db)
-    return evc_financials
+async def read_evc_financials(
+    response: Response,
+    page: LimitedPageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    evc_financials = await evc_financial_service.get_evc_financials_async(db, page)
+    return page_response(response, evc_financials)
 
 
 @router.put(
@@ -62,7 +66,7 @@ async def read_evc_financials(db: Session = Depends(get_db)):
     response_model=EVC_FinancialResponse,
     tags=[tag_name],
 )
-async def update_evc_financial(
+def update_evc_financial(
     evc_financial_id: int,
     evc_financial: EVC_FinancialUpdate,
     db: Session = Depends(get_db),
@@ -80,7 +84,7 @@ async def update_evc_financial(
     response_model=EVC_FinancialResponse,
     tags=[tag_name],
 )
-async def delete_evc_financial(evc_financial_id: int, db: Session = Depends(get_db)):
+def delete_evc_financial(evc_financial_id: int, db: Session = Depends(get_db)):
     db_evc_financial = evc_financial_service.delete_evc_financial(db, evc_financial_id)
     if db_evc_financial is None:
         raise HTTPException(status_code=404, detail="EVC Financial not found")
@@ -92,26 +96,19 @@ async def delete_evc_financial(evc_financial_id: int, db: Session = Depends(get_
     response_model=dict,
     tags=[tag_name],
 )
-async def get_spendings_by_evc_q(evc_q_id: int, db: Session = Depends(get_db)) -> float:
+async def get_spendings_by_evc_q(
+    evc_q_id: int, db: AsyncSession = Depends(get_async_db)
+) -> float:
     """
-    Get the total spendings (sum of RoleProvider.price_usd) for a given evc_q_id.
+    Get the total spendings (manual values plus provider costs) for a given evc_q_id.
     """
-    total = evc_financial_service.get_spendings_by_evc_q(db, evc_q_id)
-    percentage = evc_financial_service.get_percentage_by_evc_q(db, evc_q_id)
-    if percentage >= 1:
-        message = "No hay más presupuesto"
-    elif percentage >= 0.8:
-        message = "Ya casi te quedas sin presupuesto"
-    elif percentage >= 0.5:
-        message = "Vas a la mitad del presupuesto"
-    else:
-        message = "Presupuesto suficiente"
+    status = await spending_service.get_quarter_status_async(db, evc_q_id)
 
     return {
         "evc_q_id": evc_q_id,
-        "total_spendings": total,
-        "percentage": percentage * 100,
-        "message": message,
+        "total_spendings": status["total_spendings"],
+        "percentage": status["percentage"],
+        "message": status["budget_message"],
     }
 
 
@@ -120,70 +117,145 @@ async def get_spendings_by_evc_q(evc_q_id: int, db: Session = Depends(get_db)) -
     response_model=List[ProviderResponse],
     tags=[tag_name],
 )
-async def get_providers_by_evc_q(evc_q_id: int, db: Session = Depends(get_db)):
-    providers = evc_financial_service.get_providers_by_evc_q(db, evc_q_id)
+async def get_providers_by_evc_q(
+    evc_q_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    providers = await evc_financial_service.get_providers_by_evc_q_async(db, evc_q_id)
     if not providers:
         raise HTTPException(status_code=404, detail="No providers found for this EVC Q")
     return providers
 
 
+async def _read_invoice_upload(file: UploadFile) -> bytes:
+    try:
+        return await invoice_jobs.read_upload(file)
+    except invoice_jobs.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
 @router.post(
     "/evc_financials/upload", response_model=EVC_FinancialResponse, tags=[tag_name]
 )
 async def create_financial_from_file(
     evc_q_id: int = Form(...),
     file: UploadFile = File(...),
+    allow_duplicate: bool = Form(False),
     db: Session = Depends(get_db),
 ):
-    content = await file.read()
-    text = ""
-
-    if file.filename.lower().endswith(".pdf"):
-        doc = fitz.open(stream=content, filetype="pdf")
-        for page in doc:
-            text += page.get_text()
-    else:
-        pass
-        # image = Image.open(io.BytesIO(content))
-        # text = pytesseract.image_to_string(image)
-
-    print("=== TEXTO COMPLETO DEL PDF ===")
-    print(text)
-
-    # Procesar líneas
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    value_candidates = []
-
-    for line in lines:
-        if any(
-            keyword in line.lower() for keyword in ["total", "subtotal", "iva", "$"]
-        ):
-            matches = re.findall(
-                r"\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})?", line
-            )  # <- mejora aquí
-            for raw in matches:
-                try:
-                    cleaned = raw.replace("$", "").replace(",", "")
-                    number = float(cleaned)
-                    if number > 100:
-                        value_candidates.append(number)
-                except ValueError:
-                    continue
-
-    if not value_candidates:
+    content = await _read_invoice_upload(file)
+    sha256 = await run_in_threadpool(invoice_cache.content_hash, content)
+    try:
+        result = await run_in_threadpool(
+            invoice_jobs.lookup_invoice, db, evc_q_id, sha256, allow_duplicate
+        )
+        cached = result is not None
+        if result is None:
+            # La lectura del PDF corre en otro proceso (ver app/services/invoice_jobs.py)
+            result = await invoice_jobs.invoice_pool.parse(file.filename, content)
+    except invoice_cache.DuplicateInvoice as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except InvoiceParsingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except MissingDependency as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    financial = await run_in_threadpool(
+        invoice_jobs.record_invoice,
+        db,
+        evc_q_id,
+        sha256,
+        len(content),
+        result,
+        cached,
+        file.filename,
+    )
+    if financial is None:
         raise HTTPException(
             status_code=400, detail="No se encontraron montos válidos en la factura"
         )
+    print(f"Valor máximo detectado y utilizado como TOTAL: {result['value']}")
+    return financial
 
-    value = max(value_candidates)
-    print(f"Valor máximo detectado y utilizado como TOTAL: {value}")
 
-    evc_data = EVC_FinancialCreateConcept(
-        evc_q_id=evc_q_id,
-        concept="Cargado automáticamente desde factura",
-        value_usd=value,
-    )
-    return evc_financial_service.create_evc_financial_concept(db, evc_data)
+@router.post(
+    "/evc_financials/upload/jobs",
+    response_model=dict,
+    status_code=202,
+    tags=[tag_name],
+)
+async def create_financial_upload_job(
+    background_tasks: BackgroundTasks,
+    evc_q_id: int = Form(...),
+    file: UploadFile = File(...),
+    allow_duplicate: bool = Form(False),
+):
+    """Encola la factura y responde en seguida; ver ``GET .../jobs/{job_id}``."""
+    content = await _read_invoice_upload(file)
+    job = invoice_jobs.create_job(evc_q_id, file.filename, len(content))
+    background_tasks.add_task(invoice_jobs.run_job, job, content, allow_duplicate)
+    return job.as_dict()
+
+
+@router.post("/evc_financials/upload/batch", response_model=dict, tags=[tag_name])
+async def create_financials_from_files(
+    evc_q_id: int = Form(...),
+    files: List[UploadFile] = File(...),
+    manifest: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Carga varias facturas (PDF o ZIP de PDFs) en una sola transacción.
+    ``manifest`` (JSON opcional ``{"archivo.pdf": evc_q_id}``) asigna otro
+    cuatrimestre a archivos puntuales; el resto usa ``evc_q_id``.
+    """
+    try:
+        quarter_by_file = json.loads(manifest) if manifest else {}
+        quarter_by_file = {name: int(q) for name, q in quarter_by_file.items()}
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="manifest inválido")
+
+    try:
+        invoice_batch.check_batch_size(files)
+    except invoice_batch.BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    batch = []
+    budget = invoice_batch.BatchBudget()
+    for file in files:
+        try:
+            content = await invoice_jobs.read_upload(
+                file, invoice_batch.upload_limit(file.filename)
+            )
+        except invoice_jobs.UploadTooLarge as e:
+            batch.append(invoice_batch.BatchFile(file.filename, evc_q_id, error=str(e)))
+            continue
+        try:
+            expanded = invoice_batch.expand_upload(
+                file.filename, content, evc_q_id, budget
+            )
+        except invoice_batch.BatchTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        for batch_file in expanded:
+            base_name = batch_file.filename.rsplit("/", 1)[-1]
+            batch_file.evc_q_id = quarter_by_file.get(
+                batch_file.filename, quarter_by_file.get(base_name, evc_q_id)
+            )
+            batch.append(batch_file)
+
+    try:
+        return await invoice_batch.ingest_invoices(db, batch)
+    except invoice_batch.BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@router.get(
+    "/evc_financials/upload/jobs/{job_id}", response_model=dict, tags=[tag_name]
+)
+def get_financial_upload_job(job_id: str):
+    job = invoice_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.as_dict()
 
 
 # @router.get(
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
+from app.database import get_async_db, get_db
+from app.core.pagination import LimitedPageParams, page_response
 
 import app.services.evc_qs as evc_q_service
 from app.models.evc_q import EVC_Q
@@ -18,36 +20,40 @@ tag_name = "EVC_Qs"
 
 
 @router.post("/evc_qs/", response_model=EVC_QResponse, tags=[tag_name])
-async def create_evc_q(evc_q_data: EVC_QCreate, db: Session = Depends(get_db)):
+def create_evc_q(evc_q_data: EVC_QCreate, db: Session = Depends(get_db)):
     return evc_q_service.create_evc_q(db, evc_q_data)
 
 
 @router.get("/evc_qs/", response_model=List[EVC_QResponse], tags=[tag_name])
-async def get_evc_qs(db: Session = Depends(get_db)):
-    return evc_q_service.get_evc_qs(db)
+async def get_evc_qs(
+    response: Response,
+    page: LimitedPageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return page_response(response, await evc_q_service.get_evc_qs_async(db, page))
 
 
 @router.get(
     "/evc_qs/evc/{evc_id}", response_model=List[EVC_QShortResponse], tags=[tag_name]
 )
-async def get_evc_qs_by_evc_id(evc_id: int, db: Session = Depends(get_db)):
-    return evc_q_service.get_evc_qs_by_evc_id(db, evc_id)
+async def get_evc_qs_by_evc_id(evc_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await evc_q_service.get_evc_qs_by_evc_id_async(db, evc_id)
 
 
 @router.get(
     "/evc_qs/last/evc/{evc_id}", response_model=EVC_QShortResponse, tags=[tag_name]
 )
-async def get_last_evc_q_by_evc_id(evc_id: int, db: Session = Depends(get_db)):
-    db_evc_q = evc_q_service.get_last_evc_q_by_evc_id(db, evc_id)
+async def get_last_evc_q_by_evc_id(
+    evc_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    db_evc_q = await evc_q_service.get_last_evc_q_by_evc_id_async(db, evc_id)
     if not db_evc_q:
         raise HTTPException(status_code=404, detail="EVC_Q not found")
     return db_evc_q
 
 
 @router.put("/evc_qs/{evc_q_id}", response_model=EVC_QResponse, tags=[tag_name])
-async def update_evc_q(
-    evc_q_id: int, evc_q_data: EVC_QUpdate, db: Session = Depends(get_db)
-):
+def update_evc_q(evc_q_id: int, evc_q_data: EVC_QUpdate, db: Session = Depends(get_db)):
     db_evc_q = evc_q_service.get_evc_q_by_id(db, evc_q_id)
     if not db_evc_q:
         raise HTTPException(status_code=404, detail="EVC_Q not found")
@@ -55,7 +61,7 @@ async def update_evc_q(
 
 
 @router.delete("/evc_qs/{evc_q_id}", response_model=EVC_QResponse, tags=[tag_name])
-async def delete_evc_q(evc_q_id: int, db: Session = Depends(get_db)):
+def delete_evc_q(evc_q_id: int, db: Session = Depends(get_db)):
     db_evc_q = evc_q_service.get_evc_q_by_id(db, evc_q_id)
     if not db_evc_q:
         raise HTTPException(status_code=404, detail="EVC_Q not found")
@@ -67,7 +73,7 @@ async def delete_evc_q(evc_q_id: int, db: Session = Depends(get_db)):
 @router.patch(
     "/evc_qs/{quarter_id}/percentage", response_model=EVC_QResponse, tags=[tag_name]
 )
-async def update_allocated_percentage(
+def update_allocated_percentage(
     quarter_id: int, percentage: float, db: Session = Depends(get_db)
 ):
     if not 0 <= percentage <= 100:
@@ -86,6 +92,6 @@ async def update_allocated_percentage(
 
 
 @router.get("/default_values/evc/{evc_id}", response_model=dict, tags=[tag_name])
-async def get_default_creation_values(evc_id: int, db: Session = Depends(get_db)):
+def get_default_creation_values(evc_id: int, db: Session = Depends(get_db)):
     response = evc_q_service.get_default_creation_values(db, evc_id)
     return response
@@ -1,9 +1,11 @@
 # app/routes/evcs.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
+from app.core.pagination import LimitedPageParams, page_response
+from app.database import get_async_db, get_db
 from app.schemas.evc import EVCCreate, EVCResponse, EVCUpdate
 from app.services import evcs as evc_service
 
@@ -13,25 +15,29 @@ tag_name = "EVCs"
 
 
 @router.post("/", response_model=EVCResponse, tags=[tag_name])
-async def create_evc(evc_data: EVCCreate, db: Session = Depends(get_db)):
+def create_evc(evc_data: EVCCreate, db: Session = Depends(get_db)):
     return evc_service.create_evc(db, evc_data)
 
 
 @router.get("/", response_model=list[EVCResponse], tags=[tag_name])
-def list_evcs(db: Session = Depends(get_db)):
-    return evc_service.get_evcs(db)
+async def list_evcs(
+    response: Response,
+    page: LimitedPageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return page_response(response, await evc_service.get_evcs_async(db, page))
 
 
 @router.get("/{evc_id}", response_model=EVCResponse, tags=[tag_name])
-async def get_evc(evc_id: int, db: Session = Depends(get_db)):
-    db_evc = evc_service.get_evc_by_id(db, evc_id)
+async def get_evc(evc_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_evc = await evc_service.get_evc_by_id_async(db, evc_id)
     if not db_evc:
         raise HTTPException(status_code=404, detail="EVC not found")
     return db_evc
 
 
 @router.put("/{evc_id}", response_model=EVCResponse, tags=[tag_name])
-async def update_evc(evc_id: int, evc_data: EVCUpdate, db: Session = Depends(get_db)):
+def update_evc(evc_id: int, evc_data: EVCUpdate, db: Session = Depends(get_db)):
     db_evc = evc_service.update_evc(db, evc_id, evc_data)
     if not db_evc:
         raise HTTPException(status_code=404, detail="EVC not found")
@@ -43,7 +49,7 @@ async def update_evc(evc_id: int, evc_data: EVCUpdate, db: Session = Depends(get
 
 
 @router.delete("/{evc_id}", response_model=EVCResponse, tags=[tag_name])
-async def delete_evc(evc_id: int, db: Session = Depends(get_db)):
+def delete_evc(evc_id: int, db: Session = Depends(get_db)):
     db_evc = evc_service.delete_evc(db, evc_id)
     if not db_evc:
         raise HTTPException(status_code=404, detail="EVC not found")
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
+from app.core.pagination import LimitedPageParams, page_response
 
 
 import app.services.functional_leader as functional_leader_service
@@ -19,7 +20,7 @@ tag_name = "Functional Leaders"
 @router.post(
     "/functional-leaders", response_model=FunctionalLeaderResponse, tags=[tag_name]
 )
-async def create_new_functional_leader(
+def create_new_functional_leader(
     functional_leader_data: FunctionalLeaderCreate, db: Session = Depends(get_db)
 ):
     return functional_leader_service.create_functional_leader(
@@ -32,8 +33,14 @@ async def create_new_functional_leader(
     response_model=list[FunctionalLeaderResponse],
     tags=[tag_name],
 )
-async def get_functional_leaders(db: Session = Depends(get_db)):
-    return functional_leader_service.get_functional_leaders(db)
+def get_functional_leaders(
+    response: Response,
+    page: LimitedPageParams = Depends(),
+    db: Session = Depends(get_db),
+):
+    return page_response(
+        response, functional_leader_service.get_functional_leaders(db, page)
+    )
 
 
 @router.put(
@@ -41,7 +48,7 @@ async def get_functional_leaders(db: Session = Depends(get_db)):
     response_model=FunctionalLeaderResponse,
     tags=[tag_name],
 )
-async def update__functional_leader(
+def update__functional_leader(
     functional_leader_id: int,
     functional_leader_data: FunctionalLeaderCreate,
     db: Session = Depends(get_db),
@@ -59,9 +66,7 @@ async def update__functional_leader(
     response_model=FunctionalLeaderResponse,
     tags=[tag_name],
 )
-async def delete_functional_leader(
-    functional_leader_id: int, db: Session = Depends(get_db)
-):
+def delete_functional_leader(functional_leader_id: int, db: Session = Depends(get_db)):
     db_functional_leader = functional_leader_service.delete_functional_leader(
         db, functional_leader_id
     )
@@ -1,5 +1,5 @@
 # routes/notification.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 from app.services.notification_service import (
     create_notification,
@@ -7,6 +7,7 @@ from app.services.notification_service import (
 )
 from app.schemas.notification import NotificationCreate, NotificationOut
 from app.database import get_db
+from app.core.pagination import PageParams, page_response
 from app.models.notification import Notification
 
 
@@ -14,8 +15,10 @@ router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
 
 @router.get("/", response_model=list[NotificationOut])
-def list_unread_notifications(db: Session = Depends(get_db)):
-    return get_unread_notifications(db)
+def list_unread_notifications(
+    response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)
+):
+    return page_response(response, get_unread_notifications(db, page))
 
 
 @router.post("/", response_model=NotificationOut)
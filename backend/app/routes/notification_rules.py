@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
+from app.core.pagination import PageParams, PageSpec, page_response, paginate
 from app.database import get_db
 from app.models.notification_rule import NotificationRule
 from app.schemas.notification_rule import NotificationRuleCreate, NotificationRuleOut
+from app.services.rule_engine import invalidate_rule_index
 from pydantic import BaseModel
 from typing import List
 
@@ -13,10 +15,19 @@ class BulkDeleteRequest(BaseModel):
 
 router = APIRouter(prefix="/notification-rules", tags=["Notification Rules"])
 
+RULE_PAGE = PageSpec(
+    NotificationRule,
+    ["name", "target_table", "condition_field", "type", "active", "created_at"],
+)
+
 
 @router.get("/", response_model=list[NotificationRuleOut])
-def list_rules(db: Session = Depends(get_db)):
-    return db.query(NotificationRule).all()
+def list_rules(
+    response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)
+):
+    return page_response(
+        response, paginate(db.query(NotificationRule), page, RULE_PAGE)
+    )
 
 
 @router.post("/", response_model=NotificationRuleOut)
@@ -25,6 +36,7 @@ def create_rule(rule: NotificationRuleCreate, db: Session = Depends(get_db)):
     db.add(db_rule)
     db.commit()
     db.refresh(db_rule)
+    invalidate_rule_index()
     return db_rule
 
 
@@ -39,6 +51,7 @@ def update_rule(
         setattr(db_rule, field, value)
     db.commit()
     db.refresh(db_rule)
+    invalidate_rule_index()
     return db_rule
 
 
@@ -48,6 +61,7 @@ def delete_rules_bulk(request: BulkDeleteRequest, db: Session = Depends(get_db))
         synchronize_session=False
     )
     db.commit()
+    invalidate_rule_index()
     return {"message": f"{len(request.rule_ids)} rules deleted successfully"}
 
 
@@ -58,4 +72,5 @@ def delete_rule(rule_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Rule not found")
     db.delete(db_rule)
     db.commit()
+    invalidate_rule_index()
     return {"message": "Rule deleted successfully"}
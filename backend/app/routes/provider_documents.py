@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.core.pagination import PageParams, page_response
 from app.schemas.provider_document import (
+    ProviderDocumentBatchDelete,
     ProviderDocumentCreate,
     ProviderDocumentResponse,
 )
@@ -9,16 +12,27 @@ from app.services.provider_document import (
     create_provider_document,
     get_documents_by_provider,
     delete_provider_document,
+    delete_provider_documents,
     get_all_provider_documents,
+    get_provider_document,
 )
+from app.services.search import PROVIDER_DOCUMENT, index_stored_document
+from app.routes.storage import ExpiresIn, document_response, document_url
 from fastapi import HTTPException, status
 
 router = APIRouter()
 
 
 @router.post("/", response_model=ProviderDocumentResponse)
-def register_document(doc_data: ProviderDocumentCreate, db: Session = Depends(get_db)):
-    return create_provider_document(db, doc_data)
+def register_document(
+    doc_data: ProviderDocumentCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    doc = create_provider_document(db, doc_data)
+    # El texto para la búsqueda se extrae después de responder
+    background_tasks.add_task(index_stored_document, PROVIDER_DOCUMENT, doc.id)
+    return doc
 
 
 @router.get("/by-provider/{provider_id}", response_model=list[ProviderDocumentResponse])
@@ -26,14 +40,40 @@ def list_documents(provider_id: int, db: Session = Depends(get_db)):
     return get_documents_by_provider(db, provider_id)
 
 
+@router.post("/batch-delete", response_model=dict)
+async def delete_documents(
+    payload: ProviderDocumentBatchDelete, db: Session = Depends(get_db)
+):
+    return await delete_provider_documents(db, payload.ids)
+
+
+@router.api_route("/{doc_id}/download", methods=["GET", "HEAD"])
+async def download_document(
+    doc_id: int, request: Request, db: Session = Depends(get_db)
+):
+    # Contratos grandes: se envían por bloques o los sirve nginx/S3
+    doc = await run_in_threadpool(get_provider_document, db, doc_id)
+    return await document_response(request, doc)
+
+
+@router.get("/{doc_id}/download-url", response_model=dict)
+async def get_download_url(
+    doc_id: int, expires_in: int = ExpiresIn, db: Session = Depends(get_db)
+):
+    doc = await run_in_threadpool(get_provider_document, db, doc_id)
+    return document_url(doc, expires_in)
+
+
 @router.delete("/{doc_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_document(doc_id: int, db: Session = Depends(get_db)):
-    success = delete_provider_document(db, doc_id)
+async def delete_document(doc_id: int, db: Session = Depends(get_db)):
+    success = await delete_provider_document(db, doc_id)
     if not success:
         raise HTTPException(status_code=404, detail="Documento no encontrado")
     return
 
 
 @router.get("/", response_model=list[ProviderDocumentResponse])
-def list_all_documents(db: Session = Depends(get_db)):
-    return get_all_provider_documents(db)
+def list_all_documents(
+    response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)
+):
+    return page_response(response, get_all_provider_documents(db, page))
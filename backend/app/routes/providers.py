@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
 from sqlalchemy.orm import Session
+from app.core.pagination import PageParams, page_response
 from app.database import get_db
-from app.schemas.provider import ProviderCreate, ProviderResponse
+from app.schemas.provider import (
+    ProviderCreate,
+    ProviderResponse,
+    ProviderSearchResponse,
+)
 from app.models.provider import Provider
 from typing import Optional, List
+import time
 from app.services.provider_service import (
     create_provider,
     get_providers,
@@ -12,7 +18,15 @@ from app.services.provider_service import (
     update_provider,
     bulk_create_providers,
 )
-from typing import List
+from app.services.provider_import import ImportFormatError, import_providers
+from app.services.provider_search import (
+    PROVIDER_SEARCH_MAX_LIMIT,
+    PROVIDER_TYPEAHEAD_MAX_LIMIT,
+    TYPEAHEAD_FIELDS,
+    provider_filters,
+    search_providers,
+    typeahead,
+)
 
 router = APIRouter(prefix="/providers", tags=["Providers"])
 
@@ -31,27 +45,70 @@ def get_distinct_countries(db: Session = Depends(get_db)):
 
 @router.get("/filter", response_model=List[ProviderResponse])
 def filter_providers(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     company: Optional[str] = None,
     country: Optional[str] = None,
     line: Optional[str] = None,
-    cost_min: float = 0.0,
-    cost_max: float = 9999999.0,
+    category: Optional[str] = None,
+    cost_min: Optional[float] = None,
+    cost_max: Optional[float] = None,
 ) -> List[ProviderResponse]:
-    query = db.query(Provider)
-    if company:
-        query = query.filter(Provider.company.ilike(f"%{company}%"))
-    if country:
-        query = query.filter(Provider.country.ilike(f"%{country}%"))
-    if line:
-        query = query.filter(Provider.line.ilike(f"%{line}%"))
-    query = query.filter(Provider.cost_usd >= cost_min, Provider.cost_usd <= cost_max)
-    return query.all()
+    # Los filtros por contenido usan los índices de trigramas (pg_trgm)
+    query = db.query(Provider).filter(
+        *provider_filters(company, country, line, category, cost_min, cost_max)
+    )
+    return page_response(response, get_providers(db, page, query))
+
+
+@router.get("/search", response_model=ProviderSearchResponse)
+def search_providers_endpoint(
+    q: Optional[str] = Query(None, max_length=200),
+    company: Optional[str] = None,
+    country: Optional[str] = None,
+    line: Optional[str] = None,
+    category: Optional[str] = None,
+    cost_min: Optional[float] = None,
+    cost_max: Optional[float] = None,
+    limit: int = Query(20, ge=1, le=PROVIDER_SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    Busca proveedores por nombre, empresa o email (``q``, tolera errores de
+    tipeo) combinando los filtros; ordena por relevancia.
+    """
+    return search_providers(
+        db,
+        q,
+        limit,
+        offset,
+        company=company,
+        country=country,
+        line=line,
+        category=category,
+        cost_min=cost_min,
+        cost_max=cost_max,
+    )
+
+
+@router.get("/typeahead", response_model=List[str])
+def typeahead_providers(
+    q: str = Query(..., min_length=1, max_length=100),
+    field: str = Query("name", pattern=f"^({'|'.join(TYPEAHEAD_FIELDS)})$"),
+    limit: int = Query(10, ge=1, le=PROVIDER_TYPEAHEAD_MAX_LIMIT),
+    db: Session = Depends(get_db),
+):
+    """Sugerencias para autocompletar ``field``: primero las que empiezan con ``q``."""
+    return typeahead(db, field, q, limit)
 
 
 @router.get("/", response_model=List[ProviderResponse])
-def list_providers(db: Session = Depends(get_db)):
-    return get_providers(db)
+def list_providers(
+    response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)
+):
+    return page_response(response, get_providers(db, page))
 
 
 @router.post("/", response_model=ProviderResponse)
@@ -90,9 +147,47 @@ def bulk_upload_providers(
 ):
     """Carga masiva de proveedores desde un JSON, evitando duplicados"""
     try:
-        added_providers = bulk_create_providers(db, providers)
-        return {"message": f"{len(added_providers)} proveedores subidos exitosamente"}
+        start = time.perf_counter()
+        result = bulk_create_providers(db, providers)
+        elapsed = time.perf_counter() - start
+        return {
+            "message": f"{result['created']} proveedores subidos exitosamente",
+            **result,
+            "elapsed_seconds": round(elapsed, 4),
+            "rows_per_second": round(len(providers) / elapsed, 1) if elapsed else None,
+        }
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error al procesar la carga: {str(e)}"
         )
+
+
+@router.post("/import")
+def import_providers_file(
+    file: UploadFile = File(...),
+    mode: str = Query("skip", pattern="^(skip|upsert)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    Importa proveedores desde un archivo CSV o XLSX leyéndolo por streaming.
+    ``mode=skip`` omite emails existentes; ``mode=upsert`` los actualiza.
+    """
+    start = time.perf_counter()
+    try:
+        result = import_providers(db, file.filename, file.file, mode)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error al procesar la importación: {str(e)}"
+        )
+    elapsed = time.perf_counter() - start
+    return {
+        "message": f"{result['created']} proveedores importados, "
+        f"{result['updated']} actualizados",
+        **result,
+        "elapsed_seconds": round(elapsed, 4),
+        "rows_per_second": (
+            round(result["processed"] / elapsed, 1) if elapsed else None
+        ),
+    }
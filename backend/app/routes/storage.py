@@ -0,0 +1,123 @@
+# app/routes/storage.py
+"""
+Descarga de objetos del storage.
+
+``GET /storage/{key}`` sirve las URLs de ``storage.public_url`` y de
+``storage.signed_url``. Con ``STORAGE_REQUIRE_SIGNED_URLS`` sólo se aceptan
+URLs firmadas y vigentes.
+
+``object_response`` elige cómo enviar el archivo sin pasarlo por la memoria
+de Python (``document_response`` hace lo mismo para un ``Document`` o
+``ProviderDocument``):
+
+- backend local: ``RangeFileResponse`` (rangos, ETag, 304), o, con
+  ``STORAGE_ACCEL_REDIRECT``, sólo el header ``X-Accel-Redirect`` para que
+  nginx lo envíe con ``sendfile``;
+- S3: redirección 307 a una URL prefirmada.
+"""
+import mimetypes
+import os
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import RedirectResponse, Response
+
+from app.core.file_response import RangeFileResponse
+from app.services import storage as storage_service
+from app.services.storage import (
+    STORAGE_SIGNED_URL_MAX_TTL,
+    STORAGE_SIGNED_URL_TTL,
+    StorageError,
+    content_disposition,
+    verify_url_signature,
+)
+
+STORAGE_REQUIRE_SIGNED_URLS = os.getenv(
+    "STORAGE_REQUIRE_SIGNED_URLS", "false"
+).lower() in ("1", "true", "yes")
+# Prefijo de la location interna de nginx que apunta a STORAGE_DIR
+# (por ejemplo ``/_storage/``); vacío: la API envía el archivo
+STORAGE_ACCEL_REDIRECT = os.getenv("STORAGE_ACCEL_REDIRECT", "")
+
+router = APIRouter()
+
+
+async def object_response(
+    request: Request, key: str, file_name: Optional[str] = None
+) -> Response:
+    backend = storage_service.storage
+    try:
+        path = backend.local_path(key)
+    except StorageError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if path is None:
+        return RedirectResponse(
+            backend.signed_url(key, STORAGE_SIGNED_URL_TTL, file_name),
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        )
+
+    headers = {}
+    if file_name:
+        headers["content-disposition"] = content_disposition(file_name)
+    media_type = mimetypes.guess_type(file_name or key)[0] or "application/octet-stream"
+    if STORAGE_ACCEL_REDIRECT:
+        headers["x-accel-redirect"] = (
+            STORAGE_ACCEL_REDIRECT.rstrip("/") + "/" + quote(key)
+        )
+        return Response(headers=headers, media_type=media_type)
+    try:
+        f = await run_in_threadpool(open, path, "rb")
+    except (FileNotFoundError, IsADirectoryError):
+        raise HTTPException(status_code=404, detail="File not found")
+    return RangeFileResponse(f, request.headers, media_type, headers, request.method)
+
+
+async def document_response(request: Request, doc) -> Response:
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if not doc.storage_key:
+        # Archivo subido fuera de la API: sólo se conoce su URL
+        return RedirectResponse(
+            doc.file_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT
+        )
+    return await object_response(request, doc.storage_key, doc.file_name)
+
+
+def document_url(doc, expires_in: int) -> dict:
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if not doc.storage_key:
+        return {"url": doc.file_url, "expires_in": None}
+    url = storage_service.storage.signed_url(doc.storage_key, expires_in, doc.file_name)
+    return {"url": url, "expires_in": expires_in}
+
+
+# Validez pedida para una URL firmada
+ExpiresIn = Query(STORAGE_SIGNED_URL_TTL, ge=1, le=STORAGE_SIGNED_URL_MAX_TTL)
+
+
+@router.api_route(
+    "/{key:path}",
+    methods=["GET", "HEAD"],
+    summary="Download Stored File",
+    description="Serve a stored file. Supports Range requests and conditional GETs.",
+)
+async def get_object(
+    request: Request,
+    key: str,
+    expires: Optional[int] = None,
+    signature: Optional[str] = None,
+    filename: Optional[str] = None,
+):
+    if signature is not None or expires is not None:
+        if (
+            signature is None
+            or expires is None
+            or not verify_url_signature(key, expires, signature, filename)
+        ):
+            raise HTTPException(status_code=403, detail="Invalid or expired signature")
+    elif STORAGE_REQUIRE_SIGNED_URLS:
+        raise HTTPException(status_code=403, detail="A signed URL is required")
+    return await object_response(request, key, filename)
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
+from app.core.pagination import LimitedPageParams, page_response
 
 import app.services.technical_leader as technical_leader_service
 from app.models.technical_leader import TechnicalLeader
@@ -19,7 +20,7 @@ tag_name = "Technical Leaders"
 @router.post(
     "/technical-leaders", response_model=TechnicalLeaderResponse, tags=[tag_name]
 )
-async def create_new_technical_leader(
+def create_new_technical_leader(
     technical_leader_data: TechnicalLeaderCreate, db: Session = Depends(get_db)
 ):
     return technical_leader_service.create_technical_leader(db, technical_leader_data)
@@ -28,8 +29,14 @@ async def create_new_technical_leader(
 @router.get(
     "/technical-leaders", response_model=list[TechnicalLeaderResponse], tags=[tag_name]
 )
-async def get_technical_leaders(db: Session = Depends(get_db)):
-    return technical_leader_service.get_technical_leaders(db)
+def get_technical_leaders(
+    response: Response,
+    page: LimitedPageParams = Depends(),
+    db: Session = Depends(get_db),
+):
+    return page_response(
+        response, technical_leader_service.get_technical_leaders(db, page)
+    )
 
 
 @router.put(
@@ -37,7 +44,7 @@ async def get_technical_leaders(db: Session = Depends(get_db)):
     response_model=TechnicalLeaderResponse,
     tags=[tag_name],
 )
-async def update_technical_leader(
+def update_technical_leader(
     technical_leader_id: int,
     technical_leader_data: TechnicalLeaderUpdate,
     db: Session = Depends(get_db),
@@ -55,9 +62,7 @@ async def update_technical_leader(
     response_model=TechnicalLeaderResponse,
     tags=[tag_name],
 )
-async def delete_technical_leader(
-    technical_leader_id: int, db: Session = Depends(get_db)
-):
+def delete_technical_leader(technical_leader_id: int, db: Session = Depends(get_db)):
     db_technical_leader = technical_leader_service.delete_technical_leader(
         db, technical_leader_id
     )
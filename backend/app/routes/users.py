@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
+from app.database import get_async_db, get_db
+from app.core.pagination import LimitedPageParams, page_response
 
 import app.services.user as user_service
 from app.schemas.user import User, UserCreate, UserResponse, UserUpdate
@@ -14,19 +16,21 @@ tag_name = "Users"
 
 
 @router.post("/", response_model=UserResponse, tags=[tag_name])
-async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
+def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
     return user_service.create_user(db, user_data)
 
 
 @router.get("/", response_model=List[UserResponse], tags=[tag_name])
-async def get_users(db: Session = Depends(get_db)):
-    return user_service.get_users(db)
+async def get_users(
+    response: Response,
+    page: LimitedPageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return page_response(response, await user_service.get_users_async(db, page))
 
 
 @router.put("/{user_id}", response_model=UserResponse, tags=[tag_name])
-async def update_user(
-    user_id: int, user_data: UserUpdate, db: Session = Depends(get_db)
-):
+def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_db)):
     db_user = user_service.update_user(db, user_id, user_data)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -34,7 +38,7 @@ async def update_user(
 
 
 @router.delete("/{user_id}", response_model=UserResponse, tags=[tag_name])
-async def delete_user(user_id: int, db: Session = Depends(get_db)):
+def delete_user(user_id: int, db: Session = Depends(get_db)):
     user = user_service.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class DocumentBase(BaseModel):
@@ -10,11 +10,37 @@ class DocumentBase(BaseModel):
 
 
 class DocumentCreate(DocumentBase):
-    pass
+    file_size: Optional[int] = None
+    sha256: Optional[str] = None
+    storage_key: Optional[str] = None
+
+
+class DocumentBatchDelete(BaseModel):
+    ids: List[int]
+
+
+class DocumentUploadStart(BaseModel):
+    file_name: str
+    content_type: Optional[str] = None
+
+
+class DocumentUploadPart(BaseModel):
+    part_number: int
+    etag: Optional[str] = None
+
+
+class DocumentUploadComplete(BaseModel):
+    # Without parts, every part received so far is used
+    parts: Optional[List[DocumentUploadPart]] = None
 
 
 class DocumentResponse(DocumentBase):
+    # Used by the download, delete and search endpoints
     id: int
+    sha256: Optional[str] = None
+    storage_key: Optional[str] = None
+    file_size: Optional[int] = None
+    sha256: Optional[str] = None
     uploaded_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
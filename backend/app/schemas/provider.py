@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 
 
 class ProviderBase(BaseModel):
@@ -22,3 +22,14 @@ class ProviderResponse(ProviderBase):
 
     class Config:
         from_attributes = True
+
+
+class ProviderSearchHit(ProviderResponse):
+    # Relevancia respecto de ``q`` (``None`` si no se buscó texto)
+    rank: Optional[float] = None
+
+
+class ProviderSearchResponse(BaseModel):
+    query: Optional[str] = None
+    total: int
+    hits: List[ProviderSearchHit]
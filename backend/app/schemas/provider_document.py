@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class ProviderSimple(BaseModel):
@@ -17,12 +17,18 @@ class ProviderDocumentBase(BaseModel):
 
 
 class ProviderDocumentCreate(ProviderDocumentBase):
-    pass
+    # Clave del archivo en el storage, si se subió a través de la API
+    storage_key: Optional[str] = None
+
+
+class ProviderDocumentBatchDelete(BaseModel):
+    ids: List[int]
 
 
 class ProviderDocumentResponse(ProviderDocumentBase):
     id: int
     uploaded_at: datetime
+    storage_key: Optional[str] = None
     provider: Optional[ProviderSimple]  # <- Aquí incluyes la relación
 
     model_config = ConfigDict(from_attributes=True)
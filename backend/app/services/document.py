@@ -1,17 +1,58 @@
 from sqlalchemy.orm import Session
 from app.models.document import Document
+from app.models.document_upload import DocumentUpload
 from app.schemas.document import DocumentCreate
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
 import os
+import uuid
 from datetime import datetime
-from app.services.supabase_client import finup_bucket
-from typing import Optional
+from app.services import storage as storage_service
+from app.services.search import DOCUMENT, remove_from_index
+from app.services.storage_gc import mark_for_deletion, schedule_sweep
+from app.services.storage import (
+    STORAGE_CHUNK_SIZE,
+    STORAGE_PART_SIZE,
+    StorageError,
+    UploadNotFound,
+)
+from typing import AsyncIterator, List, Optional
+from app.core.pagination import PageParams, PageSpec, paginate
+
+DOCUMENT_PAGE = PageSpec(Document, ["file_name", "file_type", "uploaded_at"])
+
+
+class DocumentUploadError(Exception):
+    pass
+
+
+class DocumentUploadNotFound(DocumentUploadError):
+    pass
+
+
+def _storage():
+    # Resolved on each call so tests can swap the backend
+    return storage_service.storage
+
+
+def _document_key(file_name: Optional[str]) -> str:
+    # Create unique filename
+    file_ext = os.path.splitext(file_name)[1] if file_name else ""
+    return f"documents/{datetime.now().timestamp()}{file_ext}"
+
+
+async def iter_upload(
+    file: UploadFile, chunk_size: int = STORAGE_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Read an upload in fixed-size chunks instead of all at once"""
+    while chunk := await file.read(chunk_size):
+        yield chunk
 
 
 async def upload_and_create_document(
     db: Session, file: UploadFile, file_url: Optional[str] = None
 ) -> Document:
-    """Upload file to Supabase and create document record"""
+    """Upload file to storage and create document record"""
     # Get file extension
     file_ext = os.path.splitext(file.filename)[1] if file.filename else ""
 
@@ -24,66 +65,198 @@ async def upload_and_create_document(
             file_type=file_ext.lstrip("."),
         )
     else:
-        # Upload to storage as before
-        file_content = await file.read()
-
-        # Create unique filename
-        unique_filename = f"{datetime.now().timestamp()}{file_ext}"
-
         # Upload to storage
-        upload_path = f"documents/{unique_filename}"
-        upload_result = await finup_bucket.upload(
-            upload_path, file_content, {"contentType": file.content_type}
-        )
-
-        if upload_result.error:
-            raise Exception(f"Error uploading file: {upload_result.error}")
-
-        # Get public URL
-        url_result = finup_bucket.get_public_url(upload_path)
+        key = _document_key(file.filename)
+        try:
+            stored = await _storage().upload_stream(
+                key, iter_upload(file), file.content_type
+            )
+        except StorageError as e:
+            raise Exception(f"Error uploading file: {e}")
 
         # Create document record
         doc_data = DocumentCreate(
             file_name=file.filename,
-            file_url=url_result.publicUrl,
+            file_url=_storage().public_url(key),
             file_type=file_ext.lstrip("."),
+            file_size=stored["size"],
+            sha256=stored["sha256"],
+            storage_key=key,
+        )
+
+    # Create and save document (sync session: keep it off the event loop)
+    return await run_in_threadpool(_save_document, db, doc_data)
+
+
+def _save_upload(db: Session, upload: DocumentUpload) -> DocumentUpload:
+    db.add(upload)
+    db.commit()
+    return upload
+
+
+def _get_upload(db: Session, upload_id: str) -> DocumentUpload:
+    upload = db.get(DocumentUpload, upload_id)
+    if upload is None:
+        raise DocumentUploadNotFound("Upload not found")
+    return upload
+
+
+async def _load_upload(db: Session, upload_id: str) -> DocumentUpload:
+    return await run_in_threadpool(_get_upload, db, upload_id)
+
+
+async def start_document_upload(
+    db: Session, file_name: str, content_type: Optional[str] = None
+) -> dict:
+    """Start a resumable upload; parts are then sent with ``upload_document_part``"""
+    key = _document_key(file_name)
+    try:
+        backend_id = await _storage().create_multipart_upload(key, content_type)
+    except StorageError as e:
+        raise DocumentUploadError(str(e))
+    upload = DocumentUpload(
+        id=uuid.uuid4().hex,
+        upload_id=backend_id,
+        storage_key=key,
+        file_name=file_name,
+        content_type=content_type,
+    )
+    await run_in_threadpool(_save_upload, db, upload)
+    return {"upload_id": upload.id, "part_size": STORAGE_PART_SIZE}
+
+
+async def upload_document_part(
+    db: Session,
+    upload_id: str,
+    part_number: int,
+    chunks: AsyncIterator[bytes],
+    size: Optional[int] = None,
+) -> dict:
+    upload = await _load_upload(db, upload_id)
+    try:
+        return await _storage().upload_part(
+            upload.storage_key, upload.upload_id, part_number, chunks, size
         )
+    except UploadNotFound:
+        raise DocumentUploadNotFound("Upload not found")
+    except StorageError as e:
+        raise DocumentUploadError(str(e))
+
+
+async def get_document_upload(db: Session, upload_id: str) -> dict:
+    """Parts received so far, so a client can resume an interrupted upload"""
+    upload = await _load_upload(db, upload_id)
+    try:
+        parts = await _storage().list_parts(upload.storage_key, upload.upload_id)
+    except UploadNotFound:
+        raise DocumentUploadNotFound("Upload not found")
+    return {
+        "upload_id": upload.id,
+        "file_name": upload.file_name,
+        "part_size": STORAGE_PART_SIZE,
+        "parts": parts,
+    }
+
 
-    # Create and save document
+def _finish_upload(db: Session, upload: DocumentUpload, doc_data: DocumentCreate):
     db_doc = Document(**doc_data.model_dump())
     db.add(db_doc)
+    db.delete(upload)
     db.commit()
     db.refresh(db_doc)
     return db_doc
 
 
-def get_all_documents(db: Session):
-    """Get all documents"""
-    return db.query(Document).all()
+async def complete_document_upload(
+    db: Session, upload_id: str, parts: Optional[List[dict]] = None
+) -> Document:
+    """Join the uploaded parts and create the document record"""
+    upload = await _load_upload(db, upload_id)
+    try:
+        stored = await _storage().complete_multipart_upload(
+            upload.storage_key, upload.upload_id, parts
+        )
+    except UploadNotFound:
+        raise DocumentUploadNotFound("Upload not found")
+    except StorageError as e:
+        raise DocumentUploadError(str(e))
 
+    doc_data = DocumentCreate(
+        file_name=upload.file_name,
+        file_url=_storage().public_url(upload.storage_key),
+        file_type=os.path.splitext(upload.file_name)[1].lstrip("."),
+        file_size=stored["size"],
+        sha256=stored["sha256"],
+        storage_key=upload.storage_key,
+    )
+    return await run_in_threadpool(_finish_upload, db, upload, doc_data)
 
-def delete_document(db: Session, doc_id: int):
-    """Delete a document"""
-    db_doc = db.query(Document).get(doc_id)
-    if not db_doc:
-        return False
 
-    # Delete from storage if URL exists
-    if db_doc.file_url:
-        try:
-            # Extract path from URL
-            # Extract the path part after storage/
-            parts = db_doc.file_url.split("/storage/")
-            if len(parts) > 1:
-                path = parts[1]
-                finup_bucket.remove(path)
-            else:
-                # Fallback method
-                path = db_doc.file_url.split("/")[-1]
-                finup_bucket.remove(f"documents/{path}")
-        except Exception as e:
-            print(f"Error deleting from storage: {e}")
-
-    db.delete(db_doc)
+def _delete_upload(db: Session, upload: DocumentUpload):
+    db.delete(upload)
+    db.commit()
+
+
+async def abort_document_upload(db: Session, upload_id: str):
+    upload = await _load_upload(db, upload_id)
+    try:
+        await _storage().abort_multipart_upload(upload.storage_key, upload.upload_id)
+    except UploadNotFound:
+        pass
+    except StorageError as e:
+        raise DocumentUploadError(str(e))
+    await run_in_threadpool(_delete_upload, db, upload)
+
+
+def _save_document(db: Session, doc_data: DocumentCreate) -> Document:
+    db_doc = Document(**doc_data.model_dump())
+    db.add(db_doc)
     db.commit()
-    return True
+    db.refresh(db_doc)
+    return db_doc
+
+
+def get_all_documents(db: Session, page: PageParams = None):
+    """Get a page of documents"""
+    return paginate(db.query(Document), page, DOCUMENT_PAGE)
+
+
+def get_document(db: Session, doc_id: int) -> Optional[Document]:
+    return db.get(Document, doc_id)
+
+
+def _delete_rows(db: Session, doc_ids: List[int]) -> List[int]:
+    rows = (
+        db.query(Document.id, Document.storage_key)
+        .filter(Document.id.in_(doc_ids))
+        .all()
+    )
+    if rows:
+        db.query(Document).filter(Document.id.in_([row.id for row in rows])).delete(
+            synchronize_session=False
+        )
+        # Files are removed later by the storage sweeper (app/services/storage_gc.py)
+        mark_for_deletion(db, [row.storage_key for row in rows])
+        remove_from_index(db, DOCUMENT, [row.id for row in rows])
+        db.commit()
+    return [row.id for row in rows]
+
+
+async def delete_documents(db: Session, doc_ids: List[int]) -> dict:
+    """
+    Delete several documents with one query and one commit, whatever their
+    number; their files are queued for the storage sweeper
+    """
+    deleted = set(await run_in_threadpool(_delete_rows, db, doc_ids))
+    if deleted:
+        schedule_sweep()
+    return {
+        "deleted": len(deleted),
+        "not_found": [doc_id for doc_id in doc_ids if doc_id not in deleted],
+    }
+
+
+async def delete_document(db: Session, doc_id: int):
+    """Delete a document"""
+    result = await delete_documents(db, [doc_id])
+    return result["deleted"] == 1
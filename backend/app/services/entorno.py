@@ -2,6 +2,12 @@ from sqlalchemy.orm import Session
 
 from app.models.entorno import Entorno
 from app.schemas.entorno import EntornoCreate
+from app.core.pagination import PageParams, PageSpec, paginate
+
+ENTORNO_PAGE = PageSpec(
+    Entorno,
+    ["name", "status", "creation_date", "technical_leader_id", "functional_leader_id"],
+)
 
 
 def create_entorno(db: Session, entorno_data: EntornoCreate):
@@ -12,8 +18,8 @@ def create_entorno(db: Session, entorno_data: EntornoCreate):
     return db_entorno
 
 
-def get_entornos(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Entorno).offset(skip).limit(limit).all()
+def get_entornos(db: Session, page: PageParams = None):
+    return paginate(db.query(Entorno), page, ENTORNO_PAGE)
 
 
 def get_entorno_by_id(db: Session, entorno_id: int):
@@ -1,5 +1,9 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from collections import defaultdict
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, select
 from app.models.evc_financial import EVC_Financial
 from app.schemas.evc_financial import (
     EVC_FinancialCreate,
@@ -8,79 +12,102 @@ from app.schemas.evc_financial import (
 )
 from app.models.provider import Provider
 from app.models.evc_q import EVC_Q
-from app.services.rule_evaluator import evaluate_rules
-from app.database import SessionLocal
+from app.services.rule_queue import enqueue_rule_evaluation
+from app.services.spending import (
+    apply_ledger_delta,
+    get_spendings_by_evc_qs,
+    get_quarter_status,
+    record_financial_change,
+    snapshot_financial,
+)
 from sqlalchemy.sql import text
+from app.core.pagination import PageParams, PageSpec, paginate, paginate_async
+
+EVC_FINANCIAL_PAGE = PageSpec(
+    EVC_Financial,
+    ["evc_q_id", "provider_id", "created_at", "concept", "value_usd"],
+)
 
 
 def create_evc_financial(db: Session, evc_financial_data: EVC_FinancialCreate):
     db_evc_financial = EVC_Financial(**evc_financial_data.dict())
     db.add(db_evc_financial)
+    db.flush()
+    record_financial_change(db, None, snapshot_financial(db, db_evc_financial))
     db.commit()
     db.refresh(db_evc_financial)
 
-    # Store financial_id and evc_q_id for rule evaluation
-    financial_id = db_evc_financial.id
-    evc_q_id = db_evc_financial.evc_q_id
-
-    # Use a separate session for rule evaluation
-    try:
-        eval_db = SessionLocal()
-        try:
-            evaluate_rules(
-                eval_db, changed_table="evc_financial", changed_id=financial_id
-            )
-            if evc_q_id:
-                evaluate_rules(eval_db, changed_table="evc_q", changed_id=evc_q_id)
-        finally:
-            eval_db.close()
-    except Exception as e:
-        print(f"Error evaluating rules after creating financial: {e}")
+    # Evaluate financial and quarter rules off the request path
+    enqueue_rule_evaluation("evc_financial", db_evc_financial.id, db)
+    enqueue_rule_evaluation("evc_q", db_evc_financial.evc_q_id, db)
 
     return db_evc_financial
 
 
 def create_evc_financial_concept(
-    db: Session, evc_financial_data: EVC_FinancialCreateConcept
+    db: Session,
+    evc_financial_data: EVC_FinancialCreateConcept,
+    source_sha256: Optional[str] = None,
 ):
-    db_evc_financial = EVC_Financial(**evc_financial_data.model_dump())
+    db_evc_financial = EVC_Financial(
+        **evc_financial_data.model_dump(), source_sha256=source_sha256
+    )
     db.add(db_evc_financial)
+    db.flush()
+    record_financial_change(db, None, snapshot_financial(db, db_evc_financial))
     db.commit()
     db.refresh(db_evc_financial)
 
-    # Store the ID and evc_q_id for rule evaluation
-    financial_id = db_evc_financial.id
-    evc_q_id = db_evc_financial.evc_q_id
-
-    # Add rule evaluation to trigger budget usage notifications
-    # Use a separate try/except block to avoid transaction conflicts
-    try:
-        # Create a new session for rule evaluation to avoid transaction conflicts
-        eval_db = SessionLocal()
-        try:
-            # First evaluate financial rules
-            evaluate_rules(
-                eval_db, changed_table="evc_financial", changed_id=financial_id
-            )
-
-            # Then evaluate EVC_Q rules since budget usage notifications are tied to quarters
-            if evc_q_id:
-                evaluate_rules(eval_db, changed_table="evc_q", changed_id=evc_q_id)
-        finally:
-            eval_db.close()
-    except Exception as e:
-        print(f"Error evaluating rules after creating financial concept: {e}")
-        # Don't fail the transaction if rule evaluation fails
+    # Evaluate financial rules, then EVC_Q rules since budget usage
+    # notifications are tied to quarters. Both run after the commit, off
+    # the request path.
+    enqueue_rule_evaluation("evc_financial", db_evc_financial.id, db)
+    enqueue_rule_evaluation("evc_q", db_evc_financial.evc_q_id, db)
 
     return db_evc_financial
 
 
+def create_evc_financials_batch(
+    db: Session,
+    evc_financials_data: List[EVC_FinancialCreateConcept],
+    source_hashes: Optional[List[Optional[str]]] = None,
+) -> List[EVC_Financial]:
+    """
+    Crea varios conceptos en una sola transacción. El ledger recibe un delta
+    por cuatrimestre y las reglas se evalúan una vez por cuatrimestre afectado.
+    ``source_hashes`` (opcional) va en paralelo a ``evc_financials_data``.
+    """
+    source_hashes = source_hashes or [None] * len(evc_financials_data)
+    db_evc_financials = [
+        EVC_Financial(**data.model_dump(), source_sha256=source_sha256)
+        for data, source_sha256 in zip(evc_financials_data, source_hashes)
+    ]
+    db.add_all(db_evc_financials)
+    db.flush()
+
+    deltas = defaultdict(float)
+    for db_evc_financial in db_evc_financials:
+        deltas[db_evc_financial.evc_q_id] += db_evc_financial.value_usd or 0.0
+    for evc_q_id, delta in deltas.items():
+        apply_ledger_delta(db, evc_q_id, delta)
+    db.commit()
+
+    for evc_q_id in deltas:
+        enqueue_rule_evaluation("evc_q", evc_q_id, db)
+    return db_evc_financials
+
+
 def get_evc_financial_by_id(db: Session, evc_financial_id: int):
     return db.query(EVC_Financial).filter(EVC_Financial.id == evc_financial_id).first()
 
 
-def get_evc_financials(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(EVC_Financial).offset(skip).limit(limit).all()
+def get_evc_financials(db: Session, page: PageParams = None):
+    return paginate(db.query(EVC_Financial), page, EVC_FINANCIAL_PAGE)
+
+
+async def get_evc_financials_async(db: AsyncSession, page: PageParams = None):
+    statement = select(EVC_Financial).options(selectinload(EVC_Financial.provider))
+    return await paginate_async(db, statement, page, EVC_FINANCIAL_PAGE)
 
 
 def update_evc_financial(
@@ -90,25 +117,19 @@ def update_evc_financial(
     if db_evc_financial:
         # Store evc_q_id before update
         evc_q_id = db_evc_financial.evc_q_id
+        before = snapshot_financial(db, db_evc_financial)
 
         for key, value in evc_financial_data.dict(exclude_unset=True).items():
             setattr(db_evc_financial, key, value)
+        record_financial_change(db, before, snapshot_financial(db, db_evc_financial))
         db.commit()
         db.refresh(db_evc_financial)
 
-        # Use a separate session for rule evaluation
-        try:
-            eval_db = SessionLocal()
-            try:
-                evaluate_rules(
-                    eval_db, changed_table="evc_financial", changed_id=evc_financial_id
-                )
-                if evc_q_id:
-                    evaluate_rules(eval_db, changed_table="evc_q", changed_id=evc_q_id)
-            finally:
-                eval_db.close()
-        except Exception as e:
-            print(f"Error evaluating rules after updating financial: {e}")
+        # Evaluate rules after the commit, off the request path
+        enqueue_rule_evaluation("evc_financial", evc_financial_id, db)
+        enqueue_rule_evaluation("evc_q", evc_q_id, db)
+        if db_evc_financial.evc_q_id != evc_q_id:
+            enqueue_rule_evaluation("evc_q", db_evc_financial.evc_q_id, db)
     return db_evc_financial
 
 
@@ -117,44 +138,20 @@ def delete_evc_financial(db: Session, evc_financial_id: int):
     if db_evc_financial:
         # Store evc_q_id before deletion
         evc_q_id = db_evc_financial.evc_q_id
+        before = snapshot_financial(db, db_evc_financial)
 
         db.delete(db_evc_financial)
+        record_financial_change(db, before, None)
         db.commit()
 
-        # Use a separate session for rule evaluation
-        try:
-            eval_db = SessionLocal()
-            try:
-                evaluate_rules(
-                    eval_db, changed_table="evc_financial", changed_id=evc_financial_id
-                )
-                if evc_q_id:
-                    evaluate_rules(eval_db, changed_table="evc_q", changed_id=evc_q_id)
-            finally:
-                eval_db.close()
-        except Exception as e:
-            print(f"Error evaluating rules after deleting financial: {e}")
+        # Evaluate rules after the commit, off the request path
+        enqueue_rule_evaluation("evc_financial", evc_financial_id, db)
+        enqueue_rule_evaluation("evc_q", evc_q_id, db)
     return db_evc_financial
 
 
 def get_spendings_by_evc_q(db: Session, evc_q_id: int) -> float:
-    total = (
-        db.query(func.sum(Provider.cost_usd))
-        .join(EVC_Financial, EVC_Financial.provider_id == Provider.id)
-        .filter(EVC_Financial.evc_q_id == evc_q_id)
-        .scalar()
-    )
-    total2 = (
-        db.query(func.sum(EVC_Financial.value_usd))
-        .filter(EVC_Financial.evc_q_id == evc_q_id)
-        .scalar()
-    )
-    if total is None:
-        total = 0.0
-    if total2 is None:
-        total2 = 0.0
-
-    return total + total2 or 0.0
+    return get_spendings_by_evc_qs(db, [evc_q_id]).get(evc_q_id, 0.0)
 
 
 def get_providers_by_evc_q(db: Session, evc_q_id: int):
@@ -167,10 +164,14 @@ def get_providers_by_evc_q(db: Session, evc_q_id: int):
     return providers
 
 
-def get_percentage_by_evc_q(db: Session, evc_q_id: int) -> float:
-    total_spendings = get_spendings_by_evc_q(db, evc_q_id)
-    total_budget = (
-        db.query(EVC_Q.allocated_budget).filter(EVC_Q.id == evc_q_id).scalar()
+async def get_providers_by_evc_q_async(db: AsyncSession, evc_q_id: int):
+    statement = (
+        select(Provider)
+        .join(EVC_Financial, EVC_Financial.provider_id == Provider.id)
+        .filter(EVC_Financial.evc_q_id == evc_q_id)
     )
-    percentage = (total_spendings / total_budget) if total_budget else 0.0
-    return percentage
+    return (await db.execute(statement)).scalars().all()
+
+
+def get_percentage_by_evc_q(db: Session, evc_q_id: int) -> float:
+    return get_quarter_status(db, evc_q_id)["percentage"] / 100
@@ -1,10 +1,27 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from app.models.evc_q import EVC_Q
+from app.models.evc_financial import EVC_Financial
 from app.schemas.evc_q import EVC_QCreate, EVC_QUpdate
-from app.services.rule_evaluator import evaluate_rules
+from app.services.rule_queue import enqueue_rule_evaluation
+from app.services.spending import discard_quarter_ledger
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
+from app.core.pagination import PageParams, PageSpec, paginate, paginate_async
+
+EVC_Q_PAGE = PageSpec(
+    EVC_Q,
+    [
+        "evc_id",
+        "year",
+        "q",
+        "allocated_budget",
+        "allocated_percentage",
+        "creation_date",
+    ],
+)
 
 
 def predict_next_exp_smoothing(data, alpha=0.5):
@@ -53,12 +70,9 @@ def create_evc_q(db: Session, evc_q_data: EVC_QCreate):
         db.commit()
         db.refresh(db_evc_q)
 
-        # Evaluate rules in a separate transaction to prevent cascading failures
-        try:
-            evaluate_rules(db, changed_table="evc_q", changed_id=db_evc_q.id)
-        except SQLAlchemyError as e:
-            print(f"Error in rule evaluation: {e}")
-            # Log the error but don't fail the EVC_Q creation
+        # Evaluate rules after the commit, off the request path, so a rule
+        # failure never affects the EVC_Q creation
+        enqueue_rule_evaluation("evc_q", db_evc_q.id, db)
 
         return db_evc_q
     except SQLAlchemyError as e:
@@ -71,14 +85,27 @@ def get_evc_q_by_id(db: Session, evc_q_id: int):
     return db.query(EVC_Q).filter(EVC_Q.id == evc_q_id).first()
 
 
-def get_evc_qs(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(EVC_Q).offset(skip).limit(limit).all()
+def get_evc_qs(db: Session, page: PageParams = None):
+    query = db.query(EVC_Q).options(selectinload(EVC_Q.evc_financials))
+    return paginate(query, page, EVC_Q_PAGE)
+
+
+async def get_evc_qs_async(db: AsyncSession, page: PageParams = None):
+    statement = select(EVC_Q).options(
+        selectinload(EVC_Q.evc_financials).selectinload(EVC_Financial.provider)
+    )
+    return await paginate_async(db, statement, page, EVC_Q_PAGE)
 
 
 def get_evc_qs_by_evc_id(db: Session, evc_id: int):
     return db.query(EVC_Q).filter(EVC_Q.evc_id == evc_id).all()
 
 
+async def get_evc_qs_by_evc_id_async(db: AsyncSession, evc_id: int):
+    result = await db.execute(select(EVC_Q).filter(EVC_Q.evc_id == evc_id))
+    return result.scalars().all()
+
+
 def get_last_evc_q_by_evc_id(db: Session, evc_id: int):
     return (
         db.query(EVC_Q)
@@ -88,6 +115,16 @@ def get_last_evc_q_by_evc_id(db: Session, evc_id: int):
     )
 
 
+async def get_last_evc_q_by_evc_id_async(db: AsyncSession, evc_id: int):
+    statement = (
+        select(EVC_Q)
+        .filter(EVC_Q.evc_id == evc_id)
+        .order_by(EVC_Q.year.desc(), EVC_Q.q.desc())
+        .limit(1)
+    )
+    return (await db.execute(statement)).scalars().first()
+
+
 def update_evc_q(db: Session, evc_q_id: int, evc_q_data: EVC_QUpdate):
     db_evc_q = get_evc_q_by_id(db, evc_q_id)
     if db_evc_q:
@@ -97,12 +134,9 @@ def update_evc_q(db: Session, evc_q_id: int, evc_q_data: EVC_QUpdate):
             db.commit()
             db.refresh(db_evc_q)
 
-            # Evaluate rules in a separate transaction to prevent cascading failures
-            try:
-                evaluate_rules(db, changed_table="evc_q", changed_id=db_evc_q.id)
-            except SQLAlchemyError as e:
-                print(f"Error in rule evaluation during update: {e}")
-                # Log the error but don't fail the EVC_Q update
+            # Evaluate rules after the commit, off the request path, so a rule
+            # failure never affects the EVC_Q update
+            enqueue_rule_evaluation("evc_q", db_evc_q.id, db)
 
             return db_evc_q
         except SQLAlchemyError as e:
@@ -115,6 +149,7 @@ def update_evc_q(db: Session, evc_q_id: int, evc_q_data: EVC_QUpdate):
 def delete_evc_q(db: Session, evc_q_id: int):
     db_evc_q = get_evc_q_by_id(db, evc_q_id)
     if db_evc_q:
+        discard_quarter_ledger(db, [evc_q_id])
         db.delete(db_evc_q)
         db.commit()
     return db_evc_q
@@ -1,14 +1,32 @@
 # app/services/evc_service.py
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 from app.models.evc import EVC
-from app.models.provider import Provider
 from app.models.evc_q import EVC_Q
 from app.schemas.evc import EVCCreate, EVCUpdate, EVCResponse
-from app.services.rule_evaluator import evaluate_rules
+from app.services.rule_queue import enqueue_rule_evaluation
+from app.services.spending import (
+    apply_quarter_spendings,
+    apply_quarter_spendings_async,
+    discard_quarter_ledger,
+)
 from app.models.evc_financial import EVC_Financial
 from app.models.budget_allocation import BudgetAllocation
-from sqlalchemy import func
+from app.core.pagination import PageParams, PageSpec, paginate, paginate_async
+
+EVC_PAGE = PageSpec(
+    EVC,
+    [
+        "name",
+        "creation_date",
+        "technical_leader_id",
+        "functional_leader_id",
+        "entorno_id",
+        "status",
+    ],
+)
 
 
 def create_evc(db: Session, evc_data: EVCCreate):
@@ -16,76 +34,46 @@ def create_evc(db: Session, evc_data: EVCCreate):
     db.add(db_evc)
     db.commit()
     db.refresh(db_evc)
-    evaluate_rules(db, changed_table="evc", changed_id=db_evc.id)
+    enqueue_rule_evaluation("evc", db_evc.id, db)
     return db_evc
 
 
-def get_evcs(db: Session, skip: int = 0, limit: int = 100):
-    evcs = (
-        db.query(EVC)
-        .options(
-            joinedload(EVC.entorno),
-            joinedload(EVC.technical_leader),
-            joinedload(EVC.functional_leader),
-            joinedload(EVC.evc_qs)
-            .joinedload(EVC_Q.evc_financials)
-            .joinedload(EVC_Financial.provider),
-        )
-        .offset(skip)
-        .limit(limit)
-        .all()
+def get_evcs(db: Session, page: PageParams = None):
+    query = db.query(EVC).options(
+        joinedload(EVC.entorno),
+        joinedload(EVC.technical_leader),
+        joinedload(EVC.functional_leader),
+        selectinload(EVC.evc_qs),
     )
+    result = paginate(query, page, EVC_PAGE)
+
+    # Calculate spending information for every quarter of the page at once
+    quarters = [quarter for evc in result.items for quarter in evc.evc_qs]
+    apply_quarter_spendings(db, quarters)
+
+    return result
+
 
-    # Calculate spending information for each EVC quarter
-    for evc in evcs:
-        for quarter in evc.evc_qs:
-            # Calculate total spendings
-            total_spendings = (
-                db.query(func.sum(Provider.cost_usd))
-                .join(EVC_Financial, EVC_Financial.provider_id == Provider.id)
-                .filter(EVC_Financial.evc_q_id == quarter.id)
-                .scalar()
-                or 0.0
-            )
-
-            # Add manual spendings
-            manual_spendings = (
-                db.query(func.sum(EVC_Financial.value_usd))
-                .filter(EVC_Financial.evc_q_id == quarter.id)
-                .scalar()
-                or 0.0
-            )
-
-            total_spendings += manual_spendings
-
-            # Calculate percentage
-            percentage = (
-                (total_spendings / quarter.allocated_budget) * 100
-                if quarter.allocated_budget
-                else 0.0
-            )
-
-            # Add the calculated values to the quarter object
-            quarter.total_spendings = total_spendings
-            quarter.percentage = percentage
-
-            # Add budget message
-            if percentage >= 100:
-                quarter.budget_message = "No hay más presupuesto"
-            elif percentage >= 80:
-                quarter.budget_message = "Ya casi te quedas sin presupuesto"
-            elif percentage >= 50:
-                quarter.budget_message = "Vas a la mitad del presupuesto"
-            else:
-                quarter.budget_message = "Presupuesto suficiente"
-
-    return evcs
+async def get_evcs_async(db: AsyncSession, page: PageParams = None):
+    # EVCResponse solo expone los cuatrimestres de cada EVC
+    statement = select(EVC).options(selectinload(EVC.evc_qs))
+    result = await paginate_async(db, statement, page, EVC_PAGE)
+
+    quarters = [quarter for evc in result.items for quarter in evc.evc_qs]
+    await apply_quarter_spendings_async(db, quarters)
+
+    return result
 
 
 def get_evc_by_id(db: Session, evc_id: int):
     return db.query(EVC).filter(EVC.id == evc_id).first()
 
 
+async def get_evc_by_id_async(db: AsyncSession, evc_id: int):
+    statement = select(EVC).options(selectinload(EVC.evc_qs)).filter(EVC.id == evc_id)
+    return (await db.execute(statement)).scalar_one_or_none()
+
+
 def update_evc(db: Session, evc_id: int, evc_data: EVCUpdate):
     db_evc = get_evc_by_id(db, evc_id)
     if db_evc:
@@ -93,7 +81,7 @@ def update_evc(db: Session, evc_id: int, evc_data: EVCUpdate):
             setattr(db_evc, key, value)
         db.commit()
         db.refresh(db_evc)
-        evaluate_rules(db, changed_table="evc", changed_id=db_evc.id)
+        enqueue_rule_evaluation("evc", db_evc.id, db)
     return db_evc
 
 
@@ -109,6 +97,9 @@ def delete_evc(db: Session, evc_id: int):
         quarter_ids = [q.id for q in quarters]
 
         if quarter_ids:
+            # Drop the spending ledger rows of these quarters
+            discard_quarter_ledger(db, quarter_ids)
+
             # Delete all EVC_Financial records for these quarters
             db.query(EVC_Financial).filter(
                 EVC_Financial.evc_q_id.in_(quarter_ids)
@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
 from app.models.functional_leader import FunctionalLeader
 from app.schemas.functional_leader import FunctionalLeaderCreate, FunctionalLeaderUpdate
+from app.core.pagination import PageParams, PageSpec, paginate
+
+FUNCTIONAL_LEADER_PAGE = PageSpec(FunctionalLeader, ["name", "email", "entry_date"])
 
 
 def create_functional_leader(
@@ -21,8 +24,8 @@ def get_functional_leader(db: Session, functional_leader_id: int):
     )
 
 
-def get_functional_leaders(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(FunctionalLeader).offset(skip).limit(limit).all()
+def get_functional_leaders(db: Session, page: PageParams = None):
+    return paginate(db.query(FunctionalLeader), page, FUNCTIONAL_LEADER_PAGE)
 
 
 def update_functional_leader(
@@ -0,0 +1,111 @@
+import os
+from typing import Iterator, Optional, Tuple
+
+from app.core.optional_deps import optional_import
+from app.services.invoice_amounts import (
+    Amount,
+    best_total,
+    extract_total,
+    rows_from_words,
+    scan_total,
+)
+from app.services.invoice_ocr import (
+    INVOICE_OCR_ENABLED,
+    INVOICE_OCR_MAX_PAGES,
+    is_image,
+    needs_ocr,
+    rasterize_page,
+)
+
+INVOICE_MAX_PAGES = int(os.getenv("INVOICE_MAX_PAGES", "200"))
+
+# Subir al cambiar la extracción: invalida los resultados guardados en
+# invoice_parse (ver app/services/invoice_cache.py)
+PARSER_VERSION = 3
+
+# fitz.TEXT_MEDIABOX_CLIP (sin importar PyMuPDF al cargar el módulo)
+TEXT_FLAGS = 64
+
+
+class InvoiceParsingError(ValueError):
+    pass
+
+
+def iter_pages(
+    filename: str, content: bytes, max_pages: int = INVOICE_MAX_PAGES
+) -> Iterator:
+    """
+    Páginas de la factura de a una, sin extraer el documento completo en
+    memoria. Sólo se abren los PDF (las imágenes van directo al OCR).
+    """
+    if not filename.lower().endswith(".pdf"):
+        return
+
+    # PyMuPDF se importa en el primer uso (ver app/core/optional_deps.py)
+    fitz = optional_import("fitz", "La lectura de facturas PDF")
+    try:
+        doc = fitz.open(stream=content, filetype="pdf")
+    except Exception as e:
+        raise InvoiceParsingError(f"No se pudo abrir el PDF: {e}")
+    with doc:
+        if doc.page_count > max_pages:
+            raise InvoiceParsingError(
+                f"La factura tiene {doc.page_count} páginas (máximo {max_pages})"
+            )
+        yield from doc
+
+
+def read_page(page) -> Tuple[Optional[Amount], str]:
+    """
+    Texto y total de una página. El total se busca primero en el texto
+    corrido (lo más barato); sólo si hay una etiqueta de total sin monto en
+    su línea (p. ej. etiqueta y monto en columnas distintas) se arman las
+    filas con las coordenadas de las palabras.
+    """
+    # Sin preservar ligaduras ni espacios ("ﬁ" llega como "fi"); sólo el
+    # texto dentro de la página. El textpage se comparte entre ambos pasos.
+    textpage = page.get_textpage(flags=TEXT_FLAGS)
+    text = page.get_text("text", textpage=textpage)
+    total, has_label = scan_total(text)
+    if not has_label or (total is not None and total.method == "label"):
+        return total, text
+    words = page.get_text("words", textpage=textpage)
+    return best_total([total, extract_total(rows_from_words(words))]), text
+
+
+def parse_invoice(filename: str, content: bytes) -> dict:
+    """
+    Lee la factura página por página y devuelve ``{"pages", "value",
+    "currency", "method", "text", "scans"}``, donde ``value`` es el total
+    detectado (o ``None``), ``text`` el texto de las páginas separadas por
+    ``\\f`` y ``scans`` las imágenes ``[(página, png)]`` que necesitan OCR
+    (ver app/services/invoice_ocr.py). Se ejecuta en los procesos de
+    ``app.services.invoice_jobs``.
+    """
+    if is_image(filename):
+        scans = [(0, content)] if INVOICE_OCR_ENABLED else []
+        return {
+            "pages": 1,
+            "value": None,
+            "currency": None,
+            "method": None,
+            "text": "",
+            "scans": scans,
+        }
+
+    totals, texts, scans = [], [], []
+    for number, page in enumerate(iter_pages(filename, content)):
+        total, text = read_page(page)
+        if needs_ocr(text) and len(scans) < INVOICE_OCR_MAX_PAGES:
+            scans.append((number, rasterize_page(page)))
+        totals.append(total)
+        texts.append(text)
+    total = best_total(totals)
+    return {
+        "pages": len(totals),
+        "value": total.value if total else None,
+        "currency": total.currency if total else None,
+        "method": total.method if total else None,
+        "text": "\f".join(texts),
+        "scans": scans,
+    }
@@ -0,0 +1,185 @@
+# app/services/invoice_amounts.py
+"""
+Detección del monto total de una factura.
+
+Los patrones se compilan una vez al importar el módulo y reconocen los
+formatos de número habituales en las facturas que recibimos:
+
+- ``1,234.56`` / ``$1,234.56`` / ``US$ 1,234.56`` (punto decimal)
+- ``1.234,56`` / ``1.234,56 €`` / ``COP 1.234.567`` (coma decimal)
+- ``1234.5`` / ``1234,50`` (sin separador de miles)
+
+Un único separador seguido de uno o dos dígitos se toma como decimal; con
+tres dígitos, como separador de miles.
+
+El total se busca primero en las filas con una etiqueta de total (``Total``,
+``Total a pagar``, ``Importe total``, ``Amount due``...; nunca ``Subtotal``).
+Se toma el mayor monto a la derecha de la etiqueta. Si ninguna fila tiene
+etiqueta, se usa la regla anterior: el mayor monto mayor a ``MIN_AMOUNT`` en
+las líneas que mencionan total, subtotal, IVA o una moneda.
+
+Con PyMuPDF las filas se arman con las coordenadas de las palabras
+(``rows_from_words``). Así una etiqueta y su monto quedan en la misma fila
+aunque estén en columnas o bloques de texto distintos.
+"""
+import re
+from operator import itemgetter
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+MIN_AMOUNT = 100.0
+
+# Tolerancia vertical (en puntos) para considerar dos palabras en la misma fila
+ROW_TOLERANCE = 3.0
+
+# Los patrones se aplican al texto en minúsculas: sin re.IGNORECASE la
+# búsqueda es bastante más rápida
+_CURRENCY = r"us\$|usd|cop|mxn|eur|\$|€"
+_NUMBER = (
+    r"\d{1,3}(?:[.,\u00a0\u202f]\d{3})+(?:[.,]\d{1,2})?"  # con separador de miles
+    r"|\d+(?:[.,]\d{1,2})?"  # sin separador de miles
+)
+AMOUNT_PATTERN = re.compile(
+    rf"(?<![\w.,])(?:(?P<pre>{_CURRENCY})\s?)?"
+    rf"(?P<number>{_NUMBER})"
+    rf"(?![\d%])(?:\s?(?P<post>usd|cop|mxn|eur|€)(?!\w))?"
+)
+# "total" también cubre "subtotal"
+KEYWORD_PATTERN = re.compile(r"total|iva|\$|€|usd|cop|eur|mxn")
+TOTAL_LABEL_PATTERN = re.compile(
+    r"(?<![a-záéíóú])(?:"
+    r"total(?:\s+(?:a\s+pagar|factura|general|due|amount))?"
+    r"|importe\s+total|monto\s+total|valor\s+total|neto\s+a\s+pagar"
+    r"|amount\s+due|balance\s+due"
+    r")(?![a-záéíóú])"
+)
+
+_CURRENCY_CODES = {"us$": "USD", "€": "EUR", "$": "$"}
+_BASELINE_KEY = itemgetter(3, 0)
+_X_KEY = itemgetter(0)
+
+
+class Amount(NamedTuple):
+    value: float
+    currency: Optional[str]
+    # "label": fila con etiqueta de total; "max": regla del mayor monto
+    method: str
+
+
+def parse_number(raw: str) -> float:
+    """``"1.234,56"`` -> 1234.56, ``"1,234"`` -> 1234.0, ``"12,5"`` -> 12.5."""
+    raw = raw.replace("\u00a0", "").replace("\u202f", "")
+    last_dot, last_comma = raw.rfind("."), raw.rfind(",")
+    if last_dot >= 0 and last_comma >= 0:
+        decimal = "." if last_dot > last_comma else ","
+    elif last_dot >= 0 or last_comma >= 0:
+        separator = "." if last_dot >= 0 else ","
+        tail = raw.rsplit(separator, 1)[1]
+        single = raw.count(separator) == 1
+        decimal = separator if single and len(tail) in (1, 2) else None
+    else:
+        decimal = None
+
+    for separator in ".,":
+        if separator != decimal:
+            raw = raw.replace(separator, "")
+    if decimal == ",":
+        raw = raw.replace(",", ".")
+    return float(raw)
+
+
+def find_amounts(text: str, start: int = 0, end: Optional[int] = None) -> List[Amount]:
+    """Montos de ``text[start:end]`` (``text`` ya en minúsculas)."""
+    amounts = []
+    for match in AMOUNT_PATTERN.finditer(
+        text, start, len(text) if end is None else end
+    ):
+        currency = match.group("pre") or match.group("post")
+        amounts.append(
+            Amount(
+                parse_number(match.group("number")),
+                _CURRENCY_CODES.get(currency, currency and currency.upper()),
+                "max",
+            )
+        )
+    return amounts
+
+
+def _line_end(text: str, position: int) -> int:
+    end = text.find("\n", position)
+    return len(text) if end < 0 else end
+
+
+def scan_total(lines: Union[str, Iterable[str]]) -> Tuple[Optional[Amount], bool]:
+    """
+    Como ``extract_total``, pero indica además si el texto tiene alguna
+    etiqueta de total (con o sin monto en su línea).
+    """
+    text = (lines if isinstance(lines, str) else "\n".join(lines)).lower()
+
+    labelled = None
+    has_label = False
+    for label in TOTAL_LABEL_PATTERN.finditer(text):
+        has_label = True
+        for amount in find_amounts(text, label.end(), _line_end(text, label.end())):
+            if amount.value > 0 and (labelled is None or amount.value > labelled.value):
+                labelled = amount._replace(method="label")
+    if labelled is not None:
+        return labelled, True
+
+    fallback = None
+    line_end = -1
+    for keyword in KEYWORD_PATTERN.finditer(text):
+        if keyword.start() < line_end:
+            continue  # línea ya revisada
+        line_start = text.rfind("\n", 0, keyword.start()) + 1
+        line_end = _line_end(text, keyword.end())
+        for amount in find_amounts(text, line_start, line_end):
+            if amount.value > MIN_AMOUNT and (
+                fallback is None or amount.value > fallback.value
+            ):
+                fallback = amount
+    return fallback, has_label
+
+
+def extract_total(lines: Union[str, Iterable[str]]) -> Optional[Amount]:
+    """
+    Total de una página (o documento) a partir de sus filas de texto. Los
+    patrones recorren el texto completo una vez, en lugar de probar cada
+    fila: la mayoría son partidas sin etiquetas ni monedas.
+    """
+    return scan_total(lines)[0]
+
+
+def best_total(amounts: Iterable[Optional[Amount]]) -> Optional[Amount]:
+    """Combina los totales por página: prima la etiqueta y luego el mayor."""
+    best = None
+    for amount in amounts:
+        if amount is None:
+            continue
+        rank = (amount.method == "label", amount.value)
+        if best is None or rank > (best.method == "label", best.value):
+            best = amount
+    return best
+
+
+def rows_from_words(words: Sequence[tuple], tolerance: float = ROW_TOLERANCE):
+    """
+    Filas visuales a partir de ``page.get_text("words")`` de PyMuPDF
+    (``x0, y0, x1, y1, palabra, ...``): se agrupan las palabras cuya base
+    (``y1``) difiere en menos de ``tolerance`` puntos y se ordenan por ``x0``.
+    """
+    rows = []
+    current = []
+    current_y = None
+    for word in sorted(words, key=_BASELINE_KEY):
+        if current and word[3] - current_y > tolerance:
+            current.sort(key=_X_KEY)
+            rows.append(" ".join([w[4] for w in current]))
+            current = []
+        if not current:
+            current_y = word[3]
+        current.append(word)
+    if current:
+        current.sort(key=_X_KEY)
+        rows.append(" ".join([w[4] for w in current]))
+    return rows
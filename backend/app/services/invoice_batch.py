@@ -0,0 +1,366 @@
+# app/services/invoice_batch.py
+"""
+Carga masiva de facturas (cierre de mes).
+
+Los PDF (sueltos o dentro de ZIPs) se leen en paralelo en
+``invoice_pool``; todos los montos detectados se insertan con
+``create_evc_financials_batch`` en una sola transacción, que evalúa las
+reglas una vez por cuatrimestre afectado. El resultado es una fila por
+archivo con su estado:
+
+- ``created``: se registró el ``EVC_Financial``.
+- ``duplicate``: la factura ya estaba cargada en el cuatrimestre (o aparece
+  dos veces en el lote); ``evc_financial_id`` apunta al registro existente.
+- ``no_amount``: no se encontró un monto válido.
+- ``error``: no se pudo leer el archivo o el cuatrimestre no existe.
+
+El resumen cuenta ``created``, ``duplicates`` y ``failed`` (``no_amount`` y
+``error``; los duplicados no cuentan como fallidos).
+
+Sólo se leen los PDF cuyo SHA-256 no está en la caché de
+``app.services.invoice_cache``; un mismo archivo se lee una sola vez.
+"""
+import asyncio
+import io
+import os
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.evc_q import EVC_Q
+from app.schemas.evc_financial import EVC_FinancialCreateConcept
+from app.services.invoice_cache import (
+    content_hash,
+    find_duplicates,
+    get_cached_parses,
+    store_parses,
+)
+from app.services.invoice_ocr import is_image
+from app.services.invoice_jobs import (
+    INVOICE_CONCEPT,
+    INVOICE_MAX_UPLOAD_BYTES,
+    invoice_pool,
+)
+import app.services.evc_financial as evc_financial_service
+import app.services.search as search_service
+
+INVOICE_BATCH_MAX_FILES = int(os.getenv("INVOICE_BATCH_MAX_FILES", "500"))
+# Límite para cada ZIP; cada PDF (suelto o comprimido) sigue limitado a
+# INVOICE_MAX_UPLOAD_BYTES
+INVOICE_BATCH_MAX_ZIP_BYTES = int(
+    os.getenv("INVOICE_BATCH_MAX_ZIP_BYTES", str(200 * 1024 * 1024))
+)
+# Total de facturas descomprimidas que un lote puede tener en memoria
+INVOICE_BATCH_MAX_EXPANDED_BYTES = int(
+    os.getenv("INVOICE_BATCH_MAX_EXPANDED_BYTES", str(500 * 1024 * 1024))
+)
+
+
+# Columnas de la tabla de resultados (todo menos el contenido)
+RESULT_FIELDS = (
+    "filename",
+    "evc_q_id",
+    "sha256",
+    "status",
+    "pages",
+    "value",
+    "evc_financial_id",
+    "error",
+)
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+class BatchBudget:
+    """
+    Facturas y bytes que todavía admite un lote. Se descuenta al expandir
+    cada archivo, antes de descomprimir los miembros de un ZIP.
+    """
+
+    def __init__(
+        self,
+        files: int = INVOICE_BATCH_MAX_FILES,
+        size: int = INVOICE_BATCH_MAX_EXPANDED_BYTES,
+    ):
+        self.files = files
+        self.size = size
+
+    def take(self, filename: str, files: int, size: int):
+        if files > self.files:
+            raise BatchTooLarge(
+                f"{filename}: el lote supera las {INVOICE_BATCH_MAX_FILES} facturas"
+            )
+        if size > self.size:
+            raise BatchTooLarge(
+                f"{filename}: el lote supera los "
+                f"{INVOICE_BATCH_MAX_EXPANDED_BYTES} bytes descomprimidos"
+            )
+        self.files -= files
+        self.size -= size
+
+
+class BatchFile:
+    __slots__ = (
+        "filename",
+        "evc_q_id",
+        "content",
+        "sha256",
+        "status",
+        "pages",
+        "value",
+        "evc_financial_id",
+        "error",
+    )
+
+    def __init__(
+        self,
+        filename: str,
+        evc_q_id: int,
+        content: Optional[bytes] = None,
+        error: Optional[str] = None,
+    ):
+        self.filename = filename
+        self.evc_q_id = evc_q_id
+        self.content = content
+        self.sha256 = None
+        self.status = "error" if error else "pending"
+        self.pages = None
+        self.value = None
+        self.evc_financial_id = None
+        self.error = error
+
+    def fail(self, error: str, status: str = "error"):
+        self.status = status
+        self.error = error
+
+    def apply(self, result: dict):
+        self.pages, self.value = result["pages"], result["value"]
+        if self.value is None:
+            self.fail("No se encontraron montos válidos en la factura", "no_amount")
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in RESULT_FIELDS}
+
+
+def upload_limit(filename: str) -> int:
+    if filename.lower().endswith(".zip"):
+        return INVOICE_BATCH_MAX_ZIP_BYTES
+    return INVOICE_MAX_UPLOAD_BYTES
+
+
+def expand_upload(
+    filename: str,
+    content: bytes,
+    evc_q_id: int,
+    budget: Optional[BatchBudget] = None,
+) -> List[BatchFile]:
+    """
+    Un ``BatchFile`` por factura; los ZIP se abren y se toma cada PDF o
+    imagen escaneada interna. Lanza ``BatchTooLarge`` si las facturas o su
+    tamaño descomprimido (el declarado en el ZIP, antes de leer ningún
+    miembro) superan lo que queda de ``budget``.
+    """
+    budget = budget or BatchBudget()
+    if not filename.lower().endswith(".zip"):
+        budget.take(filename, 1, len(content))
+        return [BatchFile(filename, evc_q_id, content)]
+
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(content))
+    except zipfile.BadZipFile:
+        return [BatchFile(filename, evc_q_id, error="ZIP inválido")]
+
+    files = []
+    with archive:
+        members = [
+            info
+            for info in archive.infolist()
+            if not info.is_dir()
+            and (info.filename.lower().endswith(".pdf") or is_image(info.filename))
+        ]
+        # Los miembros demasiado grandes no se leen: sólo cuentan como factura.
+        # zipfile no descomprime más allá del ``file_size`` declarado.
+        readable = [i for i in members if i.file_size <= INVOICE_MAX_UPLOAD_BYTES]
+        budget.take(filename, len(members), sum(i.file_size for i in readable))
+        for info in members:
+            name = f"{filename}/{info.filename}"
+            if info.file_size > INVOICE_MAX_UPLOAD_BYTES:
+                files.append(
+                    BatchFile(name, evc_q_id, error="Archivo demasiado grande")
+                )
+                continue
+            try:
+                files.append(BatchFile(name, evc_q_id, archive.read(info)))
+            except zipfile.BadZipFile:
+                files.append(BatchFile(name, evc_q_id, error="ZIP inválido"))
+    return files
+
+
+def check_batch_size(files: List[BatchFile]):
+    if len(files) > INVOICE_BATCH_MAX_FILES:
+        raise BatchTooLarge(
+            f"El lote tiene {len(files)} facturas (máximo {INVOICE_BATCH_MAX_FILES})"
+        )
+
+
+def _hash(files: List[BatchFile]):
+    for batch_file in files:
+        batch_file.sha256 = content_hash(batch_file.content)
+
+
+def _lookup(db: Session, files: List[BatchFile]) -> Dict[str, dict]:
+    """
+    Marca los duplicados (en el lote o ya cargados) y devuelve las lecturas
+    guardadas de los demás archivos.
+    """
+    seen = set()
+    for batch_file in files:
+        key = (batch_file.evc_q_id, batch_file.sha256)
+        if key in seen:
+            batch_file.fail("La factura aparece más de una vez en el lote", "duplicate")
+        seen.add(key)
+    try:
+        duplicates = find_duplicates(db, seen)
+        for batch_file in files:
+            financial_id = duplicates.get((batch_file.evc_q_id, batch_file.sha256))
+            if financial_id is None:
+                continue
+            if batch_file.status == "pending":
+                batch_file.fail(
+                    "La factura ya se cargó en el cuatrimestre", "duplicate"
+                )
+            batch_file.evc_financial_id = financial_id
+        return get_cached_parses(db, (f.sha256 for f in files if f.status == "pending"))
+    finally:
+        # No retener la conexión mientras se leen los PDF
+        db.rollback()
+
+
+async def _parse(batch_files: List[BatchFile]) -> Optional[Tuple[int, dict]]:
+    """Lee una vez el contenido compartido por ``batch_files`` (mismo hash)."""
+    first = batch_files[0]
+    try:
+        result = await invoice_pool.parse(first.filename, first.content)
+    except Exception as e:
+        for batch_file in batch_files:
+            batch_file.fail(str(e))
+        return None
+    finally:
+        size = len(first.content)
+        for batch_file in batch_files:
+            batch_file.content = None
+    for batch_file in batch_files:
+        batch_file.apply(result)
+    return size, result
+
+
+def _index(db: Session, files: List[BatchFile], parsed: Dict[str, Tuple[int, dict]]):
+    """Indexa para la búsqueda las facturas del lote, una vez por hash."""
+    names = {}
+    for batch_file in files:
+        if batch_file.sha256 in parsed or batch_file.status == "pending":
+            names.setdefault(batch_file.sha256, batch_file.filename)
+    # Leídas ahora: con su texto; de la caché: sólo si todavía no están
+    search_service.index_invoices(
+        db,
+        ((sha256, names.get(sha256), result) for sha256, (_, result) in parsed.items()),
+    )
+    search_service.index_invoices(
+        db,
+        ((sha256, name, {}) for sha256, name in names.items() if sha256 not in parsed),
+        replace=False,
+    )
+    db.commit()
+
+
+def _save(db: Session, files: List[BatchFile], parsed: Dict[str, Tuple[int, dict]]):
+    _index(db, files, parsed)
+    store_parses(
+        db, ((sha256, size, result) for sha256, (size, result) in parsed.items())
+    )
+    files = [f for f in files if f.status == "pending"]
+    if not files:
+        return
+
+    quarter_ids = {f.evc_q_id for f in files}
+    existing = set(
+        db.execute(select(EVC_Q.id).where(EVC_Q.id.in_(quarter_ids))).scalars()
+    )
+    for batch_file in files:
+        if batch_file.evc_q_id not in existing:
+            batch_file.fail("EVC_Q not found")
+
+    valid = [f for f in files if f.status == "pending"]
+    if not valid:
+        return
+    financials = evc_financial_service.create_evc_financials_batch(
+        db,
+        [
+            EVC_FinancialCreateConcept(
+                evc_q_id=f.evc_q_id, concept=INVOICE_CONCEPT, value_usd=f.value
+            )
+            for f in valid
+        ],
+        source_hashes=[f.sha256 for f in valid],
+    )
+    for batch_file, financial in zip(valid, financials):
+        batch_file.status = "created"
+        batch_file.evc_financial_id = financial.id
+
+
+def _link_duplicates(files: List[BatchFile]):
+    """Los repetidos dentro del lote apuntan al registro creado por su gemelo."""
+    created = {
+        (f.evc_q_id, f.sha256): f.evc_financial_id
+        for f in files
+        if f.status == "created"
+    }
+    for batch_file in files:
+        if batch_file.status == "duplicate" and batch_file.evc_financial_id is None:
+            batch_file.evc_financial_id = created.get(
+                (batch_file.evc_q_id, batch_file.sha256)
+            )
+
+
+async def ingest_invoices(db: Session, files: List[BatchFile]) -> dict:
+    """
+    Descarta duplicados, lee en paralelo los archivos que no están en la caché
+    y registra los montos de una vez.
+    """
+    check_batch_size(files)
+    pending = [f for f in files if f.status == "pending"]
+    await run_in_threadpool(_hash, pending)
+    cached = await run_in_threadpool(_lookup, db, pending) if pending else {}
+
+    to_parse: Dict[str, List[BatchFile]] = {}
+    for batch_file in pending:
+        if batch_file.status != "pending":
+            batch_file.content = None
+        elif batch_file.sha256 in cached:
+            batch_file.content = None
+            batch_file.apply(cached[batch_file.sha256])
+        else:
+            to_parse.setdefault(batch_file.sha256, []).append(batch_file)
+    results = await asyncio.gather(*(_parse(group) for group in to_parse.values()))
+    parsed = {
+        sha256: result
+        for sha256, result in zip(to_parse, results)
+        if result is not None
+    }
+
+    if parsed or any(f.status == "pending" for f in pending):
+        await run_in_threadpool(_save, db, pending, parsed)
+    _link_duplicates(pending)
+
+    rows = [f.as_dict() for f in files]
+    return {
+        "created": sum(row["status"] == "created" for row in rows),
+        "duplicates": sum(row["status"] == "duplicate" for row in rows),
+        "failed": sum(row["status"] in ("error", "no_amount") for row in rows),
+        "files": rows,
+    }
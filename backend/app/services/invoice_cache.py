@@ -0,0 +1,144 @@
+# app/services/invoice_cache.py
+"""
+Caché de facturas leídas, direccionada por contenido.
+
+La clave es el SHA-256 del archivo subido. ``invoice_parse`` guarda el texto
+extraído y el total detectado (compartido entre workers y reinicios), con
+una caché en memoria de ``INVOICE_CACHE_SIZE`` entradas por delante. Un
+reintento o una nueva carga del mismo PDF no se vuelve a leer.
+
+Los ``EVC_Financial`` creados desde una factura guardan ese mismo hash en
+``source_sha256``: ``find_duplicates`` detecta si la factura ya se cargó en
+el cuatrimestre antes de insertarla otra vez.
+"""
+import hashlib
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.models.evc_financial import EVC_Financial
+from app.models.invoice_parse import InvoiceParse
+from app.services.invoice import PARSER_VERSION
+
+INVOICE_CACHE_SIZE = int(os.getenv("INVOICE_CACHE_SIZE", "4096"))
+INVOICE_CACHE_TTL = float(os.getenv("INVOICE_CACHE_TTL", "3600"))
+
+RESULT_FIELDS = ("pages", "value", "currency", "method")
+
+# En memoria sólo el resultado, sin el texto
+_parse_cache = TTLCache(INVOICE_CACHE_SIZE, INVOICE_CACHE_TTL)
+
+
+class DuplicateInvoice(ValueError):
+    def __init__(self, evc_q_id: int, evc_financial_id: int):
+        super().__init__(
+            f"La factura ya se cargó en el EVC_Q {evc_q_id} "
+            f"(EVC_Financial {evc_financial_id})"
+        )
+        self.evc_q_id = evc_q_id
+        self.evc_financial_id = evc_financial_id
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def get_cached_parses(db: Session, hashes: Iterable[str]) -> Dict[str, dict]:
+    """Resultados ya guardados para ``hashes`` (memoria y luego una consulta)."""
+    found = {}
+    missing = []
+    for sha256 in set(hashes):
+        result = _parse_cache.get(sha256)
+        if result is None:
+            missing.append(sha256)
+        else:
+            found[sha256] = result
+    if missing:
+        rows = db.execute(
+            select(InvoiceParse).where(
+                InvoiceParse.sha256.in_(missing),
+                InvoiceParse.parser_version == PARSER_VERSION,
+            )
+        ).scalars()
+        for row in rows:
+            result = {field: getattr(row, field) for field in RESULT_FIELDS}
+            _parse_cache.set(row.sha256, result)
+            found[row.sha256] = result
+    return found
+
+
+def get_cached_parse(db: Session, sha256: str) -> Optional[dict]:
+    return get_cached_parses(db, [sha256]).get(sha256)
+
+
+def store_parses(db: Session, entries: Iterable[Tuple[str, int, dict]]):
+    """
+    Guarda (o reemplaza, si es de otra versión del extractor) los resultados
+    ``(sha256, tamaño, resultado)`` en una transacción.
+    """
+    # Un OCR incompleto (plazo vencido, tesseract caído) se reintenta en la
+    # próxima carga en vez de quedar guardado
+    entries = {
+        sha256: (size, result)
+        for sha256, size, result in entries
+        if not result.get("ocr_errors")
+    }
+    if not entries:
+        return
+    existing = {
+        row.sha256: row
+        for row in db.execute(
+            select(InvoiceParse).where(InvoiceParse.sha256.in_(list(entries)))
+        ).scalars()
+    }
+    for sha256, (size, result) in entries.items():
+        values = {field: result[field] for field in RESULT_FIELDS}
+        _parse_cache.set(sha256, dict(values))
+        values.update(parser_version=PARSER_VERSION, size=size, text=result.get("text"))
+        row = existing.get(sha256)
+        if row is None:
+            db.add(InvoiceParse(sha256=sha256, **values))
+        else:
+            for field, value in values.items():
+                setattr(row, field, value)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Otro worker guardó alguna de estas facturas al mismo tiempo
+        db.rollback()
+
+
+def store_parse(db: Session, sha256: str, size: int, result: dict):
+    store_parses(db, [(sha256, size, result)])
+
+
+def clear_parse_cache():
+    _parse_cache.clear()
+
+
+def find_duplicates(
+    db: Session, keys: Iterable[Tuple[int, str]]
+) -> Dict[Tuple[int, str], int]:
+    """``{(evc_q_id, sha256): evc_financial_id}`` de las facturas ya cargadas."""
+    keys = set(keys)
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(EVC_Financial.evc_q_id, EVC_Financial.source_sha256, EVC_Financial.id)
+        .where(tuple_(EVC_Financial.evc_q_id, EVC_Financial.source_sha256).in_(keys))
+        .order_by(EVC_Financial.id)
+    )
+    duplicates = {}
+    for evc_q_id, sha256, financial_id in rows:
+        duplicates.setdefault((evc_q_id, sha256), financial_id)
+    return duplicates
+
+
+def check_duplicate(db: Session, evc_q_id: int, sha256: str):
+    duplicate = find_duplicates(db, [(evc_q_id, sha256)]).get((evc_q_id, sha256))
+    if duplicate is not None:
+        raise DuplicateInvoice(evc_q_id, duplicate)
@@ -0,0 +1,251 @@
+# app/services/invoice_jobs.py
+"""
+Lectura de facturas fuera del proceso del servidor.
+
+Extraer el texto de un PDF con PyMuPDF es trabajo de CPU que retiene el GIL;
+hecho dentro del handler bloquea el event loop del worker. ``invoice_pool``
+lo delega a un ``ProcessPoolExecutor`` de ``INVOICE_PARSE_WORKERS`` procesos
+(creado en el primer uso) y el handler sólo espera el resultado.
+
+``POST /evc-financials/evc_financials/upload/jobs`` responde en seguida con un
+``InvoiceJob``; el registro de ``EVC_Financial`` se hace al terminar la
+lectura y el estado se consulta en ``GET .../upload/jobs/{job_id}``. Los jobs
+se guardan en memoria del worker durante ``INVOICE_JOB_TTL`` segundos.
+
+Antes de leer un PDF se busca su SHA-256 en la caché de
+``app.services.invoice_cache`` y se rechazan las facturas ya cargadas en el
+mismo cuatrimestre.
+"""
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.process_pool import LazyProcessPool
+from app.database import session_scope
+from app.schemas.evc_financial import EVC_FinancialCreateConcept
+from app.services.invoice import parse_invoice
+from app.services.invoice_cache import (
+    DuplicateInvoice,
+    check_duplicate,
+    content_hash,
+    get_cached_parse,
+    store_parse,
+)
+import app.services.evc_financial as evc_financial_service
+import app.services.invoice_ocr as invoice_ocr
+import app.services.search as search_service
+
+INVOICE_PARSE_WORKERS = int(os.getenv("INVOICE_PARSE_WORKERS", "2"))
+INVOICE_MAX_UPLOAD_BYTES = int(
+    os.getenv("INVOICE_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024))
+)
+INVOICE_JOB_TTL = float(os.getenv("INVOICE_JOB_TTL", "3600"))
+INVOICE_MAX_JOBS = int(os.getenv("INVOICE_MAX_JOBS", "10000"))
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+INVOICE_CONCEPT = "Cargado automáticamente desde factura"
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+async def read_upload(file: UploadFile, max_bytes: int = INVOICE_MAX_UPLOAD_BYTES):
+    """Lee ``file`` por bloques y corta en cuanto supera ``max_bytes``."""
+    chunks = []
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(
+                f"El archivo supera el máximo de {max_bytes // (1024 * 1024)} MB"
+            )
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class InvoiceParsingPool(LazyProcessPool):
+    def __init__(self, workers: int = INVOICE_PARSE_WORKERS):
+        super().__init__(workers)
+
+    def submit(self, filename: str, content: bytes) -> Future:
+        return self.run(parse_invoice, filename, content)
+
+    async def parse(self, filename: str, content: bytes) -> dict:
+        """
+        ``parse_invoice`` en el pool, sin bloquear el event loop. Las páginas
+        escaneadas pasan luego por el OCR (ver app/services/invoice_ocr.py).
+        """
+        result = await asyncio.wrap_future(self.submit(filename, content))
+        return await invoice_ocr.complete_scans(result)
+
+
+invoice_pool = InvoiceParsingPool()
+
+
+def save_invoice_financial(
+    db: Session, evc_q_id: int, value: float, source_sha256: Optional[str] = None
+):
+    evc_data = EVC_FinancialCreateConcept(
+        evc_q_id=evc_q_id, concept=INVOICE_CONCEPT, value_usd=value
+    )
+    return evc_financial_service.create_evc_financial_concept(
+        db, evc_data, source_sha256=source_sha256
+    )
+
+
+def lookup_invoice(
+    db: Session, evc_q_id: int, sha256: str, allow_duplicate: bool = False
+) -> Optional[dict]:
+    """
+    Resultado ya guardado de la factura (o ``None``); lanza
+    ``DuplicateInvoice`` si ya se cargó en el cuatrimestre. Cierra la
+    transacción de lectura para no retener la conexión mientras se lee el PDF.
+    """
+    try:
+        if not allow_duplicate:
+            check_duplicate(db, evc_q_id, sha256)
+        return get_cached_parse(db, sha256)
+    finally:
+        db.rollback()
+
+
+def record_invoice(
+    db: Session,
+    evc_q_id: int,
+    sha256: str,
+    size: int,
+    result: dict,
+    cached: bool,
+    file_name: Optional[str] = None,
+):
+    """
+    Guarda la lectura (si es nueva), la indexa para la búsqueda (ver
+    app/services/search.py) y crea el ``EVC_Financial`` si hay monto.
+    """
+    search_service.index_invoices(db, [(sha256, file_name, result)], replace=not cached)
+    if not cached:
+        store_parse(db, sha256, size, result)
+    if result["value"] is None:
+        db.commit()
+        return None
+    return save_invoice_financial(db, evc_q_id, result["value"], sha256)
+
+
+class InvoiceJob:
+    __slots__ = (
+        "id",
+        "evc_q_id",
+        "filename",
+        "size",
+        "status",
+        "pages",
+        "value",
+        "evc_financial_id",
+        "sha256",
+        "cached",
+        "error",
+        "created_at",
+        "finished_at",
+    )
+
+    def __init__(self, evc_q_id: int, filename: str, size: int):
+        self.id = uuid.uuid4().hex
+        self.evc_q_id = evc_q_id
+        self.filename = filename
+        self.size = size
+        self.sha256 = None
+        self.cached = False
+        self.status = "pending"
+        self.pages = None
+        self.value = None
+        self.evc_financial_id = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def finish(self, status: str, error: str = None):
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+_jobs = TTLCache(INVOICE_MAX_JOBS, INVOICE_JOB_TTL)
+
+
+def create_job(evc_q_id: int, filename: str, size: int) -> InvoiceJob:
+    job = InvoiceJob(evc_q_id, filename, size)
+    _jobs.set(job.id, job)
+    return job
+
+
+def get_job(job_id: str) -> Optional[InvoiceJob]:
+    return _jobs.get(job_id)
+
+
+def _lookup_in_new_session(evc_q_id: int, sha256: str, allow_duplicate: bool):
+    with session_scope() as db:
+        return lookup_invoice(db, evc_q_id, sha256, allow_duplicate)
+
+
+def _record_in_new_session(
+    evc_q_id: int, sha256: str, size: int, result: dict, cached: bool, file_name: str
+) -> Optional[int]:
+    with session_scope() as db:
+        financial = record_invoice(
+            db, evc_q_id, sha256, size, result, cached, file_name
+        )
+        return financial.id if financial is not None else None
+
+
+async def run_job(job: InvoiceJob, content: bytes, allow_duplicate: bool = False):
+    """
+    Lee la factura (de la caché o en el pool) y registra el ``EVC_Financial``
+    resultante. Si la factura ya se cargó en el cuatrimestre el job termina
+    como ``duplicate`` con el id del ``EVC_Financial`` existente.
+    """
+    job.status = "running"
+    try:
+        job.sha256 = await run_in_threadpool(content_hash, content)
+        result = await run_in_threadpool(
+            _lookup_in_new_session, job.evc_q_id, job.sha256, allow_duplicate
+        )
+        job.cached = result is not None
+        if result is None:
+            result = await invoice_pool.parse(job.filename, content)
+        job.pages, job.value = result["pages"], result["value"]
+        job.evc_financial_id = await run_in_threadpool(
+            _record_in_new_session,
+            job.evc_q_id,
+            job.sha256,
+            len(content),
+            result,
+            job.cached,
+            job.filename,
+        )
+    except DuplicateInvoice as e:
+        job.evc_financial_id = e.evc_financial_id
+        job.finish("duplicate", str(e))
+        return
+    except Exception as e:
+        job.finish("failed", str(e))
+        return
+    if job.value is None:
+        job.finish("failed", "No se encontraron montos válidos en la factura")
+        return
+    job.finish("done")
@@ -0,0 +1,136 @@
+# app/services/invoice_ocr.py
+"""
+OCR de facturas escaneadas.
+
+``parse_invoice`` sólo rasteriza (en escala de grises, a ``INVOICE_OCR_DPI``)
+las páginas cuya capa de texto está vacía, y toma tal cual las imágenes
+subidas. ``complete_scans`` pasa esas imágenes por Tesseract en ``ocr_pool``,
+un pool aparte de ``INVOICE_OCR_WORKERS`` procesos para que el OCR (segundos
+por página) no ocupe los procesos que leen PDFs con texto. Cada página tiene
+un plazo de ``INVOICE_OCR_PAGE_TIMEOUT`` segundos; al vencer se corta el
+proceso de tesseract y la página queda sin texto.
+
+El resultado completo (con el texto del OCR) se guarda en la caché de
+``app.services.invoice_cache``, salvo que alguna página haya fallado.
+"""
+import asyncio
+import io
+import os
+from concurrent.futures import Future
+from typing import Optional
+
+from app.core.optional_deps import MissingDependency, optional_import
+from app.core.process_pool import LazyProcessPool
+from app.services.invoice_amounts import Amount, best_total, scan_total
+
+INVOICE_OCR_ENABLED = os.getenv("INVOICE_OCR_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+INVOICE_OCR_WORKERS = int(os.getenv("INVOICE_OCR_WORKERS", "2"))
+# Cada proceso se reemplaza tras este número de páginas (libera la memoria
+# que Pillow y el intérprete retienen entre imágenes grandes)
+INVOICE_OCR_MAX_TASKS_PER_WORKER = int(
+    os.getenv("INVOICE_OCR_MAX_TASKS_PER_WORKER", "200")
+)
+INVOICE_OCR_PAGE_TIMEOUT = float(os.getenv("INVOICE_OCR_PAGE_TIMEOUT", "30"))
+INVOICE_OCR_DPI = int(os.getenv("INVOICE_OCR_DPI", "300"))
+INVOICE_OCR_MAX_PAGES = int(os.getenv("INVOICE_OCR_MAX_PAGES", "20"))
+INVOICE_OCR_LANG = os.getenv("INVOICE_OCR_LANG", "spa+eng")
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff")
+
+OCR_FEATURE = "El OCR de facturas"
+
+
+def is_image(filename: str) -> bool:
+    return filename.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def needs_ocr(text: str) -> bool:
+    return INVOICE_OCR_ENABLED and not text.strip()
+
+
+def rasterize_page(page, dpi: int = INVOICE_OCR_DPI) -> bytes:
+    """PNG en escala de grises de la página (un byte por pixel al renderizar)."""
+    return page.get_pixmap(dpi=dpi, colorspace="gray").tobytes("png")
+
+
+def ocr_image(image: bytes, lang: str, timeout: float) -> str:
+    """Texto de la imagen; corre en los procesos de ``ocr_pool``."""
+    Image = optional_import("PIL.Image", OCR_FEATURE)
+    pytesseract = optional_import("pytesseract", OCR_FEATURE)
+    try:
+        with Image.open(io.BytesIO(image)) as picture:
+            return pytesseract.image_to_string(picture, lang=lang, timeout=timeout)
+    except pytesseract.TesseractNotFoundError as e:
+        raise MissingDependency(f"{OCR_FEATURE} requiere el programa tesseract") from e
+
+
+class OCRPool(LazyProcessPool):
+    def __init__(
+        self,
+        workers: int = INVOICE_OCR_WORKERS,
+        timeout: float = INVOICE_OCR_PAGE_TIMEOUT,
+        lang: str = INVOICE_OCR_LANG,
+    ):
+        super().__init__(workers, max_tasks_per_child=INVOICE_OCR_MAX_TASKS_PER_WORKER)
+        self.timeout = timeout
+        self.lang = lang
+
+    def submit(self, image: bytes) -> Future:
+        return self.run(ocr_image, image, self.lang, self.timeout)
+
+    async def read(self, image: bytes) -> str:
+        # El plazo lo aplica pytesseract dentro del proceso, así que no cuenta
+        # el tiempo en cola detrás de otras páginas
+        return await asyncio.wrap_future(self.submit(image))
+
+
+ocr_pool = OCRPool()
+
+
+def _amount(result: dict) -> Optional[Amount]:
+    if result["value"] is None:
+        return None
+    return Amount(result["value"], result["currency"], result["method"])
+
+
+async def complete_scans(result: dict) -> dict:
+    """
+    Completa el resultado de ``parse_invoice`` con el OCR de sus ``scans``
+    (``[(página, imagen)]``). Si ninguna página se pudo leer porque falta
+    Tesseract y no hay otro total, lanza ``MissingDependency``.
+    """
+    scans = result.pop("scans", None)
+    if not scans:
+        return result
+
+    outcomes = await asyncio.gather(
+        *(ocr_pool.read(image) for _, image in scans), return_exceptions=True
+    )
+    texts = result["text"].split("\f")
+    totals = [_amount(result)]
+    errors = []
+    for (number, _), outcome in zip(scans, outcomes):
+        if isinstance(outcome, Exception):
+            errors.append(outcome)
+            continue
+        texts[number] = outcome
+        totals.append(scan_total(outcome)[0])
+
+    total = best_total(totals)
+    if total is None and len(errors) == len(scans):
+        missing = [e for e in errors if isinstance(e, MissingDependency)]
+        if missing:
+            raise missing[0]
+    result.update(
+        value=total.value if total else None,
+        currency=total.currency if total else None,
+        method=total.method if total else None,
+        text="\f".join(texts),
+        ocr_pages=len(scans) - len(errors),
+        ocr_errors=len(errors),
+    )
+    return result
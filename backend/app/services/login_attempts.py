@@ -0,0 +1,49 @@
+# app/services/login_attempts.py
+"""
+Límite de intentos de login fallidos por cuenta.
+
+Tras ``LOGIN_MAX_ATTEMPTS`` fallos dentro de ``LOGIN_ATTEMPT_WINDOW_SECONDS``
+la cuenta queda bloqueada hasta que la ventana vence. El chequeo se hace
+antes de verificar la contraseña, así que un ataque de fuerza bruta contra
+una cuenta no consume tiempo de bcrypt.
+"""
+import os
+import time
+from typing import Optional
+
+from app.core.cache import TTLCache
+
+LOGIN_MAX_ATTEMPTS = int(os.getenv("LOGIN_MAX_ATTEMPTS", "5"))
+LOGIN_ATTEMPT_WINDOW_SECONDS = float(os.getenv("LOGIN_ATTEMPT_WINDOW_SECONDS", "300"))
+
+# email -> (fallos, instante del primer fallo de la ventana)
+_failures = TTLCache(maxsize=100_000, default_ttl=LOGIN_ATTEMPT_WINDOW_SECONDS)
+
+
+def _key(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def retry_after(email: str) -> Optional[int]:
+    """Segundos que faltan para poder reintentar, o ``None`` si no está bloqueada."""
+    entry = _failures.get(_key(email))
+    if entry is None or entry[0] < LOGIN_MAX_ATTEMPTS:
+        return None
+    remaining = entry[1] + LOGIN_ATTEMPT_WINDOW_SECONDS - time.monotonic()
+    return max(1, int(remaining + 0.999))
+
+
+def record_failure(email: str):
+    key = _key(email)
+    now = time.monotonic()
+    count, started = _failures.get(key, (0, now))
+    remaining = started + LOGIN_ATTEMPT_WINDOW_SECONDS - now
+    _failures.set(key, (count + 1, started), ttl=remaining)
+
+
+def record_success(email: str):
+    _failures.delete(_key(email))
+
+
+def clear_attempts():
+    _failures.clear()
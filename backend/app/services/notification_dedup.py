@@ -0,0 +1,145 @@
+# app/services/notification_dedup.py
+"""
+Deduplicación de notificaciones por claves estructuradas.
+
+Cada notificación generada por una regla lleva ``rule_id``, ``evc_q_id``,
+``threshold_bucket`` y un ``fingerprint`` (SHA-256 de esas claves). Antes
+de insertar se consulta primero una caché en memoria con TTL y después el
+índice ``(fingerprint, created_at)``, en lugar de buscar con ``LIKE`` en el
+texto de todos los mensajes.
+"""
+import hashlib
+import math
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.models.notification import Notification
+
+DEDUP_WINDOW_SECONDS = float(os.getenv("NOTIFICATION_DEDUP_SECONDS", "300"))
+PERCENTAGE_BUCKET_SIZE = 10
+
+_fingerprint_cache = TTLCache(maxsize=10_000, default_ttl=DEDUP_WINDOW_SECONDS)
+_quarter_cache = TTLCache(maxsize=10_000, default_ttl=DEDUP_WINDOW_SECONDS)
+
+
+def percentage_bucket(percentage: Optional[float]) -> Optional[int]:
+    """Banda de ``PERCENTAGE_BUCKET_SIZE`` puntos de un porcentaje gastado."""
+    if percentage is None:
+        return None
+    return int(math.floor(percentage / PERCENTAGE_BUCKET_SIZE)) * PERCENTAGE_BUCKET_SIZE
+
+
+def notification_fingerprint(
+    rule_id: Optional[int],
+    evc_q_id: Optional[int],
+    threshold_bucket: Optional[int],
+    subject: Optional[str] = None,
+    message: Optional[str] = None,
+) -> str:
+    """
+    Huella estable de una notificación. ``subject`` identifica la fila que
+    disparó la regla cuando no es un cuatrimestre (p. ej. ``"provider:3"``).
+    Si no hay regla asociada (notificaciones antiguas) se incluye el mensaje.
+    """
+    parts = [str(rule_id), str(evc_q_id), str(threshold_bucket), subject or ""]
+    if rule_id is None:
+        parts.append(message or "")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _window_start() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=DEDUP_WINDOW_SECONDS)
+
+
+def was_quarter_recently_notified(db: Session, evc_q_id: Optional[int]) -> bool:
+    """Indica si ya hubo una notificación para el cuatrimestre en la ventana."""
+    if evc_q_id is None:
+        return False
+    if evc_q_id in _quarter_cache:
+        return True
+    found = (
+        db.query(Notification.id)
+        .filter(
+            Notification.evc_q_id == evc_q_id,
+            Notification.created_at > _window_start(),
+        )
+        .first()
+        is not None
+    )
+    if found:
+        _quarter_cache.set(evc_q_id, True)
+    return found
+
+
+def filter_new_notifications(db: Session, notifications: List[dict]) -> List[dict]:
+    """
+    Descarta las notificaciones cuyo ``fingerprint`` ya se emitió dentro de
+    la ventana (o que vienen repetidas en la misma lista). Hace como mucho
+    una consulta indexada para todo el lote.
+    """
+    candidates, seen = [], set()
+    for notification in notifications:
+        fingerprint = notification.get("fingerprint")
+        if fingerprint is not None:
+            if fingerprint in seen or fingerprint in _fingerprint_cache:
+                continue
+            seen.add(fingerprint)
+        candidates.append(notification)
+
+    if not seen:
+        return candidates
+
+    existing = {
+        fingerprint
+        for (fingerprint,) in db.query(Notification.fingerprint).filter(
+            Notification.fingerprint.in_(seen),
+            Notification.created_at > _window_start(),
+        )
+    }
+    for fingerprint in existing:
+        _fingerprint_cache.set(fingerprint, True)
+    return [n for n in candidates if n.get("fingerprint") not in existing]
+
+
+def remember_notifications(notifications: Iterable[dict]):
+    """Registra en la caché las notificaciones recién insertadas."""
+    for notification in notifications:
+        if notification.get("fingerprint") is not None:
+            _fingerprint_cache.set(notification["fingerprint"], True)
+        if notification.get("evc_q_id") is not None:
+            _quarter_cache.set(notification["evc_q_id"], True)
+
+
+# ---------------------------------------------------------------------------
+# Backfill de notificaciones antiguas (solo tienen el texto del mensaje)
+# ---------------------------------------------------------------------------
+
+_QUARTER_ID_PATTERN = re.compile(r"cuatrimestre \(ID: (\d+)\)")
+_PERCENTAGE_PATTERN = re.compile(
+    r"El EVC '(?P<evc_name>.*)' ha gastado el (?P<percentage>[\d.]+)% "
+    r"de su presupuesto en Q(?P<q>\d+)/(?P<year>\d+)"
+)
+
+
+def parse_legacy_message(message: str) -> dict:
+    """
+    Extrae de un mensaje generado por ``evaluate_rules`` el ``evc_q_id`` (o
+    el nombre de EVC, año y Q para buscarlo) y la banda de porcentaje.
+    """
+    match = _QUARTER_ID_PATTERN.search(message or "")
+    if match:
+        return {"evc_q_id": int(match.group(1))}
+    match = _PERCENTAGE_PATTERN.search(message or "")
+    if match:
+        return {
+            "evc_name": match.group("evc_name"),
+            "q": int(match.group("q")),
+            "year": int(match.group("year")),
+            "threshold_bucket": percentage_bucket(float(match.group("percentage"))),
+        }
+    return {}
@@ -3,6 +3,13 @@ from app.repositories.notification_rule_repository import get_active_rules_by_ta
 from app.repositories.notification_repository import create_notification
 from sqlalchemy.orm import Session
 from app.models.notification import Notification
+from app.core.pagination import PageParams, PageSpec, paginate
+
+NOTIFICATION_PAGE = PageSpec(
+    Notification,
+    ["type", "created_at", "rule_id", "evc_q_id"],
+    default_sort="-created_at",
+)
 
 
 async def evaluate_rules_for_entity(entity_data: dict, table_name: str):
@@ -32,11 +39,7 @@ async def evaluate_rules_for_entity(entity_data: dict, table_name: str):
             await create_notification({"message": rule.message, "type": rule.type})
 
 
-def get_unread_notifications(db: Session):
-    """Returns all unread notifications."""
-    return (
-        db.query(Notification)
-        .filter(Notification.read == False)
-        .order_by(Notification.created_at.desc())
-        .all()
-    )
+def get_unread_notifications(db: Session, page: PageParams = None):
+    """Returns a page of unread notifications, newest first."""
+    query = db.query(Notification).filter(Notification.read == False)
+    return paginate(query, page, NOTIFICATION_PAGE)
@@ -0,0 +1,69 @@
+# app/services/principal_cache.py
+"""
+Caché de usuarios autenticados (principal) por token JWT.
+
+``get_current_user`` guarda aquí el usuario resuelto para cada token, de
+modo que los requests siguientes con el mismo token no decodifican el JWT
+ni consultan ``app_user``. La entrada vence cuando vence el token (``exp``)
+o a los ``PRINCIPAL_CACHE_MAX_TTL`` segundos, lo que ocurra primero, y se
+invalida cuando ``/users`` modifica o elimina al usuario.
+"""
+import os
+import time
+from typing import Optional
+
+from app.core.cache import TTLCache
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "4096"))
+# Tope de vida de una entrada: acota cuánto tarda en verse un cambio hecho
+# fuera de la API (p. ej. directamente en la base)
+PRINCIPAL_CACHE_MAX_TTL = float(os.getenv("PRINCIPAL_CACHE_MAX_TTL", "300"))
+
+_principal_cache = TTLCache(
+    maxsize=PRINCIPAL_CACHE_SIZE, default_ttl=PRINCIPAL_CACHE_MAX_TTL
+)
+
+
+class Principal:
+    """
+    Copia de los campos públicos de un ``User``, independiente de la sesión
+    de SQLAlchemy para poder compartirse entre requests.
+    """
+
+    __slots__ = ("id", "email", "username", "rol")
+
+    def __init__(self, id: int, email: str, username: str, rol: str):
+        self.id = id
+        self.email = email
+        self.username = username
+        self.rol = rol
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(id=user.id, email=user.email, username=user.username, rol=user.rol)
+
+
+def get_cached_principal(token: str) -> Optional[Principal]:
+    return _principal_cache.get(token)
+
+
+def remember_principal(token: str, user, expires_at: Optional[float]) -> Principal:
+    """
+    Guarda el usuario del token hasta ``expires_at`` (timestamp ``exp`` del
+    JWT) y devuelve la copia almacenada.
+    """
+    principal = Principal.from_user(user)
+    ttl = PRINCIPAL_CACHE_MAX_TTL
+    if expires_at is not None:
+        ttl = min(ttl, float(expires_at) - time.time())
+    _principal_cache.set(token, principal, ttl=ttl)
+    return principal
+
+
+def invalidate_user(user_id: int):
+    """Descarta todos los tokens en caché del usuario ``user_id``."""
+    _principal_cache.delete_where(lambda _token, principal: principal.id == user_id)
+
+
+def clear_principals():
+    _principal_cache.clear()
@@ -1,6 +1,16 @@
+from typing import List
+
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
 from app.models.provider_document import ProviderDocument
 from app.schemas.provider_document import ProviderDocumentCreate
+from app.core.pagination import PageParams, PageSpec, paginate
+from app.services.search import PROVIDER_DOCUMENT, remove_from_index
+from app.services.storage_gc import mark_for_deletion, schedule_sweep
+
+PROVIDER_DOCUMENT_PAGE = PageSpec(
+    ProviderDocument, ["provider_id", "file_name", "uploaded_at"]
+)
 
 
 def create_provider_document(db: Session, doc_data: ProviderDocumentCreate):
@@ -19,16 +29,42 @@ def get_documents_by_provider(db: Session, provider_id: int):
     )
 
 
-def delete_provider_document(db: Session, doc_id: int):
-    db_doc = db.query(ProviderDocument).get(doc_id)
-    if not db_doc:
-        return None
-    db.delete(db_doc)
-    db.commit()
-    return True
+def get_provider_document(db: Session, doc_id: int):
+    return db.get(ProviderDocument, doc_id)
 
 
-def get_all_provider_documents(db: Session):
-    return (
-        db.query(ProviderDocument).options(joinedload(ProviderDocument.provider)).all()
+def _delete_rows(db: Session, doc_ids: List[int]) -> List[int]:
+    rows = (
+        db.query(ProviderDocument.id, ProviderDocument.storage_key)
+        .filter(ProviderDocument.id.in_(doc_ids))
+        .all()
     )
+    if rows:
+        db.query(ProviderDocument).filter(
+            ProviderDocument.id.in_([row.id for row in rows])
+        ).delete(synchronize_session=False)
+        mark_for_deletion(db, [row.storage_key for row in rows])
+        remove_from_index(db, PROVIDER_DOCUMENT, [row.id for row in rows])
+        db.commit()
+    return [row.id for row in rows]
+
+
+async def delete_provider_documents(db: Session, doc_ids: List[int]) -> dict:
+    """Borra los documentos; sus archivos los borra luego el sweeper del storage."""
+    deleted = set(await run_in_threadpool(_delete_rows, db, doc_ids))
+    if deleted:
+        schedule_sweep()
+    return {
+        "deleted": len(deleted),
+        "not_found": [doc_id for doc_id in doc_ids if doc_id not in deleted],
+    }
+
+
+async def delete_provider_document(db: Session, doc_id: int):
+    result = await delete_provider_documents(db, [doc_id])
+    return True if result["deleted"] else None
+
+
+def get_all_provider_documents(db: Session, page: PageParams = None):
+    query = db.query(ProviderDocument).options(joinedload(ProviderDocument.provider))
+    return paginate(query, page, PROVIDER_DOCUMENT_PAGE)
@@ -0,0 +1,250 @@
+# app/services/provider_import.py
+"""
+Importación de proveedores desde archivos CSV o XLSX por streaming.
+
+Las filas se leen una a una, se validan con ``ProviderCreate`` y se
+escriben en lotes de ``IMPORT_CHUNK_SIZE``. La deduplicación por email se
+hace con una consulta ``IN`` por lote contra el índice único de
+``provider.email`` (no se cargan todos los emails en memoria), y cada lote
+se confirma por separado, así que la memoria no depende del tamaño del
+archivo.
+"""
+import codecs
+import csv
+import os
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.provider import Provider
+from app.schemas.provider import ProviderCreate
+from app.services.provider_service import evaluate_notification_rules_batch
+from app.services.spending import record_provider_cost_change
+
+IMPORT_CHUNK_SIZE = int(os.getenv("PROVIDER_IMPORT_CHUNK_SIZE", "1000"))
+MAX_REPORTED_ERRORS = 1000
+
+PROVIDER_FIELDS = list(ProviderCreate.model_fields)
+IMPORT_MODES = ("skip", "upsert")
+
+
+class ImportFormatError(ValueError):
+    """El archivo no tiene un formato o encabezados válidos."""
+
+
+def _normalize_header(header) -> str:
+    return str(header or "").strip().lower()
+
+
+def _check_headers(headers: List[str]):
+    missing = [field for field in PROVIDER_FIELDS if field not in headers]
+    if missing:
+        raise ImportFormatError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    """Itera ``(número de fila, dict)`` de un CSV sin cargarlo completo."""
+    text_stream = codecs.getreader("utf-8-sig")(stream)
+    reader = csv.reader(text_stream)
+    try:
+        headers = [_normalize_header(h) for h in next(reader)]
+    except StopIteration:
+        return
+    _check_headers(headers)
+    for row_number, values in enumerate(reader, start=2):
+        if not any(value.strip() for value in values):
+            continue
+        yield row_number, dict(zip(headers, values))
+
+
+def iter_xlsx_rows(stream: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    """Itera las filas de la primera hoja de un XLSX en modo solo lectura."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError("La importación XLSX requiere el paquete openpyxl")
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        try:
+            headers = [_normalize_header(h) for h in next(rows)]
+        except StopIteration:
+            return
+        _check_headers(headers)
+        for row_number, values in enumerate(rows, start=2):
+            if all(value is None or str(value).strip() == "" for value in values):
+                continue
+            yield row_number, {
+                header: ("" if value is None else value)
+                for header, value in zip(headers, values)
+            }
+    finally:
+        workbook.close()
+
+
+def iter_file_rows(filename: str, stream: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return iter_csv_rows(stream)
+    if extension in (".xlsx", ".xlsm"):
+        return iter_xlsx_rows(stream)
+    raise ImportFormatError("Formato no soportado: use un archivo .csv o .xlsx")
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.notifications = 0
+        self.errors: List[dict] = []
+        self.errors_truncated = False
+
+    def add_error(self, row_number: int, email, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "email": email, "errors": errors})
+        else:
+            self.errors_truncated = True
+
+    def as_dict(self) -> dict:
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "notifications": self.notifications,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated,
+        }
+
+
+def _write_row(db: Session, row: dict, existing: Optional[Tuple[int, float]]):
+    table = Provider.__table__
+    if existing is None:
+        db.execute(table.insert(), [row])
+    else:
+        db.execute(table.update().where(table.c.id == existing[0]).values(**row))
+        record_provider_cost_change(db, existing[0], existing[1], row["cost_usd"])
+
+
+def _write_chunk(db: Session, rows: List[Tuple[int, dict]], existing: dict):
+    """Inserta las filas nuevas con un solo ``executemany`` y actualiza las demás."""
+    table = Provider.__table__
+    new_rows = [row for _, row in rows if row["email"] not in existing]
+    if new_rows:
+        db.execute(table.insert(), new_rows)
+    updates = [
+        {"match_id": existing[row["email"]][0], **row}
+        for _, row in rows
+        if row["email"] in existing
+    ]
+    if updates:
+        db.execute(
+            table.update()
+            .where(table.c.id == bindparam("match_id"))
+            .values({field: bindparam(field) for field in PROVIDER_FIELDS}),
+            updates,
+        )
+        for row in updates:
+            provider_id, old_cost = existing[row["email"]]
+            record_provider_cost_change(db, provider_id, old_cost, row["cost_usd"])
+
+
+def _flush_chunk(db: Session, chunk: List[Tuple[int, dict]], mode: str, report):
+    """
+    Escribe un lote validado en una transacción. Si el lote viola alguna
+    restricción (p. ej. ``name`` repetido) se reintenta fila por fila para
+    informar exactamente qué filas fallaron.
+    """
+    emails = {row["email"] for _, row in chunk}
+    existing = {
+        email: (provider_id, cost_usd)
+        for email, provider_id, cost_usd in db.query(
+            Provider.email, Provider.id, Provider.cost_usd
+        ).filter(Provider.email.in_(emails))
+    }
+
+    rows, seen = [], set()
+    for row_number, row in chunk:
+        if row["email"] in seen or (mode == "skip" and row["email"] in existing):
+            report.skipped += 1
+            continue
+        seen.add(row["email"])
+        rows.append((row_number, row))
+
+    try:
+        _write_chunk(db, rows, existing)
+        written = rows
+    except IntegrityError:
+        db.rollback()
+        written = []
+        for row_number, row in rows:
+            try:
+                _write_row(db, row, existing.get(row["email"]))
+                db.commit()
+                written.append((row_number, row))
+            except IntegrityError as e:
+                db.rollback()
+                report.add_error(row_number, row["email"], [str(e.orig)])
+
+    updated = sum(1 for _, row in written if row["email"] in existing)
+    report.updated += updated
+    report.created += len(written) - updated
+    ids = (
+        dict(
+            db.query(Provider.email, Provider.id).filter(
+                Provider.email.in_([row["email"] for _, row in written])
+            )
+        )
+        if written
+        else {}
+    )
+    report.notifications += evaluate_notification_rules_batch(
+        [{**row, "id": ids.get(row["email"])} for _, row in written], db, "provider"
+    )
+    db.commit()
+
+
+def import_providers(
+    db: Session, filename: str, stream: BinaryIO, mode: str = "skip"
+) -> dict:
+    """
+    Importa proveedores desde un CSV/XLSX. ``mode="skip"`` omite los emails
+    ya registrados; ``mode="upsert"`` los actualiza. Devuelve el reporte con
+    los errores por fila.
+    """
+    if mode not in IMPORT_MODES:
+        raise ImportFormatError(f"Modo inválido: {mode}")
+
+    report = ImportReport()
+    chunk: List[Tuple[int, dict]] = []
+    for row_number, raw in iter_file_rows(filename, stream):
+        report.processed += 1
+        try:
+            provider = ProviderCreate(**{f: raw.get(f) for f in PROVIDER_FIELDS})
+        except ValidationError as e:
+            report.add_error(
+                row_number,
+                raw.get("email"),
+                [
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                    for err in e.errors()
+                ],
+            )
+            continue
+        chunk.append((row_number, provider.model_dump()))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            _flush_chunk(db, chunk, mode, report)
+            chunk = []
+
+    if chunk:
+        _flush_chunk(db, chunk, mode, report)
+    return report.as_dict()
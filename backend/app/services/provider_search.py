@@ -0,0 +1,184 @@
+# app/services/provider_search.py
+"""
+Búsqueda de proveedores.
+
+- ``provider_filters``: filtros combinables (``company``, ``country`` y
+  ``line`` por contenido, ``category`` exacta, rango de ``cost_usd``). El
+  ``ILIKE '%...%'`` lo resuelven en PostgreSQL los índices GIN de trigramas
+  (``pg_trgm``, ver la migración c2e7a9d4f316) en lugar de recorrer la tabla.
+- ``search_providers``: texto libre ``q`` sobre nombre, empresa y email con
+  tolerancia a errores (``word_similarity``), ordenado por relevancia:
+  coincidencia exacta del nombre, nombre que empieza con ``q``, ``q``
+  contenido en el texto y, por último, la similitud.
+- ``typeahead``: valores distintos de una columna para autocompletar, los
+  que empiezan con el prefijo primero.
+
+En SQLite las funciones de similitud son las de app/core/trigram.py (sin
+índice); el resultado es el mismo.
+"""
+import os
+from typing import List, Optional
+
+from sqlalchemy import case, func, literal, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.core import trigram  # noqa: F401  similitud en SQLite
+from app.models.provider import Provider
+
+PROVIDER_SEARCH_THRESHOLD = float(os.getenv("PROVIDER_SEARCH_THRESHOLD", "0.5"))
+PROVIDER_TYPEAHEAD_THRESHOLD = float(os.getenv("PROVIDER_TYPEAHEAD_THRESHOLD", "0.3"))
+PROVIDER_SEARCH_MAX_LIMIT = 100
+PROVIDER_TYPEAHEAD_MAX_LIMIT = 25
+# Con menos caracteres los trigramas no discriminan: sólo prefijo
+FUZZY_MIN_LENGTH = 3
+
+TYPEAHEAD_FIELDS = ("name", "company", "country", "line")
+
+# Debe coincidir con la expresión del índice ix_provider_search_trgm
+SEARCH_TEXT = (
+    func.coalesce(Provider.name, "")
+    + " "
+    + func.coalesce(Provider.company, "")
+    + " "
+    + func.coalesce(Provider.email, "")
+)
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def contains(column, value: str):
+    return column.ilike(f"%{escape_like(value)}%", escape="\\")
+
+
+def startswith(column, value: str):
+    return column.ilike(f"{escape_like(value)}%", escape="\\")
+
+
+def _uses_pg_trgm(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _similar(db: Session, q: str, column, word: bool, threshold: float):
+    """
+    ``q`` parecido a ``column``. En PostgreSQL con los operadores ``<%`` y
+    ``%`` (los que usan el índice GIN) y el umbral fijado para la transacción.
+    """
+    if not _uses_pg_trgm(db):
+        function = func.word_similarity if word else func.similarity
+        return function(q, column) >= threshold
+    setting = (
+        "pg_trgm.word_similarity_threshold" if word else "pg_trgm.similarity_threshold"
+    )
+    db.execute(
+        text("SELECT set_config(:name, :value, true)"),
+        {"name": setting, "value": str(threshold)},
+    )
+    return literal(q).op("<%" if word else "%")(column)
+
+
+def provider_filters(
+    company: Optional[str] = None,
+    country: Optional[str] = None,
+    line: Optional[str] = None,
+    category: Optional[str] = None,
+    cost_min: Optional[float] = None,
+    cost_max: Optional[float] = None,
+) -> list:
+    """Condiciones de los filtros recibidos; los ausentes no filtran."""
+    conditions = []
+    for column, value in (
+        (Provider.company, company),
+        (Provider.country, country),
+        (Provider.line, line),
+    ):
+        if value:
+            conditions.append(contains(column, value))
+    if category:
+        conditions.append(Provider.category == category)
+    if cost_min is not None:
+        conditions.append(Provider.cost_usd >= cost_min)
+    if cost_max is not None:
+        conditions.append(Provider.cost_usd <= cost_max)
+    return conditions
+
+
+def search_providers(
+    db: Session,
+    q: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    **filters,
+) -> dict:
+    """
+    Página de proveedores que cumplen ``filters`` y, si hay ``q``, se parecen
+    a ``q``; con ``total`` y el ``rank`` de cada uno (``None`` sin ``q``,
+    ordenados por nombre).
+    """
+    limit = max(1, min(limit, PROVIDER_SEARCH_MAX_LIMIT))
+    conditions = provider_filters(**filters)
+    q = (q or "").strip()
+    if q:
+        match = contains(SEARCH_TEXT, q)
+        if len(q) >= FUZZY_MIN_LENGTH:
+            match = or_(
+                match,
+                _similar(db, q, SEARCH_TEXT, True, PROVIDER_SEARCH_THRESHOLD),
+            )
+        conditions.append(match)
+        rank = (
+            case((func.lower(Provider.name) == q.lower(), 3.0), else_=0.0)
+            + case((startswith(Provider.name, q), 2.0), else_=0.0)
+            + case((contains(SEARCH_TEXT, q), 1.0), else_=0.0)
+            + func.word_similarity(q, SEARCH_TEXT)
+        ).label("rank")
+        order = [rank.desc(), Provider.id]
+    else:
+        rank = literal(None).label("rank")
+        order = [Provider.name, Provider.id]
+
+    total = db.execute(
+        select(func.count()).select_from(Provider).where(*conditions)
+    ).scalar_one()
+    rows = db.execute(
+        select(*Provider.__table__.c, rank)
+        .where(*conditions)
+        .order_by(*order)
+        .limit(limit)
+        .offset(max(0, offset))
+    ).all()
+    return {"query": q or None, "total": total, "hits": [row._asdict() for row in rows]}
+
+
+def typeahead(
+    db: Session, field: str, prefix: str, limit: int = 10, **filters
+) -> List[str]:
+    """
+    Hasta ``limit`` valores distintos de ``field``: primero los que empiezan
+    con ``prefix`` y después los parecidos, por similitud.
+    """
+    if field not in TYPEAHEAD_FIELDS:
+        raise ValueError(f"Campo no permitido: {field}")
+    column = getattr(Provider, field)
+    limit = max(1, min(limit, PROVIDER_TYPEAHEAD_MAX_LIMIT))
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    match = startswith(column, prefix)
+    if len(prefix) >= FUZZY_MIN_LENGTH:
+        match = or_(
+            match, _similar(db, prefix, column, False, PROVIDER_TYPEAHEAD_THRESHOLD)
+        )
+    score = (
+        case((startswith(column, prefix), 1.0), else_=0.0)
+        + func.similarity(prefix, column)
+    ).label("score")
+    rows = db.execute(
+        select(column, func.max(score).label("score"))
+        .where(match, *provider_filters(**filters))
+        .group_by(column)
+        .order_by(func.max(score).desc(), column)
+        .limit(limit)
+    )
+    return [value for value, _ in rows]
@@ -1,34 +1,35 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.models.provider import Provider
+from app.models.provider_document import ProviderDocument
 from app.schemas.provider import ProviderCreate
-from app.repositories.notification_rule_repository import get_active_rules_by_table
-from app.repositories.notification_repository import create_notification
+from app.models.notification import Notification
+from app.services.rule_engine import get_rule_index, match_rows
+from app.services.rule_evaluator import build_rule_notification
+from app.services.notification_dedup import (
+    filter_new_notifications,
+    remember_notifications,
+)
+from datetime import datetime
+from app.services.spending import record_provider_cost_change
+from app.core.pagination import PageParams, PageSpec, paginate
+from app.services.search import PROVIDER_DOCUMENT, remove_from_index
+from app.services.storage_gc import mark_for_deletion, schedule_sweep
+
+PROVIDER_PAGE = PageSpec(
+    Provider,
+    ["name", "role", "company", "country", "cost_usd", "category", "line", "email"],
+)
 
 
 def evaluate_notification_rules(entity_data: dict, db: Session, table_name: str):
-    rules = get_active_rules_by_table(db, table_name)
-
-    for rule in rules:
-        field = rule.condition_field
-        value = entity_data.get(field)
-
-        if value is None:
-            continue
-
-        triggered = False
-        if rule.comparison == ">" and value > rule.threshold:
-            triggered = True
-        elif rule.comparison == "<" and value < rule.threshold:
-            triggered = True
-        elif rule.comparison == "==" and value == rule.threshold:
-            triggered = True
-        elif rule.comparison == ">=" and value >= rule.threshold:
-            triggered = True
-        elif rule.comparison == "<=" and value <= rule.threshold:
-            triggered = True
-
-        if triggered:
-            create_notification(db, {"message": rule.message, "type": rule.type})
+    """
+    Evalúa las reglas contra una entidad (con su ``id``) por el mismo camino
+    que ``evaluate_notification_rules_batch``, con sus claves de
+    deduplicación, y hace commit si se generó alguna notificación.
+    """
+    if evaluate_notification_rules_batch([entity_data], db, table_name):
+        db.commit()
 
 
 def create_provider(db: Session, provider_data: ProviderCreate):
@@ -38,13 +39,17 @@ def create_provider(db: Session, provider_data: ProviderCreate):
     db.refresh(provider)
 
     # Evaluar reglas de notificaciones
-    evaluate_notification_rules(provider_data.dict(), db, "provider")
+    evaluate_notification_rules(
+        {**provider_data.dict(), "id": provider.id}, db, "provider"
+    )
 
     return provider
 
 
-def get_providers(db: Session):
-    return db.query(Provider).all()
+def get_providers(db: Session, page: PageParams = None, query=None):
+    if query is None:
+        query = db.query(Provider)
+    return paginate(query, page, PROVIDER_PAGE)
 
 
 def get_provider_by_id(db: Session, provider_id: int):
@@ -54,13 +59,26 @@ def get_provider_by_id(db: Session, provider_id: int):
 def delete_provider(db: Session, provider_id: int):
     provider = db.query(Provider).filter(Provider.id == provider_id).first()
     if provider:
-        # Primero eliminar los documentos asociados al proveedor
-        for document in provider.documents:
-            db.delete(document)
+        # Primero eliminar los documentos asociados al proveedor, en una sola
+        # sentencia; sus archivos quedan marcados para el sweeper del storage
+        documents = db.query(ProviderDocument).filter(
+            ProviderDocument.provider_id == provider_id
+        )
+        rows = documents.with_entities(
+            ProviderDocument.id, ProviderDocument.storage_key
+        ).all()
+        marked = mark_for_deletion(db, [row.storage_key for row in rows])
+        remove_from_index(db, PROVIDER_DOCUMENT, [row.id for row in rows])
+        documents.delete(synchronize_session=False)
+
+        # Los gastos que tomaban el costo del proveedor dejan de sumarlo
+        record_provider_cost_change(db, provider.id, provider.cost_usd, None)
 
         # Luego eliminar el proveedor
         db.delete(provider)
         db.commit()
+        if marked:
+            schedule_sweep()
         return True
     return False
 
@@ -68,31 +86,86 @@ def delete_provider(db: Session, provider_id: int):
 def update_provider(db: Session, provider_id: int, provider_data: ProviderCreate):
     provider = db.query(Provider).filter(Provider.id == provider_id).first()
     if provider:
+        old_cost = provider.cost_usd
         for key, value in provider_data.dict().items():
             setattr(provider, key, value)
+        record_provider_cost_change(db, provider.id, old_cost, provider.cost_usd)
         db.commit()
         db.refresh(provider)
 
         # Evaluar reglas después de actualizar
-        evaluate_notification_rules(provider_data.dict(), db, "provider")
+        evaluate_notification_rules(
+            {**provider_data.dict(), "id": provider.id}, db, "provider"
+        )
 
         return provider
     return None
 
 
-def bulk_create_providers(db: Session, providers_data: list[ProviderCreate]):
-    existing_emails = {p.email for p in db.query(Provider.email).all()}
-    new_providers = []
+def evaluate_notification_rules_batch(
+    entities: list[dict], db: Session, table_name: str
+) -> int:
+    """
+    Evalúa todas las reglas activas de la tabla contra un lote de entidades
+    (con su ``id``) y agrega las notificaciones resultantes con un único
+    insert masivo. Las claves de deduplicación son las de
+    ``evaluate_rules``: se descartan las ya emitidas dentro de la ventana.
+    No hace commit. Devuelve cuántas notificaciones se generaron.
+    """
+    rules = get_rule_index(db).rules_for(table_name)
+    if not rules or not entities:
+        return 0
+
+    notifications = filter_new_notifications(
+        db,
+        [
+            build_rule_notification(rule, table_name, entities[i].get("id"))
+            for rule, i in match_rows(rules, entities)
+        ],
+    )
+    if notifications:
+        now = datetime.utcnow()
+        db.bulk_insert_mappings(
+            Notification, [{**n, "created_at": now} for n in notifications]
+        )
+        remember_notifications(notifications)
+    return len(notifications)
+
 
+def bulk_create_providers(db: Session, providers_data: list[ProviderCreate]):
+    """
+    Inserta los proveedores nuevos (omitiendo emails ya registrados o
+    repetidos en el lote) y evalúa las reglas sobre todo el lote en una
+    sola transacción. Devuelve un resumen con los conteos.
+    """
+    incoming_emails = {provider_data.email for provider_data in providers_data}
+    existing_emails = {
+        email
+        for (email,) in db.query(Provider.email).filter(
+            Provider.email.in_(incoming_emails)
+        )
+    }
+
+    new_rows = []
     for provider_data in providers_data:
         if provider_data.email in existing_emails:
             continue
-        provider_dict = provider_data.dict()
-        provider = Provider(**provider_dict)
-        db.add(provider)
-        db.flush()  # Obtener ID sin commit aún
-        evaluate_notification_rules(provider_dict, db, "provider")
-        new_providers.append(provider)
-
+        existing_emails.add(provider_data.email)
+        new_rows.append(provider_data.dict())
+
+    if new_rows:
+        # Los ``id`` generados identifican cada fila en las notificaciones
+        ids = db.scalars(
+            insert(Provider).returning(Provider.id, sort_by_parameter_order=True),
+            new_rows,
+        )
+        for row, provider_id in zip(new_rows, ids):
+            row["id"] = provider_id
+    notifications = evaluate_notification_rules_batch(new_rows, db, "provider")
     db.commit()
-    return new_providers
+
+    return {
+        "created": len(new_rows),
+        "skipped": len(providers_data) - len(new_rows),
+        "notifications": notifications,
+    }
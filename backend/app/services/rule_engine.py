@@ -0,0 +1,248 @@
+# app/services/rule_engine.py
+"""
+Índice en memoria de las reglas de notificación activas.
+
+Las reglas se cargan una sola vez, se "compilan" (comparador ya resuelto)
+y se indexan por ``(target_table, condition_field)``. El índice se
+invalida desde el CRUD de ``/notification-rules`` y, para que otros
+workers vean los cambios, se recarga además cada ``RULES_RELOAD_SECONDS``.
+"""
+import bisect
+import operator
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+import app.models  # noqa: F401  registra todas las tablas en Base.metadata
+from app.models.notification_rule import NotificationRule
+
+RULES_RELOAD_SECONDS = float(os.getenv("RULES_RELOAD_SECONDS", "60"))
+
+COMPARATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+}
+
+# Campos que no existen como columna y se calculan a partir del ledger de gasto
+CALCULATED_FIELDS = {"evc_q": {"spent_percentage", "spent_budget"}}
+
+
+class CompiledRule:
+    """Copia inmutable de una NotificationRule con su comparador resuelto."""
+
+    __slots__ = (
+        "id",
+        "name",
+        "target_table",
+        "condition_field",
+        "comparison",
+        "threshold",
+        "message",
+        "type",
+        "is_custom",
+        "_compare",
+    )
+
+    def __init__(self, rule: NotificationRule):
+        self.id = rule.id
+        self.name = rule.name
+        self.target_table = rule.target_table
+        self.condition_field = rule.condition_field
+        self.comparison = rule.comparison
+        self.threshold = rule.threshold
+        self.message = rule.message
+        self.type = rule.type
+        self.is_custom = (rule.comparison or "").startswith("custom:")
+        self._compare = COMPARATORS.get(rule.comparison)
+
+    @property
+    def is_supported(self) -> bool:
+        return (
+            self.is_custom
+            or self._compare is not None
+            or self.comparison in ("is_null", "is_not_null")
+        )
+
+    @property
+    def is_calculated(self) -> bool:
+        return self.condition_field in CALCULATED_FIELDS.get(self.target_table, ())
+
+    def matches(self, value) -> bool:
+        if self.comparison == "is_null":
+            return value is None
+        if self.comparison == "is_not_null":
+            return value is not None
+        if value is None or self._compare is None:
+            return False
+        try:
+            return bool(self._compare(value, self.threshold))
+        except TypeError:
+            return False
+
+    def as_clause(self, column):
+        """Expresión SQL equivalente, para evaluar sobre toda una tabla."""
+        if self.comparison == "is_null":
+            return column.is_(None)
+        if self.comparison == "is_not_null":
+            return column.isnot(None)
+        return self._compare(column, self.threshold)
+
+
+class RuleIndex:
+    """Reglas activas indexadas por tabla y por ``(tabla, campo)``."""
+
+    def __init__(self, rules: Iterable[NotificationRule]):
+        self.rules: List[CompiledRule] = []
+        self.by_table: Dict[str, List[CompiledRule]] = defaultdict(list)
+        self.by_key: Dict[tuple, List[CompiledRule]] = defaultdict(list)
+        for rule in rules:
+            compiled = CompiledRule(rule)
+            if not compiled.is_supported:
+                print(
+                    f"[rule_engine] Comparación no soportada en regla '{rule.name}': {rule.comparison}"
+                )
+                continue
+            self.rules.append(compiled)
+            self.by_table[compiled.target_table].append(compiled)
+            self.by_key[(compiled.target_table, compiled.condition_field)].append(
+                compiled
+            )
+
+    def rules_for(self, table: Optional[str] = None) -> List[CompiledRule]:
+        if table is None:
+            return list(self.rules)
+        return list(self.by_table.get(table, ()))
+
+    def rules_for_field(self, table: str, field: str) -> List[CompiledRule]:
+        return list(self.by_key.get((table, field), ()))
+
+    def fields_for(self, table: str) -> List[str]:
+        return sorted({field for (t, field) in self.by_key if t == table})
+
+
+_index: Optional[RuleIndex] = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def load_rule_index(db: Session) -> RuleIndex:
+    rules = db.query(NotificationRule).filter(NotificationRule.active.is_(True)).all()
+    return RuleIndex(rules)
+
+
+def get_rule_index(db: Session) -> RuleIndex:
+    """Devuelve el índice en caché, recargándolo si fue invalidado o expiró."""
+    global _index, _loaded_at
+    index = _index
+    if index is not None and time.monotonic() - _loaded_at < RULES_RELOAD_SECONDS:
+        return index
+    with _lock:
+        if _index is None or time.monotonic() - _loaded_at >= RULES_RELOAD_SECONDS:
+            _index = load_rule_index(db)
+            _loaded_at = time.monotonic()
+        return _index
+
+
+def invalidate_rule_index():
+    """Descarta el índice; se recarga en la siguiente evaluación."""
+    global _index
+    with _lock:
+        _index = None
+
+
+def fetch_row_values(
+    db: Session, table_name: str, row_id: int, fields: Iterable[str]
+) -> Optional[dict]:
+    """
+    Lee en una sola consulta todas las columnas de una fila que usan las
+    reglas. Los campos que no son columnas de la tabla se ignoran.
+    """
+    table = Base.metadata.tables.get(table_name)
+    if table is None:
+        return None
+    columns = [table.c[field] for field in fields if field in table.c]
+    if "id" not in {column.name for column in columns}:
+        columns.append(table.c.id)
+    row = db.execute(select(*columns).where(table.c.id == row_id)).mappings().first()
+    return dict(row) if row is not None else None
+
+
+def any_row_matches(db: Session, rule: CompiledRule) -> bool:
+    """Indica si alguna fila de la tabla de la regla la cumple."""
+    table = Base.metadata.tables.get(rule.target_table)
+    if table is None or rule.condition_field not in table.c:
+        return False
+    column = table.c[rule.condition_field]
+    return (
+        db.execute(select(table.c.id).where(rule.as_clause(column)).limit(1)).first()
+        is not None
+    )
+
+
+def match_rows(
+    rules: Iterable[CompiledRule], rows: List[dict]
+) -> List[Tuple[CompiledRule, int]]:
+    """
+    Evalúa todas las reglas contra un lote de filas y devuelve los pares
+    ``(regla, índice de fila)`` que se cumplen.
+
+    Los valores de cada campo se ordenan una sola vez; las comparaciones de
+    orden (``>``, ``>=``, ``<``, ``<=``, ``==``) se resuelven con búsqueda
+    binaria sobre esa columna, así que el costo es ``O(N log N)`` por campo
+    más ``O(log N)`` por regla, en lugar de ``reglas x filas`` comparaciones.
+    """
+    columns: Dict[str, tuple] = {}
+    matches: List[Tuple[CompiledRule, int]] = []
+
+    for rule in rules:
+        if rule.is_custom:
+            continue
+        field = rule.condition_field
+
+        if rule.comparison in ("is_null", "is_not_null", "!="):
+            matches.extend(
+                (rule, i) for i, row in enumerate(rows) if rule.matches(row.get(field))
+            )
+            continue
+
+        if field not in columns:
+            pairs = sorted(
+                (
+                    (row[field], i)
+                    for i, row in enumerate(rows)
+                    if isinstance(row.get(field), (int, float))
+                    and not isinstance(row.get(field), bool)
+                ),
+            )
+            columns[field] = ([value for value, _ in pairs], [i for _, i in pairs])
+        values, positions = columns[field]
+
+        threshold = rule.threshold
+        if rule.comparison == ">":
+            selected = positions[bisect.bisect_right(values, threshold) :]
+        elif rule.comparison == ">=":
+            selected = positions[bisect.bisect_left(values, threshold) :]
+        elif rule.comparison == "<":
+            selected = positions[: bisect.bisect_left(values, threshold)]
+        elif rule.comparison == "<=":
+            selected = positions[: bisect.bisect_right(values, threshold)]
+        else:  # "==" / "="
+            selected = positions[
+                bisect.bisect_left(values, threshold) : bisect.bisect_right(
+                    values, threshold
+                )
+            ]
+        matches.extend((rule, i) for i in sorted(selected))
+
+    return matches
@@ -1,11 +1,105 @@
 from sqlalchemy.orm import Session
-from app.models.notification_rule import NotificationRule
 from app.models.notification import Notification
-from app.models.provider import Provider
-from sqlalchemy import func, text
+from app.models.evc import EVC
+from app.models.evc_q import EVC_Q
+from app.models.evc_financial import EVC_Financial
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
-from app.database import SessionLocal
+from app.services.spending import get_spendings_by_evc_qs
+from app.services.notification_dedup import (
+    filter_new_notifications,
+    notification_fingerprint,
+    percentage_bucket,
+    remember_notifications,
+    was_quarter_recently_notified,
+)
+from app.services.rule_engine import (
+    any_row_matches,
+    fetch_row_values,
+    get_rule_index,
+)
+
+
+def _fetch_quarter_values(db: Session, evc_q_id: int, fields) -> dict:
+    """Fila de evc_q con el nombre del EVC y los campos calculados de gasto."""
+    table = EVC_Q.__table__
+    columns = [table.c[field] for field in fields if field in table.c]
+    columns += [
+        column
+        for column in (
+            table.c.id,
+            table.c.evc_id,
+            table.c.allocated_budget,
+            table.c.year,
+            table.c.q,
+        )
+        if column not in columns
+    ]
+    row = (
+        db.execute(
+            select(*columns, EVC.name.label("evc_name"))
+            .join(EVC, EVC.id == table.c.evc_id)
+            .where(table.c.id == evc_q_id)
+        )
+        .mappings()
+        .first()
+    )
+    if row is None:
+        return None
+
+    values = dict(row)
+    spent_budget = get_spendings_by_evc_qs(db, [evc_q_id]).get(evc_q_id, 0.0)
+    values["spent_budget"] = spent_budget
+    values["spent_percentage"] = (
+        (spent_budget / values["allocated_budget"]) * 100
+        if values["allocated_budget"]
+        else None
+    )
+    return values
+
+
+def _build_notification(
+    rule,
+    message: str,
+    notification_type: str,
+    evc_q_id: int = None,
+    threshold_bucket: int = None,
+    subject: str = None,
+) -> dict:
+    return {
+        "message": message,
+        "type": notification_type,
+        "read": False,
+        "rule_id": rule.id,
+        "evc_q_id": evc_q_id,
+        "threshold_bucket": threshold_bucket,
+        "fingerprint": notification_fingerprint(
+            rule.id, evc_q_id, threshold_bucket, subject=subject
+        ),
+    }
+
+
+def build_rule_notification(rule, table: str, row_id: int = None) -> dict:
+    """
+    Notificación de una regla estándar disparada por la fila ``row_id`` de
+    ``table`` (o por la tabla, sin fila), con sus claves de deduplicación.
+    """
+    if table == "evc_q" and row_id:
+        return _build_notification(rule, rule.message, rule.type, evc_q_id=row_id)
+    return _build_notification(
+        rule,
+        rule.message,
+        rule.type,
+        subject=f"{table}:{row_id}" if row_id else table,
+    )
+
+
+def _fetch_values(db: Session, rule_index, table: str, row_id: int) -> dict:
+    fields = rule_index.fields_for(table)
+    if table == "evc_q":
+        return _fetch_quarter_values(db, row_id, fields)
+    return fetch_row_values(db, table, row_id, fields)
 
 
 def evaluate_rules(db: Session, changed_table: str = None, changed_id: int = None):
@@ -17,296 +111,156 @@ def evaluate_rules(db: Session, changed_table: str = None, changed_id: int = Non
     :param changed_id: (opcional) ID del registro afectado
     """
     notifications_to_add = []  # Collect notifications to add at the end
+    rule_failed = False
 
     # Track which EVC quarters have already been notified for which thresholds
     # Format: {quarter_id: {threshold_type: [thresholds_reported]}}
     reported_thresholds = {}
 
     try:
-        query_rules = db.query(NotificationRule).filter(
-            NotificationRule.active.is_(True)
-        )
-
-        if changed_table:
-            query_rules = query_rules.filter(
-                NotificationRule.target_table == changed_table
-            )
-
-        rules = query_rules.all()
+        rule_index = get_rule_index(db)
+        rules = rule_index.rules_for(changed_table)
         print(f"Evaluating {len(rules)} rules for {changed_table} (ID: {changed_id})")
+        if not rules:
+            return
 
         # First check if we should skip creating duplicate notifications
         # Only create one notification per EVC quarter per update operation
         if changed_table == "evc_financial" and changed_id:
             # Get the associated quarter for this financial entry
-            quarter_info = db.execute(
-                text(
-                    """
-                    SELECT ef.evc_q_id, eq.evc_id, e.name as evc_name
-                    FROM evc_financial ef
-                    JOIN evc_q eq ON ef.evc_q_id = eq.id
-                    JOIN evc e ON eq.evc_id = e.id
-                    WHERE ef.id = :id
-                """
-                ),
-                {"id": changed_id},
-            ).fetchone()
-
-            if quarter_info:
-                # Check if there are any existing recent notifications for this EVC quarter
-                # from the last 5 minutes
-                recent_notifications = db.execute(
-                    text(
-                        """
-                        SELECT COUNT(*) 
-                        FROM notification 
-                        WHERE message LIKE :pattern 
-                        AND created_at > NOW() - INTERVAL '5 minutes'
-                    """
-                    ),
-                    {
-                        "pattern": f"%EVC '{quarter_info.evc_name}'%cuatrimestre (ID: {quarter_info.evc_q_id})%"
-                    },
-                ).scalar()
-
-                if recent_notifications > 0:
-                    print(
-                        f"Skipping duplicate notifications for EVC quarter {quarter_info.evc_q_id} - already notified in the last 5 minutes"
-                    )
-                    return
+            evc_q_id = db.execute(
+                select(EVC_Financial.evc_q_id).where(EVC_Financial.id == changed_id)
+            ).scalar()
+
+            # Indexed lookup on (evc_q_id, created_at), cached in memory
+            if was_quarter_recently_notified(db, evc_q_id):
+                print(
+                    f"Skipping duplicate notifications for EVC quarter {evc_q_id} - already notified in the last 5 minutes"
+                )
+                return
+
+        # Fetch every value the rules need from the changed row in a single query per table
+        row_values = {}
+        if changed_id:
+            for table in {rule.target_table for rule in rules}:
+                row_values[table] = _fetch_values(db, rule_index, table, changed_id)
 
         # Now evaluate the rules
         for rule in rules:
             table = rule.target_table
             field = rule.condition_field
-            comparison = rule.comparison
             threshold = rule.threshold
 
             try:
                 # Handle special case for evc_q with spent_percentage and spent_budget fields
                 # that don't exist as actual columns but need to be calculated
-                if table == "evc_q" and (
-                    field == "spent_percentage" or field == "spent_budget"
-                ):
-                    try:
-                        # Skip standard comparison and use custom rule approach instead
-                        if changed_id:
-                            # For a specific EVC quarter
-                            q = db.execute(
-                                text(
-                                    """
-                                    SELECT 
-                                        eq.id, 
-                                        eq.evc_id, 
-                                        e.name as evc_name,
-                                        eq.allocated_budget,
-                                        eq.year,
-                                        eq.q,
-                                        (
-                                            SELECT COALESCE(SUM(ef.value_usd), 0) 
-                                            FROM evc_financial ef 
-                                            WHERE ef.evc_q_id = eq.id
-                                        ) +
-                                        (
-                                            SELECT COALESCE(SUM(p.cost_usd), 0) 
-                                            FROM provider p 
-                                            JOIN evc_financial ef ON p.id = ef.provider_id 
-                                            WHERE ef.evc_q_id = eq.id
-                                        ) as spent_budget
-                                    FROM evc_q eq
-                                    JOIN evc e ON eq.evc_id = e.id
-                                    WHERE eq.id = :id
-                                    """
-                                ),
-                                {"id": changed_id},
-                            ).fetchone()
-
-                            if q and q.allocated_budget > 0:
-                                spent_budget = q.spent_budget
-                                spent_percentage = (
-                                    spent_budget / q.allocated_budget
-                                ) * 100
-                                print(
-                                    f"Quarter ID {q.id}: Budget: {q.allocated_budget}, Spent: {spent_budget} ({spent_percentage:.1f}%)"
-                                )
+                if rule.is_calculated:
+                    q = row_values.get(table)
+                    if not q or not q["allocated_budget"] or q["allocated_budget"] <= 0:
+                        continue
 
-                                # Initialize tracking for this quarter if not exists
-                                if q.id not in reported_thresholds:
-                                    reported_thresholds[q.id] = {
-                                        "spent_percentage": [],
-                                        "spent_budget": [],
-                                    }
-
-                                # Check field and comparison
-                                should_notify = False
-                                if field == "spent_percentage":
-                                    if (
-                                        comparison == ">="
-                                        and spent_percentage >= threshold
-                                    ):
-                                        should_notify = True
-                                    elif (
-                                        comparison == ">"
-                                        and spent_percentage > threshold
-                                    ):
-                                        should_notify = True
-                                    elif (
-                                        comparison == "=="
-                                        and spent_percentage == threshold
-                                    ):
-                                        should_notify = True
-                                    elif (
-                                        comparison == "<="
-                                        and spent_percentage <= threshold
-                                    ):
-                                        should_notify = True
-                                    elif (
-                                        comparison == "<"
-                                        and spent_percentage < threshold
-                                    ):
-                                        should_notify = True
-                                elif field == "spent_budget":
-                                    if comparison == ">=" and spent_budget >= threshold:
-                                        should_notify = True
-                                    elif comparison == ">" and spent_budget > threshold:
-                                        should_notify = True
-                                    elif (
-                                        comparison == "==" and spent_budget == threshold
-                                    ):
-                                        should_notify = True
-                                    elif (
-                                        comparison == "<=" and spent_budget <= threshold
-                                    ):
-                                        should_notify = True
-                                    elif comparison == "<" and spent_budget < threshold:
-                                        should_notify = True
-
-                                # Check if we already reported this threshold level
-                                if should_notify:
-                                    # Skip if we already reported this threshold or a higher one for this quarter
-                                    if threshold in reported_thresholds[q.id][field]:
-                                        continue
-
-                                    # For percentage thresholds, only report the highest threshold reached
-                                    if field == "spent_percentage":
-                                        # Skip lower thresholds if we've already reported a higher one
-                                        higher_reported = [
-                                            t
-                                            for t in reported_thresholds[q.id][field]
-                                            if t > threshold
-                                        ]
-                                        if higher_reported:
-                                            continue
-
-                                        # Skip if it's a very small change from previously reported (less than 5%)
-                                        close_reported = [
-                                            t
-                                            for t in reported_thresholds[q.id][field]
-                                            if abs(t - threshold) < 5
-                                        ]
-                                        if close_reported:
-                                            continue
-
-                                    # Add this threshold to reported list
-                                    reported_thresholds[q.id][field].append(threshold)
-
-                                    # Create the notification with a standardized format
-                                    # Only one message format for consistency
-                                    if field == "spent_percentage":
-                                        msg = f"El EVC '{q.evc_name}' ha gastado el {spent_percentage:.1f}% de su presupuesto en Q{q.q}/{q.year} (${spent_budget:.2f} de ${q.allocated_budget:.2f})"
-                                    else:  # spent_budget
-                                        msg = f"El EVC '{q.evc_name}' ha gastado ${spent_budget:.2f} del presupuesto asignado en el cuatrimestre (ID: {q.id})."
-
-                                    # Determine notification type based on percentage
-                                    notification_type = rule.type
-                                    if field == "spent_percentage":
-                                        if spent_percentage >= 100:
-                                            notification_type = "critical"
-                                        elif spent_percentage >= 90:
-                                            notification_type = "alert"
-                                        elif spent_percentage >= 75:
-                                            notification_type = "warning"
-                                        elif spent_percentage >= 50:
-                                            notification_type = "info"
-
-                                    notifications_to_add.append(
-                                        {
-                                            "message": msg,
-                                            "type": notification_type,
-                                            "read": False,
-                                        }
-                                    )
-
-                        # Handle other non-specific quarter queries...
-                    except Exception as e:
-                        print(
-                            f"[evaluate_rules] Error handling calculated field {field}: {e}"
-                        )
+                    spent_budget = q["spent_budget"]
+                    spent_percentage = q["spent_percentage"]
+                    print(
+                        f"Quarter ID {q['id']}: Budget: {q['allocated_budget']}, Spent: {spent_budget} ({spent_percentage:.1f}%)"
+                    )
+
+                    # Initialize tracking for this quarter if not exists
+                    if q["id"] not in reported_thresholds:
+                        reported_thresholds[q["id"]] = {
+                            "spent_percentage": [],
+                            "spent_budget": [],
+                        }
+                    quarter_reported = reported_thresholds[q["id"]][field]
+
+                    if not rule.matches(q[field]):
                         continue
-                elif comparison.startswith("custom:"):
+
+                    # Skip if we already reported this threshold or a higher one for this quarter
+                    if threshold in quarter_reported:
+                        continue
+
+                    # For percentage thresholds, only report the highest threshold reached
+                    if field == "spent_percentage":
+                        # Skip lower thresholds if we've already reported a higher one
+                        if any(t > threshold for t in quarter_reported):
+                            continue
+
+                        # Skip if it's a very small change from previously reported (less than 5%)
+                        if any(abs(t - threshold) < 5 for t in quarter_reported):
+                            continue
+
+                    # Add this threshold to reported list
+                    quarter_reported.append(threshold)
+
+                    # Create the notification with a standardized format
+                    # Only one message format for consistency
+                    if field == "spent_percentage":
+                        msg = f"El EVC '{q['evc_name']}' ha gastado el {spent_percentage:.1f}% de su presupuesto en Q{q['q']}/{q['year']} (${spent_budget:.2f} de ${q['allocated_budget']:.2f})"
+                    else:  # spent_budget
+                        msg = f"El EVC '{q['evc_name']}' ha gastado ${spent_budget:.2f} del presupuesto asignado en el cuatrimestre (ID: {q['id']})."
+
+                    # Determine notification type based on percentage
+                    notification_type = rule.type
+                    if field == "spent_percentage":
+                        if spent_percentage >= 100:
+                            notification_type = "critical"
+                        elif spent_percentage >= 90:
+                            notification_type = "alert"
+                        elif spent_percentage >= 75:
+                            notification_type = "warning"
+                        elif spent_percentage >= 50:
+                            notification_type = "info"
+
+                    notifications_to_add.append(
+                        _build_notification(
+                            rule,
+                            msg,
+                            notification_type,
+                            evc_q_id=q["id"],
+                            threshold_bucket=(
+                                percentage_bucket(spent_percentage)
+                                if field == "spent_percentage"
+                                else int(threshold)
+                            ),
+                        )
+                    )
+                elif rule.is_custom:
                     # Process custom comparison rules with existing logic
                     pass  # Keep existing custom rule logic
                 else:
-                    # Process standard comparison rules with existing logic
+                    # Standard comparison rules run in memory against the fetched row
                     if changed_id:
-                        # Handle NULL checks properly
-                        if comparison == "is_null":
-                            sql = f"SELECT COUNT(*) FROM {table} WHERE id = :id AND {field} IS NULL"
-                            result = db.execute(text(sql), {"id": changed_id}).scalar()
-                        elif comparison == "is_not_null":
-                            sql = f"SELECT COUNT(*) FROM {table} WHERE id = :id AND {field} IS NOT NULL"
-                            result = db.execute(text(sql), {"id": changed_id}).scalar()
-                        else:
-                            sql = f"SELECT COUNT(*) FROM {table} WHERE id = :id AND {field} {comparison} :val"
-                            result = db.execute(
-                                text(sql), {"id": changed_id, "val": threshold}
-                            ).scalar()
+                        values = row_values.get(table)
+                        triggered = (
+                            values is not None
+                            and field in values
+                            and rule.matches(values[field])
+                        )
                     else:
-                        # Handle NULL checks properly
-                        if comparison == "is_null":
-                            sql = f"SELECT COUNT(*) FROM {table} WHERE {field} IS NULL"
-                            result = db.execute(text(sql)).scalar()
-                        elif comparison == "is_not_null":
-                            sql = f"SELECT COUNT(*) FROM {table} WHERE {field} IS NOT NULL"
-                            result = db.execute(text(sql)).scalar()
-                        else:
-                            sql = f"SELECT COUNT(*) FROM {table} WHERE {field} {comparison} :val"
-                            result = db.execute(text(sql), {"val": threshold}).scalar()
+                        triggered = any_row_matches(db, rule)
 
-                    if result > 0:
+                    if triggered:
                         # Only add default notification if not duplicated
                         if table == "evc_q" and changed_id:
                             # Check for duplicate notification for this quarter
-                            evc_id_info = db.execute(
-                                text("SELECT evc_id FROM evc_q WHERE id = :id"),
-                                {"id": changed_id},
-                            ).fetchone()
-
-                            if evc_id_info:
-                                key = f"{table}_{field}_{evc_id_info.evc_id}"
-                                if key not in reported_thresholds:
-                                    reported_thresholds[key] = []
-
-                                if threshold not in reported_thresholds[key]:
-                                    reported_thresholds[key].append(threshold)
-                                    notifications_to_add.append(
-                                        {
-                                            "message": rule.message,
-                                            "type": rule.type,
-                                            "read": False,
-                                        }
-                                    )
+                            key = f"{table}_{field}_{row_values[table]['evc_id']}"
+                            if key not in reported_thresholds:
+                                reported_thresholds[key] = []
+
+                            if threshold not in reported_thresholds[key]:
+                                reported_thresholds[key].append(threshold)
+                                notifications_to_add.append(
+                                    build_rule_notification(rule, table, changed_id)
+                                )
                         else:
                             notifications_to_add.append(
-                                {
-                                    "message": rule.message,
-                                    "type": rule.type,
-                                    "read": False,
-                                }
+                                build_rule_notification(rule, table, changed_id)
                             )
 
             except Exception as e:
                 print(f"[evaluate_rules] Error evaluando regla '{rule.name}':", e)
+                rule_failed = True
                 # Continue to the next rule instead of stopping the entire process
                 continue
 
@@ -327,39 +281,35 @@ def evaluate_rules(db: Session, changed_table: str = None, changed_id: int = Non
                     seen.add(key)
                     filtered_notifications.append(notification)
 
-            print(
-                f"After filtering, {len(filtered_notifications)} unique notifications remain"
-            )
-
-            # Only proceed if we have unique notifications
-            if filtered_notifications:
-                try:
-                    # Create a new session for notifications to avoid transaction issues
-                    notif_db = SessionLocal()
-
-                    try:
-                        for notification_data in filtered_notifications:
-                            notif_db.add(
-                                Notification(
-                                    message=notification_data["message"],
-                                    type=notification_data["type"],
-                                    read=notification_data["read"],
-                                    created_at=datetime.utcnow(),
-                                )
-                            )
-                        notif_db.commit()
-                        print(
-                            f"Successfully added {len(filtered_notifications)} notifications to database"
-                        )
-                    except Exception as e:
-                        notif_db.rollback()
-                        print(f"[evaluate_rules] Error adding notifications: {e}")
-                    finally:
-                        notif_db.close()
-                except Exception as e:
-                    print(f"[evaluate_rules] Error creating notification session: {e}")
-            else:
-                print("No unique notifications to add after filtering")
+            # Misma sesión (y conexión) que la evaluación: si alguna regla
+            # falló, la transacción puede haber quedado abortada
+            if rule_failed:
+                db.rollback()
+
+            try:
+                # Skip notifications already emitted within the dedup window
+                filtered_notifications = filter_new_notifications(
+                    db, filtered_notifications
+                )
+                print(
+                    f"After filtering, {len(filtered_notifications)} unique notifications remain"
+                )
+
+                # Only proceed if we have unique notifications
+                if filtered_notifications:
+                    now = datetime.utcnow()
+                    for notification_data in filtered_notifications:
+                        db.add(Notification(created_at=now, **notification_data))
+                    db.commit()
+                    remember_notifications(filtered_notifications)
+                    print(
+                        f"Successfully added {len(filtered_notifications)} notifications to database"
+                    )
+                else:
+                    print("No unique notifications to add after filtering")
+            except Exception as e:
+                db.rollback()
+                print(f"[evaluate_rules] Error adding notifications: {e}")
         else:
             print("No notifications to add after rule evaluation")
     except Exception as e:
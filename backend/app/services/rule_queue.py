@@ -0,0 +1,190 @@
+# app/services/rule_queue.py
+"""
+Cola post-commit para evaluar reglas de notificación fuera del request.
+
+Los servicios encolan ``(tabla, id)`` después de hacer ``commit`` y un
+pool de hilos ejecuta ``evaluate_rules`` con su propia sesión. Los eventos
+repetidos para la misma fila (por ejemplo varios movimientos del mismo
+``evc_q``) que llegan dentro de ``RULES_COALESCE_SECONDS`` se evalúan una
+sola vez.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database import session_scope
+
+RULES_ASYNC = os.getenv("RULES_ASYNC", "true").lower() in ("1", "true", "yes")
+RULES_WORKERS = int(os.getenv("RULES_WORKERS", "2"))
+RULES_COALESCE_SECONDS = float(os.getenv("RULES_COALESCE_SECONDS", "0.5"))
+
+EventKey = Tuple[str, int]
+
+
+def _evaluate_in_session(
+    changed_table: str, changed_id: int, db: Optional[Session] = None
+):
+    from app.services.rule_evaluator import evaluate_rules
+
+    with session_scope(db) as session:
+        evaluate_rules(session, changed_table=changed_table, changed_id=changed_id)
+
+
+class RuleEvaluationQueue:
+    def __init__(
+        self,
+        workers: int = RULES_WORKERS,
+        coalesce_window: float = RULES_COALESCE_SECONDS,
+        evaluate: Callable[[str, int], None] = _evaluate_in_session,
+    ):
+        self.workers = max(1, workers)
+        self.coalesce_window = coalesce_window
+        self._evaluate = evaluate
+        # Dict ordenado por inserción: el primero siempre es el evento más antiguo
+        self._pending: Dict[EventKey, float] = {}
+        self._cond = threading.Condition()
+        self._threads = []
+        self._running = False
+        self._in_flight = 0
+
+        self.enqueued = 0
+        self.coalesced = 0
+        self.processed = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._total_lag = 0.0
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._threads = [
+                threading.Thread(
+                    target=self._work, name=f"rule-worker-{n}", daemon=True
+                )
+                for n in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detiene los workers y evalúa lo que quede pendiente."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.drain()
+
+    def drain(self):
+        """Evalúa en el hilo actual todos los eventos pendientes."""
+        while True:
+            with self._cond:
+                if not self._pending:
+                    return
+                key = next(iter(self._pending))
+                enqueued_at = self._pending.pop(key)
+                self._in_flight += 1
+            self._run(key, enqueued_at)
+
+    def enqueue(self, changed_table: str, changed_id: Optional[int]):
+        if changed_id is None:
+            return
+        key = (changed_table, changed_id)
+        with self._cond:
+            self.enqueued += 1
+            if key in self._pending:
+                self.coalesced += 1
+                return
+            self._pending[key] = time.monotonic()
+            self._cond.notify()
+        if not self._running:
+            self.start()
+
+    def _next_event(self):
+        with self._cond:
+            while self._running:
+                if self._pending:
+                    key, enqueued_at = next(iter(self._pending.items()))
+                    wait = enqueued_at + self.coalesce_window - time.monotonic()
+                    if wait <= 0:
+                        del self._pending[key]
+                        self._in_flight += 1
+                        return key, enqueued_at
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _work(self):
+        while True:
+            event = self._next_event()
+            if event is None:
+                return
+            self._run(*event)
+
+    def _run(self, key: EventKey, enqueued_at: float):
+        lag = time.monotonic() - enqueued_at
+        try:
+            self._evaluate(*key)
+        except Exception as e:
+            self.errors += 1
+            print(f"[rule_queue] Error evaluating rules for {key}: {e}")
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self.processed += 1
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                self._total_lag += lag
+
+    def metrics(self) -> dict:
+        with self._cond:
+            oldest = next(iter(self._pending.values()), None)
+            return {
+                "running": self._running,
+                "workers": self.workers,
+                "coalesce_window_seconds": self.coalesce_window,
+                "queue_depth": len(self._pending),
+                "in_flight": self._in_flight,
+                "oldest_pending_seconds": (
+                    time.monotonic() - oldest if oldest is not None else 0.0
+                ),
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "processed": self.processed,
+                "errors": self.errors,
+                "last_lag_seconds": self.last_lag,
+                "max_lag_seconds": self.max_lag,
+                "avg_lag_seconds": (
+                    self._total_lag / self.processed if self.processed else 0.0
+                ),
+            }
+
+
+rule_queue = RuleEvaluationQueue()
+
+
+def enqueue_rule_evaluation(
+    changed_table: str, changed_id: Optional[int], db: Optional[Session] = None
+):
+    """
+    Programa la evaluación de reglas para una fila ya confirmada en la base.
+    Con ``RULES_ASYNC=false`` se evalúa en línea (útil en scripts y pruebas)
+    reutilizando ``db``, la sesión del request, si se recibe.
+    """
+    if changed_id is None:
+        return
+    if RULES_ASYNC:
+        rule_queue.enqueue(changed_table, changed_id)
+    else:
+        try:
+            _evaluate_in_session(changed_table, changed_id, db)
+        except Exception as e:
+            print(f"[rule_queue] Error evaluating rules for {changed_table}: {e}")
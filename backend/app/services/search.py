@@ -0,0 +1,520 @@
+# app/services/search.py
+"""
+Búsqueda de texto completo sobre facturas y documentos.
+
+Cada factura leída (por su SHA-256, con el texto que ya extrae
+``parse_invoice``) y cada documento subido (texto del PDF o del archivo de
+texto, extraído en ``invoice_pool``) queda como una fila ``SearchEntry``.
+``search_documents`` devuelve los resultados ordenados por relevancia con un
+fragmento del texto donde aparecen los términos marcados con ``<mark>``:
+
+- PostgreSQL: columna generada ``search_vector`` (``tsvector``, índice GIN,
+  ver la migración b8d4f2a6c135), ``websearch_to_tsquery`` y ``ts_rank_cd``.
+- Otras bases (SQLite en tests y desarrollo): índice invertido propio en
+  ``search_term`` (término -> entradas) con ranking BM25. Los términos se
+  comparan en minúsculas y sin acentos; todos deben aparecer.
+
+Las entradas se escriben en la transacción de quien llama (facturas) o en
+una tarea en segundo plano después de la subida (documentos); borrar un
+documento borra su entrada.
+"""
+import asyncio
+import html
+import math
+import operator
+import os
+import re
+import tempfile
+import unicodedata
+from collections import Counter
+from functools import reduce
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, func, insert, literal_column, select
+from sqlalchemy.orm import Session, aliased
+
+from app.core.optional_deps import optional_import
+from app.database import session_scope
+from app.models.document import Document
+from app.models.evc_financial import EVC_Financial
+from app.models.invoice_parse import InvoiceParse
+from app.models.provider_document import ProviderDocument
+from app.models.search_entry import SearchEntry, SearchTerm
+from app.services import storage as storage_service
+import app.services.invoice_jobs as invoice_jobs
+
+SEARCH_TS_CONFIG = os.getenv("SEARCH_TS_CONFIG", "spanish")
+# Texto indexado por archivo; el resto se descarta
+SEARCH_MAX_TEXT_CHARS = int(os.getenv("SEARCH_MAX_TEXT_CHARS", "500000"))
+# Documentos más grandes se indexan sólo por nombre
+SEARCH_MAX_EXTRACT_BYTES = int(
+    os.getenv("SEARCH_MAX_EXTRACT_BYTES", str(50 * 1024 * 1024))
+)
+SEARCH_SNIPPET_WORDS = int(os.getenv("SEARCH_SNIPPET_WORDS", "30"))
+SEARCH_MAX_LIMIT = 100
+
+INVOICE = "invoice"
+DOCUMENT = "document"
+PROVIDER_DOCUMENT = "provider_document"
+SOURCES = (INVOICE, DOCUMENT, PROVIDER_DOCUMENT)
+
+DOCUMENT_MODELS = {DOCUMENT: Document, PROVIDER_DOCUMENT: ProviderDocument}
+DOWNLOAD_PATHS = {
+    DOCUMENT: "/documents/{}/download",
+    PROVIDER_DOCUMENT: "/provider-documents/{}/download",
+}
+
+TEXT_EXTENSIONS = {".txt", ".csv", ".md", ".json", ".xml", ".html", ".htm"}
+
+# Índice local: peso de una aparición en el nombre del archivo y
+# parámetros de BM25
+NAME_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERM_LENGTH = 64
+
+STOPWORDS = frozenset(
+    """
+    a al como con de del el en es la las lo los no o para por que se su un una
+    y and for in of on or the to
+    """.split()
+)
+
+_WORD = re.compile(r"[^\W_]+")
+_SPACES = re.compile(r"\s+")
+
+# Marcas de ts_headline, reemplazadas por <mark> después de escapar el texto
+_START, _STOP = "\x02", "\x03"
+
+
+def fold(word: str) -> str:
+    """Minúsculas y sin acentos (``Señal`` -> ``senal``)."""
+    decomposed = unicodedata.normalize("NFKD", word.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Términos de ``text`` para el índice local (sin palabras vacías)."""
+    if not text:
+        return []
+    terms = (fold(word) for word in _WORD.findall(text))
+    return [term[:MAX_TERM_LENGTH] for term in terms if term and term not in STOPWORDS]
+
+
+def _uses_tsvector(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _index_terms(db: Session, entry: SearchEntry):
+    body = tokenize(entry.body)
+    counts = Counter(body)
+    for term in tokenize(entry.file_name):
+        counts[term] += NAME_WEIGHT
+    entry.length = len(body)
+    db.execute(delete(SearchTerm).where(SearchTerm.entry_id == entry.id))
+    if counts:
+        db.execute(
+            insert(SearchTerm),
+            [
+                {"term": term, "entry_id": entry.id, "tf": tf}
+                for term, tf in counts.items()
+            ],
+        )
+
+
+def _get_entry(db: Session, source: str, source_key: str) -> Optional[SearchEntry]:
+    return db.execute(
+        select(SearchEntry).where(
+            SearchEntry.source == source, SearchEntry.source_key == source_key
+        )
+    ).scalar_one_or_none()
+
+
+def index_text(
+    db: Session,
+    source: str,
+    source_key,
+    file_name: Optional[str],
+    text: Optional[str],
+    replace: bool = True,
+) -> SearchEntry:
+    """
+    Crea o actualiza la entrada de ``(source, source_key)``; no hace commit.
+    Con ``replace=False`` una entrada existente se deja como está.
+    """
+    source_key = str(source_key)
+    text = (text or "")[:SEARCH_MAX_TEXT_CHARS]
+    entry = _get_entry(db, source, source_key)
+    if entry is not None and (
+        not replace or (entry.file_name == file_name and entry.body == text)
+    ):
+        return entry
+    if entry is None:
+        entry = SearchEntry(source=source, source_key=source_key)
+        db.add(entry)
+    entry.file_name = file_name
+    entry.body = text
+    db.flush()
+    if not _uses_tsvector(db):
+        _index_terms(db, entry)
+    return entry
+
+
+def index_invoices(db: Session, invoices: Iterable[tuple], replace: bool = True):
+    """
+    Indexa ``(sha256, nombre del archivo, resultado de parse_invoice)``; no
+    hace commit. Los resultados de la caché no traen el texto: si la factura
+    todavía no está indexada se toma de ``invoice_parse``.
+    """
+    for sha256, file_name, result in invoices:
+        if not replace and _get_entry(db, INVOICE, sha256) is not None:
+            continue
+        text = result.get("text")
+        if text is None:
+            text = db.execute(
+                select(InvoiceParse.text).where(InvoiceParse.sha256 == sha256)
+            ).scalar_one_or_none()
+        index_text(db, INVOICE, sha256, file_name, text)
+
+
+def remove_from_index(db: Session, source: str, source_keys: Iterable):
+    """Borra las entradas de ``source_keys``; no hace commit."""
+    keys = [str(key) for key in source_keys]
+    if not keys:
+        return
+    entries = select(SearchEntry.id).where(
+        SearchEntry.source == source, SearchEntry.source_key.in_(keys)
+    )
+    # SQLite no aplica el ON DELETE CASCADE sin PRAGMA foreign_keys
+    db.execute(delete(SearchTerm).where(SearchTerm.entry_id.in_(entries)))
+    db.execute(
+        delete(SearchEntry).where(
+            SearchEntry.source == source, SearchEntry.source_key.in_(keys)
+        )
+    )
+
+
+def _snippet(text: Optional[str], terms: Iterable[str]) -> str:
+    """Ventana de ``SEARCH_SNIPPET_WORDS`` palabras alrededor del primer término."""
+    words = list(_WORD.finditer(text or ""))
+    if not words:
+        return ""
+    terms = set(terms)
+    first = next((n for n, word in enumerate(words) if fold(word.group()) in terms), 0)
+    start = max(0, first - SEARCH_SNIPPET_WORDS // 3)
+    end = min(len(words), start + SEARCH_SNIPPET_WORDS)
+    parts = []
+    position = words[start].start()
+    for word in words[start:end]:
+        # Se conserva la puntuación entre palabras (``PO-4500``)
+        parts.append(html.escape(_SPACES.sub(" ", text[position : word.start()])))
+        value = html.escape(word.group())
+        if fold(word.group()) in terms:
+            value = f"<mark>{value}</mark>"
+        parts.append(value)
+        position = word.end()
+    snippet = "".join(parts)
+    if start > 0:
+        snippet = "… " + snippet
+    if end < len(words):
+        snippet += " …"
+    return snippet
+
+
+def _highlight(headline: Optional[str]) -> str:
+    escaped = html.escape(" ".join((headline or "").split()))
+    return escaped.replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def _search_tsvector(db: Session, q: str, sources, limit: int, offset: int):
+    vector = literal_column("search_entry.search_vector")
+    query = func.websearch_to_tsquery(SEARCH_TS_CONFIG, q)
+    condition = vector.op("@@")(query)
+    rank = func.ts_rank_cd(vector, query).label("rank")
+    if sources:
+        condition = condition & SearchEntry.source.in_(sources)
+    total = db.execute(
+        select(func.count()).select_from(SearchEntry).where(condition)
+    ).scalar_one()
+    page = (
+        select(
+            SearchEntry.id,
+            SearchEntry.source,
+            SearchEntry.source_key,
+            SearchEntry.file_name,
+            SearchEntry.body,
+            rank,
+        )
+        .where(condition)
+        .order_by(rank.desc(), SearchEntry.id)
+        .limit(limit)
+        .offset(offset)
+        .subquery()
+    )
+    # ts_headline sólo para la página, no para todos los resultados
+    options = (
+        f"StartSel={_START}, StopSel={_STOP}, "
+        f"MaxWords={SEARCH_SNIPPET_WORDS}, MinWords={SEARCH_SNIPPET_WORDS // 2}"
+    )
+    rows = db.execute(
+        select(
+            page.c.source,
+            page.c.source_key,
+            page.c.file_name,
+            page.c.rank,
+            func.ts_headline(SEARCH_TS_CONFIG, page.c.body, query, options).label(
+                "snippet"
+            ),
+        ).order_by(page.c.rank.desc(), page.c.id)
+    ).all()
+    hits = [
+        {
+            "source": row.source,
+            "key": row.source_key,
+            "file_name": row.file_name,
+            "rank": float(row.rank),
+            "snippet": _highlight(row.snippet),
+        }
+        for row in rows
+    ]
+    return total, hits
+
+
+def _search_terms(db: Session, q: str, sources, limit: int, offset: int):
+    terms = sorted(set(tokenize(q)))
+    if not terms:
+        return 0, []
+    stats = select(func.count(), func.avg(SearchEntry.length))
+    if sources:
+        stats = stats.where(SearchEntry.source.in_(sources))
+    count, average = db.execute(stats).one()
+    frequencies = dict(
+        db.execute(
+            select(SearchTerm.term, func.count())
+            .where(SearchTerm.term.in_(terms))
+            .group_by(SearchTerm.term)
+        ).all()
+    )
+    if len(frequencies) < len(terms):
+        # Algún término no aparece en ninguna entrada
+        return 0, []
+    average = float(average or 0) or 1.0
+
+    # Las entradas candidatas salen del término menos frecuente (un PO, un
+    # CUIT); los demás se buscan por clave primaria en cada una
+    terms.sort(key=frequencies.get)
+    postings = [aliased(SearchTerm) for _ in terms]
+    first = postings[0]
+    weights = []
+    for term, posting in zip(terms, postings):
+        df = frequencies[term]
+        idf = math.log(1 + (max(count, df) - df + 0.5) / (df + 0.5))
+        tf = posting.tf * 1.0
+        weights.append(
+            idf
+            * tf
+            * (BM25_K1 + 1)
+            / (tf + BM25_K1 * (1 - BM25_B + BM25_B * SearchEntry.length / average))
+        )
+    score = reduce(operator.add, weights).label("rank")
+    matches = (
+        select(first.entry_id, score)
+        .join(SearchEntry, SearchEntry.id == first.entry_id)
+        .where(first.term == terms[0])
+    )
+    for term, posting in zip(terms[1:], postings[1:]):
+        matches = matches.join(
+            posting, and_(posting.entry_id == first.entry_id, posting.term == term)
+        )
+    if sources:
+        matches = matches.where(SearchEntry.source.in_(sources))
+    total = db.execute(
+        select(func.count()).select_from(matches.subquery())
+    ).scalar_one()
+    page = matches.order_by(score.desc(), first.entry_id).limit(limit).offset(offset)
+    ranked = db.execute(page).all()
+    rows = {
+        entry.id: entry
+        for entry in db.execute(
+            select(SearchEntry).where(
+                SearchEntry.id.in_([entry_id for entry_id, _ in ranked])
+            )
+        ).scalars()
+    }
+    hits = []
+    for entry_id, rank in ranked:
+        entry = rows[entry_id]
+        hits.append(
+            {
+                "source": entry.source,
+                "key": entry.source_key,
+                "file_name": entry.file_name,
+                "rank": float(rank),
+                "snippet": _snippet(entry.body, terms),
+            }
+        )
+    return total, hits
+
+
+def _add_links(db: Session, hits: List[dict]):
+    """Facturas: los ``EVC_Financial`` cargados con ellas; documentos: la descarga."""
+    hashes = [hit["key"] for hit in hits if hit["source"] == INVOICE]
+    financials: Dict[str, List[dict]] = {}
+    if hashes:
+        rows = db.execute(
+            select(
+                EVC_Financial.id, EVC_Financial.evc_q_id, EVC_Financial.source_sha256
+            )
+            .where(EVC_Financial.source_sha256.in_(hashes))
+            .order_by(EVC_Financial.id)
+        )
+        for row in rows:
+            financials.setdefault(row.source_sha256, []).append(
+                {"id": row.id, "evc_q_id": row.evc_q_id}
+            )
+    for hit in hits:
+        if hit["source"] == INVOICE:
+            hit["financials"] = financials.get(hit["key"], [])
+        else:
+            hit["download_url"] = DOWNLOAD_PATHS[hit["source"]].format(hit["key"])
+
+
+def search_documents(
+    db: Session,
+    q: str,
+    sources: Optional[List[str]] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> dict:
+    """
+    Página de resultados de ``q`` ordenados por relevancia, con ``total``
+    (cantidad de entradas que coinciden) y un fragmento por resultado.
+    """
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    search = _search_tsvector if _uses_tsvector(db) else _search_terms
+    total, hits = search(db, q, sources, limit, max(0, offset))
+    _add_links(db, hits)
+    return {"query": q, "total": total, "hits": hits}
+
+
+def extract_text(path: str, file_name: Optional[str]) -> Optional[str]:
+    """
+    Texto de un PDF (página por página, como ``parse_invoice``) o de un
+    archivo de texto; ``None`` para otros formatos. Corre en ``invoice_pool``.
+    """
+    extension = os.path.splitext(file_name or path)[1].lower()
+    if extension == ".pdf":
+        fitz = optional_import("fitz", "La indexación de PDF")
+        texts, size = [], 0
+        with fitz.open(path) as doc:
+            for page in doc:
+                texts.append(page.get_text("text"))
+                size += len(texts[-1])
+                if size >= SEARCH_MAX_TEXT_CHARS:
+                    break
+        return "\f".join(texts)
+    if extension in TEXT_EXTENSIONS:
+        with open(path, "rb") as f:
+            content = f.read(SEARCH_MAX_TEXT_CHARS)
+        return content.decode("utf-8", errors="replace")
+    return None
+
+
+async def _extract_stored(key: str, file_name: Optional[str]) -> Optional[str]:
+    storage = storage_service.storage
+    path = storage.local_path(key)
+    if path is not None:
+        return await asyncio.wrap_future(
+            invoice_jobs.invoice_pool.run(extract_text, str(path), file_name)
+        )
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "object"
+        await storage.download_file(key, path)
+        return await asyncio.wrap_future(
+            invoice_jobs.invoice_pool.run(extract_text, str(path), file_name)
+        )
+
+
+def _load_document(db: Optional[Session], source: str, doc_id: int):
+    with session_scope(db) as session:
+        doc = session.get(DOCUMENT_MODELS[source], doc_id)
+        if doc is None:
+            return None
+        return doc.file_name, doc.storage_key, doc.file_size
+
+
+def _save_entry(db: Optional[Session], source: str, doc_id: int, file_name, text):
+    with session_scope(db) as session:
+        # El documento pudo borrarse mientras se extraía el texto
+        if session.get(DOCUMENT_MODELS[source], doc_id) is None:
+            return False
+        index_text(session, source, doc_id, file_name, text)
+        session.commit()
+        return True
+
+
+async def index_stored_document(
+    source: str, doc_id: int, db: Optional[Session] = None
+) -> bool:
+    """
+    Extrae el texto del archivo del documento y lo indexa. Pensado para una
+    ``BackgroundTask`` después de la subida; un error de lectura deja el
+    documento indexado sólo por nombre.
+    """
+    loaded = await run_in_threadpool(_load_document, db, source, doc_id)
+    if loaded is None:
+        return False
+    file_name, key, size = loaded
+    text = None
+    if key and (size is None or size <= SEARCH_MAX_EXTRACT_BYTES):
+        try:
+            text = await _extract_stored(key, file_name)
+        except Exception as e:
+            print(f"No se pudo extraer el texto de {source} {doc_id}: {e}")
+    return await run_in_threadpool(_save_entry, db, source, doc_id, file_name, text)
+
+
+async def reindex(db: Optional[Session] = None, batch_size: int = 500) -> dict:
+    """
+    Indexa lo que falta: facturas ya leídas en ``invoice_parse`` (sin volver a
+    leer el PDF) y documentos subidos antes de que existiera el índice.
+    """
+
+    def missing(session: Session, source: str, keys) -> List:
+        indexed = set(
+            session.execute(
+                select(SearchEntry.source_key).where(SearchEntry.source == source)
+            ).scalars()
+        )
+        return [key for key in keys if str(key) not in indexed]
+
+    def index_parses() -> int:
+        with session_scope(db) as session:
+            hashes = missing(
+                session, INVOICE, session.execute(select(InvoiceParse.sha256)).scalars()
+            )
+            for start in range(0, len(hashes), batch_size):
+                batch = hashes[start : start + batch_size]
+                for sha256, text in session.execute(
+                    select(InvoiceParse.sha256, InvoiceParse.text).where(
+                        InvoiceParse.sha256.in_(batch)
+                    )
+                ):
+                    index_text(session, INVOICE, sha256, None, text, replace=False)
+                session.commit()
+            return len(hashes)
+
+    def document_ids(source: str) -> List[int]:
+        with session_scope(db) as session:
+            model = DOCUMENT_MODELS[source]
+            return missing(session, source, session.execute(select(model.id)).scalars())
+
+    result = {INVOICE: await run_in_threadpool(index_parses)}
+    for source in DOCUMENT_MODELS:
+        ids = await run_in_threadpool(document_ids, source)
+        for doc_id in ids:
+            await index_stored_document(source, doc_id, db)
+        result[source] = len(ids)
+    return result
@@ -0,0 +1,392 @@
+# app/services/spending.py
+"""
+Cálculo del gasto por cuatrimestre (EVC_Q).
+
+El gasto de un cuatrimestre es la suma de los montos manuales
+(``evc_financial.value_usd``) más el costo de los proveedores asociados
+(``provider.cost_usd``). Los totales se guardan en el ledger
+``evc_q_spending``, que se mantiene de forma incremental en cada escritura
+de ``evc_financial`` o cambio de costo de un proveedor, así que leer el
+estado de un cuatrimestre no depende de cuántos movimientos tenga.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.evc_financial import EVC_Financial
+from app.models.evc_q import EVC_Q
+from app.models.evc_q_spending import EVC_QSpending
+from app.models.provider import Provider
+
+# (evc_q_id, manual_total, provider_total) que aporta un EVC_Financial
+FinancialSnapshot = Tuple[Optional[int], float, float]
+
+
+def get_budget_message(percentage: float) -> str:
+    """Mensaje de estado del presupuesto para un porcentaje de 0 a 100."""
+    if percentage >= 100:
+        return "No hay más presupuesto"
+    elif percentage >= 80:
+        return "Ya casi te quedas sin presupuesto"
+    elif percentage >= 50:
+        return "Vas a la mitad del presupuesto"
+    return "Presupuesto suficiente"
+
+
+def _ledger_totals_statement(evc_q_ids: Optional[List[int]] = None):
+    statement = (
+        select(
+            EVC_Financial.evc_q_id,
+            func.coalesce(func.sum(EVC_Financial.value_usd), 0.0),
+            func.coalesce(func.sum(Provider.cost_usd), 0.0),
+        )
+        .outerjoin(Provider, EVC_Financial.provider_id == Provider.id)
+        .filter(EVC_Financial.evc_q_id.isnot(None))
+        .group_by(EVC_Financial.evc_q_id)
+    )
+    if evc_q_ids is not None:
+        statement = statement.filter(EVC_Financial.evc_q_id.in_(evc_q_ids))
+    return statement
+
+
+def _ledger_totals(rows) -> Dict[int, Tuple[float, float]]:
+    return {
+        evc_q_id: (float(manual_total), float(provider_total))
+        for evc_q_id, manual_total, provider_total in rows
+    }
+
+
+def _unique_ids(evc_q_ids: Iterable[int]) -> List[int]:
+    return list({q_id for q_id in evc_q_ids if q_id is not None})
+
+
+def compute_ledger_totals(
+    db: Session, evc_q_ids: Optional[Iterable[int]] = None
+) -> Dict[int, Tuple[float, float]]:
+    """
+    Recalcula desde ``evc_financial`` los totales ``(manual, proveedores)``
+    con una única consulta agrupada. Sin ``evc_q_ids`` recorre todos los
+    cuatrimestres que tienen movimientos.
+    """
+    ids = None
+    if evc_q_ids is not None:
+        ids = _unique_ids(evc_q_ids)
+        if not ids:
+            return {}
+    return _ledger_totals(db.execute(_ledger_totals_statement(ids)))
+
+
+def _ledger_statement(ids: List[int]):
+    return select(EVC_QSpending.evc_q_id, EVC_QSpending.spent_total).filter(
+        EVC_QSpending.evc_q_id.in_(ids)
+    )
+
+
+def _fill_missing(spendings: dict, ids: List[int], computed: dict) -> Dict[int, float]:
+    for q_id in ids:
+        if q_id not in spendings:
+            manual_total, provider_total = computed.get(q_id, (0.0, 0.0))
+            spendings[q_id] = manual_total + provider_total
+    return spendings
+
+
+def get_spendings_by_evc_qs(db: Session, evc_q_ids: Iterable[int]) -> Dict[int, float]:
+    """
+    Devuelve ``{evc_q_id: total_gastado}`` leyendo el ledger. Los
+    cuatrimestres que aún no tienen fila en el ledger se calculan con la
+    consulta agrupada; los que no tienen movimientos quedan en 0.0.
+    """
+    ids = _unique_ids(evc_q_ids)
+    if not ids:
+        return {}
+
+    spendings = dict(db.execute(_ledger_statement(ids)).all())
+    missing = [q_id for q_id in ids if q_id not in spendings]
+    computed = compute_ledger_totals(db, missing) if missing else {}
+    return _fill_missing(spendings, ids, computed)
+
+
+async def get_spendings_by_evc_qs_async(
+    db: AsyncSession, evc_q_ids: Iterable[int]
+) -> Dict[int, float]:
+    """Versión de ``get_spendings_by_evc_qs`` para una ``AsyncSession``."""
+    ids = _unique_ids(evc_q_ids)
+    if not ids:
+        return {}
+
+    spendings = dict((await db.execute(_ledger_statement(ids))).all())
+    missing = [q_id for q_id in ids if q_id not in spendings]
+    computed = {}
+    if missing:
+        computed = _ledger_totals(await db.execute(_ledger_totals_statement(missing)))
+    return _fill_missing(spendings, ids, computed)
+
+
+def build_quarter_status(total_spendings: float, allocated_budget: float) -> dict:
+    """Arma ``total_spendings``, ``percentage`` y ``budget_message``."""
+    percentage = (total_spendings / allocated_budget) * 100 if allocated_budget else 0.0
+    return {
+        "total_spendings": total_spendings,
+        "percentage": percentage,
+        "budget_message": get_budget_message(percentage),
+    }
+
+
+def _set_quarter_status(quarters: List[EVC_Q], spendings: Dict[int, float]):
+    for quarter in quarters:
+        status = build_quarter_status(
+            spendings.get(quarter.id, 0.0), quarter.allocated_budget
+        )
+        for key, value in status.items():
+            setattr(quarter, key, value)
+    return quarters
+
+
+def apply_quarter_spendings(db: Session, quarters: List[EVC_Q]) -> List[EVC_Q]:
+    """
+    Calcula el estado de presupuesto de todos los cuatrimestres recibidos
+    con una sola consulta y lo asigna como atributos de cada objeto.
+    """
+    spendings = get_spendings_by_evc_qs(db, [quarter.id for quarter in quarters])
+    return _set_quarter_status(quarters, spendings)
+
+
+async def apply_quarter_spendings_async(
+    db: AsyncSession, quarters: List[EVC_Q]
+) -> List[EVC_Q]:
+    """Versión de ``apply_quarter_spendings`` para una ``AsyncSession``."""
+    spendings = await get_spendings_by_evc_qs_async(
+        db, [quarter.id for quarter in quarters]
+    )
+    return _set_quarter_status(quarters, spendings)
+
+
+def get_quarter_status(db: Session, evc_q_id: int) -> dict:
+    """Estado de presupuesto de un único cuatrimestre."""
+    allocated_budget = (
+        db.query(EVC_Q.allocated_budget).filter(EVC_Q.id == evc_q_id).scalar()
+    )
+    total_spendings = get_spendings_by_evc_qs(db, [evc_q_id]).get(evc_q_id, 0.0)
+    status = build_quarter_status(total_spendings, allocated_budget)
+    status["evc_q_id"] = evc_q_id
+    return status
+
+
+async def get_quarter_status_async(db: AsyncSession, evc_q_id: int) -> dict:
+    """Versión de ``get_quarter_status`` para una ``AsyncSession``."""
+    allocated_budget = await db.scalar(
+        select(EVC_Q.allocated_budget).filter(EVC_Q.id == evc_q_id)
+    )
+    spendings = await get_spendings_by_evc_qs_async(db, [evc_q_id])
+    status = build_quarter_status(spendings.get(evc_q_id, 0.0), allocated_budget)
+    status["evc_q_id"] = evc_q_id
+    return status
+
+
+# ---------------------------------------------------------------------------
+# Mantenimiento del ledger
+# ---------------------------------------------------------------------------
+
+
+def _ledger_insert(
+    db: Session, evc_q_id: int, manual_total: float, provider_total: float
+):
+    """
+    ``INSERT`` de la fila del ledger con ``ON CONFLICT (evc_q_id)`` del
+    dialecto, para que dos primeras escrituras concurrentes en un
+    cuatrimestre no choquen por la clave primaria.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(EVC_QSpending).values(
+        evc_q_id=evc_q_id,
+        manual_total=manual_total,
+        provider_total=provider_total,
+        spent_total=manual_total + provider_total,
+        updated_at=datetime.utcnow(),
+    )
+
+
+def refresh_quarter_ledger(db: Session, evc_q_id: int) -> EVC_QSpending:
+    """Recalcula desde cero la fila del ledger de un cuatrimestre."""
+    db.flush()
+    manual_total, provider_total = compute_ledger_totals(db, [evc_q_id]).get(
+        evc_q_id, (0.0, 0.0)
+    )
+    statement = _ledger_insert(db, evc_q_id, manual_total, provider_total)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[EVC_QSpending.evc_q_id],
+            set_={
+                "manual_total": statement.excluded.manual_total,
+                "provider_total": statement.excluded.provider_total,
+                "spent_total": statement.excluded.spent_total,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+    )
+    return db.get(EVC_QSpending, evc_q_id, populate_existing=True)
+
+
+def apply_ledger_delta(
+    db: Session, evc_q_id: int, manual_delta: float = 0.0, provider_delta: float = 0.0
+):
+    """
+    Suma los deltas al ledger con un ``UPDATE`` atómico. Si el cuatrimestre
+    todavía no tiene fila, se inserta con sus totales recalculados (que ya
+    incluyen el cambio, porque se hace ``flush`` antes); si otra transacción
+    la insertó mientras tanto, el ``ON CONFLICT`` le suma los deltas.
+    """
+    if evc_q_id is None or (not manual_delta and not provider_delta):
+        return
+
+    deltas = {
+        EVC_QSpending.manual_total: EVC_QSpending.manual_total + manual_delta,
+        EVC_QSpending.provider_total: EVC_QSpending.provider_total + provider_delta,
+        EVC_QSpending.spent_total: EVC_QSpending.spent_total
+        + manual_delta
+        + provider_delta,
+        EVC_QSpending.updated_at: datetime.utcnow(),
+    }
+    updated = (
+        db.query(EVC_QSpending)
+        .filter(EVC_QSpending.evc_q_id == evc_q_id)
+        .update(deltas, synchronize_session=False)
+    )
+    if updated:
+        return
+
+    db.flush()
+    manual_total, provider_total = compute_ledger_totals(db, [evc_q_id]).get(
+        evc_q_id, (0.0, 0.0)
+    )
+    statement = _ledger_insert(db, evc_q_id, manual_total, provider_total)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[EVC_QSpending.evc_q_id],
+            set_={column.key: value for column, value in deltas.items()},
+        )
+    )
+
+
+def _get_provider_cost(db: Session, provider_id: Optional[int]) -> float:
+    if provider_id is None:
+        return 0.0
+    cost = db.query(Provider.cost_usd).filter(Provider.id == provider_id).scalar()
+    return cost or 0.0
+
+
+def snapshot_financial(
+    db: Session, financial: Optional[EVC_Financial]
+) -> Optional[FinancialSnapshot]:
+    """Lo que un EVC_Financial aporta al gasto de su cuatrimestre."""
+    if financial is None:
+        return None
+    return (
+        financial.evc_q_id,
+        financial.value_usd or 0.0,
+        _get_provider_cost(db, financial.provider_id),
+    )
+
+
+def record_financial_change(
+    db: Session,
+    before: Optional[FinancialSnapshot],
+    after: Optional[FinancialSnapshot],
+):
+    """
+    Aplica al ledger la diferencia entre el estado anterior y el nuevo de un
+    EVC_Financial (``None`` para creación o borrado). Debe llamarse dentro
+    de la misma transacción que la escritura, antes del ``commit``.
+    """
+    db.flush()
+    if before and after and before[0] == after[0]:
+        apply_ledger_delta(db, after[0], after[1] - before[1], after[2] - before[2])
+        return
+    if before:
+        apply_ledger_delta(db, before[0], -before[1], -before[2])
+    if after:
+        apply_ledger_delta(db, after[0], after[1], after[2])
+
+
+def record_provider_cost_change(
+    db: Session, provider_id: int, old_cost: Optional[float], new_cost: Optional[float]
+):
+    """Propaga un cambio de ``provider.cost_usd`` a los cuatrimestres que lo usan."""
+    delta = (new_cost or 0.0) - (old_cost or 0.0)
+    if not delta:
+        return
+    db.flush()
+    usages = (
+        db.query(EVC_Financial.evc_q_id, func.count(EVC_Financial.id))
+        .filter(
+            EVC_Financial.provider_id == provider_id,
+            EVC_Financial.evc_q_id.isnot(None),
+        )
+        .group_by(EVC_Financial.evc_q_id)
+        .all()
+    )
+    for evc_q_id, count in usages:
+        apply_ledger_delta(db, evc_q_id, provider_delta=delta * count)
+
+
+def discard_quarter_ledger(db: Session, evc_q_ids: Iterable[int]):
+    """Elimina las filas del ledger de cuatrimestres que se van a borrar."""
+    ids = list(evc_q_ids)
+    if ids:
+        db.query(EVC_QSpending).filter(EVC_QSpending.evc_q_id.in_(ids)).delete(
+            synchronize_session=False
+        )
+
+
+def rebuild_ledger(db: Session) -> int:
+    """Reconstruye todo el ledger desde ``evc_financial``. Devuelve filas escritas."""
+    totals = compute_ledger_totals(db)
+    db.query(EVC_QSpending).delete(synchronize_session=False)
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(
+        EVC_QSpending,
+        [
+            {
+                "evc_q_id": evc_q_id,
+                "manual_total": manual_total,
+                "provider_total": provider_total,
+                "spent_total": manual_total + provider_total,
+                "updated_at": now,
+            }
+            for evc_q_id, (manual_total, provider_total) in totals.items()
+        ],
+    )
+    db.commit()
+    return len(totals)
+
+
+def verify_ledger(db: Session, tolerance: float = 0.01) -> List[dict]:
+    """
+    Compara el ledger con los totales recalculados y devuelve las
+    diferencias encontradas (lista vacía si todo cuadra).
+    """
+    expected = compute_ledger_totals(db)
+    stored = {
+        entry.evc_q_id: (entry.manual_total, entry.provider_total)
+        for entry in db.query(EVC_QSpending).all()
+    }
+
+    mismatches = []
+    for evc_q_id in sorted(set(expected) | set(stored)):
+        expected_totals = expected.get(evc_q_id, (0.0, 0.0))
+        stored_totals = stored.get(evc_q_id, (0.0, 0.0))
+        if any(abs(e - s) > tolerance for e, s in zip(expected_totals, stored_totals)):
+            mismatches.append(
+                {
+                    "evc_q_id": evc_q_id,
+                    "expected": expected_totals,
+                    "stored": stored_totals,
+                }
+            )
+    return mismatches
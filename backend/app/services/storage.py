@@ -0,0 +1,413 @@
+# app/services/storage.py
+"""
+Almacenamiento de archivos subidos (documentos).
+
+``storage`` es el backend elegido con ``STORAGE_BACKEND``:
+
+- ``local`` (por defecto): un directorio (``STORAGE_DIR``), para desarrollo
+  y pruebas.
+- ``s3``: cualquier servicio compatible con S3 (AWS, MinIO, R2); ver
+  ``app/services/storage_s3.py``.
+
+Los objetos se identifican por su clave (``documents/...``), que se guarda en
+``storage_key`` de ``Document`` y ``ProviderDocument``; la URL pública se
+deriva de la clave con ``public_url``. Todas las operaciones leen y escriben
+por bloques: la memoria de una subida no depende del tamaño del archivo.
+
+Las subidas reanudables siguen el modelo de multipart de S3: las partes
+pueden llegar en cualquier orden o volver a enviarse, y se unen al completar.
+
+Las descargas se sirven desde ``app/routes/storage.py``; ``signed_url`` da
+URLs de corta duración (HMAC en el backend local, prefirmadas en S3).
+"""
+import datetime
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import quote, urlencode
+
+from fastapi.concurrency import run_in_threadpool
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+STORAGE_DIR = Path(
+    os.getenv("STORAGE_DIR", str(Path(tempfile.gettempdir()) / "finup_storage"))
+)
+STORAGE_PUBLIC_URL = os.getenv("STORAGE_PUBLIC_URL", "http://localhost:8000/storage")
+# Bloques leídos de una subida y escritos al storage
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(1024 * 1024)))
+# Tamaño de parte sugerido para subidas reanudables y usado en las subidas y
+# descargas en paralelo (S3 exige al menos 5 MB salvo en la última parte)
+STORAGE_PART_SIZE = int(os.getenv("STORAGE_PART_SIZE", str(8 * 1024 * 1024)))
+# Partes en vuelo por subida o descarga
+STORAGE_CONCURRENCY = int(os.getenv("STORAGE_CONCURRENCY", "4"))
+
+# Clave de las URLs firmadas del backend local
+STORAGE_SIGNING_KEY = os.getenv(
+    "STORAGE_SIGNING_KEY", os.getenv("SECRET_KEY", "your-secret-key-for-development")
+)
+# Validez por defecto y máxima de una URL firmada (S3 admite hasta 7 días)
+STORAGE_SIGNED_URL_TTL = int(os.getenv("STORAGE_SIGNED_URL_TTL", "300"))
+STORAGE_SIGNED_URL_MAX_TTL = 7 * 24 * 3600
+
+UPLOADS_DIR = ".uploads"
+
+
+class StorageError(Exception):
+    pass
+
+
+class UploadNotFound(StorageError):
+    pass
+
+
+class _StreamWriter:
+    """Escribe bloques en ``path`` calculando su tamaño y SHA-256."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self.digest.update(chunk)
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def close(self):
+        self.file.close()
+
+    def discard(self):
+        self.file.close()
+        self.path.unlink(missing_ok=True)
+
+    def stored(self, key: str) -> dict:
+        return {"key": key, "size": self.size, "sha256": self.digest.hexdigest()}
+
+
+def _temp_path(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+
+
+async def _write_stream(path: Path, key: str, chunks: AsyncIterable[bytes]) -> dict:
+    """
+    Escribe ``chunks`` en ``path`` a través de un archivo temporal (nunca se
+    ve un objeto a medias). La escritura y el hash corren en el threadpool.
+    """
+    writer = await run_in_threadpool(_StreamWriter, _temp_path(path))
+    try:
+        async for chunk in chunks:
+            await run_in_threadpool(writer.write, chunk)
+    except BaseException:
+        await run_in_threadpool(writer.discard)
+        raise
+    await run_in_threadpool(writer.close)
+    os.replace(writer.path, path)
+    return writer.stored(key)
+
+
+def _concatenate(sources: List[Path], path: Path, key: str) -> dict:
+    writer = _StreamWriter(_temp_path(path))
+    try:
+        for source in sources:
+            with open(source, "rb") as f:
+                while chunk := f.read(STORAGE_CHUNK_SIZE):
+                    writer.write(chunk)
+    except BaseException:
+        writer.discard()
+        raise
+    writer.close()
+    os.replace(writer.path, path)
+    return writer.stored(key)
+
+
+def content_disposition(file_name: str, disposition: str = "attachment") -> str:
+    quoted = quote(file_name)
+    if quoted == file_name:
+        return f'{disposition}; filename="{file_name}"'
+    return f"{disposition}; filename*=utf-8''{quoted}"
+
+
+def url_signature(key: str, expires: int, file_name: Optional[str] = None) -> str:
+    message = f"{key}\n{expires}\n{file_name or ''}".encode()
+    return hmac.new(STORAGE_SIGNING_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_url_signature(
+    key: str, expires: int, signature: str, file_name: Optional[str] = None
+) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(url_signature(key, expires, file_name), signature)
+
+
+class Storage:
+    """Interfaz común de los backends."""
+
+    def __init__(self, public_url: str):
+        self.public_url_base = public_url.rstrip("/")
+
+    def public_url(self, key: str) -> str:
+        return f"{self.public_url_base}/{key}"
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Archivo local de ``key``, si el backend guarda en disco."""
+        return None
+
+    def signed_url(
+        self, key: str, expires_in: int, file_name: Optional[str] = None
+    ) -> str:
+        """
+        URL de descarga válida por ``expires_in`` segundos; con ``file_name``
+        el archivo se descarga con ese nombre.
+        """
+        expires = int(time.time()) + expires_in
+        params = {"expires": expires}
+        if file_name:
+            params["filename"] = file_name
+        params["signature"] = url_signature(key, expires, file_name)
+        return f"{self.public_url(quote(key))}?{urlencode(params)}"
+
+    async def upload_stream(
+        self,
+        key: str,
+        chunks: AsyncIterable[bytes],
+        content_type: Optional[str] = None,
+    ) -> dict:
+        """Guarda ``chunks`` en ``key``; devuelve ``{"key", "size", "sha256"}``."""
+        raise NotImplementedError
+
+    def iter_object(
+        self, key: str, chunk_size: int = STORAGE_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        raise NotImplementedError
+
+    async def download_file(self, key: str, path: Path) -> int:
+        """Copia ``key`` a ``path``; devuelve los bytes escritos."""
+        raise NotImplementedError
+
+    def list_objects(self, prefix: str = "") -> AsyncIterator[dict]:
+        """
+        Objetos cuya clave empieza con ``prefix``, como
+        ``{"key", "size", "last_modified"}`` (``datetime`` UTC sin zona).
+        """
+        raise NotImplementedError
+
+    async def delete_many(self, keys: Iterable[str]) -> List[str]:
+        """Borra ``keys`` (las inexistentes se ignoran); devuelve las que fallaron."""
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        failed = await self.delete_many([key])
+        if failed:
+            raise StorageError(f"No se pudo borrar {key}")
+
+    async def create_multipart_upload(
+        self, key: str, content_type: Optional[str] = None
+    ) -> str:
+        raise NotImplementedError
+
+    async def upload_part(
+        self,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        chunks: AsyncIterable[bytes],
+        size: Optional[int] = None,
+    ) -> dict:
+        """Guarda una parte; devuelve ``{"part_number", "size", "etag"}``."""
+        raise NotImplementedError
+
+    async def list_parts(self, key: str, upload_id: str) -> List[dict]:
+        raise NotImplementedError
+
+    async def complete_multipart_upload(
+        self, key: str, upload_id: str, parts: Optional[List[dict]] = None
+    ) -> dict:
+        """
+        Une las partes (todas las recibidas, o ``parts`` como
+        ``[{"part_number", "etag"}]``). Devuelve ``{"key", "size", "sha256"}``;
+        ``sha256`` es ``None`` si el backend no lo puede calcular sin volver a
+        leer el objeto.
+        """
+        raise NotImplementedError
+
+    async def abort_multipart_upload(self, key: str, upload_id: str):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+def check_parts(received: Dict[int, dict], parts: Optional[List[dict]]) -> List[dict]:
+    """Partes a unir, validadas contra las recibidas y en orden."""
+    if parts is None:
+        parts = list(received.values())
+    if not parts:
+        raise StorageError("No se recibió ninguna parte")
+    for part in parts:
+        found = received.get(part["part_number"])
+        if found is None or part.get("etag", found["etag"]) != found["etag"]:
+            raise StorageError(f"La parte {part['part_number']} falta o cambió")
+    return sorted(
+        (received[part["part_number"]] for part in parts),
+        key=lambda part: part["part_number"],
+    )
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: Path = STORAGE_DIR, public_url: str = STORAGE_PUBLIC_URL):
+        super().__init__(public_url)
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        root = self.root.resolve()
+        path = (self.root / key).resolve()
+        # Se compara la ruta ya resuelta: ``./.uploads`` o ``x/../.uploads``
+        # también caen en la zona de multiparts en curso
+        if not path.is_relative_to(root) or path.relative_to(root).parts[:1] == (
+            UPLOADS_DIR,
+        ):
+            raise StorageError(f"Clave inválida: {key}")
+        return path
+
+    def local_path(self, key):
+        return self.path(key)
+
+    async def upload_stream(self, key, chunks, content_type=None):
+        return await _write_stream(self.path(key), key, chunks)
+
+    async def iter_object(self, key, chunk_size=STORAGE_CHUNK_SIZE):
+        try:
+            f = await run_in_threadpool(open, self.path(key), "rb")
+        except FileNotFoundError:
+            raise StorageError(f"No existe {key}")
+        try:
+            while chunk := await run_in_threadpool(f.read, chunk_size):
+                yield chunk
+        finally:
+            f.close()
+
+    async def download_file(self, key, path):
+        source = self.path(key)
+        if not source.exists():
+            raise StorageError(f"No existe {key}")
+        await run_in_threadpool(shutil.copyfile, source, path)
+        return Path(path).stat().st_size
+
+    def _scan(self, prefix: str) -> List[dict]:
+        objects = []
+        for directory, dirs, files in os.walk(self.root):
+            if Path(directory) == self.root:
+                dirs[:] = [name for name in dirs if name != UPLOADS_DIR]
+            for name in files:
+                if name.endswith(".part"):
+                    # Escritura en curso (ver ``_temp_path``)
+                    continue
+                path = Path(directory) / name
+                key = path.relative_to(self.root).as_posix()
+                if key.startswith(prefix):
+                    stat = path.stat()
+                    objects.append(
+                        {
+                            "key": key,
+                            "size": stat.st_size,
+                            "last_modified": datetime.datetime.utcfromtimestamp(
+                                stat.st_mtime
+                            ),
+                        }
+                    )
+        return objects
+
+    async def list_objects(self, prefix=""):
+        for obj in await run_in_threadpool(self._scan, prefix):
+            yield obj
+
+    async def delete_many(self, keys):
+        def delete(keys):
+            failed = []
+            for key in keys:
+                try:
+                    self.path(key).unlink(missing_ok=True)
+                except (OSError, StorageError):
+                    failed.append(key)
+            return failed
+
+        return await run_in_threadpool(delete, list(keys))
+
+    def _upload_dir(self, upload_id: str) -> Path:
+        if not upload_id.isalnum():
+            raise UploadNotFound(upload_id)
+        upload_dir = self.root / UPLOADS_DIR / upload_id
+        if not upload_dir.is_dir():
+            raise UploadNotFound(upload_id)
+        return upload_dir
+
+    async def create_multipart_upload(self, key, content_type=None):
+        self.path(key)
+        upload_id = uuid.uuid4().hex
+        (self.root / UPLOADS_DIR / upload_id).mkdir(parents=True)
+        return upload_id
+
+    async def upload_part(self, key, upload_id, part_number, chunks, size=None):
+        part_path = self._upload_dir(upload_id) / f"{part_number:05d}"
+        stored = await _write_stream(part_path, key, chunks)
+        part_path.with_suffix(".etag").write_text(stored["sha256"])
+        return {
+            "part_number": part_number,
+            "size": stored["size"],
+            "etag": stored["sha256"],
+        }
+
+    def _parts(self, upload_id: str) -> Dict[int, dict]:
+        parts = {}
+        for etag_path in sorted(self._upload_dir(upload_id).glob("*.etag")):
+            part_path = etag_path.with_suffix("")
+            if part_path.exists():
+                number = int(part_path.name)
+                parts[number] = {
+                    "part_number": number,
+                    "size": part_path.stat().st_size,
+                    "etag": etag_path.read_text(),
+                }
+        return parts
+
+    async def list_parts(self, key, upload_id):
+        return list((await run_in_threadpool(self._parts, upload_id)).values())
+
+    async def complete_multipart_upload(self, key, upload_id, parts=None):
+        upload_dir = self._upload_dir(upload_id)
+        parts = check_parts(await run_in_threadpool(self._parts, upload_id), parts)
+        stored = await run_in_threadpool(
+            _concatenate,
+            [upload_dir / f"{part['part_number']:05d}" for part in parts],
+            self.path(key),
+            key,
+        )
+        await run_in_threadpool(shutil.rmtree, upload_dir, True)
+        return stored
+
+    async def abort_multipart_upload(self, key, upload_id):
+        await run_in_threadpool(shutil.rmtree, self._upload_dir(upload_id), True)
+
+
+def create_storage() -> Storage:
+    if STORAGE_BACKEND == "s3":
+        # httpx sólo se importa con este backend
+        from app.services.storage_s3 import S3Storage
+
+        return S3Storage.from_env()
+    if STORAGE_BACKEND != "local":
+        raise StorageError(f"STORAGE_BACKEND desconocido: {STORAGE_BACKEND}")
+    return LocalStorage()
+
+
+storage = create_storage()
@@ -0,0 +1,354 @@
+# app/services/storage_gc.py
+"""
+Borrado diferido de los archivos del storage (tombstone + sweep).
+
+Al borrar documentos, ``mark_for_deletion`` registra sus claves en
+``storage_tombstone`` dentro de la misma transacción que borra las filas:
+si la transacción se confirma, el archivo se borrará aunque el storage
+falle o el proceso se caiga; si no, nada cambia. El request no espera al
+storage.
+
+``StorageSweeper`` corre en el event loop de cada worker: cada
+``STORAGE_GC_INTERVAL`` segundos (o antes, con ``wake``) toma hasta
+``STORAGE_GC_BATCH_SIZE`` tombstones vencidos, los borra con una llamada
+``delete_many`` y reintenta los que fallaron con backoff exponencial.
+Tomar un lote corre ``next_attempt_at`` (un lease), así dos workers no
+procesan las mismas filas.
+
+``reconcile_storage`` busca archivos que ninguna fila referencia
+(``Document``, ``ProviderDocument`` o una subida en curso) y con más de
+``STORAGE_GC_GRACE`` segundos, los marca para el sweeper, y descarta las
+subidas reanudables abandonadas hace más de ``STORAGE_UPLOAD_TTL``.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.database import session_scope
+from app.models.document import Document
+from app.models.document_upload import DocumentUpload
+from app.models.provider_document import ProviderDocument
+from app.models.storage_tombstone import StorageTombstone
+from app.services import storage as storage_service
+from app.services.storage import StorageError
+
+STORAGE_GC_ENABLED = os.getenv("STORAGE_GC_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+STORAGE_GC_INTERVAL = float(os.getenv("STORAGE_GC_INTERVAL", "30"))
+STORAGE_GC_BATCH_SIZE = int(os.getenv("STORAGE_GC_BATCH_SIZE", "1000"))
+# Reintentos: STORAGE_GC_RETRY_BASE * 2^intentos, hasta STORAGE_GC_RETRY_MAX
+STORAGE_GC_RETRY_BASE = float(os.getenv("STORAGE_GC_RETRY_BASE", "30"))
+STORAGE_GC_RETRY_MAX = float(os.getenv("STORAGE_GC_RETRY_MAX", "3600"))
+# Tiempo que un lote queda reservado para el worker que lo tomó
+STORAGE_GC_LEASE = float(os.getenv("STORAGE_GC_LEASE", "300"))
+# Archivos más nuevos pueden ser de una subida cuya fila aún no se confirmó
+STORAGE_GC_GRACE = float(os.getenv("STORAGE_GC_GRACE", "3600"))
+STORAGE_GC_PREFIX = os.getenv("STORAGE_GC_PREFIX", "documents/")
+# Cada cuánto corre la reconciliación en el sweeper (0: sólo a pedido)
+STORAGE_RECONCILE_INTERVAL = float(os.getenv("STORAGE_RECONCILE_INTERVAL", "86400"))
+STORAGE_UPLOAD_TTL = float(os.getenv("STORAGE_UPLOAD_TTL", "86400"))
+
+REFERENCE_COLUMNS = (
+    Document.storage_key,
+    ProviderDocument.storage_key,
+    DocumentUpload.storage_key,
+)
+
+
+def mark_for_deletion(db: Session, keys: Iterable[Optional[str]]) -> int:
+    """
+    Agrega tombstones para ``keys`` (ignora las vacías) a la transacción de
+    ``db``; el commit queda a cargo de quien llama.
+    """
+    keys = {key for key in keys if key}
+    if keys:
+        # Un solo INSERT (executemany) para todo el lote
+        db.execute(insert(StorageTombstone), [{"storage_key": key} for key in keys])
+    return len(keys)
+
+
+def referenced_keys(db: Session, keys: Iterable[str]) -> Set[str]:
+    keys = list(keys)
+    found = set()
+    for column in REFERENCE_COLUMNS:
+        for start in range(0, len(keys), 1000):
+            batch = keys[start : start + 1000]
+            found.update(
+                key for (key,) in db.query(column).filter(column.in_(batch)).distinct()
+            )
+    return found
+
+
+def _retry_delay(attempts: int) -> float:
+    return min(STORAGE_GC_RETRY_BASE * 2 ** (attempts - 1), STORAGE_GC_RETRY_MAX)
+
+
+def _claim(db: Optional[Session], limit: int) -> List[tuple]:
+    with session_scope(db) as session:
+        now = datetime.utcnow()
+        rows = (
+            session.query(
+                StorageTombstone.id,
+                StorageTombstone.storage_key,
+                StorageTombstone.attempts,
+            )
+            .filter(StorageTombstone.next_attempt_at <= now)
+            .order_by(StorageTombstone.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if rows:
+            session.query(StorageTombstone).filter(
+                StorageTombstone.id.in_([row.id for row in rows])
+            ).update(
+                {"next_attempt_at": now + timedelta(seconds=STORAGE_GC_LEASE)},
+                synchronize_session=False,
+            )
+            session.commit()
+        keys = {row.storage_key for row in rows}
+        still_used = referenced_keys(session, keys) if keys else set()
+        return [(row, row.storage_key in still_used) for row in rows]
+
+
+def _finish(db: Optional[Session], done: List[int], failed: List[tuple], error: str):
+    with session_scope(db) as session:
+        if done:
+            session.query(StorageTombstone).filter(
+                StorageTombstone.id.in_(done)
+            ).delete(synchronize_session=False)
+        now = datetime.utcnow()
+        for row in failed:
+            attempts = row.attempts + 1
+            session.query(StorageTombstone).filter(
+                StorageTombstone.id == row.id
+            ).update(
+                {
+                    "attempts": attempts,
+                    "next_attempt_at": now + timedelta(seconds=_retry_delay(attempts)),
+                    "last_error": error[:1000],
+                },
+                synchronize_session=False,
+            )
+        session.commit()
+
+
+async def sweep_storage(
+    db: Optional[Session] = None, limit: int = STORAGE_GC_BATCH_SIZE
+) -> dict:
+    """Procesa un lote de tombstones vencidos."""
+    claimed = await run_in_threadpool(_claim, db, limit)
+    # Una clave que volvió a usarse no se borra; sólo se descarta el tombstone
+    keys = sorted({row.storage_key for row, used in claimed if not used})
+    failed_keys: Set[str] = set()
+    error = ""
+    if keys:
+        try:
+            failed_keys = set(await storage_service.storage.delete_many(keys))
+            error = "The storage backend did not delete the object"
+        except StorageError as e:
+            failed_keys, error = set(keys), str(e)
+    done = [row.id for row, _ in claimed if row.storage_key not in failed_keys]
+    failed = [row for row, _ in claimed if row.storage_key in failed_keys]
+    if claimed:
+        await run_in_threadpool(_finish, db, done, failed, error)
+    return {
+        "claimed": len(claimed),
+        "deleted": len(keys) - len(failed_keys),
+        "kept": sum(1 for _, used in claimed if used),
+        "failed": len(failed_keys),
+    }
+
+
+def _mark_orphans(db: Optional[Session], keys: List[str]) -> int:
+    with session_scope(db) as session:
+        known = referenced_keys(session, keys)
+        known.update(
+            key
+            for (key,) in session.query(StorageTombstone.storage_key).filter(
+                StorageTombstone.storage_key.in_(keys)
+            )
+        )
+        marked = mark_for_deletion(session, set(keys) - known)
+        session.commit()
+        return marked
+
+
+def _stale_uploads(db: Optional[Session], cutoff: datetime) -> List[tuple]:
+    with session_scope(db) as session:
+        return [
+            (upload.id, upload.storage_key, upload.upload_id)
+            for upload in session.query(DocumentUpload).filter(
+                DocumentUpload.created_at < cutoff
+            )
+        ]
+
+
+def _delete_uploads(db: Optional[Session], ids: List[str]):
+    with session_scope(db) as session:
+        session.query(DocumentUpload).filter(DocumentUpload.id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        session.commit()
+
+
+async def reconcile_storage(
+    db: Optional[Session] = None,
+    prefix: str = STORAGE_GC_PREFIX,
+    grace: float = STORAGE_GC_GRACE,
+) -> dict:
+    """Marca los archivos huérfanos y descarta las subidas abandonadas."""
+    backend = storage_service.storage
+    now = datetime.utcnow()
+    uploads = await run_in_threadpool(
+        _stale_uploads, db, now - timedelta(seconds=STORAGE_UPLOAD_TTL)
+    )
+    for _, key, upload_id in uploads:
+        try:
+            await backend.abort_multipart_upload(key, upload_id)
+        except StorageError:
+            # Ya no existe en el backend (o falla): la fila se descarta igual
+            pass
+    if uploads:
+        await run_in_threadpool(_delete_uploads, db, [upload[0] for upload in uploads])
+
+    cutoff = now - timedelta(seconds=grace)
+    scanned = orphans = 0
+    batch: List[str] = []
+    async for obj in backend.list_objects(prefix):
+        scanned += 1
+        if obj["last_modified"] <= cutoff:
+            batch.append(obj["key"])
+        if len(batch) >= STORAGE_GC_BATCH_SIZE:
+            orphans += await run_in_threadpool(_mark_orphans, db, batch)
+            batch = []
+    if batch:
+        orphans += await run_in_threadpool(_mark_orphans, db, batch)
+    return {"scanned": scanned, "orphans": orphans, "stale_uploads": len(uploads)}
+
+
+def _pending(db: Optional[Session]) -> dict:
+    with session_scope(db) as session:
+        total, failing, oldest = session.query(
+            func.count(StorageTombstone.id),
+            func.count(StorageTombstone.id).filter(StorageTombstone.attempts > 0),
+            func.min(StorageTombstone.created_at),
+        ).one()
+        return {
+            "pending": total,
+            "failing": failing,
+            "oldest_pending_seconds": (
+                (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+            ),
+        }
+
+
+class StorageSweeper:
+    def __init__(
+        self,
+        interval: float = STORAGE_GC_INTERVAL,
+        reconcile_interval: float = STORAGE_RECONCILE_INTERVAL,
+    ):
+        self.interval = interval
+        self.reconcile_interval = reconcile_interval
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._last_reconcile = time.monotonic()
+
+        self.runs = 0
+        self.deleted = 0
+        self.failed = 0
+        self.errors = 0
+        self.last_reconcile: Optional[dict] = None
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def wake(self):
+        """Adelanta el próximo lote (se puede llamar desde cualquier hilo)."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wake.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def run_once(self) -> dict:
+        result = await sweep_storage()
+        self.runs += 1
+        self.deleted += result["deleted"]
+        self.failed += result["failed"]
+        return result
+
+    async def _run(self):
+        while True:
+            try:
+                result = await self.run_once()
+                if result["claimed"] >= STORAGE_GC_BATCH_SIZE:
+                    # Quedan más tombstones vencidos: siguiente lote enseguida
+                    continue
+                if (
+                    self.reconcile_interval
+                    and time.monotonic() - self._last_reconcile
+                    >= self.reconcile_interval
+                ):
+                    self._last_reconcile = time.monotonic()
+                    self.last_reconcile = await reconcile_storage()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"[storage_gc] Error sweeping storage: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def metrics(self, db: Optional[Session] = None) -> dict:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "last_reconcile": self.last_reconcile,
+            **_pending(db),
+        }
+
+
+storage_sweeper = StorageSweeper()
+
+
+def schedule_sweep():
+    """Llamar después del commit que agregó tombstones."""
+    storage_sweeper.wake()
@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
 from app.models.technical_leader import TechnicalLeader
 from app.schemas.technical_leader import TechnicalLeaderCreate, TechnicalLeaderUpdate
+from app.core.pagination import PageParams, PageSpec, paginate
+
+TECHNICAL_LEADER_PAGE = PageSpec(TechnicalLeader, ["name", "email", "entry_date"])
 
 
 def create_technical_leader(db: Session, technical_leader_data: TechnicalLeaderCreate):
@@ -19,8 +22,8 @@ def get_technical_leader_by_id(db: Session, technical_leader_id: int):
     )
 
 
-def get_technical_leaders(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(TechnicalLeader).offset(skip).limit(limit).all()
+def get_technical_leaders(db: Session, page: PageParams = None):
+    return paginate(db.query(TechnicalLeader), page, TECHNICAL_LEADER_PAGE)
 
 
 def update_technical_leader(
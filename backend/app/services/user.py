@@ -1,7 +1,13 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
+from app.core.pagination import PageParams, PageSpec, paginate, paginate_async
+from app.services.principal_cache import invalidate_user
+
+USER_PAGE = PageSpec(User, ["username", "email", "rol"])
 
 
 def create_user(db: Session, user_data: UserCreate):
@@ -16,8 +22,12 @@ def get_user_by_id(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+def get_users(db: Session, page: PageParams = None):
+    return paginate(db.query(User), page, USER_PAGE)
+
+
+async def get_users_async(db: AsyncSession, page: PageParams = None):
+    return await paginate_async(db, select(User), page, USER_PAGE)
 
 
 def update_user(db: Session, user_id: int, user_update_data: UserUpdate):
@@ -27,6 +37,7 @@ def update_user(db: Session, user_id: int, user_update_data: UserUpdate):
             setattr(db_user, key, value)
         db.commit()
         db.refresh(db_user)
+        invalidate_user(user_id)
     return db_user
 
 
@@ -35,4 +46,5 @@ def delete_user(db: Session, user_id: int):
     if db_user:
         db.delete(db_user)
         db.commit()
+        invalidate_user(user_id)
     return db_user
@@ -0,0 +1,130 @@
+# benchmarks/bench_auth.py
+"""
+Compara el throughput de un endpoint autenticado (GET /auth/me):
+
+- legacy: ``get_current_user`` decodifica el JWT y consulta ``app_user``
+  en cada request (implementación previa).
+- cached: ``app.routes.auth.get_current_user`` con la caché de principals.
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_auth --requests 2000 --users 50
+"""
+import argparse
+import time
+
+from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.testclient import TestClient
+from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.security import ALGORITHM, SECRET_KEY
+from app.database import async_database_url, get_async_db, get_db
+from app.models.user import User
+from app.routes import auth
+from app.services import auth_service
+from app.services.principal_cache import clear_principals
+from benchmarks.common import QueryCounter, make_session_factory
+
+
+async def legacy_get_current_user(
+    token: str = Depends(auth.oauth2_scheme), db: Session = Depends(get_db)
+):
+    """Implementación previa de ``get_current_user`` (referencia)."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        email = payload.get("sub")
+        if email is None:
+            raise credentials_exception
+    except JWTError:
+        raise credentials_exception
+    user = auth_service.get_user_by_email(db, email)
+    if user is None:
+        raise credentials_exception
+    return user
+
+
+def seed(db, n_users: int):
+    db.add_all(
+        User(username=f"user{i}", email=f"user{i}@mail.com", password="x")
+        for i in range(n_users)
+    )
+    db.commit()
+    return [
+        auth_service.create_access_token({"sub": f"user{i}@mail.com"})
+        for i in range(n_users)
+    ]
+
+
+def make_client(Session, AsyncSession, legacy: bool) -> TestClient:
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    if legacy:
+        app.dependency_overrides[auth.get_current_user] = legacy_get_current_user
+    return TestClient(app)
+
+
+def run(label, client, engines, tokens, n_requests: int):
+    clear_principals()
+    counters = [QueryCounter(engine) for engine in engines]
+    start = time.perf_counter()
+    with counters[0], counters[1]:
+        for i in range(n_requests):
+            token = tokens[i % len(tokens)]
+            response = client.get(
+                "/auth/me", headers={"Authorization": f"Bearer {token}"}
+            )
+            assert response.status_code == 200, response.text
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:>8}: {n_requests / elapsed:8.0f} req/s  "
+        f"{sum(c.count for c in counters):6d} queries"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    engine, Session = make_session_factory()
+    db = Session()
+    tokens = seed(db, args.users)
+    db.close()
+    print(f"Seeded {args.users} users ({engine.url.get_backend_name()})")
+
+    async_engine = create_async_engine(
+        async_database_url(engine.url.render_as_string(hide_password=False))
+    )
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+    engines = [engine, async_engine.sync_engine]
+
+    legacy = make_client(Session, AsyncSession, True)
+    run("legacy", legacy, engines, tokens, args.requests)
+    cached = make_client(Session, AsyncSession, False)
+    run("cached", cached, engines, tokens, args.requests)
+
+
+if __name__ == "__main__":
+    main()
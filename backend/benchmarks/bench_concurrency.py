@@ -0,0 +1,177 @@
+# benchmarks/bench_concurrency.py
+"""
+Prueba de carga de endpoints de lectura con muchos clientes simultáneos:
+
+- legacy: handlers ``async def`` que usan la ``Session`` síncrona
+  (implementación previa; cada consulta bloquea el event loop).
+- async: los routers actuales (``AsyncSession`` en las lecturas calientes).
+
+Por defecto levanta ambas apps en el mismo proceso (transporte ASGI de
+``httpx``); con ``--url`` apunta a un servidor ya desplegado, p. ej. uvicorn
+sobre PostgreSQL, que es donde la diferencia es representativa.
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_concurrency --clients 200 --requests 2000
+    python -m benchmarks.bench_concurrency --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.pagination import default_page
+from app.database import async_database_url, get_async_db, get_db
+from app.models.evc import EVC
+from app.models.evc_q import EVC_Q
+from app.models.user import User
+from app.routes.evc_qs import router as evc_qs_router
+from app.routes.evcs import router as evcs_router
+from app.routes.users import router as users_router
+from app.services import evc_qs as evc_q_service
+from app.services import evcs as evc_service
+from app.services import user as user_service
+from benchmarks.common import make_session_factory, percentile
+
+PATHS = ["/evcs/?limit=20", "/evc-qs/evc_qs/?limit=20", "/users/?limit=20"]
+
+
+def seed(db, n_evcs: int):
+    db.add_all(EVC(id=i + 1, name=f"evc-{i}", description="") for i in range(n_evcs))
+    db.add_all(
+        EVC_Q(
+            evc_id=i + 1,
+            year=2025,
+            q=q,
+            allocated_budget=1000,
+            allocated_percentage=25,
+        )
+        for i in range(n_evcs)
+        for q in range(1, 5)
+    )
+    db.add_all(
+        User(username=f"user{i}", email=f"user{i}@mail.com", password="x")
+        for i in range(n_evcs)
+    )
+    db.commit()
+
+
+def legacy_app() -> FastAPI:
+    """Los mismos listados con ``async def`` + ``Session`` síncrona."""
+    app = FastAPI()
+
+    @app.get("/evcs/")
+    async def list_evcs(limit: int = 20, db: Session = Depends(get_db)):
+        return evc_service.get_evcs(db, default_page(limit=limit)).items
+
+    @app.get("/evc-qs/evc_qs/")
+    async def list_evc_qs(limit: int = 20, db: Session = Depends(get_db)):
+        quarters = evc_q_service.get_evc_qs(db, default_page(limit=limit)).items
+        return [{"id": q.id, "financials": len(q.evc_financials)} for q in quarters]
+
+    @app.get("/users/")
+    async def list_users(limit: int = 20, db: Session = Depends(get_db)):
+        users = user_service.get_users(db, default_page(limit=limit)).items
+        return [{"id": u.id, "email": u.email} for u in users]
+
+    return app
+
+
+def async_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(evcs_router, prefix="/evcs")
+    app.include_router(evc_qs_router, prefix="/evc-qs")
+    app.include_router(users_router, prefix="/users")
+    return app
+
+
+def override_sessions(app: FastAPI, Session, AsyncSession):
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+
+async def load(client: httpx.AsyncClient, clients: int, n_requests: int):
+    latencies = []
+    pending = iter(range(n_requests))
+
+    async def worker():
+        for i in pending:
+            start = time.perf_counter()
+            response = await client.get(PATHS[i % len(PATHS)])
+            assert response.status_code == 200, response.text
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return time.perf_counter() - start, latencies
+
+
+def report(label: str, elapsed: float, latencies):
+    print(
+        f"{label:>8}: {len(latencies) / elapsed:8.0f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+        f"p95 {percentile(latencies, 95) * 1000:7.1f} ms"
+    )
+
+
+async def run_in_process(args):
+    # Un pool por cliente en ambos casos: con el pool por defecto la versión
+    # legacy se bloquea, porque la espera síncrona de una conexión detiene el
+    # event loop que debería liberar las conexiones ocupadas.
+    pool = {"pool_size": args.clients, "max_overflow": 0}
+    engine, Session = make_session_factory(**pool)
+    db = Session()
+    seed(db, args.evcs)
+    db.close()
+    async_url = async_database_url(engine.url.render_as_string(hide_password=False))
+    # aiosqlite usa NullPool (una conexión por sesión) y no acepta tamaño de pool
+    async_pool = {} if engine.url.get_backend_name() == "sqlite" else pool
+    async_engine = create_async_engine(async_url, **async_pool)
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+    print(f"Seeded {args.evcs} EVCs ({engine.url.get_backend_name()})")
+
+    for label, app in (("legacy", legacy_app()), ("async", async_app())):
+        override_sessions(app, Session, AsyncSession)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            report(label, *await load(client, args.clients, args.requests))
+    await async_engine.dispose()
+
+
+async def run_remote(args):
+    limits = httpx.Limits(max_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+        report("remote", *await load(client, args.clients, args.requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--evcs", type=int, default=500)
+    parser.add_argument("--url", help="Servidor ya desplegado (sin sembrar datos)")
+    args = parser.parse_args()
+
+    asyncio.run(run_remote(args) if args.url else run_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
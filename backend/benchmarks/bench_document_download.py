@@ -0,0 +1,131 @@
+# benchmarks/bench_document_download.py
+"""
+Memoria y velocidad de la descarga de un documento grande servido por
+uvicorn desde el storage local:
+
+- legacy: ``Response(open(...).read())`` (el archivo entero en memoria).
+- range: ``object_response`` / ``RangeFileResponse`` (bloques con
+  ``os.pread``), descarga completa y en ``--parts`` rangos en paralelo.
+
+Informa MB/s y el pico de memoria de Python (tracemalloc, servidor y
+cliente en el mismo proceso; el cliente descarta los bloques al leerlos).
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_document_download --size-mb 256
+"""
+import argparse
+import asyncio
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+from app.routes.storage import object_response
+from app.services import storage as storage_service
+from app.services.storage import LocalStorage
+
+KEY = "documents/contrato.bin"
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy")
+    def legacy():
+        with open(storage_service.storage.local_path(KEY), "rb") as f:
+            return Response(f.read(), media_type="application/octet-stream")
+
+    @app.get("/range")
+    async def ranged(request: Request):
+        return await object_response(request, KEY)
+
+    return app
+
+
+def serve(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(app, port=port, log_level="error", lifespan="off")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def fetch(client: httpx.AsyncClient, url: str, headers=None) -> int:
+    size = 0
+    async with client.stream("GET", url, headers=headers) as response:
+        async for chunk in response.aiter_raw():
+            size += len(chunk)
+    return size
+
+
+async def fetch_parts(client, url: str, size: int, parts: int) -> int:
+    step = -(-size // parts)
+    ranges = [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+    sizes = await asyncio.gather(
+        *(fetch(client, url, {"range": f"bytes={a}-{b}"}) for a, b in ranges)
+    )
+    return sum(sizes)
+
+
+async def measure(download, size: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    received = await download()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert received == size, (received, size)
+    return elapsed, peak
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as directory:
+        storage_service.storage = LocalStorage(Path(directory))
+        path = storage_service.storage.local_path(KEY)
+        path.parent.mkdir(parents=True)
+        block = bytes(range(256)) * 4096  # 1 MB
+        with open(path, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(block)
+        size = args.size_mb * 1024 * 1024
+
+        server = serve(make_app(), args.port)
+        base = f"http://127.0.0.1:{args.port}"
+        print(f"File: {args.size_mb} MB")
+        async with httpx.AsyncClient(timeout=None) as client:
+            cases = (
+                ("legacy", lambda: fetch(client, f"{base}/legacy")),
+                ("range", lambda: fetch(client, f"{base}/range")),
+                (
+                    f"{args.parts} ranges",
+                    lambda: fetch_parts(client, f"{base}/range", size, args.parts),
+                ),
+            )
+            for label, download in cases:
+                elapsed, peak = await measure(download, size)
+                print(
+                    f"{label:>10}: {args.size_mb / elapsed:8.1f} MB/s  "
+                    f"peak memory {peak / 1024 / 1024:8.1f} MB"
+                )
+        server.should_exit = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--parts", type=int, default=4)
+    parser.add_argument("--port", type=int, default=9072)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_document_upload.py
+"""
+Memoria y velocidad de la subida de documentos al storage local:
+
+- legacy: ``await file.read()`` completo y un solo ``write`` (implementación
+  previa de ``upload_and_create_document``).
+- stream: ``upload_stream`` con bloques de ``STORAGE_CHUNK_SIZE`` (tamaño y
+  SHA-256 calculados al vuelo).
+
+El archivo subido está en disco, como lo deja Starlette al recibir un
+multipart grande. Para cada modo informa MB/s y el pico de memoria de Python
+(tracemalloc) durante la subida.
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_document_upload --size-mb 256
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from fastapi import UploadFile
+
+from app.services.document import iter_upload
+from app.services.storage import LocalStorage
+
+
+async def _whole(file):
+    yield await file.read()
+
+
+async def legacy(storage, file):
+    return await storage.upload_stream("documents/legacy.bin", _whole(file))
+
+
+async def stream(storage, file):
+    return await storage.upload_stream("documents/stream.bin", iter_upload(file))
+
+
+async def measure(upload, storage, source: Path, trace: bool):
+    with open(source, "rb") as f:
+        file = UploadFile(file=f, filename="documento.bin")
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = await upload(storage, file)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace else 0
+        if trace:
+            tracemalloc.stop()
+    assert result["size"] == source.stat().st_size
+    return elapsed, peak
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / "source.bin"
+        block = bytes(range(256)) * 4096  # 1 MB
+        with open(source, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(block)
+        storage = LocalStorage(Path(directory) / "storage")
+
+        print(f"File: {args.size_mb} MB")
+        for label, upload in (("legacy", legacy), ("stream", stream)):
+            elapsed, _ = await measure(upload, storage, source, trace=False)
+            _, peak = await measure(upload, storage, source, trace=True)
+            print(
+                f"{label:>8}: {args.size_mb / elapsed:8.1f} MB/s  "
+                f"peak memory {peak / 1024 / 1024:8.1f} MB"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=256)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
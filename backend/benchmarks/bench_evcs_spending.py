@@ -0,0 +1,178 @@
+# benchmarks/bench_evcs_spending.py
+"""
+Compara el cálculo de gasto por cuatrimestre de GET /evcs:
+
+- legacy: dos ``SUM`` por cuatrimestre dentro de un ciclo en Python.
+- engine: ``app.services.spending`` (una consulta agrupada por página).
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_evcs_spending --evcs 5000 --pages 5
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from app.models.evc import EVC
+from app.models.evc_financial import EVC_Financial
+from app.models.evc_q import EVC_Q
+from app.models.provider import Provider
+from app.core.pagination import default_page
+from app.services.evcs import get_evcs
+from benchmarks.common import QueryCounter, make_session_factory
+
+
+def seed(db, n_evcs: int, quarters_per_evc: int, financials_per_q: int):
+    rng = random.Random(42)
+    providers = [
+        {
+            "id": i + 1,
+            "name": f"provider-{i}",
+            "role": "dev",
+            "company": f"company-{i % 50}",
+            "country": "CO",
+            "cost_usd": rng.uniform(100, 5000),
+            "category": "IT",
+            "line": "core",
+            "email": f"provider-{i}@finup.com",
+        }
+        for i in range(200)
+    ]
+    db.bulk_insert_mappings(Provider, providers)
+    db.bulk_insert_mappings(
+        EVC, [{"id": i + 1, "name": f"EVC {i}", "status": True} for i in range(n_evcs)]
+    )
+
+    quarters, financials = [], []
+    q_id = 0
+    for evc_id in range(1, n_evcs + 1):
+        for n in range(quarters_per_evc):
+            q_id += 1
+            quarters.append(
+                {
+                    "id": q_id,
+                    "evc_id": evc_id,
+                    "year": 2024 + n // 4,
+                    "q": n % 4 + 1,
+                    "allocated_budget": rng.uniform(10_000, 50_000),
+                    "allocated_percentage": 0.0,
+                }
+            )
+            for f in range(financials_per_q):
+                with_provider = f == 0
+                financials.append(
+                    {
+                        "evc_q_id": q_id,
+                        "provider_id": rng.randint(1, 200) if with_provider else None,
+                        "value_usd": None if with_provider else rng.uniform(10, 2000),
+                        "concept": "bench",
+                    }
+                )
+    db.bulk_insert_mappings(EVC_Q, quarters)
+    db.bulk_insert_mappings(EVC_Financial, financials)
+    db.commit()
+
+
+def legacy_get_evcs(db, skip: int = 0, limit: int = 100):
+    """Implementación previa de ``get_evcs`` (referencia para el benchmark)."""
+    evcs = (
+        db.query(EVC)
+        .options(
+            joinedload(EVC.entorno),
+            joinedload(EVC.technical_leader),
+            joinedload(EVC.functional_leader),
+            joinedload(EVC.evc_qs)
+            .joinedload(EVC_Q.evc_financials)
+            .joinedload(EVC_Financial.provider),
+        )
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    for evc in evcs:
+        for quarter in evc.evc_qs:
+            total = (
+                db.query(func.sum(Provider.cost_usd))
+                .join(EVC_Financial, EVC_Financial.provider_id == Provider.id)
+                .filter(EVC_Financial.evc_q_id == quarter.id)
+                .scalar()
+                or 0.0
+            )
+            total += (
+                db.query(func.sum(EVC_Financial.value_usd))
+                .filter(EVC_Financial.evc_q_id == quarter.id)
+                .scalar()
+                or 0.0
+            )
+            quarter.total_spendings = total
+    return evcs
+
+
+def keyset_get_evcs():
+    """``get_evcs`` recorriendo las páginas con el cursor de la anterior."""
+    state = {"cursor": None}
+
+    def fetch(db, skip: int = 0, limit: int = 100):
+        page = default_page(limit=limit, cursor=state["cursor"], count="none")
+        result = get_evcs(db, page)
+        state["cursor"] = result.next_cursor
+        return result.items
+
+    return fetch
+
+
+def run(label, fn, engine, Session, pages: int, page_size: int):
+    latencies = []
+    counter = QueryCounter(engine)
+    totals = {}
+    with counter:
+        for page in range(pages):
+            db = Session()
+            try:
+                start = time.perf_counter()
+                evcs = fn(db, skip=page * page_size, limit=page_size)
+                latencies.append(time.perf_counter() - start)
+                for evc in evcs:
+                    for quarter in evc.evc_qs:
+                        totals[quarter.id] = round(quarter.total_spendings, 6)
+            finally:
+                db.close()
+    print(
+        f"{label:<8} queries/page={counter.count / pages:>8.1f}  "
+        f"mean={statistics.mean(latencies) * 1000:>8.1f} ms  "
+        f"max={max(latencies) * 1000:>8.1f} ms"
+    )
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--evcs", type=int, default=5000)
+    parser.add_argument("--quarters", type=int, default=8)
+    parser.add_argument("--financials", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    engine, Session = make_session_factory()
+    db = Session()
+    seed(db, args.evcs, args.quarters, args.financials)
+    db.close()
+    print(
+        f"Seeded {args.evcs} EVCs x {args.quarters} quarters x "
+        f"{args.financials} financials ({engine.url.get_backend_name()})"
+    )
+
+    legacy = run("legacy", legacy_get_evcs, engine, Session, args.pages, args.page_size)
+    current = run(
+        "engine", keyset_get_evcs(), engine, Session, args.pages, args.page_size
+    )
+    assert legacy == current, "Los totales de ambas implementaciones no coinciden"
+
+
+if __name__ == "__main__":
+    main()
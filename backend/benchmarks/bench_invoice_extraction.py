@@ -0,0 +1,84 @@
+# benchmarks/bench_invoice_extraction.py
+"""
+Precisión y velocidad de la extracción del total de facturas sobre el corpus
+etiquetado de ``benchmarks.invoice_corpus`` (todos los estilos):
+
+- legacy: ``page.get_text()`` y el mayor monto > 100 en las líneas con
+  total/subtotal/iva/$ (implementación previa del endpoint de carga).
+- current: ``app.services.invoice.parse_invoice`` (filas por coordenadas,
+  patrones precompilados y etiquetas de total).
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_invoice_extraction --invoices 600 --max-pages 3
+"""
+import argparse
+import re
+import time
+from collections import Counter
+
+import fitz
+
+from app.services.invoice import parse_invoice
+from benchmarks.invoice_corpus import STYLES, make_labelled_corpus
+
+
+def legacy_parse_invoice(filename: str, content: bytes) -> dict:
+    """Implementación previa (referencia)."""
+    text = ""
+    pages = 0
+    with fitz.open(stream=content, filetype="pdf") as doc:
+        for page in doc:
+            pages += 1
+            text += page.get_text()
+
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    value_candidates = []
+    for line in lines:
+        if any(
+            keyword in line.lower() for keyword in ["total", "subtotal", "iva", "$"]
+        ):
+            matches = re.findall(r"\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})?", line)
+            for raw in matches:
+                try:
+                    number = float(raw.replace("$", "").replace(",", ""))
+                    if number > 100:
+                        value_candidates.append(number)
+                except ValueError:
+                    continue
+    return {"pages": pages, "value": max(value_candidates, default=None)}
+
+
+def run(label: str, parse, corpus):
+    correct = Counter()
+    pages = 0
+    start = time.perf_counter()
+    for name, content, total in corpus:
+        result = parse(name, content)
+        pages += result["pages"]
+        if result["value"] is not None and abs(result["value"] - total) < 0.005:
+            correct[name.rsplit("-", 1)[1][:-4]] += 1
+    elapsed = time.perf_counter() - start
+
+    per_style = len(corpus) // len(STYLES)
+    styles = "  ".join(f"{style} {correct[style]}/{per_style}" for style in STYLES)
+    print(
+        f"{label:>8}: {sum(correct.values()) / len(corpus):6.1%} accuracy  "
+        f"{pages / elapsed:7.1f} pages/s  ({styles})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=600)
+    parser.add_argument("--max-pages", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = make_labelled_corpus(args.invoices, max_pages=args.max_pages)
+    print(f"Corpus: {len(corpus)} invoices, styles: {', '.join(STYLES)}")
+    run("legacy", legacy_parse_invoice, corpus)
+    run("current", parse_invoice, corpus)
+
+
+if __name__ == "__main__":
+    main()
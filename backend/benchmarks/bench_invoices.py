@@ -0,0 +1,85 @@
+# benchmarks/bench_invoices.py
+"""
+Throughput de lectura de facturas sobre un corpus de PDFs sintéticos:
+
+- inline: ``parse_invoice`` dentro del event loop (implementación previa del
+  endpoint de carga); mientras lee, el loop no atiende otros requests.
+- pool: ``InvoiceParsingPool`` con ``--workers`` procesos.
+
+Para cada modo informa facturas/s, páginas/s, el retraso máximo del event
+loop y cuántos totales coinciden con los del corpus.
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_invoices --invoices 500 --workers 4
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.invoice import parse_invoice
+from app.services.invoice_jobs import InvoiceParsingPool
+from benchmarks.invoice_corpus import make_corpus
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Mayor retraso observado de un ``sleep(interval)`` en el event loop."""
+    max_lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - start - interval)
+    return max_lag
+
+
+async def run(label: str, parse, corpus):
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_loop_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(parse(name, content) for name, content, _ in corpus)
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    max_lag = await lag
+
+    pages = sum(result["pages"] for result in results)
+    correct = sum(
+        result["value"] == total for result, (_, _, total) in zip(results, corpus)
+    )
+    print(
+        f"{label:>8}: {len(corpus) / elapsed:7.1f} invoices/s  "
+        f"{pages / elapsed:7.1f} pages/s  "
+        f"max loop lag {max_lag * 1000:7.1f} ms  "
+        f"{correct}/{len(corpus)} totals"
+    )
+
+
+async def main_async(args):
+    corpus = make_corpus(args.invoices, max_pages=args.max_pages)
+    print(f"Corpus: {len(corpus)} invoices")
+
+    async def inline(name, content):
+        return parse_invoice(name, content)
+
+    await run("inline", inline, corpus)
+
+    pool = InvoiceParsingPool(args.workers)
+    # Arranca los procesos antes de medir
+    await asyncio.gather(*(pool.parse(*corpus[0][:2]) for _ in range(args.workers)))
+    await run("pool", pool.parse, corpus)
+    pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pages", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_ocr.py
+"""
+Throughput y memoria del OCR de facturas escaneadas, sobre el corpus de
+``benchmarks.invoice_corpus`` convertido a PDFs sin capa de texto:
+
+- páginas/s de punta a punta: rasterización en ``InvoiceParsingPool`` y
+  Tesseract en un ``OCRPool`` de ``--workers`` procesos;
+- memoria máxima (RSS) de cada proceso del pool y de los procesos tesseract
+  que lanzó;
+- totales que coinciden con los del corpus.
+
+Requiere el programa ``tesseract`` (ver el Dockerfile).
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_ocr --invoices 20 --workers 2 --dpi 300
+"""
+import argparse
+import asyncio
+import os
+import resource
+import shutil
+import sys
+import time
+
+
+def worker_memory() -> tuple:
+    """``(pid, RSS máximo del proceso, RSS máximo de sus hijos)`` en KB."""
+    # La pausa reparte las consultas entre todos los procesos del pool
+    time.sleep(0.05)
+    return (
+        os.getpid(),
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
+async def pool_memory(pool) -> dict:
+    probes = await asyncio.gather(
+        *(asyncio.wrap_future(pool.run(worker_memory)) for _ in range(pool.workers * 4))
+    )
+    return {pid: (own, children) for pid, own, children in probes}
+
+
+async def main_async(args):
+    from app.services import invoice_ocr
+    from app.services.invoice_jobs import InvoiceParsingPool
+    from benchmarks.invoice_corpus import make_corpus, make_scanned_pdf
+
+    corpus = [
+        (name, make_scanned_pdf(content), total)
+        for name, content, total in make_corpus(args.invoices, max_pages=args.max_pages)
+    ]
+    parser = InvoiceParsingPool(args.parse_workers)
+    invoice_ocr.ocr_pool = invoice_ocr.OCRPool(args.workers)
+    # Arranca los procesos antes de medir
+    await pool_memory(invoice_ocr.ocr_pool)
+    await parser.parse(*corpus[0][:2])
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(parser.parse(name, content) for name, content, _ in corpus)
+    )
+    elapsed = time.perf_counter() - start
+    memory = await pool_memory(invoice_ocr.ocr_pool)
+    parser.shutdown()
+    invoice_ocr.ocr_pool.shutdown()
+
+    pages = sum(result.get("ocr_pages", 0) for result in results)
+    errors = sum(result.get("ocr_errors", 0) for result in results)
+    correct = sum(
+        result["value"] is not None and abs(result["value"] - total) < 0.005
+        for result, (_, _, total) in zip(results, corpus)
+    )
+    print(
+        f"Corpus: {len(corpus)} scanned invoices, {args.workers} OCR workers, "
+        f"{args.dpi} dpi"
+    )
+    print(
+        f"{pages / elapsed:7.2f} pages/s  {elapsed / max(pages, 1):6.2f} s/page  "
+        f"{errors} failed pages  {correct}/{len(corpus)} totals"
+    )
+    for pid, (own, children) in sorted(memory.items()):
+        print(
+            f"  worker {pid}: {own / 1024:7.1f} MB  "
+            f"tesseract peak {children / 1024:7.1f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--max-pages", type=int, default=2)
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args()
+
+    if shutil.which("tesseract") is None:
+        sys.exit("tesseract no está instalado")
+    # Los procesos de los pools leen la configuración al importar
+    os.environ["INVOICE_OCR_DPI"] = str(args.dpi)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_pagination.py
+"""
+Compara el costo de una página profunda de GET /notifications/:
+
+- offset: ``ORDER BY created_at DESC OFFSET n LIMIT k`` (implementación previa).
+- keyset: ``app.core.pagination.paginate`` continuando desde un cursor.
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_pagination --rows 500000 --page-size 100
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.core.pagination import default_page, encode_cursor, paginate
+from app.models.notification import Notification
+from app.services.notification_service import NOTIFICATION_PAGE
+from benchmarks.common import make_session_factory
+
+
+def seed(engine, rows: int):
+    start = datetime(2024, 1, 1)
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            batch.append(
+                {
+                    "message": f"n{i}",
+                    "type": "alert",
+                    "read": False,
+                    "created_at": start + timedelta(seconds=i),
+                }
+            )
+            if len(batch) == 10_000:
+                conn.execute(Notification.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Notification.__table__.insert(), batch)
+
+
+def offset_page(db, offset: int, limit: int):
+    return (
+        db.query(Notification)
+        .filter(Notification.read == False)
+        .order_by(Notification.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+
+def keyset_page(db, cursor, limit: int):
+    query = db.query(Notification).filter(Notification.read == False)
+    page = default_page(cursor=cursor, limit=limit, count="none")
+    return paginate(query, page, NOTIFICATION_PAGE).items
+
+
+def measure(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine, Session = make_session_factory()
+    seed(engine, args.rows)
+    print(f"Seeded {args.rows} notifications ({engine.url.get_backend_name()})")
+
+    db = Session()
+    sort_keys = NOTIFICATION_PAGE.sort_keys(None)
+    print(f"{'depth':>10}  {'offset ms':>10}  {'keyset ms':>10}")
+    for depth in (0, args.rows // 10, args.rows // 2, args.rows - args.page_size):
+        offset_rows = offset_page(db, depth, args.page_size)
+        cursor = None
+        if depth:
+            # Cursor equivalente a haber recorrido las páginas anteriores
+            last = offset_page(db, depth - 1, 1)[0]
+            cursor = encode_cursor(sort_keys, [last.created_at, last.id])
+        keyset_rows = keyset_page(db, cursor, args.page_size)
+        assert [n.id for n in offset_rows] == [n.id for n in keyset_rows]
+
+        offset_ms = measure(lambda: offset_page(db, depth, args.page_size), args.repeat)
+        keyset_ms = measure(
+            lambda: keyset_page(db, cursor, args.page_size), args.repeat
+        )
+        print(f"{depth:>10}  {offset_ms:>10.1f}  {keyset_ms:>10.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/bench_search.py
+"""
+Búsqueda de un proveedor o número de orden de compra entre ``--documents``
+facturas de texto sintético (``--words`` palabras cada una):
+
+- like: ``lower(text) LIKE '%término%'`` por cada término sobre
+  ``invoice_parse.text``, como haría una búsqueda sin índice.
+- index: ``app.services.search.search_documents`` (en SQLite, el índice
+  invertido de ``search_term`` con BM25, fragmento incluido).
+
+Informa el tiempo de indexar y p50/p95 de ``--queries`` consultas con uno o
+dos términos. Con ``BENCH_DB_URL`` apuntando a PostgreSQL (esquema creado
+con ``alembic upgrade head``) mide el camino ``tsvector``/GIN.
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_search --documents 20000 --queries 200
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import and_, func, select
+
+from app.models.invoice_parse import InvoiceParse
+from app.services.search import INVOICE, index_text, search_documents
+from benchmarks.common import make_session_factory, percentile
+
+VOCABULARY = (
+    "servicio mantenimiento licencia soporte consultoría horas cantidad precio "
+    "unitario subtotal impuesto iva total moneda pago transferencia vencimiento "
+    "contrato anexo entrega proyecto infraestructura nube almacenamiento red"
+).split()
+
+
+def make_text(rng: random.Random, n: int, words: int) -> str:
+    body = " ".join(rng.choice(VOCABULARY) for _ in range(words))
+    return (
+        f"Factura {n:07d}\nProveedor Empresa{n % 500:03d} S.A.\n"
+        f"Orden de compra PO-{4500000 + n}\n{body}"
+    )
+
+
+def seed(Session, documents: int, words: int) -> float:
+    rng = random.Random(7)
+    db = Session()
+    start = time.perf_counter()
+    for n in range(documents):
+        text = make_text(rng, n, words)
+        sha256 = f"{n:064x}"
+        db.add(
+            InvoiceParse(
+                sha256=sha256, parser_version=0, size=len(text), pages=1, text=text
+            )
+        )
+        index_text(db, INVOICE, sha256, f"factura-{n}.pdf", text)
+        if n % 1000 == 999:
+            db.commit()
+    db.commit()
+    db.close()
+    return time.perf_counter() - start
+
+
+def like(db, q: str):
+    terms = q.lower().split()
+    condition = and_(*(func.lower(InvoiceParse.text).like(f"%{t}%") for t in terms))
+    return db.execute(select(InvoiceParse.sha256).where(condition).limit(20)).all()
+
+
+def index(db, q: str):
+    return search_documents(db, q, limit=20)["hits"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    engine, Session = make_session_factory()
+    elapsed = seed(Session, args.documents, args.words)
+    print(f"{args.documents} invoices indexed in {elapsed:.1f} s")
+
+    rng = random.Random(11)
+    queries = []
+    for _ in range(args.queries):
+        n = rng.randrange(args.documents)
+        queries.append(
+            rng.choice(
+                [f"PO-{4500000 + n}", f"empresa{n % 500:03d} soporte", f"{n:07d}"]
+            )
+        )
+
+    db = Session()
+    for label, search in (("like", like), ("index", index)):
+        samples = []
+        for q in queries:
+            start = time.perf_counter()
+            assert search(db, q), q
+            samples.append(time.perf_counter() - start)
+        print(
+            f"{label:>6}: p50 {percentile(samples, 50) * 1000:8.2f} ms  "
+            f"p95 {percentile(samples, 95) * 1000:8.2f} ms"
+        )
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
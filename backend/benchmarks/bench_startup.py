@@ -0,0 +1,91 @@
+# benchmarks/bench_startup.py
+"""
+Mide el arranque en frío del worker con ``python -X importtime``:
+
+- importa ``app.main`` en procesos nuevos (``--runs``) y toma la mediana del
+  tiempo acumulado de importación;
+- lista los módulos con más tiempo propio;
+- falla (código de salida 1) si la mediana supera ``--budget-ms`` o si se
+  importa alguna dependencia pesada que debería cargarse en el primer uso
+  (ver app/core/optional_deps.py).
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_startup --runs 5 --budget-ms 2500
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from app.core.optional_deps import HEAVY_MODULES
+
+# Además de las dependencias opcionales, Alembic sólo se usa para migrar
+DEFERRED_MODULES = [name.split(".")[0] for name in HEAVY_MODULES] + ["alembic"]
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(target: str = "app.main"):
+    """``{módulo: (propio_us, acumulado_us)}`` de un proceso nuevo."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, module = match.groups()
+            times[module] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=2500.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # La primera corrida calienta la caché de bytecode y del sistema de archivos
+    import_times()
+    runs = [import_times() for _ in range(args.runs)]
+    totals = [times["app.main"][1] / 1000 for times in runs]
+    median = statistics.median(totals)
+    print(
+        f"import app.main: median {median:.0f} ms  "
+        f"min {min(totals):.0f} ms  max {max(totals):.0f} ms  ({args.runs} runs)"
+    )
+
+    print(f"Top {args.top} modules by self time (last run):")
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)
+    for module, (self_us, cumulative_us) in slowest[: args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {cumulative_us / 1000:8.1f} ms  {module}")
+
+    failures = []
+    loaded = sorted(
+        module
+        for module in runs[-1]
+        if module.split(".")[0] in DEFERRED_MODULES and "." not in module
+    )
+    if loaded:
+        failures.append(f"deferred modules imported at startup: {', '.join(loaded)}")
+    if median > args.budget_ms:
+        failures.append(
+            f"median {median:.0f} ms exceeds budget {args.budget_ms:.0f} ms"
+        )
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/bench_storage.py
+"""
+Backend S3 de ``app.services.storage`` contra ``benchmarks.fake_s3`` (un S3
+en memoria, en lugar de un MinIO real):
+
+- conexiones: ``--requests`` lecturas con el cliente compartido de
+  ``S3Storage`` frente a un cliente nuevo por petición (servidor uvicorn
+  real, cuenta conexiones TCP abiertas);
+- multipart: subida de ``--size-mb`` MB con partes en serie
+  (``concurrency=1``) frente a ``--concurrency`` partes en paralelo;
+- borrado: ``--deletes`` objetos uno por uno frente a ``DeleteObjects``.
+
+``--latency`` agrega esa demora (segundos) a cada petición, como la ida y
+vuelta a un S3 remoto.
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_storage --latency 0.02 --size-mb 64
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fake_s3 import FakeS3, make_storage, serve
+
+
+async def _chunks(size_mb: int):
+    block = bytes(range(256)) * 4096  # 1 MB
+    for _ in range(size_mb):
+        yield block
+
+
+async def connections(args):
+    app = FakeS3()
+    app.objects["documents/a.txt"] = b"x" * 1024
+    thread = serve(app, args.port)
+    endpoint = f"http://127.0.0.1:{args.port}"
+
+    async def read(storage):
+        return b"".join(
+            [chunk async for chunk in storage.iter_object("documents/a.txt")]
+        )
+
+    async def shared():
+        storage = make_storage(endpoint=endpoint)
+        for _ in range(args.requests):
+            await read(storage)
+        await storage.close()
+
+    async def per_request():
+        for _ in range(args.requests):
+            storage = make_storage(endpoint=endpoint)
+            await read(storage)
+            await storage.close()
+
+    print(f"Connections ({args.requests} GET)")
+    for label, run in (("new client", per_request), ("shared", shared)):
+        app.connections.clear()
+        start = time.perf_counter()
+        await run()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:>12}: {args.requests / elapsed:8.1f} req/s  "
+            f"{len(app.connections):5d} connections"
+        )
+    thread.server.should_exit = True
+    thread.join()
+
+
+async def multipart(args):
+    print(f"Multipart upload ({args.size_mb} MB, parts of {args.part_mb} MB)")
+    for concurrency in (1, args.concurrency):
+        app = FakeS3(latency=args.latency)
+        storage = make_storage(
+            app, part_size=args.part_mb * 1024 * 1024, concurrency=concurrency
+        )
+        start = time.perf_counter()
+        stored = await storage.upload_stream("documents/big.bin", _chunks(args.size_mb))
+        elapsed = time.perf_counter() - start
+        await storage.close()
+        assert stored["size"] == args.size_mb * 1024 * 1024
+        print(
+            f"{concurrency:>5} in flight: {args.size_mb / elapsed:8.1f} MB/s  "
+            f"{app.requests['upload_part']} parts"
+        )
+
+
+async def deletes(args):
+    keys = [f"documents/{n}.pdf" for n in range(args.deletes)]
+    print(f"Delete ({args.deletes} objects)")
+
+    async def one_by_one(storage):
+        for key in keys:
+            await storage.delete(key)
+
+    async def batch(storage):
+        assert not await storage.delete_many(keys)
+
+    for label, run in (("one by one", one_by_one), ("batch", batch)):
+        app = FakeS3(latency=args.latency)
+        app.objects.update({key: b"x" for key in keys})
+        storage = make_storage(app)
+        start = time.perf_counter()
+        await run(storage)
+        elapsed = time.perf_counter() - start
+        await storage.close()
+        assert not app.objects
+        print(
+            f"{label:>12}: {elapsed:8.2f} s  "
+            f"{sum(app.requests.values()):5d} requests"
+        )
+
+
+async def main_async(args):
+    await connections(args)
+    await multipart(args)
+    await deletes(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--part-mb", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--deletes", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=9071)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_storage_gc.py
+"""
+Borrado de un proveedor con ``--documents`` documentos en el storage S3
+simulado (``benchmarks.fake_s3`` con ``--latency`` por petición):
+
+- inline: cada documento se borra del storage y de la base uno por uno
+  dentro del request.
+- tombstone: ``delete_provider`` (un ``DELETE`` de los documentos y sus
+  tombstones en la misma transacción) y, aparte, ``sweep_storage`` en
+  segundo plano.
+
+Informa el tiempo del request, las sentencias SQL y las peticiones al
+storage; para tombstone, también el tiempo del sweep.
+
+Uso (desde ``backend/``)::
+
+    python -m benchmarks.bench_storage_gc --documents 2000 --latency 0.005
+"""
+import argparse
+import asyncio
+import time
+
+from app.models.provider import Provider
+from app.models.provider_document import ProviderDocument
+from app.services import storage as storage_service
+from app.services.provider_service import delete_provider
+from app.services.storage_gc import sweep_storage
+from benchmarks.common import QueryCounter, make_session_factory
+from benchmarks.fake_s3 import FakeS3, make_storage
+
+
+def prepare(Session, s3: FakeS3, documents: int) -> int:
+    db = Session()
+    provider = Provider(name="Acme", email="acme@example.com")
+    db.add(provider)
+    db.commit()
+    for n in range(documents):
+        key = f"documents/contrato-{n}.pdf"
+        s3.objects[key] = b"x"
+        db.add(
+            ProviderDocument(
+                provider_id=provider.id, file_name=key, file_url="", storage_key=key
+            )
+        )
+    db.commit()
+    provider_id = provider.id
+    db.close()
+    return provider_id
+
+
+async def inline(db, provider_id: int):
+    provider = db.get(Provider, provider_id)
+    for document in provider.documents:
+        await storage_service.storage.delete(document.storage_key)
+        db.delete(document)
+    db.delete(provider)
+    db.commit()
+
+
+async def tombstone(db, provider_id: int):
+    delete_provider(db, provider_id)
+
+
+async def main_async(args):
+    print(
+        f"Provider with {args.documents} documents, {args.latency * 1000:.0f} ms per request"
+    )
+    for label, delete in (("inline", inline), ("tombstone", tombstone)):
+        engine, Session = make_session_factory()
+        s3 = FakeS3(latency=args.latency)
+        storage_service.storage = make_storage(s3)
+        provider_id = prepare(Session, s3, args.documents)
+
+        db = Session()
+        with QueryCounter(engine) as queries:
+            start = time.perf_counter()
+            await delete(db, provider_id)
+            elapsed = time.perf_counter() - start
+        requests = sum(s3.requests.values())
+        line = (
+            f"{label:>10}: request {elapsed * 1000:9.1f} ms  "
+            f"{queries.count:6d} queries  {requests:5d} storage requests"
+        )
+        if label == "tombstone":
+            start = time.perf_counter()
+            await sweep_storage(db, limit=args.documents)
+            line += f"  | sweep {(time.perf_counter() - start) * 1000:.1f} ms"
+        assert not s3.objects
+        print(line)
+        db.close()
+        await storage_service.storage.close()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
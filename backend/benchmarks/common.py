@@ -0,0 +1,55 @@
+# benchmarks/common.py
+"""Utilidades compartidas por los benchmarks del backend."""
+import os
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+import app.models  # noqa: F401  registra todos los modelos
+
+BENCH_DB_URL = os.getenv("BENCH_DB_URL", "sqlite:///./bench.db")
+
+
+def make_session_factory(url: str = BENCH_DB_URL, reset: bool = True, **engine_kwargs):
+    """Crea un engine de benchmark y (opcionalmente) recrea el esquema."""
+    engine = create_engine(url, **engine_kwargs)
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class QueryCounter:
+    """Cuenta las sentencias SQL ejecutadas sobre un engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def timed(results: dict, key: str):
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,295 @@
+# benchmarks/fake_s3.py
+"""
+Servidor S3 mínimo en memoria (estilo MinIO) para las pruebas y benchmarks
+de ``app.services.storage_s3``: objetos, rangos, multipart y
+``DeleteObjects``, con la firma SigV4 verificada en cada petición.
+
+Es una app ASGI: en las pruebas se usa con ``httpx.ASGITransport``; para
+medir conexiones reales se sirve con uvicorn (``serve``). ``latency``
+agrega una demora fija por petición y ``requests`` cuenta las peticiones
+por operación.
+"""
+import asyncio
+import datetime
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, unquote
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.services.storage_s3 import canonical_query, presign_v4, sign_v4
+
+ACCESS_KEY = "minio"
+SECRET_KEY = "minio-secret"
+REGION = "us-east-1"
+
+
+def _xml(body: str, status: int = 200) -> Response:
+    return Response(body, status_code=status, media_type="application/xml")
+
+
+def _error(code: str, status: int) -> Response:
+    return _xml(f"<Error><Code>{code}</Code></Error>", status)
+
+
+def _tag(element) -> str:
+    return element.tag.rsplit("}", 1)[-1]
+
+
+class FakeS3:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects: Dict[str, bytes] = {}
+        # Fecha de escritura; los objetos agregados a mano cuentan como antiguos
+        self.modified: Dict[str, datetime.datetime] = {}
+        self.uploads: Dict[str, dict] = {}
+        self.requests = Counter()
+        self.connections = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        request = Request(scope, receive)
+        if scope.get("client"):
+            self.connections.add(tuple(scope["client"]))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = await self.handle(request)
+        await response(scope, receive, send)
+
+    def _check_presigned(self, request: Request, raw_path: str, raw_query: str) -> bool:
+        params = parse_qsl(raw_query, keep_blank_values=True)
+        fields = dict(params)
+        try:
+            now = datetime.datetime.strptime(fields["X-Amz-Date"], "%Y%m%dT%H%M%SZ")
+            expires_in = int(fields["X-Amz-Expires"])
+        except (KeyError, ValueError):
+            return False
+        expires = now + datetime.timedelta(seconds=expires_in)
+        if expires < datetime.datetime.utcnow():
+            return False
+        own = [(name, value) for name, value in params if not name.startswith("X-Amz-")]
+        expected = presign_v4(
+            request.method,
+            raw_path,
+            own,
+            request.headers.get("host", ""),
+            ACCESS_KEY,
+            SECRET_KEY,
+            REGION,
+            now,
+            expires_in,
+        )
+        return expected.endswith(f"X-Amz-Signature={fields.get('X-Amz-Signature')}")
+
+    def _check_signature(self, request: Request, raw_path: str, raw_query: str) -> bool:
+        if "X-Amz-Signature=" in raw_query:
+            return self._check_presigned(request, raw_path, raw_query)
+        authorization = request.headers.get("authorization", "")
+        try:
+            signed = authorization.split("SignedHeaders=")[1].split(",")[0].split(";")
+            now = datetime.datetime.strptime(
+                request.headers["x-amz-date"], "%Y%m%dT%H%M%SZ"
+            )
+        except (IndexError, KeyError, ValueError):
+            return False
+        headers = {name: request.headers.get(name, "") for name in signed}
+        query = canonical_query(parse_qsl(raw_query, keep_blank_values=True))
+        expected = sign_v4(
+            request.method,
+            raw_path,
+            query,
+            headers,
+            ACCESS_KEY,
+            SECRET_KEY,
+            REGION,
+            now,
+        )
+        return authorization == expected
+
+    async def handle(self, request: Request) -> Response:
+        raw_path = request.scope.get("raw_path", b"").decode() or request.url.path
+        raw_query = request.scope.get("query_string", b"").decode()
+        if not self._check_signature(request, raw_path, raw_query):
+            return _error("SignatureDoesNotMatch", 403)
+
+        _, _, path = raw_path.partition("/")
+        bucket, _, key = path.partition("/")
+        key = unquote(key)
+        query = dict(parse_qsl(raw_query, keep_blank_values=True))
+        method = request.method
+
+        if not key:
+            if method == "POST" and "delete" in query:
+                self.requests["delete_objects"] += 1
+                return self._delete_objects(await request.body())
+            if method == "GET" and query.get("list-type") == "2":
+                self.requests["list_objects"] += 1
+                return self._list_objects(
+                    query.get("prefix", ""), query.get("continuation-token", "")
+                )
+            return _error("NotImplemented", 501)
+
+        upload_id = query.get("uploadId")
+        if method == "POST" and "uploads" in query:
+            self.requests["create_multipart"] += 1
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = {"key": key, "parts": {}}
+            return _xml(
+                "<InitiateMultipartUploadResult>"
+                f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+            )
+        if upload_id is not None:
+            upload = self.uploads.get(upload_id)
+            if upload is None or upload["key"] != key:
+                return _error("NoSuchUpload", 404)
+            if method == "PUT":
+                self.requests["upload_part"] += 1
+                body = await request.body()
+                etag = hashlib.md5(body).hexdigest()
+                upload["parts"][int(query["partNumber"])] = (body, etag)
+                return Response(headers={"etag": f'"{etag}"'})
+            if method == "GET":
+                self.requests["list_parts"] += 1
+                return self._list_parts(upload, int(query.get("part-number-marker", 0)))
+            if method == "POST":
+                self.requests["complete_multipart"] += 1
+                return self._complete(upload_id, await request.body())
+            if method == "DELETE":
+                self.requests["abort_multipart"] += 1
+                del self.uploads[upload_id]
+                return Response(status_code=204)
+
+        if method == "PUT":
+            self.requests["put_object"] += 1
+            self.objects[key] = await request.body()
+            self.modified[key] = datetime.datetime.utcnow()
+            return Response(
+                headers={"etag": f'"{hashlib.md5(self.objects[key]).hexdigest()}"'}
+            )
+        if method in ("GET", "HEAD"):
+            self.requests["get_object" if method == "GET" else "head_object"] += 1
+            content = self.objects.get(key)
+            if content is None:
+                return _error("NoSuchKey", 404)
+            if method == "HEAD":
+                return Response(headers={"content-length": str(len(content))})
+            byte_range = request.headers.get("range")
+            disposition = query.get("response-content-disposition")
+            headers = {"content-disposition": disposition} if disposition else {}
+            if byte_range:
+                start, end = byte_range.split("=")[1].split("-")
+                return Response(
+                    content[int(start) : int(end) + 1], status_code=206, headers=headers
+                )
+            return Response(content, headers=headers)
+        if method == "DELETE":
+            self.requests["delete_object"] += 1
+            self.objects.pop(key, None)
+            return Response(status_code=204)
+        return _error("NotImplemented", 501)
+
+    def _delete_objects(self, body: bytes) -> Response:
+        root = ElementTree.fromstring(body)
+        for element in root.iter():
+            if _tag(element) == "Key":
+                self.objects.pop(element.text, None)
+        return _xml("<DeleteResult></DeleteResult>")
+
+    def _list_objects(self, prefix: str, token: str, max_keys: int = 1000) -> Response:
+        keys = sorted(k for k in self.objects if k.startswith(prefix) and k > token)
+        page = keys[:max_keys]
+        contents = ""
+        for k in page:
+            modified = self.modified.get(k, datetime.datetime(2000, 1, 1))
+            contents += (
+                f"<Contents><Key>{escape(k)}</Key><Size>{len(self.objects[k])}</Size>"
+                f"<LastModified>{modified:%Y-%m-%dT%H:%M:%S.000Z}</LastModified>"
+                "</Contents>"
+            )
+        truncated = len(keys) > max_keys
+        next_token = (
+            f"<NextContinuationToken>{escape(page[-1])}</NextContinuationToken>"
+            if truncated
+            else ""
+        )
+        return _xml(
+            f"<ListBucketResult><IsTruncated>{str(truncated).lower()}</IsTruncated>"
+            f"{next_token}{contents}</ListBucketResult>"
+        )
+
+    def _list_parts(self, upload: dict, marker: int, max_parts: int = 1000) -> Response:
+        numbers = sorted(n for n in upload["parts"] if n > marker)
+        page = numbers[:max_parts]
+        parts = "".join(
+            f"<Part><PartNumber>{n}</PartNumber><ETag>\"{upload['parts'][n][1]}\"</ETag>"
+            f"<Size>{len(upload['parts'][n][0])}</Size></Part>"
+            for n in page
+        )
+        truncated = "true" if len(numbers) > max_parts else "false"
+        next_marker = page[-1] if page else marker
+        return _xml(
+            f"<ListPartsResult><IsTruncated>{truncated}</IsTruncated>"
+            f"<NextPartNumberMarker>{next_marker}</NextPartNumberMarker>"
+            f"{parts}</ListPartsResult>"
+        )
+
+    def _complete(self, upload_id: str, body: bytes) -> Response:
+        upload = self.uploads[upload_id]
+        chunks = []
+        for part in ElementTree.fromstring(body):
+            fields = {_tag(child): child.text for child in part}
+            number = int(fields["PartNumber"])
+            stored = upload["parts"].get(number)
+            if stored is None or fields["ETag"].strip('"') != stored[1]:
+                return _xml("<Error><Code>InvalidPart</Code></Error>")
+            chunks.append(stored[0])
+        self.objects[upload["key"]] = b"".join(chunks)
+        self.modified[upload["key"]] = datetime.datetime.utcnow()
+        del self.uploads[upload_id]
+        return _xml(
+            "<CompleteMultipartUploadResult>"
+            f"<Key>{escape(upload['key'])}</Key></CompleteMultipartUploadResult>"
+        )
+
+
+def serve(app: FakeS3, port: int) -> "threading.Thread":
+    """Sirve ``app`` con uvicorn en un hilo (para medir conexiones reales)."""
+    import uvicorn
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, port=port, log_level="error", lifespan="off")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    thread.server = server
+    return thread
+
+
+def make_storage(
+    app: Optional[FakeS3] = None, endpoint: str = "http://s3.local", **options
+):
+    """``S3Storage`` contra ``app`` (en proceso) o contra ``endpoint``."""
+    import httpx
+
+    from app.services.storage_s3 import S3Storage
+
+    transport = httpx.ASGITransport(app) if app is not None else None
+    return S3Storage(
+        endpoint,
+        "finup",
+        ACCESS_KEY,
+        SECRET_KEY,
+        region=REGION,
+        transport=transport,
+        **options,
+    )
@@ -0,0 +1,123 @@
+# benchmarks/invoice_corpus.py
+"""
+Facturas PDF sintéticas para los benchmarks y pruebas de carga de facturas.
+
+Cada factura sale de un ``STYLE`` (formato de número y disposición del total)
+y conoce su total esperado, así que el corpus sirve también como conjunto
+etiquetado para medir la precisión de la extracción de montos.
+"""
+import random
+from typing import Optional
+
+import fitz
+
+
+def _us(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def _eu(value: float) -> str:
+    return f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _totals_us(page, total):
+    page.insert_text((72, 780), f"Subtotal ${_us(total / 1.16)}")
+    page.insert_text((72, 800), f"TOTAL ${_us(total)}")
+
+
+def _totals_eu(page, total):
+    page.insert_text((72, 760), f"Base imponible {_eu(total / 1.21)} €")
+    page.insert_text((72, 780), f"IVA 21% {_eu(total - total / 1.21)} €")
+    page.insert_text((72, 800), f"Total factura {_eu(total)} €")
+
+
+def _totals_cop(page, total):
+    page.insert_text((72, 780), f"IVA 19% COP {_eu(round(total * 0.19))[:-3]}")
+    page.insert_text((72, 800), f"Total a pagar: COP {_eu(total)[:-3]}")
+
+
+def _totals_columns(page, total):
+    # Etiqueta y monto en bloques distintos, alineados sólo por la posición
+    page.insert_text((72, 780), "Subtotal")
+    page.insert_text((72, 800), "Total")
+    page.insert_text((450, 780), f"USD {_us(total * 1.1)}")
+    page.insert_text((450, 800), f"USD {_us(total)}")
+    page.insert_text((300, 780), "Descuento 10%")
+
+
+def _totals_discount(page, total):
+    page.insert_text((72, 760), f"Subtotal ${_us(total * 1.25)}")
+    page.insert_text((72, 780), f"Descuento -${_us(total * 0.25)}")
+    page.insert_text((72, 800), f"Total ${_us(total)}")
+
+
+def _totals_unlabelled(page, total):
+    page.insert_text((72, 800), f"Pago recibido ${_us(total)}")
+
+
+STYLES = {
+    "us": _totals_us,
+    "eu": _totals_eu,
+    "cop": _totals_cop,
+    "columns": _totals_columns,
+    "discount": _totals_discount,
+    "unlabelled": _totals_unlabelled,
+}
+
+
+def make_invoice_pdf(
+    total: Optional[float],
+    pages: int = 1,
+    lines_per_page: int = 30,
+    style: str = "us",
+) -> bytes:
+    """PDF de ``pages`` páginas con partidas y el total en la última página."""
+    doc = fitz.open()
+    rng = random.Random(total)
+    for number in range(pages):
+        page = doc.new_page()
+        y = 72
+        page.insert_text((72, y), f"Factura - página {number + 1}")
+        for item in range(lines_per_page):
+            y += 20
+            if y > 740:
+                break
+            page.insert_text(
+                (72, y),
+                f"Servicio {item:03d}  cantidad {rng.randint(1, 9)}  ref {item}",
+            )
+        if number == pages - 1 and total is not None:
+            STYLES[style](page, total)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def make_scanned_pdf(content: bytes, dpi: int = 150) -> bytes:
+    """Copia de ``content`` con cada página como imagen (sin capa de texto)."""
+    scanned = fitz.open()
+    with fitz.open(stream=content, filetype="pdf") as doc:
+        for page in doc:
+            image = scanned.new_page(width=page.rect.width, height=page.rect.height)
+            pixmap = page.get_pixmap(dpi=dpi, colorspace="gray")
+            image.insert_image(image.rect, stream=pixmap.tobytes("png"))
+    content = scanned.tobytes(garbage=3, deflate=True)
+    scanned.close()
+    return content
+
+
+def make_corpus(size: int, max_pages: int = 3, seed: int = 7, styles=("us",)):
+    """``[(nombre, contenido, total)]`` reproducible."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        style = styles[i % len(styles)]
+        total = round(rng.uniform(150, 250000), 0 if style == "cop" else 2)
+        content = make_invoice_pdf(total, pages=rng.randint(1, max_pages), style=style)
+        corpus.append((f"invoice-{i:04d}-{style}.pdf", content, total))
+    return corpus
+
+
+def make_labelled_corpus(size: int = len(STYLES) * 10, max_pages: int = 2):
+    """Corpus con todos los ``STYLES`` para medir la precisión de extracción."""
+    return make_corpus(size, max_pages=max_pages, seed=11, styles=tuple(STYLES))
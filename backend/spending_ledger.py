@@ -0,0 +1,45 @@
+# spending_ledger.py
+"""
+Mantenimiento del ledger de gasto por cuatrimestre (tabla ``evc_q_spending``).
+
+Uso (desde ``backend/``)::
+
+    python spending_ledger.py rebuild   # recalcula todo el ledger
+    python spending_ledger.py verify    # compara ledger vs. evc_financial
+"""
+import argparse
+import sys
+
+from app.database import SessionLocal
+from app.services.spending import rebuild_ledger, verify_ledger
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ledger de gasto por EVC_Q")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            rows = rebuild_ledger(db)
+            print(f"Ledger reconstruido: {rows} cuatrimestres.")
+            return 0
+
+        mismatches = verify_ledger(db)
+        for mismatch in mismatches:
+            print(
+                f"EVC_Q {mismatch['evc_q_id']}: ledger (manual, proveedores)="
+                f"{mismatch['stored']} esperado={mismatch['expected']}"
+            )
+        if mismatches:
+            print(f"{len(mismatches)} cuatrimestres con diferencias.")
+            return 1
+        print("El ledger coincide con evc_financial.")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Base de datos en memoria y datos de prueba compartidos por los tests."""
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  registra todos los modelos
+from app.database import Base
+from app.models.evc import EVC
+from app.models.evc_financial import EVC_Financial
+from app.models.evc_q import EVC_Q
+from app.models.provider import Provider
+from app.services import invoice_jobs, search
+from app.services.invoice import parse_invoice
+
+
+def make_db():
+    """Sesión sobre un SQLite en memoria con todas las tablas."""
+    # La escritura corre en el threadpool: la conexión se comparte entre hilos
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def seed(db):
+    """Un EVC con tres cuatrimestres, un proveedor y tres gastos."""
+    db.add(EVC(id=1, name="EVC 1", description=""))
+    db.add_all(
+        [
+            EVC_Q(id=1, evc_id=1, year=2025, q=1, allocated_budget=1000),
+            EVC_Q(id=2, evc_id=1, year=2025, q=2, allocated_budget=1000),
+            EVC_Q(id=3, evc_id=1, year=2025, q=3, allocated_budget=0),
+        ]
+    )
+    db.add(
+        Provider(
+            id=1,
+            name="p",
+            role="dev",
+            company="c",
+            country="CO",
+            cost_usd=300,
+            category="IT",
+            line="l",
+            email="p@finup.com",
+        )
+    )
+    db.add_all(
+        [
+            EVC_Financial(evc_q_id=1, provider_id=1),
+            EVC_Financial(evc_q_id=1, value_usd=550),
+            EVC_Financial(evc_q_id=3, value_usd=10),
+        ]
+    )
+    db.commit()
+
+
+class InlinePool:
+    """``invoice_pool`` que lee las facturas en el mismo proceso."""
+
+    async def parse(self, filename, content):
+        return parse_invoice(filename, content)
+
+
+class InlineRunner:
+    def run(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def index_in_session(monkeypatch, db):
+    """La indexación en segundo plano usa ``db`` y extrae el texto sin el pool."""
+
+    @contextmanager
+    def test_session(session=None):
+        yield db
+
+    monkeypatch.setattr(search, "session_scope", test_session)
+    monkeypatch.setattr(invoice_jobs, "invoice_pool", InlineRunner())
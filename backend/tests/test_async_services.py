@@ -0,0 +1,71 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  registra todos los modelos
+from app.core.pagination import default_page
+from app.database import Base, async_database_url
+from app.services import evc_qs, evcs, spending
+from tests.helpers import seed
+
+
+def run_async(tmp_path, scenario):
+    """Siembra la base con la sesión síncrona y ejecuta ``scenario(db)`` en async."""
+    path = tmp_path / "async.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    seed(sessionmaker(bind=engine)())
+
+    async def run():
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+            result = await scenario(db)
+        await async_engine.dispose()
+        return result
+
+    return asyncio.run(run())
+
+
+def test_async_database_url_swaps_driver():
+    assert (
+        async_database_url("postgresql+psycopg2://u:p@db:5432/finup")
+        == "postgresql+asyncpg://u:p@db:5432/finup"
+    )
+    assert (
+        async_database_url("sqlite:///./finup.db") == "sqlite+aiosqlite:///./finup.db"
+    )
+
+
+def test_evcs_page_includes_quarter_spendings(tmp_path):
+    async def scenario(db):
+        return await evcs.get_evcs_async(db, default_page())
+
+    page = run_async(tmp_path, scenario)
+
+    assert page.total == 1
+    # Fuera de la sesión: evc_qs ya debe estar cargado
+    quarters = {q.id: q for q in page.items[0].evc_qs}
+    assert quarters[1].total_spendings == 850.0
+    assert quarters[2].budget_message == "Presupuesto suficiente"
+
+
+def test_evc_qs_pages_match_and_load_providers(tmp_path):
+    async def scenario(db):
+        first = await evc_qs.get_evc_qs_async(db, default_page(limit=2))
+        rest = await evc_qs.get_evc_qs_async(
+            db, default_page(limit=2, cursor=first.next_cursor)
+        )
+        status = await spending.get_quarter_status_async(db, 1)
+        return first, rest, status
+
+    first, rest, status = run_async(tmp_path, scenario)
+
+    assert [q.id for q in first.items + rest.items] == [1, 2, 3]
+    assert first.total == 3 and rest.next_cursor is None
+    # Fuera de la sesión: financials y sus proveedores ya deben estar cargados
+    financials = first.items[0].evc_financials
+    providers = [f.provider for f in financials if f.provider_id]
+    assert [p.id for p in providers] == [1]
+    assert status["total_spendings"] == 850.0 and status["percentage"] == 85.0
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.core.config import settings
+from app.core.db_pool import MeteredQueuePool, engine_options, pool_status
+from app.services import rule_evaluator, rule_queue
+
+
+def test_engine_options_follow_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    sync = engine_options("postgresql+psycopg2://u:p@db/finup")
+    assert sync["poolclass"] is MeteredQueuePool
+    assert sync["pool_size"] == 7
+    assert sync["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+    async_ = engine_options("postgresql+asyncpg://u:p@db/finup", is_async=True)
+    assert async_["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+    assert engine_options("sqlite:///./finup.db") == {}
+
+
+def test_pool_metrics_count_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MeteredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+    with engine.connect():
+        pass
+
+    status = pool_status(engine)
+    assert status["size"] == 1 and status["checked_out"] == 0
+    assert status["checkouts"] == 2
+    assert status["checkout_timeouts"] == 1
+
+
+def test_inline_evaluation_reuses_request_session(monkeypatch):
+    sessions = []
+    monkeypatch.setattr(rule_queue, "RULES_ASYNC", False)
+    monkeypatch.setattr(
+        rule_evaluator,
+        "evaluate_rules",
+        lambda db, changed_table, changed_id: sessions.append(db),
+    )
+
+    request_db = object()
+    rule_queue.enqueue_rule_evaluation("evc_q", 1, request_db)
+
+    assert sessions == [request_db]
@@ -0,0 +1,199 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.file_response import RangeNotSatisfiable, parse_range
+from app.database import get_db
+from app.models.document import Document
+from app.routes import storage as storage_routes
+from app.routes.documents import router as documents_router
+from app.routes.storage import router as storage_router
+from app.services import storage as storage_service
+from app.services.storage import LocalStorage
+from benchmarks.fake_s3 import FakeS3, make_storage
+from tests.helpers import make_db
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+def make_client(monkeypatch, storage, content=CONTENT):
+    monkeypatch.setattr(storage_service, "storage", storage)
+    db = make_db()
+    key = "documents/contrato.pdf"
+    asyncio.run(storage.upload_stream(key, _chunks(content)))
+    db.add(
+        Document(
+            file_name="contrato año.pdf",
+            file_url=storage.public_url(key),
+            file_type="pdf",
+            storage_key=key,
+        )
+    )
+    db.add(Document(file_name="externo.pdf", file_url="https://cdn.example/x.pdf"))
+    db.commit()
+    app = FastAPI()
+    app.include_router(documents_router, prefix="/documents")
+    app.include_router(storage_router, prefix="/storage")
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+async def _chunks(content: bytes):
+    yield content
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    assert parse_range("bytes=9-1", 100) is None
+    for value in ("bytes=100-", "bytes=-0"):
+        try:
+            parse_range(value, 100)
+        except RangeNotSatisfiable:
+            continue
+        raise AssertionError(value)
+
+
+def test_download_streams_whole_file_with_validators(monkeypatch, tmp_path):
+    client = make_client(monkeypatch, LocalStorage(tmp_path))
+
+    response = client.get("/documents/1/download")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-length"] == str(len(CONTENT))
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert (
+        "filename*=utf-8''contrato%20a%C3%B1o.pdf"
+        in response.headers["content-disposition"]
+    )
+
+    head = client.head("/documents/1/download")
+    assert head.status_code == 200 and head.content == b""
+    assert head.headers["etag"] == response.headers["etag"]
+
+    assert client.get("/documents/99/download").status_code == 404
+    external = client.get("/documents/2/download", follow_redirects=False)
+    assert external.status_code == 307
+    assert external.headers["location"] == "https://cdn.example/x.pdf"
+
+
+def test_range_and_conditional_requests(monkeypatch, tmp_path):
+    client = make_client(monkeypatch, LocalStorage(tmp_path))
+    full = client.get("/documents/1/download")
+    etag = full.headers["etag"]
+
+    part = client.get("/documents/1/download", headers={"range": "bytes=100-199"})
+    assert part.status_code == 206
+    assert part.content == CONTENT[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+    tail = client.get("/documents/1/download", headers={"range": "bytes=-16"})
+    assert tail.content == CONTENT[-16:]
+
+    outside = client.get("/documents/1/download", headers={"range": "bytes=99999-"})
+    assert outside.status_code == 416
+    assert outside.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    cached = client.get("/documents/1/download", headers={"if-none-match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+    since = client.get(
+        "/documents/1/download",
+        headers={"if-modified-since": full.headers["last-modified"]},
+    )
+    assert since.status_code == 304
+
+    # El archivo cambió: If-Range no coincide y se envía completo
+    stale = client.get(
+        "/documents/1/download",
+        headers={"range": "bytes=0-9", "if-range": '"otro"'},
+    )
+    assert stale.status_code == 200 and stale.content == CONTENT
+    fresh = client.get(
+        "/documents/1/download", headers={"range": "bytes=0-9", "if-range": etag}
+    )
+    assert fresh.status_code == 206 and fresh.content == CONTENT[:10]
+
+
+def test_signed_urls(monkeypatch, tmp_path):
+    client = make_client(monkeypatch, LocalStorage(tmp_path))
+    body = client.get("/documents/1/download-url", params={"expires_in": 60}).json()
+    assert body["expires_in"] == 60
+    url = urlsplit(body["url"])
+
+    response = client.get(f"{url.path}?{url.query}")
+    assert response.status_code == 200 and response.content == CONTENT
+    assert "contrato%20a%C3%B1o.pdf" in response.headers["content-disposition"]
+
+    tampered = url.query.replace("expires=", "expires=1")
+    assert client.get(f"{url.path}?{tampered}").status_code == 403
+    other = client.get(f"/storage/documents/otro.pdf?{url.query}")
+    assert other.status_code == 403
+
+    expired = storage_service.storage.signed_url("documents/contrato.pdf", -1)
+    expired = urlsplit(expired)
+    assert client.get(f"{expired.path}?{expired.query}").status_code == 403
+
+    assert client.get("/storage/documents/contrato.pdf").status_code == 200
+    monkeypatch.setattr(storage_routes, "STORAGE_REQUIRE_SIGNED_URLS", True)
+    assert client.get("/storage/documents/contrato.pdf").status_code == 403
+    assert client.get("/storage/../secret").status_code == 404
+    assert client.get("/documents/2/download-url").json()["url"] == (
+        "https://cdn.example/x.pdf"
+    )
+
+
+def test_accel_redirect_leaves_the_file_to_nginx(monkeypatch, tmp_path):
+    client = make_client(monkeypatch, LocalStorage(tmp_path))
+    monkeypatch.setattr(storage_routes, "STORAGE_ACCEL_REDIRECT", "/_storage/")
+    response = client.get("/documents/1/download")
+    assert response.status_code == 200 and response.content == b""
+    assert response.headers["x-accel-redirect"] == "/_storage/documents/contrato.pdf"
+
+
+def test_s3_download_redirects_to_presigned_url(monkeypatch):
+    s3 = FakeS3()
+    client = make_client(monkeypatch, make_storage(s3))
+    response = client.get("/documents/1/download", follow_redirects=False)
+    assert response.status_code == 307
+    location = response.headers["location"]
+    assert "X-Amz-Signature=" in location
+
+    async def fetch(url, **headers):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(s3)) as s3_client:
+            return await s3_client.get(url, headers=headers)
+
+    direct = asyncio.run(fetch(location))
+    assert direct.status_code == 200 and direct.content == CONTENT
+    assert "contrato%20a%C3%B1o.pdf" in direct.headers["content-disposition"]
+    ranged = asyncio.run(fetch(location, range="bytes=0-9"))
+    assert ranged.status_code == 206 and ranged.content == CONTENT[:10]
+    forged = location.replace("X-Amz-Expires=300", "X-Amz-Expires=3000")
+    assert asyncio.run(fetch(forged)).status_code == 403
+
+    expired = make_storage(s3).signed_url("documents/contrato.pdf", 1)
+    time.sleep(1.1)
+    assert asyncio.run(fetch(expired)).status_code == 403
+
+
+def test_keys_cannot_reach_uploads_in_progress(monkeypatch, tmp_path):
+    storage = LocalStorage(tmp_path)
+    client = make_client(monkeypatch, storage)
+    upload_id = asyncio.run(storage.create_multipart_upload("documents/x.pdf"))
+    asyncio.run(storage.upload_part("documents/x.pdf", upload_id, 1, _chunks(b"x")))
+
+    for key in (
+        f".uploads/{upload_id}/00001",
+        f"./.uploads/{upload_id}/00001",
+        f"documents/%2e%2e/.uploads/{upload_id}/00001",
+    ):
+        assert client.get(f"/storage/{key}").status_code == 404, key
+    assert client.get("/storage/documents/contrato.pdf").status_code == 200
@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import tracemalloc
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.routes.documents import router
+from app.services import storage as storage_service
+from app.services.storage import LocalStorage
+from tests.helpers import index_in_session, make_db
+
+
+def make_client(monkeypatch, storage):
+    monkeypatch.setattr(storage_service, "storage", storage)
+    db = make_db()
+    index_in_session(monkeypatch, db)
+    app = FastAPI()
+    app.include_router(router, prefix="/documents")
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app), storage
+
+
+def test_upload_streams_to_storage_with_bounded_memory(tmp_path):
+    storage = LocalStorage(tmp_path)
+    chunk = b"x" * (256 * 1024)
+    chunks = 80  # 20 MB
+
+    async def source():
+        for _ in range(chunks):
+            yield chunk
+
+    tracemalloc.start()
+    result = asyncio.run(storage.upload_stream("documents/big.bin", source()))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert result["size"] == len(chunk) * chunks
+    assert result["sha256"] == hashlib.sha256(chunk * chunks).hexdigest()
+    assert (tmp_path / "documents/big.bin").stat().st_size == len(chunk) * chunks
+    assert peak < 4 * len(chunk)
+    assert not list((tmp_path / "documents").glob("*.part"))
+
+
+def test_single_upload_records_size_and_checksum(monkeypatch, tmp_path):
+    client, _ = make_client(monkeypatch, LocalStorage(tmp_path))
+    content = b"%PDF-1.4 contrato" * 1000
+
+    response = client.post(
+        "/documents/upload",
+        files={"file": ("contrato.pdf", content, "application/pdf")},
+    )
+    assert response.status_code == 201
+    body = response.json()
+    assert body["file_size"] == len(content)
+    assert body["sha256"] == hashlib.sha256(content).hexdigest()
+    assert body["file_type"] == "pdf"
+
+
+def test_resumable_upload_accepts_parts_in_any_order(monkeypatch, tmp_path):
+    client, storage = make_client(monkeypatch, LocalStorage(tmp_path))
+    parts = [b"a" * 1000, b"b" * 1000, b"c" * 10]
+
+    upload = client.post("/documents/uploads", json={"file_name": "informe.pdf"}).json()
+    url = f"/documents/uploads/{upload['upload_id']}"
+    client.put(f"{url}/parts/3", content=parts[2])
+    client.put(f"{url}/parts/1", content=b"interrumpida")
+    # Reanudación: la parte 1 se vuelve a enviar completa
+    client.put(f"{url}/parts/1", content=parts[0])
+    assert [p["part_number"] for p in client.get(url).json()["parts"]] == [1, 3]
+    client.put(f"{url}/parts/2", content=parts[1])
+
+    response = client.post(f"{url}/complete")
+    assert response.status_code == 201
+    body = response.json()
+    content = b"".join(parts)
+    assert body["file_name"] == "informe.pdf" and body["file_size"] == len(content)
+    assert body["sha256"] == hashlib.sha256(content).hexdigest()
+    assert (tmp_path / body["storage_key"]).read_bytes() == content
+    assert body["file_url"] == storage.public_url(body["storage_key"])
+
+    assert client.get(url).status_code == 404
+    assert client.put(f"{url}/parts/1", content=b"x").status_code == 404
+
+
+def test_complete_rejects_changed_parts_and_abort_discards(monkeypatch, tmp_path):
+    client, _ = make_client(monkeypatch, LocalStorage(tmp_path))
+    upload = client.post("/documents/uploads", json={"file_name": "a.pdf"}).json()
+    url = f"/documents/uploads/{upload['upload_id']}"
+    etag = client.put(f"{url}/parts/1", content=b"uno").json()["etag"]
+
+    bad = {"parts": [{"part_number": 1, "etag": "otro"}]}
+    assert client.post(f"{url}/complete", json=bad).status_code == 400
+    good = {"parts": [{"part_number": 1, "etag": etag}]}
+    assert client.delete(url).status_code == 204
+    assert client.post(f"{url}/complete", json=good).status_code == 404
@@ -0,0 +1,60 @@
+import fitz
+import pytest
+
+from app.services.invoice import parse_invoice
+from app.services.invoice_amounts import extract_total, parse_number, rows_from_words
+from benchmarks.invoice_corpus import STYLES, make_labelled_corpus
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("1,234.56", 1234.56),
+        ("1.234,56", 1234.56),
+        ("1.234.567", 1234567.0),
+        ("1,234", 1234.0),
+        ("12,5", 12.5),
+        ("1234.50", 1234.5),
+        ("1 234,56", 1234.56),
+    ],
+)
+def test_parse_number_detects_the_decimal_separator(raw, expected):
+    assert parse_number(raw) == expected
+
+
+def test_labelled_total_wins_over_larger_amounts():
+    total = extract_total(
+        ["Subtotal $10,000.00", "Descuento -$2,000.00", "TOTAL $8,000.00"]
+    )
+    assert (total.value, total.currency, total.method) == (8000.0, "$", "label")
+
+    total = extract_total(["IVA 21% 210,00 €", "Total factura 1.210,00 €"])
+    assert (total.value, total.currency) == (1210.0, "EUR")
+
+
+def test_unlabelled_invoices_fall_back_to_the_largest_amount():
+    total = extract_total(["Fecha 18/10/2026", "IVA 16% 160.00", "Pago $1,160.00"])
+    assert (total.value, total.method) == (1160.0, "max")
+    assert extract_total(["Servicio 001 cantidad 3"]) is None
+
+
+def test_rows_join_words_on_the_same_baseline():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 700), "Total")
+    page.insert_text((400, 700), "USD 1,500.00")
+    page.insert_text((72, 720), "Gracias")
+
+    rows = rows_from_words(page.get_text("words"))
+
+    assert rows == ["Total USD 1,500.00", "Gracias"]
+
+
+def test_labelled_corpus_is_fully_recognized():
+    corpus = make_labelled_corpus()
+    misses = [
+        name
+        for name, content, total in corpus
+        if parse_invoice(name, content)["value"] != total
+    ]
+    assert len(corpus) == len(STYLES) * 10 and misses == []
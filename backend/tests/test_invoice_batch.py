@@ -0,0 +1,89 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+from app.services import evc_financial, invoice_batch
+from app.services.spending import get_spendings_by_evc_qs, verify_ledger
+from benchmarks.invoice_corpus import make_invoice_pdf
+from tests.helpers import InlinePool, make_db, seed
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_batch_inserts_all_invoices_and_evaluates_each_quarter_once(monkeypatch):
+    evaluated = []
+    monkeypatch.setattr(invoice_batch, "invoice_pool", InlinePool())
+    monkeypatch.setattr(
+        evc_financial,
+        "enqueue_rule_evaluation",
+        lambda table, row_id, db=None: evaluated.append((table, row_id)),
+    )
+    db = make_db()
+    seed(db)
+
+    archive = make_zip(
+        {
+            "marzo/a.pdf": make_invoice_pdf(1000.0),
+            "marzo/b.pdf": make_invoice_pdf(2000.0),
+            "marzo/sin-monto.pdf": make_invoice_pdf(None),
+            "notas.txt": b"ignorado",
+        }
+    )
+    files = (
+        invoice_batch.expand_upload("lote.zip", archive, 1)
+        + invoice_batch.expand_upload("c.pdf", make_invoice_pdf(500.0), 2)
+        + invoice_batch.expand_upload("d.pdf", make_invoice_pdf(700.0), 99)
+        + invoice_batch.expand_upload("rota.zip", b"no es zip", 1)
+    )
+
+    report = asyncio.run(invoice_batch.ingest_invoices(db, files))
+
+    statuses = {row["filename"]: row["status"] for row in report["files"]}
+    assert statuses == {
+        "lote.zip/marzo/a.pdf": "created",
+        "lote.zip/marzo/b.pdf": "created",
+        "lote.zip/marzo/sin-monto.pdf": "no_amount",
+        "c.pdf": "created",
+        "d.pdf": "error",
+        "rota.zip": "error",
+    }
+    assert report["created"] == 3 and report["failed"] == 3
+    assert sorted(evaluated) == [("evc_q", 1), ("evc_q", 2)]
+    totals = get_spendings_by_evc_qs(db, [1, 2])
+    assert totals[1] == 850.0 + 3000.0 and totals[2] == 500.0
+    # El cuatrimestre 3 no se tocó (el seed no pasa por el ledger)
+    assert [d for d in verify_ledger(db) if d["evc_q_id"] != 3] == []
+
+
+def test_zip_is_rejected_before_reading_members(monkeypatch):
+    read = []
+    monkeypatch.setattr(
+        zipfile.ZipFile, "read", lambda self, info, pwd=None: read.append(info)
+    )
+    # Muy comprimible: poco en el request, mucho descomprimido
+    bomb = make_zip({f"f{n}.pdf": b"\0" * 1000 for n in range(5)})
+
+    with pytest.raises(invoice_batch.BatchTooLarge):
+        invoice_batch.expand_upload(
+            "bomba.zip", bomb, 1, invoice_batch.BatchBudget(files=4)
+        )
+    with pytest.raises(invoice_batch.BatchTooLarge):
+        invoice_batch.expand_upload(
+            "bomba.zip", bomb, 1, invoice_batch.BatchBudget(size=4999)
+        )
+    assert read == []
+
+    # El presupuesto se comparte entre los archivos del lote
+    budget = invoice_batch.BatchBudget(files=6)
+    monkeypatch.undo()
+    assert len(invoice_batch.expand_upload("a.zip", bomb, 1, budget)) == 5
+    with pytest.raises(invoice_batch.BatchTooLarge):
+        invoice_batch.expand_upload("b.zip", bomb, 1, budget)
@@ -0,0 +1,114 @@
+import asyncio
+from contextlib import contextmanager
+
+from app.models.invoice_parse import InvoiceParse
+from app.services import evc_financial, invoice_batch, invoice_cache, invoice_jobs
+from app.services.invoice import parse_invoice
+from benchmarks.invoice_corpus import make_invoice_pdf
+from tests.helpers import make_db, seed
+
+
+class CountingPool:
+    def __init__(self):
+        self.calls = 0
+
+    async def parse(self, filename, content):
+        self.calls += 1
+        return parse_invoice(filename, content)
+
+
+def prepare(monkeypatch):
+    pool = CountingPool()
+    monkeypatch.setattr(invoice_batch, "invoice_pool", pool)
+    monkeypatch.setattr(invoice_jobs, "invoice_pool", pool)
+    monkeypatch.setattr(
+        evc_financial, "enqueue_rule_evaluation", lambda table, row_id, db=None: None
+    )
+    invoice_cache.clear_parse_cache()
+    db = make_db()
+    seed(db)
+    return pool, db
+
+
+def test_cached_parse_skips_the_pool_and_duplicates_are_flagged(monkeypatch):
+    pool, db = prepare(monkeypatch)
+    content = make_invoice_pdf(1500.0)
+
+    first = asyncio.run(
+        invoice_batch.ingest_invoices(
+            db,
+            invoice_batch.expand_upload("a.pdf", content, 1)
+            + invoice_batch.expand_upload("copia.pdf", content, 1)
+            + invoice_batch.expand_upload("otro-q.pdf", content, 2),
+        )
+    )
+    assert [row["status"] for row in first["files"]] == [
+        "created",
+        "duplicate",
+        "created",
+    ]
+    # El repetido apunta al registro de su gemelo y no cuenta como fallido
+    ids = [row["evc_financial_id"] for row in first["files"]]
+    assert ids[1] == ids[0] is not None
+    assert (first["created"], first["duplicates"], first["failed"]) == (2, 1, 0)
+    # El mismo contenido se lee una sola vez
+    assert pool.calls == 1
+    assert db.get(InvoiceParse, invoice_cache.content_hash(content)).value == 1500.0
+
+    # Otra carga del mismo PDF: sin leerlo y marcada como duplicada
+    invoice_cache.clear_parse_cache()
+    again = asyncio.run(
+        invoice_batch.ingest_invoices(
+            db, invoice_batch.expand_upload("a.pdf", content, 1)
+        )
+    )
+    row = again["files"][0]
+    assert row["status"] == "duplicate" and again["duplicates"] == 1
+    assert row["evc_financial_id"] == first["files"][0]["evc_financial_id"]
+    assert pool.calls == 1
+
+
+def test_job_uses_the_cache_and_stops_on_duplicates(monkeypatch):
+    pool, db = prepare(monkeypatch)
+
+    @contextmanager
+    def test_session():
+        yield db
+
+    monkeypatch.setattr(invoice_jobs, "session_scope", test_session)
+    content = make_invoice_pdf(800.0)
+    sha256 = invoice_cache.content_hash(content)
+    invoice_cache.store_parse(db, sha256, len(content), parse_invoice("a.pdf", content))
+
+    job = invoice_jobs.create_job(2, "a.pdf", len(content))
+    asyncio.run(invoice_jobs.run_job(job, content))
+    assert job.status == "done" and job.cached and pool.calls == 0
+
+    again = invoice_jobs.create_job(2, "a.pdf", len(content))
+    asyncio.run(invoice_jobs.run_job(again, content))
+    assert again.status == "duplicate"
+    assert again.evc_financial_id == job.evc_financial_id
+    assert invoice_cache.find_duplicates(db, [(2, sha256), (1, sha256)]) == {
+        (2, sha256): job.evc_financial_id
+    }
+
+    forced = invoice_jobs.create_job(2, "a.pdf", len(content))
+    asyncio.run(invoice_jobs.run_job(forced, content, allow_duplicate=True))
+    assert forced.status == "done" and forced.evc_financial_id != job.evc_financial_id
+
+
+def test_results_from_another_parser_version_are_ignored(monkeypatch):
+    _, db = prepare(monkeypatch)
+    content = make_invoice_pdf(900.0)
+    sha256 = invoice_cache.content_hash(content)
+    db.add(
+        InvoiceParse(
+            sha256=sha256, parser_version=0, size=len(content), pages=1, value=1.0
+        )
+    )
+    db.commit()
+
+    assert invoice_cache.get_cached_parse(db, sha256) is None
+    invoice_cache.store_parse(db, sha256, len(content), parse_invoice("a.pdf", content))
+    invoice_cache.clear_parse_cache()
+    assert invoice_cache.get_cached_parse(db, sha256)["value"] == 900.0
@@ -0,0 +1,61 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.services import invoice_jobs
+from app.services.invoice import InvoiceParsingError, parse_invoice
+from benchmarks.invoice_corpus import make_invoice_pdf
+
+
+def test_parse_invoice_reads_every_page():
+    content = make_invoice_pdf(12345.67, pages=3)
+
+    result = parse_invoice("factura.pdf", content)
+    assert result["pages"] == 3 and result["value"] == 12345.67
+    with pytest.raises(InvoiceParsingError):
+        parse_invoice("rota.pdf", b"not a pdf")
+
+
+def test_read_upload_stops_at_the_size_limit():
+    def upload(size):
+        return UploadFile(file=io.BytesIO(b"x" * size), filename="factura.pdf")
+
+    assert len(asyncio.run(invoice_jobs.read_upload(upload(100), 100))) == 100
+    with pytest.raises(invoice_jobs.UploadTooLarge):
+        asyncio.run(invoice_jobs.read_upload(upload(101), 100))
+
+
+def test_job_parses_in_the_pool_and_saves_the_financial(monkeypatch):
+    saved = []
+    monkeypatch.setattr(
+        invoice_jobs, "invoice_pool", invoice_jobs.InvoiceParsingPool(1)
+    )
+    monkeypatch.setattr(invoice_jobs, "_lookup_in_new_session", lambda *args: None)
+    monkeypatch.setattr(
+        invoice_jobs,
+        "_record_in_new_session",
+        lambda evc_q_id, sha256, size, result, cached, file_name: (
+            saved.append((evc_q_id, result["value"])) or 42
+            if result["value"] is not None
+            else None
+        ),
+    )
+    content = make_invoice_pdf(2500.0, pages=2)
+    job = invoice_jobs.create_job(7, "factura.pdf", len(content))
+    empty = invoice_jobs.create_job(7, "vacia.pdf", 0)
+
+    async def run():
+        await invoice_jobs.run_job(job, content)
+        await invoice_jobs.run_job(empty, make_invoice_pdf(None))
+
+    try:
+        asyncio.run(run())
+    finally:
+        invoice_jobs.invoice_pool.shutdown()
+
+    assert invoice_jobs.get_job(job.id) is job
+    assert job.status == "done" and job.pages == 2
+    assert job.evc_financial_id == 42 and saved == [(7, 2500.0)]
+    assert empty.status == "failed" and "montos" in empty.error
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.core.optional_deps import MissingDependency
+from app.models.invoice_parse import InvoiceParse
+from app.services import invoice_cache, invoice_ocr
+from app.services.invoice import parse_invoice
+from benchmarks.invoice_corpus import make_invoice_pdf, make_scanned_pdf
+from tests.helpers import make_db
+
+
+class FakeOCRPool:
+    """Devuelve ``texts`` en orden; una excepción hace fallar esa página."""
+
+    def __init__(self, *texts):
+        self.texts = list(texts)
+        self.images = []
+
+    async def read(self, image):
+        self.images.append(image)
+        text = self.texts.pop(0)
+        if isinstance(text, Exception):
+            raise text
+        return text
+
+
+def test_only_pages_without_text_are_rasterized():
+    scanned = parse_invoice("a.pdf", make_scanned_pdf(make_invoice_pdf(900.0, pages=2)))
+    assert scanned["value"] is None
+    assert [number for number, _ in scanned["scans"]] == [0, 1]
+    assert scanned["scans"][0][1].startswith(b"\x89PNG")
+
+    assert parse_invoice("b.pdf", make_invoice_pdf(900.0))["scans"] == []
+    assert parse_invoice("foto.JPG", b"jpeg")["scans"] == [(0, b"jpeg")]
+
+
+def test_ocr_text_fills_the_scanned_pages(monkeypatch):
+    texts = ["Servicio 001", "Subtotal $1,000.00\nTOTAL $1,160.00"]
+    pool = FakeOCRPool(*texts)
+    monkeypatch.setattr(invoice_ocr, "ocr_pool", pool)
+    result = parse_invoice("a.pdf", make_scanned_pdf(make_invoice_pdf(1.0, pages=2)))
+
+    result = asyncio.run(invoice_ocr.complete_scans(result))
+    assert result["value"] == 1160.0 and result["method"] == "label"
+    assert result["text"].split("\f") == texts and len(pool.images) == 2
+    assert result["ocr_pages"] == 2 and result["ocr_errors"] == 0
+    assert "scans" not in result
+
+
+def test_failed_pages_are_not_cached(monkeypatch):
+    monkeypatch.setattr(
+        invoice_ocr,
+        "ocr_pool",
+        FakeOCRPool(RuntimeError("Tesseract process timeout"), "Total $500.00"),
+    )
+    invoice_cache.clear_parse_cache()
+    db = make_db()
+    content = make_scanned_pdf(make_invoice_pdf(500.0, pages=2))
+
+    result = asyncio.run(invoice_ocr.complete_scans(parse_invoice("a.pdf", content)))
+    assert result["value"] == 500.0 and result["ocr_errors"] == 1
+    invoice_cache.store_parse(
+        db, invoice_cache.content_hash(content), len(content), result
+    )
+    assert db.query(InvoiceParse).count() == 0
+
+
+def test_missing_tesseract_is_reported_when_nothing_was_read(monkeypatch):
+    monkeypatch.setattr(
+        invoice_ocr, "ocr_pool", FakeOCRPool(MissingDependency("sin tesseract"))
+    )
+    with pytest.raises(MissingDependency):
+        asyncio.run(invoice_ocr.complete_scans(parse_invoice("foto.png", b"png")))
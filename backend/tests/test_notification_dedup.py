@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+from app.models.notification import Notification
+from app.models.notification_rule import NotificationRule
+from app.models.provider import Provider
+from app.schemas.provider import ProviderCreate
+from app.services import notification_dedup
+from app.services.notification_dedup import (
+    filter_new_notifications,
+    notification_fingerprint,
+    parse_legacy_message,
+    percentage_bucket,
+    was_quarter_recently_notified,
+)
+from app.services.provider_service import (
+    bulk_create_providers,
+    create_provider,
+    evaluate_notification_rules_batch,
+    update_provider,
+)
+from app.services.rule_engine import invalidate_rule_index
+from tests import helpers
+
+
+def make_db():
+    notification_dedup._fingerprint_cache.clear()
+    notification_dedup._quarter_cache.clear()
+    return helpers.make_db()
+
+
+def test_recent_fingerprints_are_filtered():
+    db = make_db()
+    recent = notification_fingerprint(1, 5, 80)
+    old = notification_fingerprint(2, 5, 80)
+    db.add_all(
+        [
+            Notification(message="a", fingerprint=recent, evc_q_id=5),
+            Notification(
+                message="b",
+                fingerprint=old,
+                created_at=datetime.utcnow() - timedelta(hours=1),
+            ),
+        ]
+    )
+    db.commit()
+
+    new = filter_new_notifications(
+        db,
+        [
+            {"message": "a", "fingerprint": recent},
+            {"message": "b", "fingerprint": old},
+            {"message": "b again", "fingerprint": old},
+            {"message": "no keys"},
+        ],
+    )
+
+    assert [n["message"] for n in new] == ["b", "no keys"]
+    assert was_quarter_recently_notified(db, 5)
+    assert not was_quarter_recently_notified(db, 6)
+
+
+def test_fingerprint_depends_on_structured_keys():
+    assert notification_fingerprint(1, 5, 80) == notification_fingerprint(1, 5, 80)
+    assert notification_fingerprint(1, 5, 80) != notification_fingerprint(1, 5, 90)
+    assert notification_fingerprint(1, None, None, subject="provider:1") != (
+        notification_fingerprint(1, None, None, subject="provider:2")
+    )
+    assert percentage_bucket(89.9) == 80
+
+
+def test_parse_legacy_messages():
+    assert parse_legacy_message(
+        "El EVC 'A' ha gastado $5.00 del presupuesto asignado en el cuatrimestre (ID: 9)."
+    ) == {"evc_q_id": 9}
+    assert parse_legacy_message(
+        "El EVC 'A' ha gastado el 93.5% de su presupuesto en Q2/2025 ($1 de $2)"
+    ) == {"evc_name": "A", "q": 2, "year": 2025, "threshold_bucket": 90}
+    assert parse_legacy_message("otro mensaje") == {}
+
+
+def add_expensive_provider_rule(db):
+    db.add(
+        NotificationRule(
+            name="caro",
+            target_table="provider",
+            condition_field="cost_usd",
+            threshold=100,
+            comparison=">",
+            message="Proveedor caro",
+            type="alert",
+            active=True,
+        )
+    )
+    db.commit()
+    invalidate_rule_index()
+
+
+def provider_data(n, cost):
+    return ProviderCreate(
+        name=f"p{n}",
+        role="dev",
+        company="acme",
+        country="AR",
+        cost_usd=cost,
+        category="x",
+        line="l",
+        email=f"p{n}@example.com",
+    )
+
+
+def test_bulk_provider_notifications_carry_keys_and_are_deduplicated():
+    db = make_db()
+    add_expensive_provider_rule(db)
+    providers = [provider_data(n, cost) for n, cost in enumerate([50.0, 150.0, 300.0])]
+
+    try:
+        assert bulk_create_providers(db, providers)["notifications"] == 2
+        rows = db.query(Notification).all()
+        ids = {p.email: p.id for p in db.query(Provider)}
+        assert {r.fingerprint for r in rows} == {
+            notification_fingerprint(rows[0].rule_id, None, None, f"provider:{i}")
+            for i in (ids["p1@example.com"], ids["p2@example.com"])
+        }
+        # Las mismas filas otra vez: ya se notificaron dentro de la ventana
+        entities = [{"id": i, "cost_usd": 150.0} for i in ids.values()]
+        assert evaluate_notification_rules_batch(entities[1:], db, "provider") == 0
+    finally:
+        invalidate_rule_index()
+
+
+def test_single_provider_notifications_use_the_same_keys():
+    db = make_db()
+    add_expensive_provider_rule(db)
+
+    try:
+        provider = create_provider(db, provider_data(1, 150.0))
+        update_provider(db, provider.id, provider_data(1, 200.0))
+        rows = db.query(Notification).all()
+        assert len(rows) == 1
+        assert rows[0].fingerprint == notification_fingerprint(
+            rows[0].rule_id, None, None, f"provider:{provider.id}"
+        )
+    finally:
+        invalidate_rule_index()
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.pagination import PAGE_DEFAULT_LIMIT, PageSpec, default_page, paginate
+from app.database import get_db
+from app.models.notification import Notification
+from app.models.provider import Provider
+from app.models.technical_leader import TechnicalLeader
+from app.routes.technical_leaders import router as technical_leaders_router
+from tests.helpers import make_db
+
+PROVIDER_PAGE = PageSpec(Provider, ["name", "country", "cost_usd"])
+NOTIFICATION_PAGE = PageSpec(Notification, ["created_at"], default_sort="-created_at")
+
+
+def seed_providers(db, n=25):
+    db.add_all(
+        Provider(
+            name=f"p{i:02d}",
+            role="dev",
+            company="acme",
+            country="AR" if i % 2 else "UY",
+            # Costos repetidos y algunos nulos para ejercitar el desempate por id
+            cost_usd=None if i % 7 == 0 else float(i % 4),
+            category="x",
+            line="l",
+            email=f"p{i}@example.com",
+        )
+        for i in range(n)
+    )
+    db.commit()
+
+
+def walk(db, query_factory, spec, **params):
+    seen, cursor = [], None
+    while True:
+        page = paginate(query_factory(), default_page(cursor=cursor, **params), spec)
+        seen.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return seen, page
+
+
+@pytest.mark.parametrize("sort", ["id", "cost_usd", "-cost_usd", "-cost_usd,name"])
+def test_walking_all_pages_returns_every_row_once_in_order(sort):
+    db = make_db()
+    seed_providers(db)
+
+    rows, last_page = walk(
+        db, lambda: db.query(Provider), PROVIDER_PAGE, sort=sort, limit=4
+    )
+
+    expected = paginate(
+        db.query(Provider), default_page(sort=sort, limit=1000), PROVIDER_PAGE
+    ).items
+    assert [p.id for p in rows] == [p.id for p in expected]
+    assert len(rows) == 25
+    assert last_page.total == 25 and not last_page.total_estimated
+
+
+def test_filters_and_descending_default_sort():
+    db = make_db()
+    seed_providers(db)
+    page = paginate(
+        db.query(Provider),
+        default_page(filters=["country:eq:AR", "cost_usd:gte:2"], limit=100),
+        PROVIDER_PAGE,
+    )
+    assert page.items and all(p.country == "AR" and p.cost_usd >= 2 for p in page.items)
+
+    now = datetime(2026, 1, 1)
+    db.add_all(
+        Notification(message=str(i), created_at=now + timedelta(minutes=i))
+        for i in range(5)
+    )
+    db.commit()
+    rows, _ = walk(db, lambda: db.query(Notification), NOTIFICATION_PAGE, limit=2)
+    assert [n.message for n in rows] == ["4", "3", "2", "1", "0"]
+
+
+def test_rejects_unknown_fields_and_mismatched_cursor():
+    db = make_db()
+    seed_providers(db)
+    with pytest.raises(HTTPException):
+        paginate(db.query(Provider), default_page(sort="email"), PROVIDER_PAGE)
+    cursor = paginate(
+        db.query(Provider), default_page(limit=2), PROVIDER_PAGE
+    ).next_cursor
+    with pytest.raises(HTTPException):
+        paginate(
+            db.query(Provider), default_page(cursor=cursor, sort="name"), PROVIDER_PAGE
+        )
+
+
+def test_without_limit_or_cursor_returns_every_row():
+    db = make_db()
+    seed_providers(db, n=120)
+
+    page = paginate(db.query(Provider), default_page(), PROVIDER_PAGE)
+    assert len(page.items) == 120 and page.next_cursor is None
+    assert page.total == 120
+
+    first = paginate(db.query(Provider), default_page(limit=50), PROVIDER_PAGE)
+    # Con cursor y sin limit, el tamaño de página por defecto
+    rest = paginate(
+        db.query(Provider), default_page(cursor=first.next_cursor), PROVIDER_PAGE
+    )
+    assert len(first.items) + len(rest.items) == 120 and rest.next_cursor is None
+
+
+def test_routes_that_had_a_limit_keep_the_default_page_size():
+    db = make_db()
+    db.add_all(
+        TechnicalLeader(name=f"t{i}", email=f"t{i}@example.com")
+        for i in range(PAGE_DEFAULT_LIMIT + 5)
+    )
+    db.commit()
+    app = FastAPI()
+    app.include_router(technical_leaders_router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    first = client.get("/technical-leaders")
+    assert len(first.json()) == PAGE_DEFAULT_LIMIT
+    rest = client.get(
+        "/technical-leaders", params={"cursor": first.headers["x-next-cursor"]}
+    )
+    assert len(rest.json()) == 5 and "x-next-cursor" not in rest.headers
+    # Los clientes que paginaban por offset reciben un error, no la primera página
+    skipped = client.get("/technical-leaders", params={"skip": 100})
+    assert skipped.status_code == 400
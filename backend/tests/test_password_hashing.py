@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401  registra todos los modelos
+from app.database import Base
+from app.models.user import User
+from app.routes.auth import authenticate_user
+from app.services import auth_service, login_attempts
+
+
+def bcrypt_context(rounds):
+    return CryptContext(
+        schemes=["bcrypt"],
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def run_with_db(password_hash, scenario):
+    """Ejecuta ``scenario(db)`` con una base en memoria que tiene a ``ana``."""
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        login_attempts.clear_attempts()
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            db.add(User(username="ana", email="ana@mail.com", password=password_hash))
+            await db.commit()
+            await scenario(db)
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_login_rehashes_when_cost_changes(monkeypatch):
+    monkeypatch.setattr(auth_service, "pwd_context", bcrypt_context(5))
+
+    async def scenario(db):
+        user = await authenticate_user(db, "ana@mail.com", "secreto123")
+        assert user.password.startswith("$2b$05$")
+        again = await authenticate_user(db, "ana@mail.com", "secreto123")
+        assert again.password == user.password
+
+    run_with_db(bcrypt_context(4).hash("secreto123"), scenario)
+
+
+def test_account_is_locked_after_repeated_failures(monkeypatch):
+    monkeypatch.setattr(login_attempts, "LOGIN_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(auth_service, "pwd_context", bcrypt_context(4))
+
+    async def scenario(db):
+        for _ in range(3):
+            assert await authenticate_user(db, "ana@mail.com", "incorrecta") is False
+
+        with pytest.raises(HTTPException) as error:
+            await authenticate_user(db, "ANA@mail.com", "secreto123")
+        assert error.value.status_code == 429
+        assert int(error.value.headers["Retry-After"]) > 0
+
+    run_with_db(bcrypt_context(4).hash("secreto123"), scenario)
+
+
+def test_successful_login_resets_failures(monkeypatch):
+    monkeypatch.setattr(login_attempts, "LOGIN_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(auth_service, "pwd_context", bcrypt_context(4))
+
+    async def scenario(db):
+        assert await authenticate_user(db, "ana@mail.com", "incorrecta") is False
+        assert await authenticate_user(db, "ana@mail.com", "secreto123")
+        assert await authenticate_user(db, "ana@mail.com", "incorrecta") is False
+        assert await authenticate_user(db, "ana@mail.com", "secreto123")
+
+    run_with_db(bcrypt_context(4).hash("secreto123"), scenario)
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  registra todos los modelos
+from app.database import Base
+from app.models.user import User
+from app.routes.auth import get_current_user
+from app.schemas.user import UserUpdate
+from app.services import principal_cache
+from app.services.auth_service import create_access_token
+from app.services.user import delete_user, update_user
+
+
+def make_dbs(tmp_path):
+    """Sesión síncrona (servicios de /users) y asíncrona (auth) sobre la misma base."""
+    path = tmp_path / "auth.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    principal_cache.clear_principals()
+    db = sessionmaker(bind=engine)()
+    db.add(User(username="ana", email="ana@mail.com", password="x", rol="admin"))
+    db.commit()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    return db, async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def resolve(token, AsyncSession):
+    async def run():
+        async with AsyncSession() as db:
+            return await get_current_user(token=token, db=db)
+
+    return asyncio.run(run())
+
+
+def test_cached_token_skips_user_lookup(tmp_path):
+    db, AsyncSession = make_dbs(tmp_path)
+    token = create_access_token({"sub": "ana@mail.com"})
+
+    first = resolve(token, AsyncSession)
+    # Sin sesión: cualquier consulta a app_user fallaría
+    second = asyncio.run(get_current_user(token=token, db=None))
+
+    assert (second.id, second.email, second.rol) == (first.id, "ana@mail.com", "admin")
+
+
+def test_entry_does_not_outlive_token(tmp_path):
+    db, AsyncSession = make_dbs(tmp_path)
+    token = create_access_token({"sub": "ana@mail.com"}, timedelta(seconds=-1))
+
+    with pytest.raises(HTTPException):
+        resolve(token, AsyncSession)
+    assert principal_cache.get_cached_principal(token) is None
+
+
+def test_user_update_and_delete_invalidate_tokens(tmp_path):
+    db, AsyncSession = make_dbs(tmp_path)
+    token = create_access_token({"sub": "ana@mail.com"})
+    user_id = resolve(token, AsyncSession).id
+
+    update_user(db, user_id, UserUpdate(rol="consultor"))
+    assert resolve(token, AsyncSession).rol == "consultor"
+
+    delete_user(db, user_id)
+    with pytest.raises(HTTPException):
+        resolve(token, AsyncSession)
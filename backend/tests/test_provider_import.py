@@ -0,0 +1,68 @@
+import io
+
+from openpyxl import Workbook
+
+from app.models.provider import Provider
+from app.services import provider_import
+from app.services.provider_import import import_providers
+from tests.helpers import make_db
+
+HEADER = "name,role,company,country,cost_usd,category,line,email\n"
+
+
+def csv_file(*rows):
+    return io.BytesIO((HEADER + "".join(r + "\n" for r in rows)).encode("utf-8"))
+
+
+def test_csv_import_reports_row_errors_and_duplicates(monkeypatch):
+    monkeypatch.setattr(provider_import, "IMPORT_CHUNK_SIZE", 2)
+    db = make_db()
+    result = import_providers(
+        db,
+        "providers.csv",
+        csv_file(
+            "a,dev,acme,AR,10,x,l,a@example.com",
+            "b,dev,acme,AR,not-a-number,x,l,b@example.com",
+            "c,dev,acme,AR,30,x,l,a@example.com",
+            "a,dev,acme,AR,40,x,l,d@example.com",
+        ),
+    )
+
+    assert result["processed"] == 4
+    assert result["created"] == 1
+    assert result["skipped"] == 1
+    assert result["failed"] == 2
+    assert [e["row"] for e in result["errors"]] == [3, 5]
+    assert db.query(Provider).count() == 1
+
+
+def test_xlsx_upsert_updates_existing_providers():
+    db = make_db()
+    db.add(
+        Provider(
+            name="a",
+            role="dev",
+            company="acme",
+            country="AR",
+            cost_usd=10,
+            category="x",
+            line="l",
+            email="a@example.com",
+        )
+    )
+    db.commit()
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER.strip().split(","))
+    sheet.append(["a", "lead", "acme", "AR", 25, "x", "l", "a@example.com"])
+    sheet.append(["b", "dev", "acme", "UY", 5, "x", "l", "b@example.com"])
+    stream = io.BytesIO()
+    workbook.save(stream)
+    stream.seek(0)
+
+    result = import_providers(db, "providers.xlsx", stream, mode="upsert")
+
+    assert (result["created"], result["updated"]) == (1, 1)
+    updated = db.query(Provider).filter_by(email="a@example.com").one()
+    assert (updated.role, updated.cost_usd) == ("lead", 25)
@@ -0,0 +1,124 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.trigram import similarity, word_similarity
+from app.database import get_db
+from app.models.provider import Provider
+from app.routes.providers import router
+from app.services.provider_search import search_providers, typeahead
+from tests.helpers import make_db
+
+PROVIDERS = [
+    ("Acme", "Acme Corp", "Argentina", "Cloud", "Infra", 1000.0),
+    ("Acme Logistics", "Acme Corp", "Chile", "Logistics", "Ops", 250.0),
+    ("Globex", "Globex Acme Partners", "Argentina", "Cloud", "Infra", 5000.0),
+    ("Initech", "Initech 100% SRL", "Uruguay", "Software", "Dev", None),
+    ("Umbrella", "Umbrella Health", "Argentina", "Health", "Ops", 750.0),
+]
+
+
+def add_providers(db):
+    for n, (name, company, country, line, category, cost) in enumerate(PROVIDERS):
+        db.add(
+            Provider(
+                name=name,
+                role="Proveedor",
+                company=company,
+                country=country,
+                line=line,
+                category=category,
+                cost_usd=cost,
+                email=f"contacto{n}@{name.split()[0].lower()}.com",
+            )
+        )
+    db.commit()
+
+
+def names(result):
+    return [hit["name"] for hit in result["hits"]]
+
+
+def test_trigram_similarity_matches_pg_trgm():
+    # Valores de la documentación de pg_trgm
+    assert round(similarity("word", "two words"), 6) == 0.363636
+    assert word_similarity("word", "two words") == 0.8
+    assert word_similarity("", "acme") == 0.0 and similarity(None, "acme") == 0.0
+
+
+def test_search_ranks_exact_prefix_contained_and_fuzzy_matches():
+    db = make_db()
+    add_providers(db)
+
+    result = search_providers(db, "acme")
+    assert result["total"] == 3
+    assert names(result) == ["Acme", "Acme Logistics", "Globex"]
+    ranks = [hit["rank"] for hit in result["hits"]]
+    assert ranks == sorted(ranks, reverse=True)
+
+    # Errores de tipeo
+    assert names(search_providers(db, "umbrela"))[0] == "Umbrella"
+    assert names(search_providers(db, "initec"))[0] == "Initech"
+    assert search_providers(db, "zzzz")["total"] == 0
+    # El email también se busca
+    assert names(search_providers(db, "contacto3@initech"))[0] == "Initech"
+
+
+def test_search_combines_filters_and_paginates():
+    db = make_db()
+    add_providers(db)
+
+    result = search_providers(db, "acme", country="argentina", cost_min=500)
+    assert names(result) == ["Acme", "Globex"]
+    assert names(search_providers(db, "acme", cost_max=500)) == ["Acme Logistics"]
+    assert names(search_providers(db, line="cloud", category="Infra")) == [
+        "Acme",
+        "Globex",
+    ]
+
+    # Sin rango de costo no se excluye al proveedor sin costo
+    everything = search_providers(db)
+    assert everything["total"] == 5 and everything["hits"][0]["rank"] is None
+    page = search_providers(db, limit=2, offset=2)
+    assert names(page) == ["Globex", "Initech"] and page["total"] == 5
+
+    # % y _ se buscan literalmente
+    assert names(search_providers(db, company="100%")) == ["Initech"]
+    assert search_providers(db, company="_")["total"] == 0
+
+
+def test_typeahead_suggests_prefixes_first_then_similar_values():
+    db = make_db()
+    add_providers(db)
+
+    assert typeahead(db, "name", "ac") == ["Acme", "Acme Logistics"]
+    assert typeahead(db, "country", "arg") == ["Argentina"]
+    assert typeahead(db, "company", "acme")[:1] == ["Acme Corp"]
+    assert "Umbrella" in typeahead(db, "name", "umbre")
+    assert typeahead(db, "name", "umbrela") == ["Umbrella"]
+
+
+def test_provider_search_routes():
+    db = make_db()
+    add_providers(db)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    response = client.get("/providers/search", params={"q": "acme", "limit": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 3 and body["hits"][0]["name"] == "Acme"
+    assert body["hits"][0]["rank"] > 0
+
+    response = client.get("/providers/filter", params={"country": "argentina"})
+    assert [p["name"] for p in response.json()] == ["Acme", "Globex", "Umbrella"]
+
+    response = client.get("/providers/typeahead", params={"q": "glo", "field": "name"})
+    assert response.json() == ["Globex"]
+    assert (
+        client.get(
+            "/providers/typeahead", params={"q": "x", "field": "email"}
+        ).status_code
+        == 422
+    )
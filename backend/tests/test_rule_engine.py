@@ -0,0 +1,73 @@
+from app.models.notification_rule import NotificationRule
+from app.services.rule_engine import RuleIndex, match_rows
+
+
+def make_rule(id, field, comparison, threshold, table="provider"):
+    return NotificationRule(
+        id=id,
+        name=f"rule-{id}",
+        target_table=table,
+        condition_field=field,
+        comparison=comparison,
+        threshold=threshold,
+        message=f"message-{id}",
+        type="alert",
+    )
+
+
+def test_rules_are_indexed_by_table_and_field():
+    index = RuleIndex(
+        [
+            make_rule(1, "cost_usd", ">", 1000),
+            make_rule(2, "cost_usd", "<=", 10),
+            make_rule(3, "spent_percentage", ">=", 80, table="evc_q"),
+            make_rule(4, "cost_usd", "LIKE", 1),
+        ]
+    )
+
+    assert [r.id for r in index.rules_for("provider")] == [1, 2]
+    assert [r.id for r in index.rules_for_field("evc_q", "spent_percentage")] == [3]
+    assert index.fields_for("provider") == ["cost_usd"]
+    assert index.rules_for_field("evc_q", "spent_percentage")[0].is_calculated
+
+
+def test_compiled_rule_matches():
+    index = RuleIndex(
+        [
+            make_rule(1, "cost_usd", ">", 1000),
+            make_rule(2, "email", "is_null", 0),
+        ]
+    )
+    greater, is_null = index.rules_for("provider")
+
+    assert greater.matches(1500)
+    assert not greater.matches(1000)
+    assert not greater.matches(None)
+    assert not greater.matches("text")
+    assert is_null.matches(None)
+    assert not is_null.matches("a@b.com")
+
+
+def test_match_rows_agrees_with_row_by_row_matching():
+    rules = RuleIndex(
+        [
+            make_rule(1, "cost_usd", ">", 100),
+            make_rule(2, "cost_usd", "<=", 100),
+            make_rule(3, "cost_usd", "==", 50),
+            make_rule(4, "email", "is_null", 0),
+        ]
+    ).rules_for("provider")
+    rows = [
+        {"cost_usd": 50, "email": "a@b.com"},
+        {"cost_usd": 150, "email": None},
+        {"cost_usd": None, "email": "c@d.com"},
+        {"cost_usd": 100.0, "email": "e@f.com"},
+    ]
+
+    expected = [
+        (rule.id, i)
+        for rule in rules
+        for i, row in enumerate(rows)
+        if rule.matches(row.get(rule.condition_field))
+    ]
+    assert [(rule.id, i) for rule, i in match_rows(rules, rows)] == expected
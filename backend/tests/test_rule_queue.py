@@ -0,0 +1,61 @@
+import time
+
+from app.services.rule_queue import RuleEvaluationQueue
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_events_for_the_same_row_are_coalesced():
+    evaluated = []
+    queue = RuleEvaluationQueue(
+        workers=2,
+        coalesce_window=0.1,
+        evaluate=lambda table, row_id: evaluated.append((table, row_id)),
+    )
+
+    for _ in range(5):
+        queue.enqueue("evc_q", 7)
+    queue.enqueue("evc_financial", 3)
+
+    assert wait_until(lambda: queue.metrics()["processed"] == 2)
+    queue.stop()
+
+    assert sorted(evaluated) == [("evc_financial", 3), ("evc_q", 7)]
+    metrics = queue.metrics()
+    assert metrics["enqueued"] == 6
+    assert metrics["coalesced"] == 4
+    assert metrics["queue_depth"] == 0
+    assert metrics["max_lag_seconds"] >= 0.1
+
+
+def test_stop_drains_pending_events():
+    evaluated = []
+    queue = RuleEvaluationQueue(
+        coalesce_window=60, evaluate=lambda *event: evaluated.append(event)
+    )
+
+    queue.enqueue("evc", 1)
+    queue.stop()
+
+    assert evaluated == [("evc", 1)]
+
+
+def test_errors_are_counted_and_do_not_stop_workers():
+    def evaluate(table, row_id):
+        if row_id == 1:
+            raise RuntimeError("boom")
+
+    queue = RuleEvaluationQueue(coalesce_window=0, evaluate=evaluate)
+    queue.enqueue("evc", 1)
+    queue.enqueue("evc", 2)
+
+    assert wait_until(lambda: queue.metrics()["processed"] == 2)
+    queue.stop()
+    assert queue.metrics()["errors"] == 1
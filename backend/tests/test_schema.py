@@ -0,0 +1,169 @@
+import os
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.services.notification_dedup import notification_fingerprint
+
+from app.core.schema import (
+    SchemaOutOfDate,
+    alembic_config,
+    check_schema_version,
+    head_revisions,
+)
+
+
+def upgrade(engine, revision="head"):
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+def downgrade(engine, revision):
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.downgrade(config, revision)
+
+
+def test_migrations_create_schema_from_scratch(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+
+    upgrade(engine)
+
+    inspector = inspect(engine)
+    assert {"evc", "evc_q", "notification", "app_user"} <= set(
+        inspector.get_table_names()
+    )
+    indexes = {i["name"] for i in inspector.get_indexes("notification")}
+    assert "ix_notification_read_created_at_id" in indexes
+    current, heads = check_schema_version(engine, mode="strict")
+    assert current == heads == head_revisions()
+
+
+def test_migration_chain_is_reproducible(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chain.db'}")
+
+    # El esquema base no incluye las tablas de revisiones posteriores
+    upgrade(engine, "9c4d2e7a1b58")
+    tables = set(inspect(engine).get_table_names())
+    assert "evc_q_spending" in tables
+    assert not {"invoice_parse", "document_upload", "search_entry"} & tables
+
+    upgrade(engine)
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection)
+        assert compare_metadata(context, Base.metadata) == []
+
+    downgrade(engine, "base")
+    assert set(inspect(engine).get_table_names()) == {"alembic_version"}
+    upgrade(engine)
+
+
+def test_notification_keys_are_backfilled_from_legacy_messages(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    messages = [
+        "El EVC 'A' ha gastado $5.00 del presupuesto asignado en el "
+        "cuatrimestre (ID: 9).",
+        "El EVC 'A' ha gastado el 93.5% de su presupuesto en Q2/2025 ($1 de $2)",
+        "otro mensaje",
+    ]
+    with engine.begin() as connection:
+        # Tablas como las creaba app.main antes de las migraciones
+        for statement in (
+            "CREATE TABLE evc (id INTEGER PRIMARY KEY, name VARCHAR)",
+            "CREATE TABLE evc_q (id INTEGER PRIMARY KEY, year INTEGER, "
+            "q INTEGER, evc_id INTEGER)",
+            "CREATE TABLE notification (id INTEGER PRIMARY KEY, "
+            "message VARCHAR NOT NULL, type VARCHAR, read BOOLEAN, "
+            "created_at DATETIME)",
+            "INSERT INTO evc (id, name) VALUES (1, 'A')",
+            "INSERT INTO evc_q (id, year, q, evc_id) VALUES (4, 2025, 2, 1)",
+        ):
+            connection.execute(text(statement))
+        for message in messages:
+            connection.execute(
+                text("INSERT INTO notification (message) VALUES (:message)"),
+                {"message": message},
+            )
+
+    upgrade(engine, "4f1c2a9d7e10")
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                "SELECT evc_q_id, threshold_bucket, fingerprint "
+                "FROM notification ORDER BY id"
+            )
+        ).all()
+    assert [(r.evc_q_id, r.threshold_bucket) for r in rows] == [
+        (9, None),
+        (4, 90),
+        (None, None),
+    ]
+    assert rows[0].fingerprint == notification_fingerprint(
+        None, 9, None, message=messages[0]
+    )
+    assert len({r.fingerprint for r in rows}) == 3
+
+
+def test_storage_keys_are_backfilled_only_for_own_storage_urls(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_PUBLIC_URL", "https://files.example.com/storage/")
+    engine = create_engine(f"sqlite:///{tmp_path / 'keys.db'}")
+    upgrade(engine, "e2b6f4a8c913")
+    urls = [
+        "https://files.example.com/storage/documents/a.pdf",
+        "https://x.supabase.co/storage/v1/object/public/docs/b.pdf",
+        "https://example.com/c.pdf",
+    ]
+    with engine.begin() as connection:
+        for url in urls:
+            connection.execute(
+                text(
+                    "INSERT INTO document (file_name, file_url) " "VALUES ('f', :url)"
+                ),
+                {"url": url},
+            )
+
+    upgrade(engine)
+
+    with engine.connect() as connection:
+        keys = connection.execute(
+            text("SELECT storage_key FROM document ORDER BY id")
+        ).scalars()
+        assert list(keys) == ["documents/a.pdf", None, None]
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_PG_URL"), reason="TEST_PG_URL (base PostgreSQL vacía)"
+)
+def test_migrations_add_search_vector_on_postgresql():
+    engine = create_engine(os.environ["TEST_PG_URL"])
+
+    upgrade(engine)
+    try:
+        inspector = inspect(engine)
+        columns = {c["name"] for c in inspector.get_columns("search_entry")}
+        assert "search_vector" in columns
+        indexes = {i["name"] for i in inspector.get_indexes("search_entry")}
+        assert "ix_search_entry_search_vector" in indexes
+    finally:
+        downgrade(engine, "base")
+
+
+def test_outdated_schema_fails_only_in_strict_mode(tmp_path, capsys):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+
+    current, heads = check_schema_version(engine, mode="warn")
+    assert current == set() and heads
+    assert "alembic upgrade head" in capsys.readouterr().out
+
+    with pytest.raises(SchemaOutOfDate):
+        check_schema_version(engine, mode="strict")
+    assert check_schema_version(engine, mode="off") == (set(), set())
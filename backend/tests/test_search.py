@@ -0,0 +1,141 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.models.search_entry import SearchEntry, SearchTerm
+from app.routes.documents import router as documents_router
+from app.services import evc_financial, invoice_batch, invoice_jobs, search
+from app.services import storage as storage_service
+from app.services.invoice import parse_invoice
+from app.services.invoice_cache import content_hash, store_parse
+from app.services.search import index_text, search_documents
+from app.services.storage import LocalStorage
+from benchmarks.invoice_corpus import make_invoice_pdf
+from tests.helpers import InlinePool, index_in_session, make_db, seed
+
+
+def test_search_ranks_hits_and_highlights_snippets():
+    db = make_db()
+    index_text(db, "document", 1, "contrato.pdf", "Servicios de limpieza para Acme")
+    index_text(
+        db,
+        "document",
+        2,
+        "orden-acme.pdf",
+        "Orden de compra PO-4500123 emitida a Acme <S.A.> por Facturación",
+    )
+    index_text(db, "invoice", "f" * 64, "factura.pdf", "Proveedor Globex, PO-4500123")
+    db.commit()
+
+    result = search_documents(db, "acme PO-4500123")
+    assert result["total"] == 1
+    hit = result["hits"][0]
+    assert (hit["source"], hit["key"]) == ("document", "2")
+    assert hit["download_url"] == "/documents/2/download"
+    assert "<mark>PO</mark>-<mark>4500123</mark>" in hit["snippet"]
+    assert "<mark>Acme</mark> &lt;S.A.&gt;" in hit["snippet"]
+
+    # Sin acentos ni mayúsculas; el nombre del archivo pesa más que el texto
+    assert search_documents(db, "facturacion")["total"] == 1
+    hits = search_documents(db, "acme")["hits"]
+    assert [hit["key"] for hit in hits] == ["2", "1"]
+    assert [
+        h["key"] for h in search_documents(db, "acme", limit=1, offset=1)["hits"]
+    ] == ["1"]
+
+    only_invoices = search_documents(db, "4500123", sources=["invoice"])
+    assert only_invoices["total"] == 1
+    assert only_invoices["hits"][0]["financials"] == []
+    assert search_documents(db, "inexistente")["total"] == 0
+    assert search_documents(db, "de la")["total"] == 0
+
+    # Reindexar reemplaza los términos anteriores
+    index_text(db, "document", 1, "contrato.pdf", "Mantenimiento")
+    assert search_documents(db, "limpieza")["total"] == 0
+    assert search_documents(db, "mantenimiento")["total"] == 1
+
+
+def test_loaded_invoices_are_searchable_with_their_financials(monkeypatch):
+    monkeypatch.setattr(invoice_batch, "invoice_pool", InlinePool())
+    monkeypatch.setattr(
+        evc_financial, "enqueue_rule_evaluation", lambda table, row_id, db=None: None
+    )
+    db = make_db()
+    seed(db)
+    content = make_invoice_pdf(1234.0)
+    files = invoice_batch.expand_upload("acme-marzo.pdf", content, 1)
+    report = asyncio.run(invoice_batch.ingest_invoices(db, files))
+
+    result = search_documents(db, "servicio 007")
+    assert result["total"] == 1
+    hit = result["hits"][0]
+    assert hit["source"] == "invoice" and hit["file_name"] == "acme-marzo.pdf"
+    assert hit["financials"] == [
+        {"id": report["files"][0]["evc_financial_id"], "evc_q_id": 1}
+    ]
+
+    # Una carga desde la caché (sin texto) no vuelve a indexar
+    record = invoice_jobs.record_invoice(
+        db, 2, hit["key"], len(content), {"value": 1234.0}, True, "otra.pdf"
+    )
+    assert record is not None
+    assert db.query(SearchEntry).count() == 1
+    assert len(search_documents(db, "acme")["hits"][0]["financials"]) == 2
+
+
+def test_uploaded_documents_are_indexed_and_removed_on_delete(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage_service, "storage", LocalStorage(tmp_path))
+    db = make_db()
+    index_in_session(monkeypatch, db)
+    app = FastAPI()
+    app.include_router(documents_router, prefix="/documents")
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    text = "Orden de compra PO-77 para Proveedor Señal S.R.L.".encode()
+    pdf = make_invoice_pdf(None)
+    uploaded = [
+        client.post("/documents/upload", files={"file": ("orden.txt", text)}).json(),
+        client.post("/documents/upload", files={"file": ("factura.pdf", pdf)}).json(),
+        client.post(
+            "/documents/upload", files={"file": ("foto.png", b"\x89PNG")}
+        ).json(),
+    ]
+
+    response = client.get("/documents/search", params={"q": "senal po-77"})
+    assert response.status_code == 200
+    hits = response.json()["hits"]
+    assert [hit["key"] for hit in hits] == [str(uploaded[0]["id"])]
+    assert "<mark>Señal</mark>" in hits[0]["snippet"]
+    assert (
+        client.get("/documents/search", params={"q": "servicio"}).json()["total"] == 1
+    )
+    # Formatos sin texto quedan indexados por nombre
+    assert client.get("/documents/search", params={"q": "foto"}).json()["total"] == 1
+    assert (
+        client.get("/documents/search", params={"q": "x", "source": "otro"}).status_code
+        == 400
+    )
+
+    client.post("/documents/batch-delete", json={"ids": [uploaded[0]["id"]]})
+    assert client.get("/documents/search", params={"q": "senal"}).json()["total"] == 0
+    assert db.query(SearchEntry).count() == 2
+    assert not db.query(SearchTerm).filter(SearchTerm.term == "senal").count()
+
+
+def test_reindex_backfills_stored_invoice_text(monkeypatch):
+    db = make_db()
+    content = make_invoice_pdf(50.0)
+    store_parse(
+        db, content_hash(content), len(content), parse_invoice("a.pdf", content)
+    )
+    index_in_session(monkeypatch, db)
+    assert asyncio.run(search.reindex()) == {
+        "invoice": 1,
+        "document": 0,
+        "provider_document": 0,
+    }
+    assert search_documents(db, "servicio")["total"] == 1
+    assert asyncio.run(search.reindex())["invoice"] == 0
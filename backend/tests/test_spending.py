@@ -0,0 +1,104 @@
+from app.models.evc_financial import EVC_Financial
+from app.models.evc_q import EVC_Q
+from app.models.evc_q_spending import EVC_QSpending
+from app.models.provider import Provider
+from app.services import spending
+from app.services.provider_service import delete_provider
+from app.services.spending import (
+    apply_quarter_spendings,
+    get_budget_message,
+    get_spendings_by_evc_qs,
+    rebuild_ledger,
+    record_financial_change,
+    record_provider_cost_change,
+    snapshot_financial,
+    verify_ledger,
+)
+from tests.helpers import make_db, seed
+
+
+def test_spendings_are_grouped_per_quarter():
+    db = make_db()
+    seed(db)
+
+    assert get_spendings_by_evc_qs(db, [1, 2, 3]) == {1: 850.0, 2: 0.0, 3: 10.0}
+    assert get_spendings_by_evc_qs(db, []) == {}
+
+
+def test_apply_quarter_spendings_sets_status():
+    db = make_db()
+    seed(db)
+    quarters = db.query(EVC_Q).order_by(EVC_Q.id).all()
+
+    apply_quarter_spendings(db, quarters)
+
+    assert quarters[0].total_spendings == 850.0
+    assert quarters[0].percentage == 85.0
+    assert quarters[0].budget_message == "Ya casi te quedas sin presupuesto"
+    assert quarters[1].budget_message == "Presupuesto suficiente"
+    assert quarters[2].percentage == 0.0
+
+
+def test_budget_message_thresholds():
+    assert get_budget_message(100) == "No hay más presupuesto"
+    assert get_budget_message(50) == "Vas a la mitad del presupuesto"
+    assert get_budget_message(49.9) == "Presupuesto suficiente"
+
+
+def test_ledger_tracks_financial_and_provider_changes():
+    db = make_db()
+    seed(db)
+    rebuild_ledger(db)
+
+    financial = EVC_Financial(evc_q_id=2, value_usd=200)
+    db.add(financial)
+    record_financial_change(db, None, snapshot_financial(db, financial))
+
+    before = snapshot_financial(db, financial)
+    financial.evc_q_id = 1
+    record_financial_change(db, before, snapshot_financial(db, financial))
+
+    provider = db.get(Provider, 1)
+    old_cost = provider.cost_usd
+    provider.cost_usd = 500
+    record_provider_cost_change(db, provider.id, old_cost, provider.cost_usd)
+    db.commit()
+
+    assert db.get(EVC_QSpending, 1).spent_total == 1250.0
+    assert db.get(EVC_QSpending, 2).spent_total == 0.0
+    assert verify_ledger(db) == []
+
+
+def test_deleting_a_provider_updates_the_ledger():
+    db = make_db()
+    seed(db)
+    rebuild_ledger(db)
+    db.commit()
+
+    assert delete_provider(db, 1)
+
+    assert get_spendings_by_evc_qs(db, [1]) == {1: 550.0}
+    assert verify_ledger(db) == []
+
+
+def test_first_write_to_a_quarter_upserts_the_ledger_row(monkeypatch):
+    db = make_db()
+    seed(db)
+    compute = spending.compute_ledger_totals
+
+    def concurrent_insert(db, evc_q_ids=None):
+        # Otra transacción crea la fila del cuatrimestre entre el UPDATE
+        # (que no encontró nada) y el INSERT
+        db.add(EVC_QSpending(evc_q_id=2, manual_total=50.0, spent_total=50.0))
+        db.flush()
+        return compute(db, evc_q_ids)
+
+    monkeypatch.setattr(spending, "compute_ledger_totals", concurrent_insert)
+    financial = EVC_Financial(evc_q_id=2, value_usd=200)
+    db.add(financial)
+    record_financial_change(db, None, snapshot_financial(db, financial))
+    db.commit()
+
+    entry = db.get(EVC_QSpending, 2)
+    db.refresh(entry)
+    assert (entry.manual_total, entry.spent_total) == (250.0, 250.0)
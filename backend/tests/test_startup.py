@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.core.optional_deps import MissingDependency, optional_import
+from benchmarks.bench_startup import DEFERRED_MODULES
+
+
+def test_app_import_defers_heavy_dependencies():
+    code = (
+        "import sys, app.main; "
+        f"print('loaded:', [m for m in {DEFERRED_MODULES!r} if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, PRELOAD_HEAVY_DEPS="false"),
+        check=True,
+    )
+    assert "loaded: []" in result.stdout.splitlines()
+
+
+def test_missing_optional_dependency_names_the_package():
+    with pytest.raises(MissingDependency, match="requiere el paquete"):
+        optional_import("finup_missing_module", "La prueba")
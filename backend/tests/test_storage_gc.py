@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+from app.models.document import Document
+from app.models.document_upload import DocumentUpload
+from app.models.provider import Provider
+from app.models.provider_document import ProviderDocument
+from app.models.storage_tombstone import StorageTombstone
+from app.services import storage as storage_service
+from app.services.document import delete_documents
+from app.services.provider_service import delete_provider
+from app.services.storage import LocalStorage, StorageError
+from app.services.storage_gc import reconcile_storage, sweep_storage
+from benchmarks.fake_s3 import FakeS3, make_storage
+from tests.helpers import make_db
+
+
+class BrokenStorage(LocalStorage):
+    async def delete_many(self, keys):
+        raise StorageError("timeout")
+
+
+def add_documents(db, s3, count):
+    for n in range(count):
+        key = f"documents/{n}.pdf"
+        s3.objects[key] = b"x"
+        db.add(Document(file_name=f"{n}.pdf", file_url="", storage_key=key))
+    db.commit()
+    return [doc.id for doc in db.query(Document)]
+
+
+def test_delete_marks_files_and_sweeper_removes_them_in_one_batch(monkeypatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(storage_service, "storage", make_storage(s3))
+    db = make_db()
+    ids = add_documents(db, s3, 500)
+
+    result = asyncio.run(delete_documents(db, ids + [9999]))
+    assert result == {"deleted": 500, "not_found": [9999]}
+    assert db.query(Document).count() == 0
+    # El request no toca el storage
+    assert not s3.requests and len(s3.objects) == 500
+    assert db.query(StorageTombstone).count() == 500
+
+    swept = asyncio.run(sweep_storage(db))
+    assert swept == {"claimed": 500, "deleted": 500, "kept": 0, "failed": 0}
+    assert s3.requests == {"delete_objects": 1}
+    assert not s3.objects
+    assert db.query(StorageTombstone).count() == 0
+
+
+def test_failed_deletes_are_retried_with_backoff(monkeypatch, tmp_path):
+    broken = BrokenStorage(tmp_path)
+    monkeypatch.setattr(storage_service, "storage", broken)
+    db = make_db()
+    (tmp_path / "documents").mkdir()
+    (tmp_path / "documents/a.pdf").write_bytes(b"x")
+    db.add(Document(file_name="a.pdf", file_url="", storage_key="documents/a.pdf"))
+    db.commit()
+    asyncio.run(delete_documents(db, [1]))
+
+    assert asyncio.run(sweep_storage(db))["failed"] == 1
+    tombstone = db.query(StorageTombstone).one()
+    db.refresh(tombstone)
+    assert tombstone.attempts == 1 and tombstone.last_error == "timeout"
+    assert tombstone.next_attempt_at > datetime.utcnow()
+    # Todavía no vence el reintento
+    assert asyncio.run(sweep_storage(db))["claimed"] == 0
+
+    tombstone.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    monkeypatch.setattr(storage_service, "storage", LocalStorage(tmp_path))
+    assert asyncio.run(sweep_storage(db))["deleted"] == 1
+    assert not (tmp_path / "documents/a.pdf").exists()
+    assert db.query(StorageTombstone).count() == 0
+
+
+def test_sweeper_keeps_files_that_are_referenced_again(monkeypatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(storage_service, "storage", make_storage(s3))
+    db = make_db()
+    s3.objects["documents/a.pdf"] = b"x"
+    db.add(StorageTombstone(storage_key="documents/a.pdf"))
+    db.add(Document(file_name="a.pdf", file_url="", storage_key="documents/a.pdf"))
+    db.commit()
+
+    assert asyncio.run(sweep_storage(db))["kept"] == 1
+    assert "documents/a.pdf" in s3.objects and not s3.requests
+    assert db.query(StorageTombstone).count() == 0
+
+
+def test_delete_provider_marks_its_documents(monkeypatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(storage_service, "storage", make_storage(s3))
+    db = make_db()
+    provider = Provider(name="Acme", email="acme@example.com")
+    db.add(provider)
+    db.commit()
+    for n in range(3):
+        key = f"documents/contrato-{n}.pdf"
+        s3.objects[key] = b"x"
+        db.add(
+            ProviderDocument(
+                provider_id=provider.id, file_name=key, file_url="", storage_key=key
+            )
+        )
+    db.commit()
+
+    assert delete_provider(db, provider.id)
+    assert db.query(ProviderDocument).count() == 0
+    assert db.query(StorageTombstone).count() == 3
+    asyncio.run(sweep_storage(db))
+    assert not s3.objects and s3.requests == {"delete_objects": 1}
+
+
+def test_reconcile_marks_old_orphans_and_drops_stale_uploads(monkeypatch, tmp_path):
+    storage = LocalStorage(tmp_path)
+    monkeypatch.setattr(storage_service, "storage", storage)
+    db = make_db()
+    (tmp_path / "documents").mkdir()
+    old = time.time() - 2 * 3600
+    for name in ("usado.pdf", "huerfano.pdf", "nuevo.pdf", "subiendo.pdf"):
+        path = tmp_path / "documents" / name
+        path.write_bytes(b"x")
+        if name != "nuevo.pdf":
+            os.utime(path, (old, old))
+    db.add(Document(file_name="u", file_url="", storage_key="documents/usado.pdf"))
+
+    upload_id = asyncio.run(storage.create_multipart_upload("documents/viejo.pdf"))
+    stale = DocumentUpload(
+        id="a" * 32,
+        upload_id=upload_id,
+        storage_key="documents/viejo.pdf",
+        file_name="viejo.pdf",
+        created_at=datetime.utcnow() - timedelta(days=2),
+    )
+    active = DocumentUpload(
+        id="b" * 32,
+        upload_id="x",
+        storage_key="documents/subiendo.pdf",
+        file_name="subiendo.pdf",
+    )
+    db.add_all([stale, active])
+    db.commit()
+
+    result = asyncio.run(reconcile_storage(db))
+    assert result == {"scanned": 4, "orphans": 1, "stale_uploads": 1}
+    assert [t.storage_key for t in db.query(StorageTombstone)] == [
+        "documents/huerfano.pdf"
+    ]
+    assert [u.id for u in db.query(DocumentUpload)] == ["b" * 32]
+    assert not (tmp_path / ".uploads" / upload_id).exists()
+
+    # Una segunda pasada no duplica los tombstones
+    assert asyncio.run(reconcile_storage(db))["orphans"] == 0
+    asyncio.run(sweep_storage(db))
+    assert sorted(p.name for p in (tmp_path / "documents").iterdir()) == [
+        "nuevo.pdf",
+        "subiendo.pdf",
+        "usado.pdf",
+    ]
+
+
+def test_reconcile_lists_s3_in_pages(monkeypatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(storage_service, "storage", make_storage(s3))
+    db = make_db()
+    for n in range(2500):
+        s3.objects[f"documents/{n:05d}.pdf"] = b"x"
+    s3.objects["otros/a.txt"] = b"x"
+
+    result = asyncio.run(reconcile_storage(db))
+    assert result["scanned"] == 2500 and result["orphans"] == 2500
+    assert s3.requests["list_objects"] == 3
+    asyncio.run(sweep_storage(db, limit=5000))
+    assert list(s3.objects) == ["otros/a.txt"]
+    assert s3.requests["delete_objects"] == 3
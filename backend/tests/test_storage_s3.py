@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.models.document import Document
+from app.routes.documents import router
+from app.services import storage as storage_service
+from app.services.storage import StorageError
+from app.services.storage_gc import sweep_storage
+from app.services.storage_s3 import S3Storage
+from benchmarks.fake_s3 import FakeS3, make_storage
+from tests.helpers import index_in_session, make_db
+
+
+async def _chunks(content: bytes, size: int = 1000):
+    for start in range(0, len(content), size):
+        yield content[start : start + size]
+
+
+def test_multipart_upload_and_ranged_download(tmp_path):
+    s3 = FakeS3()
+    storage = make_storage(s3, part_size=4096, concurrency=3)
+    content = bytes(range(256)) * 100  # 25600 bytes: 7 partes
+    key = "documents/año 2024/factura.pdf"
+
+    async def run():
+        stored = await storage.upload_stream(key, _chunks(content))
+        size = await storage.download_file(key, tmp_path / "copia.pdf")
+        streamed = b"".join([chunk async for chunk in storage.iter_object(key)])
+        await storage.close()
+        return stored, size, streamed
+
+    stored, size, streamed = asyncio.run(run())
+    assert stored == {
+        "key": key,
+        "size": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+    assert s3.objects[key] == content
+    assert s3.requests["upload_part"] == 7 and s3.requests["put_object"] == 0
+    assert size == len(content)
+    assert (tmp_path / "copia.pdf").read_bytes() == content
+    assert streamed == content
+    assert not s3.uploads
+
+
+def test_small_upload_is_a_single_put():
+    s3 = FakeS3()
+    storage = make_storage(s3, part_size=4096)
+    asyncio.run(storage.upload_stream("documents/a.txt", _chunks(b"hola")))
+    assert s3.objects["documents/a.txt"] == b"hola"
+    assert s3.requests == {"put_object": 1}
+
+
+def test_bad_credentials_are_rejected():
+    s3 = FakeS3()
+    storage = S3Storage(
+        "http://s3.local",
+        "finup",
+        "minio",
+        "otra-clave",
+        transport=httpx.ASGITransport(s3),
+    )
+    with pytest.raises(StorageError, match="SignatureDoesNotMatch"):
+        asyncio.run(storage.upload_stream("documents/a.txt", _chunks(b"hola")))
+    assert not s3.objects
+
+
+def test_batch_delete_sweeps_with_one_request_per_thousand_keys(monkeypatch):
+    s3 = FakeS3()
+    storage = make_storage(s3)
+    monkeypatch.setattr(storage_service, "storage", storage)
+    db = make_db()
+    for n in range(1000):
+        key = f"documents/{n}.pdf"
+        s3.objects[key] = b"x"
+        db.add(
+            Document(
+                file_name=f"{n}.pdf", file_url="", file_type="pdf", storage_key=key
+            )
+        )
+    db.commit()
+    s3.objects["documents/otro.pdf"] = b"x"
+
+    app = FastAPI()
+    app.include_router(router, prefix="/documents")
+    app.dependency_overrides[get_db] = lambda: db
+    ids = [doc.id for doc in db.query(Document).all()]
+    response = TestClient(app).post(
+        "/documents/batch-delete", json={"ids": ids + [99999]}
+    )
+
+    assert response.json() == {"deleted": 1000, "not_found": [99999]}
+    assert not s3.requests
+    asyncio.run(sweep_storage(db))
+    assert s3.requests == {"delete_objects": 1}
+    assert list(s3.objects) == ["documents/otro.pdf"]
+    assert db.query(Document).count() == 0
+
+
+def test_resumable_upload_through_routes(monkeypatch):
+    s3 = FakeS3()
+    storage = make_storage(s3)
+    monkeypatch.setattr(storage_service, "storage", storage)
+    db = make_db()
+    index_in_session(monkeypatch, db)
+    app = FastAPI()
+    app.include_router(router, prefix="/documents")
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    upload = client.post("/documents/uploads", json={"file_name": "informe.pdf"}).json()
+    url = f"/documents/uploads/{upload['upload_id']}"
+    client.put(f"{url}/parts/2", content=b"mundo")
+    client.put(f"{url}/parts/1", content=b"hola ")
+    assert [p["part_number"] for p in client.get(url).json()["parts"]] == [1, 2]
+
+    body = client.post(f"{url}/complete").json()
+    assert s3.objects[body["storage_key"]] == b"hola mundo"
+    assert body["file_size"] == 10 and body["sha256"] is None
+    assert client.get(url).status_code == 404